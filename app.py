@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
@@ -24,14 +26,21 @@ class SpanEnrichingProcessor(SpanProcessor):
         for key, value in custom_dimensions.items():
             span.set_attribute(key, value)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Close the pooled HTTP session of the web content fetches on shutdown
+    await app.state.global_manager.web_content_fetcher.close()
+
 # Function to create the FastAPI application
 def create_app():
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
     # Load environment variables
     load_dotenv()
 
     global_manager = GlobalManager(app=app)
+    app.state.global_manager = global_manager
 
     # Instrument the FastAPI application
     FastAPIInstrumentor.instrument_app(app)
@@ -64,6 +73,15 @@ async def health_check():
 async def health_ping():
     return "pong"
 
+@app.get("/health/genai")
+async def health_genai():
+    return app.state.global_manager.genai_interactions_text_dispatcher.get_deployments_health()
+
+@app.get("/health/genai/usage")
+async def health_genai_usage(group_by: str = "model,channel,action_type"):
+    group_keys = [key.strip() for key in group_by.split(",") if key.strip()]
+    return app.state.global_manager.genai_interactions_text_dispatcher.get_token_usage(group_keys)
+
 @app.exception_handler(Exception)
 async def unhandled_exception_handler(request: Request, exc: Exception):
     return JSONResponse(
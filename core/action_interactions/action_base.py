@@ -7,6 +7,15 @@ from core.user_interactions.incoming_notification_data_base import (
 
 
 class ActionBase(ABC):
+    # True when the action can run concurrently with the other parallel-safe actions of the same response: it does
+    # not depend on their side effects and the order of its output does not matter. The other actions run alone,
+    # in the order of the response.
+    parallel_safe: bool = False
+    # True when the follow-up turn the action triggers with its results can be sent back to the model together with
+    # the follow-ups of the other actions of the response. The other actions trigger their follow-ups directly, for
+    # example when each one depends on the answer to the previous one.
+    batch_follow_up: bool = False
+
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
         super().__init__()
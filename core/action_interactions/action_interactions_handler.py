@@ -1,11 +1,20 @@
+import asyncio
 from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 
 from core.action_interactions.action_base import ActionBase
 from core.action_interactions.action_input import ActionInput
+from core.action_interactions.follow_up_batch import (
+    FollowUpBatch,
+    batch_follow_ups,
+    collect_follow_ups,
+)
+from core.genai_interactions import token_accounting
 from core.genai_interactions.genai_response import GenAIResponse
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
+from core.user_interactions.message_type import MessageType
 from core.user_interactions.user_interactions_dispatcher import (
     UserInteractionsDispatcher,
 )
@@ -23,15 +32,20 @@ class ActionInteractionsHandler:
         self.logger = global_manager.logger
         self.im_dispatcher: UserInteractionsDispatcher = self.global_manager.user_interactions_dispatcher
         self.available_actions = {}
+        # Completions saved by batching the follow-ups of the actions, per conversation
+        self.saved_completions: Dict[str, int] = defaultdict(int)
 
-    async def handle_action(self, action, event):
+    async def handle_action(self, action, event, action_plugin: Optional[ActionBase] = None):
         action_input = ActionInput(action_name=action.ActionName, parameters=action.Parameters)
-        action_plugin: ActionBase = self.global_manager.get_action(action.ActionName)
+        action_plugin = action_plugin or self.global_manager.get_action(action.ActionName)
 
         if action_plugin is not None:
             try:
                 self.logger.info(f'calling execute on action: [{action.ActionName}]')
-                result = await action_plugin.execute(action_input, event=event)
+                # Les complétions générées par l'action lui sont comptabilisées
+                batch_follow_up = getattr(action_plugin, "batch_follow_up", False) is True
+                with token_accounting.action_type(action.ActionName), batch_follow_ups(batch_follow_up):
+                    result = await action_plugin.execute(action_input, event=event)
                 return result
             except Exception as e:
                 self.logger.error(f"An error occurred while executing the action {action.ActionName}: {e}")
@@ -49,16 +63,65 @@ class ActionInteractionsHandler:
         for action in genai_response.response:
             actions_by_type[action.ActionName].append(action)
 
-        # Process ObservationThought actions first
-        for action in actions_by_type['ObservationThought']:
-            await self.handle_action(action, event)
+        # ObservationThought actions first, then UserInteraction actions, then the remaining actions
+        actions = actions_by_type.pop('ObservationThought', []) + actions_by_type.pop('UserInteraction', [])
+        for remaining_actions in actions_by_type.values():
+            actions.extend(remaining_actions)
+
+        with collect_follow_ups() as follow_ups:
+            results = await self.run_actions(actions, event)
+        await self.send_follow_ups(follow_ups, event)
+        return results
+
+    async def send_follow_ups(self, follow_ups: FollowUpBatch, event: IncomingNotificationDataBase):
+        """
+        Sends the follow-up turns requested by the actions, one per conversation, and reports the completions saved.
+        """
+        for key, saved in follow_ups.saved_completions().items():
+            self.saved_completions[key] += saved
+            message = (f"Results of {saved + 1} actions sent back in a single turn, {saved} completions saved "
+                       f"({self.saved_completions[key]} in this conversation)")
+            self.logger.info(f"{key}: {message}")
+            await self.im_dispatcher.send_message(event=event, message=message, message_type=MessageType.COMMENT,
+                                                  is_internal=True)
+
+        with batch_follow_ups(False):
+            for follow_up_event in follow_ups.merge().values():
+                await self.global_manager.genai_interactions_text_dispatcher.trigger_genai(event=follow_up_event)
+
+    def schedule(self, actions) -> List[List[Tuple]]:
+        """
+        Splits the actions into stages run one after the other, each action paired with its plugin.
+        A side-effect ordered action is a stage of its own, consecutive parallel-safe actions share a stage.
+        """
+        stages = []
+        parallel_stage = False
+        for action in actions:
+            action_plugin = self.global_manager.get_action(action.ActionName)
+            parallel_safe = getattr(action_plugin, "parallel_safe", False) is True
+            if parallel_safe and parallel_stage:
+                stages[-1].append((action, action_plugin))
+            else:
+                stages.append([(action, action_plugin)])
+            parallel_stage = parallel_safe
+        return stages
+
+    async def run_actions(self, actions, event: IncomingNotificationDataBase) -> list:
+        """
+        Runs the actions stage by stage, the actions of a stage concurrently with at most ACTION_MAX_PARALLEL
+        running at once. The results are returned in the order of the actions.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.global_manager.bot_config.ACTION_MAX_PARALLEL))
 
-        # Then process UserInteraction actions
-        for action in actions_by_type['UserInteraction']:
-            await self.handle_action(action, event)
+        async def run_action(action, action_plugin):
+            async with semaphore:
+                return await self.handle_action(action, event, action_plugin=action_plugin)
 
-        # Process remaining actions
-        for action_type, actions in actions_by_type.items():
-            if action_type not in ['ObservationThought', 'UserInteraction']:
-                for action in actions:
-                    await self.handle_action(action, event)
+        results = []
+        for stage in self.schedule(actions):
+            if len(stage) > 1:
+                self.logger.info(f"Running {len(stage)} actions concurrently: "
+                                 f"{', '.join(action.ActionName for action, _ in stage)}")
+            results.extend(await asyncio.gather(*(run_action(action, action_plugin)
+                                                  for action, action_plugin in stage)))
+        return results
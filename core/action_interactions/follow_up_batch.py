@@ -0,0 +1,104 @@
+import contextvars
+import copy
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+# Separates the results of the actions in a batched follow-up turn
+FOLLOW_UP_SEPARATOR = "\n\n"
+
+_current_batch: contextvars.ContextVar = contextvars.ContextVar("follow_up_batch", default=None)
+_batching_enabled: contextvars.ContextVar = contextvars.ContextVar("follow_up_batching", default=False)
+
+
+class FollowUpBatch:
+    """
+    Follow-up turns requested by the actions of one response, through trigger_genai, while they run. They are sent
+    back to the model once all the actions are done, as a single turn per conversation, instead of one full-context
+    completion per action.
+    """
+
+    def __init__(self):
+        self.events: List[IncomingNotificationDataBase] = []
+        self.closed = False
+
+    def add(self, event: IncomingNotificationDataBase) -> bool:
+        """
+        Returns False once the batch is closed, for example for a task started by an action that outlives it:
+        the follow-up must then be triggered right away.
+        """
+        if self.closed:
+            return False
+        self.events.append(event)
+        return True
+
+    @staticmethod
+    def conversation_key(event: IncomingNotificationDataBase) -> str:
+        return f"{event.channel_id}-{event.thread_id or event.timestamp}"
+
+    def merge(self) -> Dict[str, IncomingNotificationDataBase]:
+        """
+        Returns the follow-up event of each conversation, the results of its actions joined in the order they came.
+        """
+        groups: Dict[str, List[IncomingNotificationDataBase]] = {}
+        for event in self.events:
+            groups.setdefault(self.conversation_key(event), []).append(event)
+
+        merged = {}
+        for key, events in groups.items():
+            if len(events) == 1:
+                merged[key] = events[0]
+                continue
+            follow_up_event = copy.deepcopy(events[0])
+            follow_up_event.text = FOLLOW_UP_SEPARATOR.join(event.text for event in events if event.text)
+            follow_up_event.images = [image for event in events for image in event.images or []]
+            follow_up_event.files_content = [content for event in events for content in event.files_content or []]
+            merged[key] = follow_up_event
+        return merged
+
+    def saved_completions(self) -> Dict[str, int]:
+        """
+        Number of completions saved by the batching, per conversation.
+        """
+        counts: Dict[str, int] = {}
+        for event in self.events:
+            key = self.conversation_key(event)
+            counts[key] = counts.get(key, -1) + 1
+        return {key: count for key, count in counts.items() if count > 0}
+
+
+def current_follow_up_batch() -> Optional[FollowUpBatch]:
+    """
+    Returns the batch the follow-ups triggered here go into, None outside of an action that batches its follow-ups.
+    """
+    return _current_batch.get() if _batching_enabled.get() else None
+
+
+@contextmanager
+def collect_follow_ups():
+    """
+    Collects the follow-up turns triggered inside the block, including by the tasks it starts.
+    """
+    batch = FollowUpBatch()
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        batch.closed = True
+        _current_batch.reset(token)
+
+
+@contextmanager
+def batch_follow_ups(enabled: bool):
+    """
+    Sets whether the follow-ups triggered inside the block, including by the tasks it starts, go into the current
+    batch. An action whose follow-ups depend on each other triggers them directly.
+    """
+    token = _batching_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _batching_enabled.reset(token)
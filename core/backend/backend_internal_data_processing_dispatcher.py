@@ -115,6 +115,21 @@ class BackendInternalDataProcessingDispatcher(InternalDataProcessingBase):
         plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
         return plugin.chainofthoughts
 
+    @property
+    def responses_cache(self, plugin_name=None):
+        plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
+        return plugin.responses_cache
+
+    @property
+    def image_descriptions(self, plugin_name=None):
+        plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
+        return plugin.image_descriptions
+
+    @property
+    def generated_images(self, plugin_name=None):
+        plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
+        return plugin.generated_images
+
     async def read_data_content(self, data_container, data_file, plugin_name=None):
         plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
         return await plugin.read_data_content(data_container=data_container, data_file=data_file)
@@ -129,6 +129,38 @@ class BackendInternalQueueProcessingDispatcher(InternalQueueProcessingBase):
         self.logger.debug(f"Getting next message for channel '{channel_id}', thread '{thread_id}' with current message_id '{current_message_id}' through {plugin.plugin_name}.")  
         return await plugin.get_next_message(data_container=data_container, channel_id=channel_id, thread_id=thread_id, current_message_id=current_message_id)  
   
+    async def enqueue_many(self, data_container: str, channel_id: str, thread_id: str, messages: List[Tuple[str, str]], guid: Optional[str] = None, plugin_name: Optional[str] = None) -> None:  
+        """  
+        Adds several (message_id, message) pairs to the queue of a `channel_id` and `thread_id`.  
+        """  
+        plugin = self.get_plugin(plugin_name)  
+        self.logger.debug(f"Enqueuing {len(messages)} messages for channel '{channel_id}', thread '{thread_id}' through {plugin.plugin_name}.")  
+        await plugin.enqueue_many(data_container=data_container, channel_id=channel_id, thread_id=thread_id, messages=messages, guid=guid)  
+  
+    async def dequeue_many(self, data_container: str, channel_id: str, thread_id: str, message_ids: List[str], guid: str, plugin_name: Optional[str] = None) -> None:  
+        """  
+        Removes several messages from the queue of a `channel_id` and `thread_id`.  
+        """  
+        plugin = self.get_plugin(plugin_name)  
+        self.logger.debug(f"Dequeuing {len(message_ids)} messages for channel '{channel_id}', thread '{thread_id}' through {plugin.plugin_name}.")  
+        await plugin.dequeue_many(data_container=data_container, channel_id=channel_id, thread_id=thread_id, message_ids=message_ids, guid=guid)  
+  
+    async def drain(self, data_container: str, channel_id: str, thread_id: str, limit: Optional[int] = None, after_message_id: Optional[str] = None, plugin_name: Optional[str] = None) -> List[Tuple[str, str]]:  
+        """  
+        Removes and returns the oldest messages of a `channel_id` and `thread_id` as (message_id, message_content) pairs.  
+        """  
+        plugin = self.get_plugin(plugin_name)  
+        self.logger.debug(f"Draining up to {limit} messages for channel '{channel_id}', thread '{thread_id}' after '{after_message_id}' through {plugin.plugin_name}.")  
+        return await plugin.drain(data_container=data_container, channel_id=channel_id, thread_id=thread_id, limit=limit, after_message_id=after_message_id)  
+  
+    async def peek_count(self, data_container: str, channel_id: str, thread_id: str, plugin_name: Optional[str] = None) -> int:  
+        """  
+        Returns the number of messages waiting for a `channel_id` and `thread_id`.  
+        """  
+        plugin = self.get_plugin(plugin_name)  
+        self.logger.debug(f"Counting messages for channel '{channel_id}', thread '{thread_id}' through {plugin.plugin_name}.")  
+        return await plugin.peek_count(data_container=data_container, channel_id=channel_id, thread_id=thread_id)  
+  
     async def has_older_messages(self, data_container: str, channel_id: str, thread_id: str, current_message_id: str, plugin_name: Optional[str] = None) -> bool:  
         """  
         Checks if there are any older messages waiting in the queue for the given channel and thread.  
@@ -15,6 +15,10 @@ class EnrichedSession(SessionBase):
         self.total_time_ms = 0.0  # Initialize total_time_ms to track session duration
         self.messages: List[Dict] = []  # List of all messages in the session
         self.end_time: Optional[str] = None  # Initialize end_time
+        # Rolling summary of the oldest messages: text, number of messages folded after the system prompt, update time
+        self.summary: Optional[Dict] = None
+        # Assistant thread holding the conversation in assistant mode: thread id, assistant id, update time
+        self.assistant_thread: Optional[Dict] = None
 
     def end_session(self) -> None:
         """
@@ -63,7 +67,7 @@ class EnrichedSession(SessionBase):
         """
         Converts the session into a dictionary for export or storage.
         """
-        return {
+        session_dict = {
             "session_id": self.session_id,
             "start_time": self.start_time,
             "end_time": self.end_time,
@@ -71,6 +75,11 @@ class EnrichedSession(SessionBase):
             "total_cost": self.total_cost,
             "messages": self.messages  # Include messages in the session export with embedded user interactions
         }
+        if self.summary is not None:
+            session_dict["summary"] = self.summary
+        if self.assistant_thread is not None:
+            session_dict["assistant_thread"] = self.assistant_thread
+        return session_dict
 
     @classmethod
     def from_dict(cls, session_data: dict) -> 'EnrichedSession':
@@ -80,6 +89,8 @@ class EnrichedSession(SessionBase):
         messages = session_data.get("messages", [])
         total_time_ms = session_data.get("total_time_ms", 0.0)
         end_time = session_data.get("end_time", None)
+        summary = session_data.get("summary", None)
+        assistant_thread = session_data.get("assistant_thread", None)
 
         # Initialize the session
         enriched_session = cls(session_id, start_time)
@@ -87,5 +98,7 @@ class EnrichedSession(SessionBase):
         enriched_session.messages = messages  # Messages include user interactions per assistant message
         enriched_session.total_time_ms = total_time_ms
         enriched_session.end_time = end_time
+        enriched_session.summary = summary
+        enriched_session.assistant_thread = assistant_thread
 
         return enriched_session
@@ -96,6 +96,30 @@ class InternalDataProcessingBase(InternalDataPluginBase):
         """
         raise NotImplementedError
 
+    @property
+    @abstractmethod
+    def responses_cache(self):
+        """
+        Property for the GenAI responses cache data.
+        """
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def image_descriptions(self):
+        """
+        Property for the cached image descriptions data.
+        """
+        raise NotImplementedError
+
+    @property
+    @abstractmethod
+    def generated_images(self):
+        """
+        Property for the cached generated images data.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def append_data(self, container_name: str, data_identifier: str, data: str) -> None:
         """
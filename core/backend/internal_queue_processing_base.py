@@ -97,6 +97,44 @@ class InternalQueueProcessingBase(InternalDataPluginBase):
         """
         raise NotImplementedError
 
+    async def enqueue_many(self, data_container: str, channel_id: str, thread_id: str,
+                           messages: List[Tuple[str, str]], guid: Optional[str] = None) -> None:
+        """
+        Adds several (message_id, message) pairs to the queue of a given channel and thread.
+        Plugins should override this to write the batch efficiently, the default enqueues one by one.
+        """
+        for message_id, message in messages:
+            await self.enqueue_message(data_container=data_container, channel_id=channel_id, thread_id=thread_id,
+                                       message_id=message_id, message=message, guid=guid)
+
+    async def dequeue_many(self, data_container: str, channel_id: str, thread_id: str, message_ids: List[str],
+                           guid: str) -> None:
+        """
+        Removes several messages from the queue of a given channel and thread.
+        Plugins should override this to delete the batch efficiently, the default dequeues one by one.
+        """
+        for message_id in message_ids:
+            await self.dequeue_message(data_container=data_container, channel_id=channel_id, thread_id=thread_id,
+                                       message_id=message_id, guid=guid)
+
+    @abstractmethod
+    async def drain(self, data_container: str, channel_id: str, thread_id: str, limit: Optional[int] = None,
+                    after_message_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Removes and returns the oldest messages of a given channel and thread, as (message_id, message) pairs
+        sorted by message_id. At most `limit` messages are returned, only those newer than `after_message_id` if set.
+        Each message is returned to a single consumer, and is removed before being processed: a consumer stopping
+        before processing the drained messages loses them.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def peek_count(self, data_container: str, channel_id: str, thread_id: str) -> int:
+        """
+        Returns the number of messages waiting in the queue for a given channel and thread, without reading them.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def has_older_messages(self, data_container: str, channel_id: str, thread_id: str,
                                  current_message_id: str) -> bool:
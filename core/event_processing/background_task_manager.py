@@ -0,0 +1,61 @@
+import asyncio
+import traceback
+from typing import Coroutine, Optional, Set
+
+
+class BackgroundTaskManager:
+    """
+    Keeps a strong reference to fire-and-forget tasks so they are not garbage collected,
+    logs their failures and bounds how many of them can be pending at once.
+    When the limit is reached, schedule() refuses the work so the caller can apply backpressure.
+    """
+
+    def __init__(self, logger, max_pending_tasks: int, name: str = "background"):
+        self.logger = logger
+        self.max_pending_tasks = max_pending_tasks
+        self.name = name
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._tasks)
+
+    def has_capacity(self) -> bool:
+        return self.max_pending_tasks <= 0 or len(self._tasks) < self.max_pending_tasks
+
+    def schedule(self, coro: Coroutine, name: Optional[str] = None) -> bool:
+        """
+        Starts the coroutine as a tracked task. Returns False (and closes the coroutine)
+        when the pending task limit is reached.
+        """
+        if not self.has_capacity():
+            coro.close()
+            self.logger.warning(
+                f"[{self.name}] {len(self._tasks)} tasks pending (limit {self.max_pending_tasks}), rejecting new task")
+            return False
+
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return True
+
+    def _on_task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        exception = task.exception()
+        if exception is not None:
+            formatted = ''.join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+            self.logger.error(f"[{self.name}] Background task {task.get_name()} failed: {exception}\n{formatted}")
+
+    async def wait_until_idle(self):
+        """
+        Waits for every task pending at call time, including the ones they schedule meanwhile.
+        """
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def cancel_all(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await self.wait_until_idle()
@@ -0,0 +1,45 @@
+import time
+from collections import OrderedDict
+
+
+class EventDeduplicator:
+    """
+    In-memory window of recently seen event identifiers.
+    Used to drop platform retries before any storage I/O is done.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, key: str) -> bool:
+        self._evict_expired(time.monotonic())
+        return key in self._seen
+
+    def is_duplicate(self, key: str) -> bool:
+        """
+        Returns True if the key was registered within the window, otherwise registers it and returns False.
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+        if key in self._seen:
+            return True
+        self._seen[key] = now
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, key: str):
+        self._seen.pop(key, None)
+
+    def _evict_expired(self, now: float):
+        # Entries are kept in insertion order, so expired ones are always at the front
+        while self._seen:
+            key, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.ttl_seconds:
+                break
+            self._seen.popitem(last=False)
@@ -0,0 +1,87 @@
+from typing import List, Tuple
+
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+
+class MessageCoalescer:
+    """
+    Merges bursts of consecutive messages sent by the same user in a thread into a single event,
+    so that they are answered with one completion instead of one completion per message.
+    Keeps track of the LLM calls saved and of an estimate of the prompt tokens they would have used.
+    """
+
+    def __init__(self, logger, window_seconds: float):
+        self.logger = logger
+        self.window_seconds = window_seconds
+        self.llm_calls_saved = 0
+        self.tokens_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    @staticmethod
+    def can_merge(first: IncomingNotificationDataBase, other: IncomingNotificationDataBase) -> bool:
+        return (bool(first.user_id)
+                and first.user_id == other.user_id
+                and first.channel_id == other.channel_id
+                and first.thread_id == other.thread_id)
+
+    def split_burst(self, event: IncomingNotificationDataBase, pending: List[IncomingNotificationDataBase]) -> Tuple[
+        List[IncomingNotificationDataBase], List[IncomingNotificationDataBase]]:
+        """
+        Splits the pending messages into the burst that directly follows the event (same user, same thread)
+        and the remaining messages, which must be processed separately.
+        """
+        burst_size = 0
+        for pending_event in pending:
+            if not self.can_merge(event, pending_event):
+                break
+            burst_size += 1
+        return pending[:burst_size], pending[burst_size:]
+
+    def group(self, events: List[IncomingNotificationDataBase]) -> List[List[IncomingNotificationDataBase]]:
+        """
+        Groups consecutive messages of the same user, keeping the order of the messages.
+        """
+        groups: List[List[IncomingNotificationDataBase]] = []
+        for event in events:
+            if groups and self.can_merge(groups[-1][0], event):
+                groups[-1].append(event)
+            else:
+                groups.append([event])
+        return groups
+
+    @staticmethod
+    def merge(events: List[IncomingNotificationDataBase]) -> IncomingNotificationDataBase:
+        """
+        Builds a single event from the messages of a burst. The merged event keeps the identity (timestamp,
+        label, raw data) of the first message, the texts are joined and the attachments concatenated.
+        """
+        first = events[0]
+        if len(events) == 1:
+            return first
+
+        merged = IncomingNotificationDataBase.from_dict(first.to_dict())
+        merged.text = "\n".join(event.text for event in events if event.text)
+        merged.is_mention = any(event.is_mention for event in events)
+        merged.images = [image for event in events for image in event.images]
+        merged.files_content = [content for event in events for content in event.files_content]
+        return merged
+
+    def record_savings(self, merged_count: int, prompt_tokens: int):
+        """
+        Records that merged_count messages were answered with a single completion. Each avoided call
+        would have sent at least the session history, estimated to prompt_tokens.
+        """
+        if merged_count < 2:
+            return
+        calls_saved = merged_count - 1
+        self.llm_calls_saved += calls_saved
+        self.tokens_saved += calls_saved * prompt_tokens
+        self.logger.info(
+            f"Coalesced {merged_count} messages into a single turn, saving {calls_saved} LLM calls and "
+            f"~{calls_saved * prompt_tokens} prompt tokens (total saved: {self.llm_calls_saved} calls, "
+            f"~{self.tokens_saved} tokens)")
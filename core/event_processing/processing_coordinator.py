@@ -0,0 +1,186 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import suppress
+from typing import Coroutine, Dict, Optional, Set
+
+from core.event_processing.event_deduplicator import EventDeduplicator
+
+
+class ProcessingAborted(Exception):
+    """
+    Raised when a cancellable operation is interrupted because its thread has been aborted.
+    """
+
+    def __init__(self, channel_id, thread_id):
+        super().__init__(f"Processing aborted for channel {channel_id}, thread {thread_id}")
+        self.channel_id = channel_id
+        self.thread_id = thread_id
+
+
+class ProcessingStateStore(ABC):
+    """
+    Persistence for the abort flags, so that a thread stopped with the BREAK keyword stays stopped after a restart.
+    """
+
+    @abstractmethod
+    async def read_abort_flag(self, key: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def write_abort_flag(self, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def remove_abort_flag(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class BackendProcessingStateStore(ProcessingStateStore):
+    """
+    Stores the abort flags as files in the abort container of the internal data processing backend.
+    """
+
+    def __init__(self, global_manager):
+        self.global_manager = global_manager
+
+    @property
+    def backend(self):
+        return self.global_manager.backend_internal_data_processing_dispatcher
+
+    async def read_abort_flag(self, key: str) -> bool:
+        return bool(await self.backend.read_data_content(self.backend.abort, f"{key}.txt"))
+
+    async def write_abort_flag(self, key: str) -> None:
+        await self.backend.write_data_content(self.backend.abort, f"{key}.txt", data="abort")
+
+    async def remove_abort_flag(self, key: str) -> None:
+        await self.backend.remove_data_content(self.backend.abort, f"{key}.txt")
+
+
+class ProcessingCoordinator:
+    """
+    In-process coordination of the message processing:
+    - processing markers, claimed once per incoming message to discard duplicates,
+    - abort flags per (channel, thread), set by the BREAK keyword and cleared by START,
+    - cancellation tokens per (channel, thread), so that an abort interrupts the in-flight calls right away.
+    Abort flags are optionally persisted through a ProcessingStateStore and loaded lazily, once per thread.
+    """
+
+    def __init__(self, global_manager, store: Optional[ProcessingStateStore] = None):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        self.store = store
+        bot_config = global_manager.bot_config
+
+        self.max_known_threads = 10000
+        self._processing = EventDeduplicator(bot_config.PROCESSING_MARKER_TTL, max_entries=self.max_known_threads)
+        self._aborted: Set[str] = set()
+        # Threads whose abort flag has already been loaded from the store
+        self._loaded: "OrderedDict[str, None]" = OrderedDict()
+        self._tokens: Dict[str, asyncio.Event] = {}
+        self._token_users: Dict[str, int] = {}
+
+    @staticmethod
+    def make_key(channel_id, item_id) -> str:
+        return f"{str(channel_id).replace(':', '_')}-{item_id}"
+
+    def claim_processing(self, channel_id, message_id) -> bool:
+        """
+        Marks the message as being processed. Returns False if it was already claimed.
+        """
+        return not self._processing.is_duplicate(self.make_key(channel_id, message_id))
+
+    def is_processing(self, channel_id, message_id) -> bool:
+        return self.make_key(channel_id, message_id) in self._processing
+
+    async def abort(self, channel_id, thread_id):
+        """
+        Flags the thread as aborted and cancels every operation currently running for it.
+        """
+        key = self.make_key(channel_id, thread_id)
+        self._aborted.add(key)
+        self._mark_loaded(key)
+        token = self._tokens.pop(key, None)
+        if token is not None:
+            self.logger.info(f"Cancelling in-flight processing for {key}")
+            token.set()
+        if self.store is not None:
+            await self.store.write_abort_flag(key)
+
+    async def resume(self, channel_id, thread_id):
+        key = self.make_key(channel_id, thread_id)
+        self._aborted.discard(key)
+        self._mark_loaded(key)
+        if self.store is not None:
+            await self.store.remove_abort_flag(key)
+
+    async def is_aborted(self, channel_id, thread_id) -> bool:
+        key = self.make_key(channel_id, thread_id)
+        if key in self._aborted:
+            return True
+        if self.store is not None and key not in self._loaded:
+            try:
+                if await self.store.read_abort_flag(key):
+                    self._aborted.add(key)
+            except Exception as e:
+                self.logger.error(f"Error loading abort flag for {key}: {e}")
+                return False
+            self._mark_loaded(key)
+        return key in self._aborted
+
+    def get_cancellation_token(self, channel_id, thread_id) -> asyncio.Event:
+        """
+        Returns the token that is set when the thread is aborted. A new token is issued after each abort.
+        """
+        key = self.make_key(channel_id, thread_id)
+        token = self._tokens.get(key)
+        if token is None:
+            token = asyncio.Event()
+            self._tokens[key] = token
+        return token
+
+    async def run_cancellable(self, channel_id, thread_id, coro: Coroutine):
+        """
+        Runs the coroutine until it completes or the thread is aborted, in which case the
+        coroutine is cancelled and ProcessingAborted is raised.
+        """
+        key = self.make_key(channel_id, thread_id)
+        token = self.get_cancellation_token(channel_id, thread_id)
+        self._token_users[key] = self._token_users.get(key, 0) + 1
+        task = asyncio.ensure_future(coro)
+        waiter = asyncio.ensure_future(token.wait())
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            waiter.cancel()
+            self._release_token(key, token)
+
+        if task.done():
+            return task.result()
+
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        raise ProcessingAborted(channel_id, thread_id)
+
+    def _release_token(self, key: str, token: asyncio.Event):
+        users = self._token_users.get(key, 1) - 1
+        if users > 0:
+            self._token_users[key] = users
+            return
+        self._token_users.pop(key, None)
+        if self._tokens.get(key) is token:
+            del self._tokens[key]
+
+    def _mark_loaded(self, key: str):
+        self._loaded[key] = None
+        self._loaded.move_to_end(key)
+        while len(self._loaded) > self.max_known_threads:
+            evicted, _ = self._loaded.popitem(last=False)
+            # Evicted flags are reloaded from the store on the next check
+            if self.store is not None:
+                self._aborted.discard(evicted)
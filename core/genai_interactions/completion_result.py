@@ -0,0 +1,13 @@
+from typing import NamedTuple, Optional
+
+from core.genai_interactions.genai_cost_base import GenAICostBase
+
+
+class CompletionResult(NamedTuple):
+    """
+    Result of one completion: the text and the token usage of this call only. It is returned by generate_completion
+    instead of being kept on the plugin instance, which is shared by all the conversations, and unpacks as the
+    (completion, genai_cost_base) pair the callers use.
+    """
+    response: Optional[str]
+    cost: GenAICostBase
@@ -0,0 +1,198 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import List, Optional, Tuple
+
+# Ratio applied to the concurrency limit when the provider throttles (429, 503, timeout)
+THROTTLE_DECREASE = 0.5
+# Ratio applied to the concurrency limit when a request is slower than the latency threshold
+LATENCY_DECREASE = 0.9
+
+
+class RequestPriority(IntEnum):
+    """
+    Priority of a GenAI request waiting for a free slot, the lowest values are served first.
+    """
+    USER = 0
+    SUBPROMPT = 1
+    BACKGROUND = 2
+
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("genai_request_priority",
+                                                                  default=RequestPriority.USER)
+
+
+def current_priority() -> RequestPriority:
+    return _current_priority.get()
+
+
+@contextmanager
+def request_priority(priority: RequestPriority):
+    """
+    Sets the priority of the GenAI requests made inside the block, including the tasks it starts.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the concurrent requests sent to a deployment, with an AIMD limit:
+    - each successful request of a saturated limiter raises the limit by 1/limit, so about one request per window,
+    - a throttled request halves it, a request slower than the latency threshold reduces it by 10%.
+    The requests over the limit wait in a priority queue (user turns first, then subprompts, then background tasks).
+    """
+
+    def __init__(self, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 32,
+                 latency_threshold: float = 0.0):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.latency_threshold = latency_threshold
+        self.in_flight = 0
+        self.throttled = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Optional[RequestPriority] = None):
+        priority = current_priority() if priority is None else priority
+        if not self._waiters and self.in_flight < self.current_limit:
+            self.in_flight += 1
+            return
+
+        entry = (int(priority), next(self._sequence), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                # The slot was granted while the request was being cancelled
+                self.release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def release(self, latency: Optional[float] = None, throttled: bool = False):
+        saturated = self.in_flight >= self.current_limit
+        self.in_flight = max(self.in_flight - 1, 0)
+        if throttled:
+            self.throttled += 1
+            self.limit = max(self.min_limit, self.limit * THROTTLE_DECREASE)
+        elif latency is not None:
+            if self.latency_threshold and latency > self.latency_threshold:
+                self.limit = max(self.min_limit, self.limit * LATENCY_DECREASE)
+            elif saturated:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.current_limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def to_dict(self) -> dict:
+        return {
+            "concurrency_limit": self.current_limit,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "throttled": self.throttled
+        }
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised without calling the provider when the circuits of all its deployments are open.
+    """
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable, circuit open for {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+    @property
+    def user_message(self) -> str:
+        return (f"The AI service ({self.name}) is currently unavailable, "
+                f"please try again in {max(1, round(self.retry_in))} seconds.")
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a deployment failing repeatedly:
+    - closed: requests go through, failure_threshold consecutive failures open the circuit,
+    - open: requests fail fast for reset_timeout seconds,
+    - half open: a single probe request is let through, its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def available(self) -> bool:
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._probing)
+
+    @property
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.opened_at + self.reset_timeout - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """
+        Frees the probe slot of a half open circuit when the probe request was cancelled.
+        """
+        self._probing = False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self._probing or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
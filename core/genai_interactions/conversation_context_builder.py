@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional, Tuple
+
+from core.genai_interactions.token_counter import TokenCounter
+
+OMITTED_IMAGE_TEXT = "[Image shared earlier in the thread, omitted from the context]"
+
+
+class ContextMetrics:
+    def __init__(self, tokens_stored=0, tokens_sent=0, messages_stored=0, messages_sent=0, images_omitted=0,
+                 parts_truncated=0, over_budget=False):
+        self.tokens_stored = tokens_stored
+        self.tokens_sent = tokens_sent
+        self.messages_stored = messages_stored
+        self.messages_sent = messages_sent
+        self.images_omitted = images_omitted
+        self.parts_truncated = parts_truncated
+        self.over_budget = over_budget
+
+    def to_dict(self) -> dict:
+        return {
+            "tokens_stored": self.tokens_stored,
+            "tokens_sent": self.tokens_sent,
+            "messages_stored": self.messages_stored,
+            "messages_sent": self.messages_sent,
+            "images_omitted": self.images_omitted,
+            "parts_truncated": self.parts_truncated,
+            "over_budget": self.over_budget
+        }
+
+
+class ConversationContextBuilder:
+    """
+    Builds the messages sent to the model from the messages stored in the session, within a token budget:
+    - the system messages and the most recent messages are kept verbatim,
+    - older images are replaced by a short reference and large older text parts (action results,
+      file contents, long answers) are truncated,
+    - if the context is still over budget, the oldest messages are dropped.
+    The session itself is never modified.
+    Both the start of the recent window and the first message kept move by steps of recent_messages messages,
+    so the context sent for consecutive turns shares the same prefix, which the providers cache.
+    """
+
+    def __init__(self, logger, token_budget: int, recent_messages: int = 6, max_part_tokens: int = 2000,
+                 token_counter: Optional[TokenCounter] = None):
+        self.logger = logger
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.max_part_tokens = max_part_tokens
+        self.token_counter = token_counter or TokenCounter(logger)
+        self.total_tokens_stored = 0
+        self.total_tokens_sent = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.token_budget > 0
+
+    def build(self, messages: List[Dict], model_name: Optional[str] = None) -> Tuple[List[Dict], ContextMetrics]:
+        counter = self.token_counter
+        metrics = ContextMetrics(messages_stored=len(messages))
+        metrics.tokens_stored = counter.count_messages(messages, model_name)
+
+        system_count = 0
+        while system_count < len(messages) and messages[system_count].get("role") == "system":
+            system_count += 1
+        system_messages = list(messages[:system_count])
+        history = messages[system_count:]
+        step = max(self.recent_messages, 1)
+        recent_start = max(len(history) - self.recent_messages, 0) // step * step
+        older = [self.compact_message(message, metrics, model_name) for message in history[:recent_start]]
+        recent = list(history[recent_start:])
+
+        fixed_tokens = counter.count_messages(system_messages + recent, model_name)
+        older_tokens = [counter.count_message(message, model_name) for message in older]
+        # The oldest messages are dropped first, by steps
+        while older and fixed_tokens + sum(older_tokens) > self.token_budget:
+            del older[:step]
+            del older_tokens[:step]
+
+        if not older and fixed_tokens > self.token_budget:
+            # Even the recent messages do not fit: compact them too, except the last one
+            recent = [self.compact_message(message, metrics, model_name) for message in recent[:-1]] + recent[-1:]
+            fixed_tokens = counter.count_messages(system_messages + recent, model_name)
+            metrics.over_budget = fixed_tokens > self.token_budget
+
+        context = system_messages + older + recent
+        metrics.messages_sent = len(context)
+        metrics.tokens_sent = fixed_tokens + sum(older_tokens)
+        self.total_tokens_stored += metrics.tokens_stored
+        self.total_tokens_sent += metrics.tokens_sent
+
+        log = self.logger.warning if metrics.over_budget else self.logger.info
+        log(f"Context built: {metrics.tokens_sent} tokens sent for {metrics.tokens_stored} stored "
+            f"({metrics.messages_sent}/{metrics.messages_stored} messages, {metrics.images_omitted} images omitted, "
+            f"{metrics.parts_truncated} parts truncated, budget {self.token_budget})")
+        return context, metrics
+
+    def compact_message(self, message: Dict, metrics: ContextMetrics, model_name: Optional[str] = None) -> Dict:
+        """
+        Returns a copy of the message with its images replaced by a reference and its large text parts truncated.
+        """
+        content = message.get("content")
+        if isinstance(content, str):
+            text = self.truncate(content, metrics, model_name)
+            return message if text is content else {**message, "content": text}
+        if not isinstance(content, list):
+            return message
+
+        compacted = []
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "image_url":
+                metrics.images_omitted += 1
+                compacted.append({"type": "text", "text": OMITTED_IMAGE_TEXT})
+            elif isinstance(part, dict) and part.get("type") == "text":
+                text = self.truncate(part.get("text", ""), metrics, model_name)
+                compacted.append(part if text is part.get("text") else {**part, "text": text})
+            else:
+                compacted.append(part)
+        return {**message, "content": compacted}
+
+    def truncate(self, text: str, metrics: ContextMetrics, model_name: Optional[str] = None) -> str:
+        tokens = self.token_counter.count_text(text, model_name)
+        if tokens <= self.max_part_tokens:
+            return text
+        metrics.parts_truncated += 1
+        kept = self.token_counter.truncate_text(text, self.max_part_tokens, model_name)
+        return f"{kept}\n[... {tokens - self.max_part_tokens} tokens truncated from the context ...]"
@@ -0,0 +1,359 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from core.genai_interactions.concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying, on the same deployment after a delay or on another one
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+# HTTP status codes meaning that the deployment is overloaded, its concurrency limit is reduced
+OVERLOAD_STATUS_CODES = (429, 503)
+# Latency assumed for a deployment without any completed request yet, in seconds
+DEFAULT_LATENCY = 1.0
+# Weight of the last request in the moving average of the latency
+LATENCY_SMOOTHING = 0.3
+# Number of recent requests kept per deployment for the p95 latency and the health score
+STATS_WINDOW = 50
+# Cooldown of a deployment after a retryable failure without Retry-After, in seconds
+DEFAULT_COOLDOWN = 5.0
+
+
+class Deployment:
+    """
+    One endpoint / deployment of a model, with the client to call it and its recent statistics.
+    """
+
+    def __init__(self, name: str, client: Any = None, model_name: Optional[str] = None,
+                 vision_model_name: Optional[str] = None, weight: float = 1.0, settings: Optional[Dict] = None):
+        self.name = name
+        self.client = client
+        # Connection settings of the deployment, for the plugins creating their client on first use
+        self.settings = settings or {}
+        self.model_name = model_name
+        self.vision_model_name = vision_model_name
+        self.weight = weight if weight and weight > 0 else 1.0
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.latencies = deque(maxlen=STATS_WINDOW)
+        self.outcomes = deque(maxlen=STATS_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self.breaker = CircuitBreaker()
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    @property
+    def p95_latency(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+    @property
+    def health_score(self) -> float:
+        """
+        Share of the recent requests that succeeded, 0 while the deployment is cooling down.
+        """
+        if self.cooling_down:
+            return 0.0
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 1.0
+
+    def expected_latency(self, default: float) -> float:
+        latency = self.latency if self.latency is not None else default
+        return latency * (self.in_flight + 1) * (self.consecutive_failures + 1) / self.weight
+
+    def record_success(self, latency: float):
+        self.latency = latency if self.latency is None else (
+            LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency)
+        self.latencies.append(latency)
+        self.outcomes.append(1)
+        self.successes += 1
+        self.consecutive_failures = 0
+
+    def record_failure(self, cooldown: Optional[float]):
+        self.outcomes.append(0)
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + (DEFAULT_COOLDOWN if cooldown is None else cooldown))
+
+    def to_dict(self) -> dict:
+        p95_latency = self.p95_latency
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "health_score": round(self.health_score, 3),
+            "latency_ms": round(self.latency * 1000) if self.latency is not None else None,
+            "p95_latency_ms": round(p95_latency * 1000) if p95_latency is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "cooling_down": self.cooling_down,
+            "circuit": self.breaker.state,
+            **self.limiter.to_dict()
+        }
+
+
+class DeploymentRouter:
+    """
+    Spreads the calls of a plugin across its deployments and retries the failed ones.
+    - Each call goes to the available deployment with the lowest expected latency (moving average of its latency,
+      multiplied by its in-flight requests and recent failures, divided by its weight).
+    - Retryable failures (429, 5xx, timeouts, connection errors) put the deployment in cooldown for the Retry-After
+      delay when the provider sends one. The call is retried at once on another deployment, or after a jittered
+      exponential backoff when none is available.
+    - With hedging, a request still running after the p95 latency of its deployment is also sent to another
+      deployment, and the first response wins.
+    - The concurrent requests of each deployment are capped by an adaptive limit, and a circuit breaker skips the
+      deployments failing repeatedly. When every circuit is open, the calls fail fast with a CircuitOpenError.
+    """
+
+    def __init__(self, logger, deployments: List[Deployment], max_retries: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 30.0, hedge: bool = False, hedge_min_delay: float = 2.0,
+                 retryable_exceptions: Tuple[type, ...] = (), name: str = "GenAI",
+                 initial_concurrency: int = 8, min_concurrency: int = 1, max_concurrency: int = 32,
+                 latency_threshold: float = 0.0, breaker_failures: int = 5, breaker_reset_timeout: float = 30.0):
+        self.logger = logger
+        self.name = name
+        self.deployments = deployments
+        for deployment in deployments:
+            deployment.limiter = AdaptiveConcurrencyLimiter(initial_concurrency, min_concurrency, max_concurrency,
+                                                            latency_threshold)
+            deployment.breaker = CircuitBreaker(breaker_failures, breaker_reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.retryable_exceptions = (asyncio.TimeoutError, ConnectionError) + tuple(retryable_exceptions)
+
+    @classmethod
+    def from_bot_config(cls, logger, bot_config, deployments: List[Deployment],
+                        retryable_exceptions: Tuple[type, ...] = (), name: str = "GenAI") -> "DeploymentRouter":
+        return cls(logger, deployments,
+                   max_retries=bot_config.GENAI_MAX_RETRIES,
+                   base_delay=bot_config.GENAI_RETRY_BASE_DELAY,
+                   max_delay=bot_config.GENAI_RETRY_MAX_DELAY,
+                   hedge=bot_config.GENAI_HEDGE_REQUESTS,
+                   hedge_min_delay=bot_config.GENAI_HEDGE_MIN_DELAY,
+                   retryable_exceptions=retryable_exceptions,
+                   name=name,
+                   initial_concurrency=bot_config.GENAI_CONCURRENCY_INITIAL_LIMIT,
+                   min_concurrency=bot_config.GENAI_CONCURRENCY_MIN_LIMIT,
+                   max_concurrency=bot_config.GENAI_CONCURRENCY_MAX_LIMIT,
+                   latency_threshold=bot_config.GENAI_CONCURRENCY_LATENCY_THRESHOLD,
+                   breaker_failures=bot_config.GENAI_CIRCUIT_BREAKER_FAILURES,
+                   breaker_reset_timeout=bot_config.GENAI_CIRCUIT_BREAKER_RESET_TIMEOUT)
+
+    def is_retryable(self, error: BaseException) -> bool:
+        if isinstance(error, self.retryable_exceptions):
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def is_overloaded(error: BaseException) -> bool:
+        return isinstance(error, asyncio.TimeoutError) or getattr(error, "status_code", None) in OVERLOAD_STATUS_CODES
+
+    @staticmethod
+    def retry_after(error: BaseException) -> Optional[float]:
+        """
+        Delay requested by the provider in the Retry-After (or retry-after-ms) header of the error response.
+        """
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if not headers:
+            return None
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            if retry_after_ms:
+                return float(retry_after_ms) / 1000
+            retry_after = headers.get("retry-after")
+            if not retry_after:
+                return None
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def backoff_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def select(self, exclude: Tuple[Deployment, ...] = ()) -> Optional[Deployment]:
+        candidates = [deployment for deployment in self.deployments
+                      if deployment not in exclude and deployment.breaker.available]
+        available = [deployment for deployment in candidates if not deployment.cooling_down]
+        if not available:
+            return min(candidates, key=lambda deployment: deployment.cooldown_until) if candidates else None
+        known_latencies = [deployment.latency for deployment in self.deployments if deployment.latency is not None]
+        default_latency = sum(known_latencies) / len(known_latencies) if known_latencies else DEFAULT_LATENCY
+        return min(available, key=lambda deployment: deployment.expected_latency(default_latency))
+
+    def health(self) -> List[Dict]:
+        return [deployment.to_dict() for deployment in self.deployments]
+
+    async def call(self, request: Callable[[Deployment], Awaitable[T]], hedge: Optional[bool] = None) -> T:
+        """
+        Runs request(deployment) on the best deployment, retrying the retryable failures.
+        """
+        hedge = self.hedge if hedge is None else hedge
+
+        async def run(deployment: Deployment) -> T:
+            if hedge and len(self.deployments) > 1:
+                return await self._call_hedged(request, deployment)
+            return await self._attempt(request, deployment)
+
+        return await self._retry(run)
+
+    @asynccontextmanager
+    async def stream(self, request: Callable[[Deployment], Awaitable[T]]) -> AsyncIterator[T]:
+        """
+        Opens the stream returned by request(deployment) on the best deployment, retrying the retryable failures
+        until it is open, and holds the deployment while the stream is consumed in the block. Its concurrency slot is
+        released, and the latency and outcome of the whole stream recorded, when the block exits. A partially
+        consumed stream cannot be replayed: streams are never hedged nor retried once open.
+        """
+        async def open_stream(deployment: Deployment) -> Tuple[Deployment, float, T]:
+            await self._acquire(deployment)
+            start = time.monotonic()
+            try:
+                return deployment, start, await request(deployment)
+            except BaseException as e:
+                self._release(deployment, start, e)
+                raise
+
+        deployment, start, result = await self._retry(open_stream)
+        error = None
+        try:
+            yield result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(deployment, start, error)
+
+    async def _retry(self, run: Callable[[Deployment], Awaitable[T]]) -> T:
+        for attempt in range(self.max_retries + 1):
+            deployment = self.select()
+            if deployment is None:
+                raise self._circuit_open_error()
+            try:
+                return await run(deployment)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self.is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                self.logger.warning(f"Deployment {deployment.name} failed ({type(e).__name__}: {e}), "
+                                    f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+    def _circuit_open_error(self) -> CircuitOpenError:
+        retry_in = min((deployment.breaker.retry_in for deployment in self.deployments), default=0.0)
+        self.logger.error(f"Every deployment of {self.name} has its circuit open, failing fast")
+        return CircuitOpenError(self.name, retry_in)
+
+    def _retry_delay(self, attempt: int) -> float:
+        candidates = [deployment for deployment in self.deployments if deployment.breaker.available]
+        if not candidates or any(not deployment.cooling_down for deployment in candidates):
+            return 0.0
+        # Every deployment is cooling down: wait for the first one to be back, at least the backoff delay
+        wait_for_cooldown = min(deployment.cooldown_until for deployment in candidates) - time.monotonic()
+        return max(self.backoff_delay(attempt), wait_for_cooldown)
+
+    async def _attempt(self, request: Callable[[Deployment], Awaitable[T]], deployment: Deployment) -> T:
+        await self._acquire(deployment)
+        start = time.monotonic()
+        try:
+            result = await request(deployment)
+        except BaseException as e:
+            self._release(deployment, start, e)
+            raise
+        self._release(deployment, start)
+        return result
+
+    async def _acquire(self, deployment: Deployment):
+        if not deployment.breaker.allow_request():
+            raise self._circuit_open_error()
+        deployment.in_flight += 1
+        try:
+            await deployment.limiter.acquire()
+        except BaseException:
+            deployment.in_flight -= 1
+            deployment.breaker.release_probe()
+            raise
+
+    def _release(self, deployment: Deployment, start: float, error: Optional[BaseException] = None):
+        """
+        Frees the concurrency slot taken by _acquire and records the outcome of the request started at start.
+        """
+        deployment.in_flight -= 1
+        latency, throttled = None, False
+        if error is None:
+            latency = time.monotonic() - start
+            deployment.record_success(latency)
+            deployment.breaker.record_success()
+        elif not isinstance(error, Exception):
+            # Cancelled, or a stream abandoned by its consumer: nothing is known about the deployment
+            deployment.breaker.release_probe()
+        elif self.is_retryable(error):
+            deployment.record_failure(self.retry_after(error))
+            deployment.breaker.record_failure()
+            throttled = self.is_overloaded(error)
+            if deployment.breaker.state != CircuitBreaker.CLOSED:
+                self.logger.warning(f"Circuit of deployment {deployment.name} opened after "
+                                    f"{deployment.breaker.consecutive_failures} consecutive failures")
+        else:
+            # The provider answered, the deployment is up
+            deployment.breaker.record_success()
+        deployment.limiter.release(latency, throttled)
+
+    async def _call_hedged(self, request: Callable[[Deployment], Awaitable[T]], deployment: Deployment) -> T:
+        primary = asyncio.ensure_future(self._attempt(request, deployment))
+        pending = {primary}
+        try:
+            hedge_delay = max(self.hedge_min_delay, deployment.p95_latency or 0.0)
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            alternative = self.select(exclude=(deployment,)) if not done else None
+            if done or alternative is None or alternative.cooling_down:
+                return await primary
+
+            self.logger.info(f"Request on {deployment.name} slower than {hedge_delay:.1f}s, "
+                             f"hedging on {alternative.name}")
+            pending.add(asyncio.ensure_future(self._attempt(request, alternative)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -1,8 +1,28 @@
 class GenAICostBase:
     def __init__(self, total_tk=None, prompt_tk=None, completion_tk=None, input_token_price=None,
-                 output_token_price=None):
+                 output_token_price=None, cached_tk=0, image_tk=0, estimated=False):
         self.total_tk = total_tk
         self.prompt_tk = prompt_tk
         self.completion_tk = completion_tk
         self.input_token_price = input_token_price
         self.output_token_price = output_token_price
+        # Prompt tokens served from the provider prompt cache (part of prompt_tk)
+        self.cached_tk = cached_tk
+        # Estimated tokens of the images sent with the prompt (part of prompt_tk)
+        self.image_tk = image_tk
+        # True when the provider did not report the usage and the tokens were counted locally
+        self.estimated = estimated
+
+    @property
+    def total_cost(self) -> float:
+        return ((self.prompt_tk or 0) / 1000) * (self.input_token_price or 0) + \
+            ((self.completion_tk or 0) / 1000) * (self.output_token_price or 0)
+
+    @staticmethod
+    def read_cached_tokens(usage) -> int:
+        """
+        Reads the number of cached prompt tokens from an OpenAI style usage, 0 when the provider does not report it.
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0)
+        return cached_tokens if isinstance(cached_tokens, int) else 0
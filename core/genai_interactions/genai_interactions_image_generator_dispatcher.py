@@ -1,14 +1,29 @@
+import time
 from typing import List, Optional
+from urllib.parse import urlsplit
 
 from core.action_interactions.action_input import ActionInput
 from core.genai_interactions.genai_interactions_plugin_base import (
     GenAIInteractionsPluginBase,
 )
+from core.genai_interactions.generated_image_cache import (
+    GeneratedImage,
+    GeneratedImageCache,
+)
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
 from utils.config_manager.config_model import BotConfig
 
+# Largest image downloaded from the provider
+MAX_IMAGE_BYTES = 20_000_000
+
+
+class ImageGenerationError(Exception):
+    """
+    The image plugin did not return an image, the message is the error it returned if any.
+    """
+
 
 class GenaiInteractionsImageGeneratorDispatcher(GenAIInteractionsPluginBase):
     def __init__(self, global_manager):
@@ -18,9 +33,11 @@ class GenaiInteractionsImageGeneratorDispatcher(GenAIInteractionsPluginBase):
         self.plugins: List[GenAIInteractionsPluginBase] = []
         self.default_plugin_name = None
         self.default_plugin: Optional[GenAIInteractionsPluginBase] = None
+        self.image_cache: Optional[GeneratedImageCache] = None
 
     def initialize(self, plugins: List[GenAIInteractionsPluginBase] = None):
         self.bot_config: BotConfig = self.global_manager.bot_config
+        self.image_cache = GeneratedImageCache(self.global_manager)
 
         if not plugins:
             self.logger.error("No plugins provided for GenaiInteractionsImageGeneratorDispatcher")
@@ -83,3 +100,36 @@ class GenaiInteractionsImageGeneratorDispatcher(GenAIInteractionsPluginBase):
     async def handle_action(self, action_input: ActionInput, plugin_name=None):
         plugin: GenAIInteractionsPluginBase = self.get_plugin(plugin_name)
         return await plugin.handle_action(action_input)
+
+    async def generate_image(self, action_input: ActionInput, plugin_name=None) -> GeneratedImage:
+        """
+        Returns the image of the prompt and size of the action, from the cache or generated by the plugin and
+        downloaded once. Raises ImageGenerationError when the plugin does not return an image url.
+        """
+        plugin: GenAIInteractionsPluginBase = self.get_plugin(plugin_name)
+        parameters = {k.lower(): v for k, v in action_input.parameters.items()}
+        model_name = getattr(plugin, "model_name", None)
+        if not isinstance(model_name, str) or not model_name:
+            model_name = plugin.plugin_name
+
+        async def generate(key: str) -> GeneratedImage:
+            return await self._generate_image(plugin, action_input, key)
+
+        return await self.image_cache.get_or_generate(parameters.get("prompt", ""), parameters.get("size", ""),
+                                                      model_name, generate)
+
+    async def _generate_image(self, plugin: GenAIInteractionsPluginBase, action_input: ActionInput,
+                              key: str) -> GeneratedImage:
+        url = await plugin.handle_action(action_input)
+        if not url:
+            raise ImageGenerationError()
+        if not isinstance(url, str) or urlsplit(url).scheme not in ("http", "https"):
+            raise ImageGenerationError(str(url) if "Error" in str(url) else f"Invalid URL {url}")
+
+        try:
+            content = await self.global_manager.web_content_fetcher.fetch_bytes(url, max_bytes=MAX_IMAGE_BYTES)
+        except Exception as e:
+            # The url of the provider is still usable for a while, the image is only not cached
+            self.logger.warning(f"Generated image {key} could not be downloaded: {e}")
+            content = None
+        return GeneratedImage(key=key, url=url, content=content, created_at=time.time())
@@ -1,9 +1,14 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from core.action_interactions.action_input import ActionInput
+from core.action_interactions.follow_up_batch import current_follow_up_batch
+from core.event_processing.processing_coordinator import ProcessingAborted
+from core.genai_interactions.completion_result import CompletionResult
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
 )
+from core.genai_interactions.genai_response_cache import GenAIResponseCache
+from core.genai_interactions.token_accounting import GROUP_KEYS
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
@@ -19,9 +24,11 @@ class GenaiInteractionsTextDispatcher(GenAIInteractionsTextPluginBase):
         self.plugins: List[GenAIInteractionsTextPluginBase] = []
         self.default_plugin_name = None
         self.default_plugin: Optional[GenAIInteractionsTextPluginBase] = None
+        self.response_cache: Optional[GenAIResponseCache] = None
 
     def initialize(self, plugins: List[GenAIInteractionsTextPluginBase] = None):
         self.bot_config: BotConfig = self.global_manager.bot_config
+        self.response_cache = GenAIResponseCache(self.global_manager)
         if not plugins:
             self.logger.error("No plugins provided for GenaiInteractionsTextDispatcher")
             return
@@ -67,32 +74,52 @@ class GenaiInteractionsTextDispatcher(GenAIInteractionsTextPluginBase):
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin()
         plugin.plugin_name = value
 
+    def get_deployments_health(self) -> Dict[str, List[Dict]]:
+        """
+        Health of the deployments of the plugins routing their completions across several deployments.
+        """
+        return {plugin.plugin_name: plugin.deployment_router.health() for plugin in self.plugins
+                if getattr(plugin, "deployment_router", None) is not None}
+
     def validate_request(self, event: IncomingNotificationDataBase, plugin_name=None):
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin(plugin_name)
         return plugin.validate_request(event)
 
     async def handle_request(self, event: IncomingNotificationDataBase, plugin_name=None):
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin(plugin_name)
-        return await plugin.handle_request(event)
+        coordinator = self.global_manager.processing_coordinator
+        thread_id = event.thread_id or event.timestamp
+        try:
+            return await coordinator.run_cancellable(event.channel_id, thread_id, plugin.handle_request(event))
+        except ProcessingAborted:
+            self.logger.info(f"Request cancelled by an abort for {event.channel_id}-{thread_id}")
+            return None
 
     async def trigger_genai(self, event: IncomingNotificationDataBase, plugin_name=None):
+        # The follow-ups of the actions of a response are sent back to the model together once they are all done
+        follow_up_batch = current_follow_up_batch()
+        if plugin_name is None and follow_up_batch is not None and follow_up_batch.add(event):
+            return
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin(plugin_name)
-        ts = event.thread_id
-        channel_id = str(event.channel_id)
-        session_name = f"{channel_id.replace(':', '_')}-{ts}.txt"
-        abort_container = self.global_manager.backend_internal_data_processing_dispatcher.abort
-        aborted = await self.global_manager.backend_internal_data_processing_dispatcher.read_data_content(
-            abort_container, session_name)
-        if aborted:
-            self.logger.info(f"Aborted session found for {session_name}")
-            await self.global_manager.user_interactions_dispatcher.send_message(
-                message=f"Session aborted, discarded autogenerated content (Trigger: {event.text})", event=event,
-                message_type=MessageType.COMMENT, is_internal=True)
-            await self.global_manager.user_interactions_dispatcher.send_message(
-                message=f"Session aborted, discarded autogenerated content (Trigger: {event.text})", event=event,
-                message_type=MessageType.COMMENT, is_internal=False)
+        coordinator = self.global_manager.processing_coordinator
+        thread_id = event.thread_id or event.timestamp
+        if await coordinator.is_aborted(event.channel_id, thread_id):
+            self.logger.info(f"Aborted session found for {coordinator.make_key(event.channel_id, thread_id)}")
+            await self._notify_aborted(event)
             return
-        await plugin.trigger_genai(event=event)
+        try:
+            await coordinator.run_cancellable(event.channel_id, thread_id, plugin.trigger_genai(event=event))
+        except ProcessingAborted:
+            self.logger.info(f"Autogenerated processing cancelled for {coordinator.make_key(event.channel_id, thread_id)}")
+            await self._notify_aborted(event)
+
+    async def _notify_aborted(self, event: IncomingNotificationDataBase):
+        await self.global_manager.user_interactions_dispatcher.send_message(
+            message=f"Session aborted, discarded autogenerated content (Trigger: {event.text})", event=event,
+            message_type=MessageType.COMMENT, is_internal=True)
+        await self.global_manager.user_interactions_dispatcher.send_message(
+            message=f"Session aborted, discarded autogenerated content (Trigger: {event.text})", event=event,
+            message_type=MessageType.COMMENT, is_internal=False)
 
     async def handle_action(self, action_input: ActionInput, event: IncomingNotificationDataBase, plugin_name=None):
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin(plugin_name)
@@ -106,6 +133,40 @@ class GenaiInteractionsTextDispatcher(GenAIInteractionsTextPluginBase):
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin(plugin_name)
         return await plugin.trigger_feedback(event=event)
 
-    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, plugin_name=None):
+    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, plugin_name=None,
+                                  raw_output=False):
+        """
+        Generates a completion with the plugin, served from the response cache when the plugin opted in.
+        The usage of the completions actually generated is accounted to the action type running them.
+        """
         plugin: GenAIInteractionsTextPluginBase = self.get_plugin(plugin_name)
-        return await plugin.generate_completion(messages, event_data)
+        model_name = getattr(plugin, "model_name", None)
+        if self.response_cache is None or not self.response_cache.is_enabled_for(plugin.plugin_name):
+            completion, genai_cost_base = await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+            return CompletionResult(completion, self.account_usage(messages, completion, genai_cost_base, model_name,
+                                                                   event_data))
+
+        parameters = {
+            "plugin_name": plugin.plugin_name,
+            "model_name": model_name,
+            "vision": bool(event_data.images),
+            "raw_output": raw_output
+        }
+        completion = await self.response_cache.get(plugin, messages, parameters)
+        if completion is not None:
+            return CompletionResult(completion, self.response_cache.cost_of_hit(plugin))
+
+        completion, genai_cost_base = await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+        await self.response_cache.set(plugin, messages, parameters, completion)
+        return CompletionResult(completion, self.account_usage(messages, completion, genai_cost_base, model_name,
+                                                               event_data))
+
+    def account_usage(self, messages, completion, genai_cost_base, model_name, event_data):
+        return self.global_manager.token_accounting.account(genai_cost_base, messages, completion, model_name,
+                                                            event_data.channel_id)
+
+    def get_token_usage(self, group_by=GROUP_KEYS) -> List[Dict]:
+        """
+        Token usage of the completions since the start, grouped by model, channel and/or action type.
+        """
+        return self.global_manager.token_accounting.aggregates(group_by)
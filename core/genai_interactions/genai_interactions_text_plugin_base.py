@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
-from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_plugin_base import (
     GenAIInteractionsPluginBase,
 )
@@ -10,23 +10,50 @@ from core.user_interactions.incoming_notification_data_base import (
 
 
 class GenAIInteractionsTextPluginBase(GenAIInteractionsPluginBase, ABC):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._genai_cost_base = None
+    @abstractmethod
+    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, raw_output: bool):
+        pass
+
+    async def generate_completion_stream(self, messages, event_data: IncomingNotificationDataBase):
+        """
+        Generates a completion as an async iterator of text chunks, the last item being the GenAICostBase
+        of this completion.
+        Plugins without native streaming yield the whole completion at once.
+        """
+        completion, genai_cost_base = await self.generate_completion(messages, event_data)
+        yield completion
+        yield genai_cost_base
 
     @property
-    def genai_cost_base(self) -> GenAICostBase:
-        if self._genai_cost_base is None:
-            raise ValueError("GenAI cost base is not set")
-        return self._genai_cost_base
+    def supports_structured_output(self) -> bool:
+        """
+        True when the provider can be asked for a JSON response following the actions schema,
+        instead of relying on the model to write the [BEGINIMDETECT] block.
+        """
+        return False
+
+    def structured_output_enabled(self, raw_output: bool = False) -> bool:
+        """
+        Structured output applies to the action responses (not to the raw outputs such as summaries),
+        when LLM_STRUCTURED_OUTPUT is set and the provider supports it.
+        """
+        bot_config = getattr(self.global_manager, 'bot_config', None)
+        return (not raw_output and self.supports_structured_output is True
+                and getattr(bot_config, 'LLM_STRUCTURED_OUTPUT', False) is True)
 
-    @genai_cost_base.setter
-    def genai_cost_base(self, value: GenAICostBase):
-        self._genai_cost_base = value
+    def format_completion(self, response):
+        """
+        Post-processing applied to a streamed completion once it is complete,
+        the same way generate_completion formats its response.
+        """
+        return response
 
-    @abstractmethod
-    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, raw_output: bool):
-        pass
+    async def generate_embedding(self, text: str) -> Optional[List[float]]:
+        """
+        Returns the embedding of the text, used by the semantic tier of the response cache.
+        Plugins without an embedding model return None.
+        """
+        return None
 
     @abstractmethod
     async def trigger_feedback(self, event: IncomingNotificationDataBase):
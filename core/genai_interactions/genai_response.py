@@ -25,28 +25,40 @@ class GenAIResponse():
         self.response = response  # The response containing a list of actions
 
     @classmethod
-    async def from_json(cls, json_data: Union[str, Dict[str, Any]]):
-        # If the input data is a string, parse it as JSON
-        if isinstance(json_data, str):
-            data = json.loads(json_data)
-        else:
-            # If the input data is already a dictionary, use it directly
-            data = json_data
-
+    def from_dict(cls, data: Dict[str, Any]) -> 'GenAIResponse':
         # Normalize keys in data
         data = normalize_keys(data)
 
         # Check if 'response' is in data
-        if 'response' not in data:
+        if not isinstance(data, dict) or 'response' not in data:
             raise ValueError("'response' field is missing in the data")
 
         actions = []
-        for action in data['response']:
+        for action in data['response'] or []:
             # Check if 'Action' is in each action
-            if 'Action' not in action:
+            if not isinstance(action, dict) or 'Action' not in action:
                 raise ValueError("'Action' field is missing in the action")
             # Create an Action object
             actions.append(Action(**action['Action']))
 
         # Return an instance of the class with the created actions
         return cls(actions)
+
+    @classmethod
+    async def from_json(cls, json_data: Union[str, Dict[str, Any], 'GenAIResponse']):
+        # A response already parsed by the chat input handler is used as is
+        if isinstance(json_data, GenAIResponse):
+            return json_data
+
+        # If the input data is a string, parse it as JSON
+        if isinstance(json_data, str):
+            data = json.loads(json_data)
+        else:
+            # If the input data is already a dictionary, use it directly
+            data = json_data
+
+        return cls.from_dict(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"response": [{"Action": {"ActionName": action.ActionName, "Parameters": action.Parameters}}
+                             for action in self.response]}
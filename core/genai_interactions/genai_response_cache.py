@@ -0,0 +1,271 @@
+import hashlib
+import json
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from core.genai_interactions.genai_cost_base import GenAICostBase
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Number of embeddings of missed requests kept until their completion is stored
+MAX_PENDING_EMBEDDINGS = 100
+
+
+class CachedResponse:
+    def __init__(self, key: str, scope: str, plugin_name: str, model_name: str, completion: str, created_at: float,
+                 expires_at: float, embedding: Optional[List[float]] = None):
+        self.key = key
+        self.scope = scope
+        self.plugin_name = plugin_name
+        self.model_name = model_name
+        self.completion = completion
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.embedding = embedding
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def to_dict(self) -> dict:
+        return {
+            "key": self.key,
+            "scope": self.scope,
+            "plugin_name": self.plugin_name,
+            "model_name": self.model_name,
+            "completion": self.completion,
+            "created_at": self.created_at,
+            "expires_at": self.expires_at,
+            "embedding": self.embedding
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CachedResponse":
+        return cls(
+            key=data["key"],
+            scope=data.get("scope", ""),
+            plugin_name=data.get("plugin_name", ""),
+            model_name=data.get("model_name", ""),
+            completion=data["completion"],
+            created_at=data.get("created_at", 0.0),
+            expires_at=data.get("expires_at", 0.0),
+            embedding=data.get("embedding")
+        )
+
+
+class GenAIResponseCache:
+    """
+    Cache of the completions returned by the text plugins, for the plugins listed in GENAI_RESPONSE_CACHE_PLUGINS.
+    - Exact tier: the entries are keyed by a hash of the normalized messages and of the model parameters, kept in
+      memory (LRU) and persisted in the responses cache container of the backend, so they survive a restart.
+    - Semantic tier (GENAI_RESPONSE_CACHE_SIMILARITY_THRESHOLD > 0): if the plugin provides embeddings, a request
+      whose earlier messages are identical and whose last message is similar enough to a cached one reuses its
+      completion.
+    Entries expire after GENAI_RESPONSE_CACHE_TTL seconds.
+    """
+
+    def __init__(self, global_manager):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        bot_config = global_manager.bot_config
+        self.plugin_names = set(bot_config.GENAI_RESPONSE_CACHE_PLUGINS or [])
+        self.ttl = bot_config.GENAI_RESPONSE_CACHE_TTL
+        self.max_entries = bot_config.GENAI_RESPONSE_CACHE_MAX_ENTRIES
+        self.similarity_threshold = bot_config.GENAI_RESPONSE_CACHE_SIMILARITY_THRESHOLD
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._semantic_index_loaded = False
+        # Embeddings computed by a semantic lookup, reused when the completion of the same request is stored
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.metrics: Dict[str, int] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0}
+
+    def is_enabled_for(self, plugin_name: str) -> bool:
+        return plugin_name in self.plugin_names and self.ttl > 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.similarity_threshold > 0
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.metrics["exact_hits"] + self.metrics["semantic_hits"]
+        total = hits + self.metrics["misses"]
+        return hits / total if total else 0.0
+
+    @staticmethod
+    def normalize_content(content):
+        if isinstance(content, str):
+            return WHITESPACE_PATTERN.sub(" ", content).strip()
+        if isinstance(content, list):
+            normalized = []
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    normalized.append({"type": "text", "text": WHITESPACE_PATTERN.sub(" ", part.get("text", "")).strip()})
+                else:
+                    normalized.append(part)
+            return normalized
+        return content
+
+    @classmethod
+    def hash_messages(cls, messages: List[Dict], parameters: Dict) -> str:
+        payload = {
+            "parameters": parameters,
+            "messages": [{"role": message.get("role"), "content": cls.normalize_content(message.get("content"))}
+                         for message in messages]
+        }
+        serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def make_keys(self, messages: List[Dict], parameters: Dict) -> Tuple[str, str]:
+        """
+        Returns the exact key of the request and its semantic scope: the hash of every message but the last one,
+        only requests sharing the same scope can be matched semantically.
+        """
+        return self.hash_messages(messages, parameters), self.hash_messages(messages[:-1], parameters)
+
+    @staticmethod
+    def query_text(messages: List[Dict]) -> str:
+        if not messages:
+            return ""
+        content = GenAIResponseCache.normalize_content(messages[-1].get("content"))
+        if isinstance(content, list):
+            return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return str(content or "")
+
+    @staticmethod
+    def cosine_similarity(first: List[float], second: List[float]) -> float:
+        if not first or not second or len(first) != len(second):
+            return 0.0
+        dot = sum(a * b for a, b in zip(first, second))
+        norm = math.sqrt(sum(a * a for a in first)) * math.sqrt(sum(b * b for b in second))
+        return dot / norm if norm else 0.0
+
+    def cost_of_hit(self, plugin) -> GenAICostBase:
+        """
+        A cached completion costs no token, the prices of the plugin are kept for the cost reports.
+        """
+        return GenAICostBase(total_tk=0, prompt_tk=0, completion_tk=0,
+                             input_token_price=getattr(plugin, "input_token_price", 0),
+                             output_token_price=getattr(plugin, "output_token_price", 0))
+
+    async def get(self, plugin, messages: List[Dict], parameters: Dict) -> Optional[str]:
+        key, scope = self.make_keys(messages, parameters)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = await self._load(key)
+        if entry is not None and entry.expired:
+            await self._evict(entry.key)
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.metrics["exact_hits"] += 1
+            self.logger.info(f"Response cache hit for {plugin.plugin_name} (hit ratio {self.hit_ratio:.0%})")
+            return entry.completion
+
+        if self.semantic_enabled:
+            entry = await self._find_similar(plugin, key, scope, messages)
+            if entry is not None:
+                self.metrics["semantic_hits"] += 1
+                self.logger.info(f"Response cache semantic hit for {plugin.plugin_name} "
+                                 f"(hit ratio {self.hit_ratio:.0%})")
+                return entry.completion
+
+        self.metrics["misses"] += 1
+        return None
+
+    async def set(self, plugin, messages: List[Dict], parameters: Dict, completion: str):
+        if not isinstance(completion, str) or not completion:
+            return
+        key, scope = self.make_keys(messages, parameters)
+        embedding = None
+        if self.semantic_enabled:
+            embedding = self._query_embeddings.pop(key, None) or await self._embed(plugin, messages)
+        now = time.time()
+        entry = CachedResponse(key=key, scope=scope, plugin_name=plugin.plugin_name,
+                               model_name=getattr(plugin, "model_name", ""), completion=completion,
+                               created_at=now, expires_at=now + self.ttl, embedding=embedding)
+        self._remember(entry)
+        self.metrics["stores"] += 1
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        try:
+            await backend.write_data_content(backend.responses_cache, f"{key}.json", json.dumps(entry.to_dict()))
+        except Exception as e:
+            self.logger.warning(f"Response cache entry {key} not persisted: {e}")
+
+    def _remember(self, entry: CachedResponse):
+        self._entries[entry.key] = entry
+        self._entries.move_to_end(entry.key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _load(self, key: str) -> Optional[CachedResponse]:
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        try:
+            data = await backend.read_data_content(backend.responses_cache, f"{key}.json")
+            if not data:
+                return None
+            entry = CachedResponse.from_dict(json.loads(data))
+        except Exception as e:
+            self.logger.warning(f"Response cache entry {key} could not be read: {e}")
+            return None
+        self._remember(entry)
+        return entry
+
+    async def _evict(self, key: str):
+        self._entries.pop(key, None)
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        try:
+            await backend.remove_data_content(backend.responses_cache, f"{key}.json")
+        except Exception as e:
+            self.logger.warning(f"Expired response cache entry {key} not removed: {e}")
+
+    async def _embed(self, plugin, messages: List[Dict]) -> Optional[List[float]]:
+        text = self.query_text(messages)
+        if not text:
+            return None
+        try:
+            return await plugin.generate_embedding(text)
+        except Exception as e:
+            self.logger.warning(f"Embedding for the response cache failed on {plugin.plugin_name}: {e}")
+            return None
+
+    async def _load_semantic_index(self):
+        """
+        Loads the persisted entries once so that the semantic tier also matches the entries of previous runs.
+        """
+        self._semantic_index_loaded = True
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        try:
+            file_names = await backend.list_container_files(backend.responses_cache)
+        except Exception as e:
+            self.logger.warning(f"Response cache entries could not be listed: {e}")
+            return
+        for file_name in (file_names or [])[-self.max_entries:]:
+            key = file_name[:-len(".json")] if file_name.endswith(".json") else file_name
+            if key not in self._entries:
+                await self._load(key)
+
+    async def _find_similar(self, plugin, key: str, scope: str, messages: List[Dict]) -> Optional[CachedResponse]:
+        if not self._semantic_index_loaded:
+            await self._load_semantic_index()
+        candidates = [entry for entry in self._entries.values()
+                      if entry.scope == scope and entry.embedding and not entry.expired]
+        if not candidates:
+            return None
+        embedding = await self._embed(plugin, messages)
+        if not embedding:
+            return None
+        self._query_embeddings[key] = embedding
+        while len(self._query_embeddings) > MAX_PENDING_EMBEDDINGS:
+            self._query_embeddings.popitem(last=False)
+
+        best_entry, best_similarity = None, 0.0
+        for entry in candidates:
+            similarity = self.cosine_similarity(embedding, entry.embedding)
+            if similarity > best_similarity:
+                best_entry, best_similarity = entry, similarity
+        if best_similarity < self.similarity_threshold:
+            return None
+        self.logger.debug(f"Response cache semantic match with similarity {best_similarity:.3f}")
+        return best_entry
@@ -0,0 +1,155 @@
+import json
+from typing import Any, Dict
+
+import yaml
+
+from core.genai_interactions.genai_response import GenAIResponse
+
+try:
+    # libyaml binding, several times faster than the pure Python loader on large responses
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+BEGIN_MARKER = "[BEGINIMDETECT]"
+END_MARKER = "[ENDIMDETECT]"
+SUPPORTED_FORMATS = ("json", "yaml")
+
+
+class GenAIResponseParser:
+    """
+    Parses a [BEGINIMDETECT] completion into a GenAIResponse in a single pass, for every text plugin:
+    the payload between the markers is loaded once (JSON or YAML), its keys are normalized and the actions are
+    built directly. The plugins return the completion as generated, it is not decoded and encoded again before
+    reaching the chat input handler, and the behaviors hand the parsed response to the action handler as is.
+    """
+
+    def __init__(self, conversion_format: str = "json"):
+        self.conversion_format = conversion_format.lower() if conversion_format else "json"
+        if self.conversion_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Invalid conversion format: {conversion_format}")
+
+    @staticmethod
+    def extract_payload(completion: str) -> str:
+        """
+        Returns the content between the markers, without the markdown code fence some models add around it.
+        """
+        start = completion.find(BEGIN_MARKER)
+        start = 0 if start == -1 else start + len(BEGIN_MARKER)
+        end = completion.find(END_MARKER, start)
+        payload = completion[start:end if end != -1 else len(completion)].strip()
+
+        if payload.startswith("```"):
+            first_line_end = payload.find("\n")
+            payload = payload[first_line_end + 1:] if first_line_end != -1 else ""
+            if payload.rstrip().endswith("```"):
+                payload = payload.rstrip()[:-3]
+            payload = payload.strip()
+        return payload
+
+    def load(self, completion: str) -> Dict[str, Any]:
+        payload = self.extract_payload(completion)
+        if self.conversion_format == "yaml":
+            return self.load_yaml(self.adjust_yaml_structure(payload))
+        return json.loads(payload)
+
+    def parse(self, completion: str) -> GenAIResponse:
+        """
+        Raises json.JSONDecodeError or yaml.YAMLError when the payload cannot be loaded and ValueError when
+        it is not a list of actions.
+        """
+        genai_response = GenAIResponse.from_dict(self.load(completion))
+        for action in genai_response.response:
+            if action.ActionName != "UserInteraction" or not isinstance(action.Parameters, dict):
+                continue
+            value = action.Parameters.get("value")
+            if isinstance(value, str):
+                # Some models double escape the new lines of the message
+                action.Parameters["value"] = value.replace("\\n", "\n")
+        return genai_response
+
+    @staticmethod
+    def load_yaml(yaml_string: str) -> Dict[str, Any]:
+        python_dict = yaml.load(yaml_string, Loader=YamlLoader)
+
+        # Vérifier si 'value' contient une chaîne YAML et la charger
+        for action in (python_dict.get('response') or []) if isinstance(python_dict, dict) else []:
+            parameters = action.get('Action', {}).get('Parameters') if isinstance(action, dict) else None
+            if not isinstance(parameters, dict):
+                continue
+            value_str = parameters.get('value')
+
+            # Traiter uniquement si value_str est une chaîne et formatée en YAML
+            if isinstance(value_str, str) and value_str.strip().startswith('```yaml') \
+                    and value_str.strip().endswith('```'):
+                # Supprimer la syntaxe du bloc de code markdown et parser le contenu YAML
+                parameters['value'] = yaml.load(value_str.strip()[7:-3].strip(), Loader=YamlLoader)
+
+        return python_dict
+
+    @staticmethod
+    def adjust_yaml_structure(yaml_content: str) -> str:
+        lines = yaml_content.split('\n')
+        adjusted_lines = []
+        inside_parameters_block = False
+        multiline_literal_indentation = 0
+        current_indentation_level = 0
+
+        for line in lines:
+            # Si nous sommes à l'intérieur d'un bloc multiligne, nous vérifions le niveau d'indentation
+            if multiline_literal_indentation > 0 and not line.startswith(' ' * multiline_literal_indentation):
+                # Nous avons atteint la fin du bloc multiligne
+                multiline_literal_indentation = 0
+
+            stripped_line = line.strip()
+
+            # Échapper les astérisques dans la chaîne YAML (uniquement en dehors des blocs multiligne)
+            if multiline_literal_indentation == 0:
+                stripped_line = stripped_line.replace('*', '\\*')
+
+            # Pas d'espaces en début pour 'response:'
+            if stripped_line.startswith('response:'):
+                adjusted_lines.append(stripped_line)
+                inside_parameters_block = False
+                current_indentation_level = 0
+
+            # 2 espaces avant '- Action:'
+            elif stripped_line.startswith('- Action:'):
+                adjusted_lines.append('  ' + stripped_line)
+                inside_parameters_block = False
+                current_indentation_level = 2
+
+            # 6 espaces avant 'ActionName:' ou 'Parameters:'
+            elif stripped_line.startswith('ActionName:') or stripped_line.startswith('Parameters:'):
+                adjusted_lines.append('      ' + stripped_line)
+                inside_parameters_block = stripped_line.startswith('Parameters:')
+                current_indentation_level = 6
+
+            # Commence une valeur multiligne
+            elif inside_parameters_block and stripped_line.endswith(': |'):
+                adjusted_lines.append(' ' * (current_indentation_level + 2) + stripped_line)
+                multiline_literal_indentation = current_indentation_level + 4  # Augmenter l'indentation pour le contenu multiligne
+
+            # Gérer les lignes à l'intérieur d'un bloc multiligne
+            elif multiline_literal_indentation > 0:
+                adjusted_lines.append(line)
+
+            # Lignes de valeur de paramètre régulières sous 'Parameters:'
+            elif inside_parameters_block and ':' in stripped_line:
+                adjusted_lines.append(' ' * (current_indentation_level + 2) + stripped_line)
+                if stripped_line.endswith(':'):
+                    # Augmenter le niveau d'indentation pour les dictionnaires imbriqués
+                    current_indentation_level += 2
+
+            # Diminuer l'indentation en quittant un bloc imbriqué
+            elif inside_parameters_block and not stripped_line:
+                current_indentation_level = max(current_indentation_level - 2, 6)
+                adjusted_lines.append(line)
+
+            # Garder l'indentation originale pour tout le reste
+            else:
+                adjusted_lines.append(line)
+
+        # Reconstruire le contenu YAML ajusté
+        adjusted_yaml_content = '\n'.join(adjusted_lines)
+        return adjusted_yaml_content
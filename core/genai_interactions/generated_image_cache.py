@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class GeneratedImage(NamedTuple):
+    """
+    Image returned by an image generation plugin. content holds the downloaded image, it is None when the image could
+    not be downloaded: only the temporary url of the provider is then available and the image is not cached.
+    """
+    key: str
+    url: str
+    content: Optional[bytes]
+    created_at: float
+    cached: bool = False
+
+
+class GeneratedImageCache:
+    """
+    Images generated by the image plugins, keyed by a hash of the normalized prompt, size and model. The same request
+    reuses the image instead of generating it again, and concurrent identical requests share one generation.
+    The images are downloaded once from the provider, whose urls expire, kept in memory (LRU, at most
+    GENAI_IMAGE_CACHE_MAX_MEMORY_ENTRIES) and persisted in the generated images container of the backend.
+    Entries expire after GENAI_IMAGE_CACHE_TTL seconds, 0 disables the cache.
+    """
+
+    def __init__(self, global_manager):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        bot_config = global_manager.bot_config
+        self.ttl = bot_config.GENAI_IMAGE_CACHE_TTL
+        self.max_memory_entries = max(1, bot_config.GENAI_IMAGE_CACHE_MAX_MEMORY_ENTRIES)
+        self._entries: "OrderedDict[str, GeneratedImage]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        return WHITESPACE_PATTERN.sub(" ", prompt or "").strip()
+
+    @staticmethod
+    def normalize_size(size: str) -> str:
+        return WHITESPACE_PATTERN.sub("", str(size or "")).lower()
+
+    @classmethod
+    def make_key(cls, prompt: str, size: str, model_name: str) -> str:
+        normalized = [cls.normalize_prompt(prompt), cls.normalize_size(size), model_name or ""]
+        return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+    def is_fresh(self, image: GeneratedImage) -> bool:
+        return time.time() - image.created_at < self.ttl
+
+    async def get(self, key: str) -> Optional[GeneratedImage]:
+        image = self._entries.get(key)
+        if image is not None:
+            if self.is_fresh(image):
+                self._entries.move_to_end(key)
+                return image
+            del self._entries[key]
+            return None
+
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        try:
+            data = await backend.read_data_content(backend.generated_images, f"{key}.json")
+            if not data:
+                return None
+            entry = json.loads(data)
+            image = GeneratedImage(key=key, url=entry.get("url", ""), content=base64.b64decode(entry["image"]),
+                                   created_at=entry.get("created_at", 0.0))
+        except Exception as e:
+            self.logger.warning(f"Generated image {key} could not be read: {e}")
+            return None
+        if not self.is_fresh(image):
+            return None
+        self._remember(image)
+        return image
+
+    async def set(self, image: GeneratedImage, prompt: str, size: str, model_name: str):
+        if image.content is None:
+            return
+        self._remember(image)
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        entry = {
+            "key": image.key,
+            "prompt": self.normalize_prompt(prompt),
+            "size": self.normalize_size(size),
+            "model_name": model_name,
+            "url": image.url,
+            "created_at": image.created_at,
+            "image": base64.b64encode(image.content).decode("ascii")
+        }
+        try:
+            await backend.write_data_content(backend.generated_images, f"{image.key}.json", json.dumps(entry))
+        except Exception as e:
+            self.logger.warning(f"Generated image {image.key} not persisted: {e}")
+
+    async def get_or_generate(self, prompt: str, size: str, model_name: str,
+                              generate: Callable[[str], Awaitable[GeneratedImage]]) -> GeneratedImage:
+        """
+        Returns the cached image of the request, otherwise generates it with generate(key) and caches it. A request
+        already being generated waits for it instead of generating the image a second time.
+        """
+        key = self.make_key(prompt, size, model_name)
+        if not self.enabled:
+            return await generate(key)
+
+        image = await self.get(key)
+        if image is not None:
+            self.hits += 1
+            self.logger.info(f"Generated image cache hit for {key}")
+            return image._replace(cached=True)
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.hits += 1
+            self.logger.debug(f"Image {key} already being generated, waiting for it")
+            return (await asyncio.shield(in_flight))._replace(cached=True)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            image = await generate(key)
+            await self.set(image, prompt, size, model_name)
+            future.set_result(image)
+            return image
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve the exception so that an unawaited future does not log a warning
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _remember(self, image: GeneratedImage):
+        self._entries[image.key] = image._replace(cached=False)
+        self._entries.move_to_end(image.key)
+        while len(self._entries) > self.max_memory_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+# Number of descriptions kept in memory, the others are read back from the backend
+MAX_MEMORY_ENTRIES = 256
+
+
+class ImageDescriptionCache:
+    """
+    Descriptions of the images written by a vision model, keyed by a hash of the model name and of the image content.
+    An image uploaded again, or found again in the history of a conversation, reuses its description instead of
+    being sent to the vision model. The descriptions are kept in memory (LRU) and persisted in the image
+    descriptions container of the backend.
+    """
+
+    def __init__(self, global_manager, max_concurrency: int = 4):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        self.max_concurrency = max(1, max_concurrency)
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(image: str, model_name: str) -> str:
+        hasher = hashlib.sha256()
+        hasher.update((model_name or "").encode("utf-8"))
+        hasher.update(b"\0")
+        hasher.update(image.encode("utf-8"))
+        return hasher.hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        description = self._entries.get(key)
+        if description is not None:
+            self._entries.move_to_end(key)
+            return description
+
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        try:
+            data = await backend.read_data_content(backend.image_descriptions, f"{key}.json")
+            if not data:
+                return None
+            description = json.loads(data).get("description")
+        except Exception as e:
+            self.logger.warning(f"Image description {key} could not be read: {e}")
+            return None
+        if description:
+            self._remember(key, description)
+        return description
+
+    async def set(self, key: str, model_name: str, description: str):
+        if not description:
+            return
+        self._remember(key, description)
+        backend = self.global_manager.backend_internal_data_processing_dispatcher
+        entry = {"key": key, "model_name": model_name, "description": description, "created_at": time.time()}
+        try:
+            await backend.write_data_content(backend.image_descriptions, f"{key}.json", json.dumps(entry))
+        except Exception as e:
+            self.logger.warning(f"Image description {key} not persisted: {e}")
+
+    async def describe_all(self, images: List[str], model_name: str,
+                           describe: Callable[[str], Awaitable[str]]) -> List[str]:
+        """
+        Returns the description of each image, in order. The images without a cached description are described
+        concurrently, at most max_concurrency at a time, and an image appearing several times is described once.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending = {}
+
+        async def describe_image(key: str, image: str) -> str:
+            description = await self.get(key)
+            if description is not None:
+                self.hits += 1
+                return description
+            self.misses += 1
+            async with semaphore:
+                description = await describe(image)
+            await self.set(key, model_name, description)
+            return description
+
+        tasks = []
+        for image in images:
+            key = self.make_key(image, model_name)
+            if key not in pending:
+                pending[key] = asyncio.ensure_future(describe_image(key, image))
+            tasks.append(pending[key])
+        try:
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in pending.values():
+                task.cancel()
+            raise
+
+    def _remember(self, key: str, description: str):
+        self._entries[key] = description
+        self._entries.move_to_end(key)
+        while len(self._entries) > MAX_MEMORY_ENTRIES:
+            self._entries.popitem(last=False)
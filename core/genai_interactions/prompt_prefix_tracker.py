@@ -0,0 +1,79 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class PromptPrefixTracker:
+    """
+    Tracks how stable the prompt prefix is, which is what the provider prompt caches rely on.
+    For each request, two hashes of the role and content of the messages are computed:
+    - the static prefix hash covers the leading system prompt, shared by every thread using the same prompts,
+    - the conversation hash covers the whole context, so that the next request of the same thread can check
+      that the context it extends is byte-identical.
+    The cached prompt tokens reported by the provider are accumulated to measure the savings.
+    """
+
+    def __init__(self, logger, max_threads: int = 10000):
+        self.logger = logger
+        self.max_threads = max_threads
+        self._threads: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self.static_prefix_hashes: "OrderedDict[str, None]" = OrderedDict()
+        self.requests = 0
+        self.prefix_reused = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+
+    @staticmethod
+    def serialize(message: Dict) -> bytes:
+        return json.dumps({"role": message.get("role"), "content": message.get("content")},
+                          ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+
+    def track(self, thread_key: str, messages: List[Dict]) -> Dict:
+        """
+        Registers the context sent for a thread and returns the prefix hashes and whether the context of
+        the previous request of the thread is a prefix of this one.
+        """
+        previous_count, previous_hash = self._threads.get(thread_key, (0, None))
+        static_prefix_hash: Optional[str] = None
+        if messages and messages[0].get("role") == "system":
+            static_prefix_hash = hashlib.sha256(self.serialize(messages[0])).hexdigest()
+
+        hasher = hashlib.sha256()
+        previous_prefix_hash: Optional[str] = None
+        for index, message in enumerate(messages):
+            if index == previous_count:
+                previous_prefix_hash = hasher.hexdigest()
+            hasher.update(self.serialize(message))
+        if previous_count == len(messages):
+            previous_prefix_hash = hasher.hexdigest()
+
+        conversation_hash = hasher.hexdigest()
+        prefix_reused = previous_hash is not None and previous_prefix_hash == previous_hash
+
+        self.requests += 1
+        if prefix_reused:
+            self.prefix_reused += 1
+        self._threads[thread_key] = (len(messages), conversation_hash)
+        self._threads.move_to_end(thread_key)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+        if static_prefix_hash is not None:
+            self.static_prefix_hashes[static_prefix_hash] = None
+            self.static_prefix_hashes.move_to_end(static_prefix_hash)
+            while len(self.static_prefix_hashes) > self.max_threads:
+                self.static_prefix_hashes.popitem(last=False)
+
+        return {
+            "static_prefix_hash": static_prefix_hash,
+            "conversation_hash": conversation_hash,
+            "prefix_reused": prefix_reused
+        }
+
+    def record_usage(self, prompt_tokens: int, cached_tokens: int):
+        self.prompt_tokens += prompt_tokens if isinstance(prompt_tokens, int) else 0
+        self.cached_tokens += cached_tokens if isinstance(cached_tokens, int) else 0
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
@@ -0,0 +1,39 @@
+# JSON schema of an action response, the same structure as the [BEGINIMDETECT] block described by the core prompt.
+# The parameters of each action depend on the action, they are left free.
+ACTIONS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "response": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "Action": {
+                        "type": "object",
+                        "properties": {
+                            "ActionName": {"type": "string"},
+                            "Parameters": {"type": "object"}
+                        },
+                        "required": ["ActionName", "Parameters"]
+                    }
+                },
+                "required": ["Action"]
+            }
+        }
+    },
+    "required": ["response"]
+}
+
+# response_format of the chat completions APIs following the OpenAI convention (OpenAI, Azure OpenAI and the
+# local servers compatible with them). The schema is not strict since the parameters of the actions are free.
+JSON_SCHEMA_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "actions_response",
+        "schema": ACTIONS_RESPONSE_SCHEMA,
+        "strict": False
+    }
+}
+
+# Providers without JSON schema support only guarantee a valid JSON object
+JSON_OBJECT_RESPONSE_FORMAT = {"type": "json_object"}
@@ -0,0 +1,187 @@
+import copy
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from core.event_processing.background_task_manager import BackgroundTaskManager
+from core.genai_interactions.concurrency_limiter import (
+    RequestPriority,
+    request_priority,
+)
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain the memory of a conversation between users and an AI assistant. "
+    "Update the summary of the conversation with the new messages below. Keep the facts, decisions, names, figures, "
+    "links, open questions and pending requests, drop greetings and repetitions. "
+    "Answer with the updated summary only, as plain text, in the language of the conversation."
+)
+SUMMARY_MESSAGE_PREFIX = "Summary of the earlier messages of this conversation (older messages are not shown):\n"
+
+
+class ThreadSummarizer:
+    """
+    Folds the oldest messages of an EnrichedSession into a rolling summary stored in the session.
+    Once batch_size messages older than the keep_recent last ones are not covered by the summary yet,
+    the summary is refreshed in a background task with only these new messages and the previous summary.
+    The completions then receive the system prompt, the summary and the messages that follow it,
+    so the input size stays roughly constant however long the thread gets.
+    """
+
+    def __init__(self, global_manager, keep_recent: int, batch_size: int, max_message_chars: int = 4000,
+                 max_pending_tasks: int = 20):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        self.keep_recent = keep_recent
+        self.batch_size = batch_size
+        self.max_message_chars = max_message_chars
+        self.background_tasks = BackgroundTaskManager(self.logger, max_pending_tasks, name="summarizer")
+        self._running: Set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.batch_size > 0
+
+    @staticmethod
+    def history_start(messages: List[Dict]) -> int:
+        start = 0
+        while start < len(messages) and messages[start].get("role") == "system":
+            start += 1
+        return start
+
+    @staticmethod
+    def get_summary(session) -> Optional[Dict]:
+        summary = getattr(session, "summary", None)
+        return summary if isinstance(summary, dict) and summary.get("text") else None
+
+    def apply_summary(self, messages: List[Dict], session) -> List[Dict]:
+        """
+        Replaces the messages covered by the summary of the session with a single summary message.
+        """
+        summary = self.get_summary(session)
+        if summary is None:
+            return messages
+        start = self.history_start(messages)
+        summarized_count = min(summary.get("summarized_count", 0), len(messages) - start)
+        summary_message = {"role": "system", "content": [
+            {"type": "text", "text": SUMMARY_MESSAGE_PREFIX + summary["text"]}
+        ]}
+        return messages[:start] + [summary_message] + messages[start + summarized_count:]
+
+    def pending_messages(self, session) -> List[Dict]:
+        """
+        Messages old enough to be summarized and not covered by the summary yet.
+        """
+        messages = session.messages
+        start = self.history_start(messages)
+        summary = self.get_summary(session)
+        summarized_count = summary.get("summarized_count", 0) if summary else 0
+        end = len(messages) - self.keep_recent
+        return messages[start + summarized_count:end] if end > start + summarized_count else []
+
+    def should_summarize(self, session) -> bool:
+        return (self.enabled
+                and session.session_id not in self._running
+                and len(self.pending_messages(session)) >= self.batch_size)
+
+    def schedule(self, session, chat_plugin, event_data: IncomingNotificationDataBase) -> bool:
+        """
+        Starts the refresh of the summary in the background if enough messages are pending.
+        """
+        if not self.should_summarize(session):
+            return False
+        self._running.add(session.session_id)
+        scheduled = self.background_tasks.schedule(self.summarize(session, chat_plugin, event_data),
+                                                   name=f"summarize-{session.session_id}")
+        if not scheduled:
+            self._running.discard(session.session_id)
+        return scheduled
+
+    async def summarize(self, session, chat_plugin, event_data: IncomingNotificationDataBase):
+        try:
+            pending = self.pending_messages(session)
+            if not pending:
+                return
+            summary = self.get_summary(session)
+            previous_count = summary.get("summarized_count", 0) if summary else 0
+            previous_text = summary["text"] if summary else "(no summary yet)"
+            transcript = "\n\n".join(self.render_message(message) for message in pending)
+            prompt = [
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": f"Current summary:\n{previous_text}\n\nNew messages:\n{transcript}"}
+            ]
+
+            # The summary prompt has no image, the vision model must not be selected
+            summary_event = copy.copy(event_data)
+            summary_event.images = []
+            # The summary waits behind the user turns when the deployment is saturated
+            with request_priority(RequestPriority.BACKGROUND):
+                completion, genai_cost_base = await chat_plugin.generate_completion(prompt, summary_event,
+                                                                                    raw_output=True)
+            self.global_manager.token_accounting.account(genai_cost_base, prompt, completion,
+                                                         getattr(chat_plugin, "model_name", None),
+                                                         event_data.channel_id, "thread_summary")
+            if not completion:
+                return
+
+            # The session was saved by the turn and its interactions while the summary was written: the summary is
+            # set on the current session, the one this task received is stale
+            summarized_count = previous_count + len(pending)
+            current = await self.global_manager.session_manager_dispatcher.get_or_create_session(
+                channel_id=event_data.channel_id,
+                thread_id=event_data.thread_id or event_data.timestamp,
+                enriched=True
+            )
+            if not self.covers_same_messages(current, summary, pending, summarized_count):
+                self.logger.warning(f"Session {session.session_id} changed while it was summarized, "
+                                    f"summary dropped")
+                return
+
+            current.summary = {
+                "text": completion.strip(),
+                "summarized_count": summarized_count,
+                "updated_at": datetime.now().isoformat()
+            }
+            await self.global_manager.session_manager_dispatcher.save_session(current)
+            self.logger.info(f"Session {session.session_id} summary refreshed with {len(pending)} messages "
+                             f"({summarized_count} messages summarized)")
+        finally:
+            self._running.discard(session.session_id)
+
+    def covers_same_messages(self, session, previous_summary: Optional[Dict], pending: List[Dict],
+                             summarized_count: int) -> bool:
+        """
+        Whether the summary written from the pending messages still applies to the reloaded session: its summary
+        is the one the refresh started from and the summarized messages are still at the same place. The
+        interactions recorded on a message meanwhile do not matter.
+        """
+        if self.get_summary(session) != previous_summary:
+            return False
+        start = self.history_start(session.messages)
+        if len(session.messages) < start + summarized_count:
+            return False
+        first = start + summarized_count - len(pending)
+        current = session.messages[first:start + summarized_count]
+        return [(m.get("role"), m.get("content")) for m in current] == [(m.get("role"), m.get("content"))
+                                                                         for m in pending]
+
+    def render_message(self, message: Dict) -> str:
+        """
+        Text of a message for the summary prompt: what was said to the user for the assistant messages,
+        the text parts for the others, images are only mentioned.
+        """
+        role = message.get("role", "user")
+        user_interactions = message.get("user_interactions") if role == "assistant" else None
+        if user_interactions:
+            text = "\n".join(str(interaction.get("message", "")) for interaction in user_interactions)
+        else:
+            content = message.get("content")
+            if isinstance(content, list):
+                text = "\n".join(part.get("text", "") if part.get("type") != "image_url" else "[image]"
+                                 for part in content if isinstance(part, dict))
+            else:
+                text = str(content or "")
+        if len(text) > self.max_message_chars:
+            text = text[:self.max_message_chars] + " [...]"
+        return f"[{role}] {text}"
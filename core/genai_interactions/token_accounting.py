@@ -0,0 +1,144 @@
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.genai_interactions.genai_cost_base import GenAICostBase
+from core.genai_interactions.token_counter import TOKENS_PER_IMAGE, TokenCounter
+
+# Dimensions of the usage aggregates
+GROUP_KEYS = ("model", "channel", "action_type")
+# Action type of the completions made outside of an action
+DEFAULT_ACTION_TYPE = "completion"
+
+_current_action_type: contextvars.ContextVar = contextvars.ContextVar("genai_action_type",
+                                                                      default=DEFAULT_ACTION_TYPE)
+
+
+def current_action_type() -> str:
+    return _current_action_type.get()
+
+
+@contextmanager
+def action_type(name: str):
+    """
+    Sets the action type the completions made inside the block are accounted to, including the tasks it starts.
+    """
+    token = _current_action_type.set(name or DEFAULT_ACTION_TYPE)
+    try:
+        yield
+    finally:
+        _current_action_type.reset(token)
+
+
+class UsageTotals:
+    def __init__(self):
+        self.requests = 0
+        self.estimated_requests = 0
+        self.prompt_tk = 0
+        self.completion_tk = 0
+        self.cached_tk = 0
+        self.image_tk = 0
+        self.total_cost = 0.0
+
+    def add(self, cost: GenAICostBase):
+        self.requests += 1
+        self.estimated_requests += 1 if cost.estimated else 0
+        self.prompt_tk += cost.prompt_tk or 0
+        self.completion_tk += cost.completion_tk or 0
+        self.cached_tk += cost.cached_tk or 0
+        self.image_tk += cost.image_tk or 0
+        self.total_cost += cost.total_cost
+
+    def merge(self, other: 'UsageTotals'):
+        for name, value in vars(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "estimated_requests": self.estimated_requests,
+            "prompt_tokens": self.prompt_tk,
+            "completion_tokens": self.completion_tk,
+            "total_tokens": self.prompt_tk + self.completion_tk,
+            "cached_prompt_tokens": self.cached_tk,
+            "image_tokens": self.image_tk,
+            "total_cost": round(self.total_cost, 6)
+        }
+
+
+class TokenAccounting:
+    """
+    Token usage of the completions, aggregated per model, channel and action type.
+    The usage reported by the provider is used when there is one. Otherwise, for example when a provider or an
+    assistant run does not return its usage, the prompt and the completion are counted with the tokenizer of the
+    model. The cached prompt tokens come from the provider and the image tokens are estimated from the images of
+    the prompt, both are part of the prompt tokens.
+    """
+
+    def __init__(self, logger, token_counter: Optional[TokenCounter] = None):
+        self.logger = logger
+        self.token_counter = token_counter or TokenCounter(logger)
+        self._totals: Dict[Tuple[str, str, str], UsageTotals] = {}
+
+    @staticmethod
+    def is_reported(cost: Optional[GenAICostBase]) -> bool:
+        return cost is not None and bool(cost.prompt_tk or cost.completion_tk)
+
+    @staticmethod
+    def count_image_tokens(messages: Optional[List[Dict]]) -> int:
+        images = 0
+        for message in messages or []:
+            content = message.get("content") if isinstance(message, dict) else None
+            if isinstance(content, list):
+                images += sum(1 for part in content if isinstance(part, dict) and part.get("type") == "image_url")
+        return images * TOKENS_PER_IMAGE
+
+    def complete_usage(self, cost: Optional[GenAICostBase], messages: Optional[List[Dict]], completion: Optional[str],
+                       model_name: Optional[str] = None) -> GenAICostBase:
+        """
+        Returns the usage of a completion with its image tokens, counted locally when the provider did not report it.
+        """
+        image_tk = self.count_image_tokens(messages)
+        input_token_price = cost.input_token_price if cost is not None else None
+        output_token_price = cost.output_token_price if cost is not None else None
+        if self.is_reported(cost):
+            return GenAICostBase(total_tk=cost.total_tk, prompt_tk=cost.prompt_tk, completion_tk=cost.completion_tk,
+                                 input_token_price=input_token_price, output_token_price=output_token_price,
+                                 cached_tk=cost.cached_tk or 0, image_tk=min(image_tk, cost.prompt_tk or 0))
+
+        prompt_tk = self.token_counter.count_messages(messages or [], model_name)
+        completion_tk = self.token_counter.count_text(completion or "", model_name)
+        self.logger.info(f"Usage not reported by the provider for {model_name}, counted {prompt_tk} prompt tokens "
+                         f"and {completion_tk} completion tokens")
+        return GenAICostBase(total_tk=prompt_tk + completion_tk, prompt_tk=prompt_tk, completion_tk=completion_tk,
+                             input_token_price=input_token_price, output_token_price=output_token_price,
+                             image_tk=image_tk, estimated=True)
+
+    def record(self, cost: GenAICostBase, model_name: Optional[str], channel_id: Optional[str],
+               action_type_name: Optional[str] = None):
+        key = (model_name or "unknown", channel_id or "unknown", action_type_name or current_action_type())
+        self._totals.setdefault(key, UsageTotals()).add(cost)
+
+    def account(self, cost: Optional[GenAICostBase], messages: Optional[List[Dict]], completion: Optional[str],
+                model_name: Optional[str], channel_id: Optional[str],
+                action_type_name: Optional[str] = None) -> GenAICostBase:
+        """
+        Completes the usage of a completion and adds it to the aggregates, returns the completed usage.
+        """
+        cost = self.complete_usage(cost, messages, completion, model_name)
+        self.record(cost, model_name, channel_id, action_type_name)
+        return cost
+
+    def aggregates(self, group_by: Iterable[str] = GROUP_KEYS) -> List[dict]:
+        """
+        Returns the usage totals grouped by the given dimensions (model, channel, action_type), the most
+        expensive first.
+        """
+        group_by = [key for key in group_by if key in GROUP_KEYS]
+        groups: Dict[Tuple[str, ...], UsageTotals] = {}
+        for key, totals in self._totals.items():
+            dimensions = dict(zip(GROUP_KEYS, key))
+            group = tuple(dimensions[name] for name in group_by)
+            groups.setdefault(group, UsageTotals()).merge(totals)
+        return sorted(({**dict(zip(group_by, group)), **totals.to_dict()} for group, totals in groups.items()),
+                      key=lambda entry: entry["total_cost"], reverse=True)
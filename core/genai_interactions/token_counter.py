@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+
+import tiktoken
+
+# Encoding used for models unknown to tiktoken (Azure deployment names, non OpenAI models)
+DEFAULT_ENCODING = "cl100k_base"
+# Approximate number of characters per token, used when no encoding can be loaded
+CHARS_PER_TOKEN = 4
+# Fixed overhead of a chat message (role and separators) and of the reply priming
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+# Cost of an image sent with detail "high" (1024x1024), the actual cost depends on the image size
+TOKENS_PER_IMAGE = 765
+
+
+class TokenCounter:
+    """
+    Counts the tokens of chat messages with the tokenizer of the model.
+    Encodings are loaded once per model. If an encoding cannot be loaded (unknown model without a
+    local tiktoken cache and no network), the count falls back to an estimate based on the text length.
+    """
+
+    def __init__(self, logger, default_encoding: str = DEFAULT_ENCODING):
+        self.logger = logger
+        self.default_encoding = default_encoding
+        self._encodings: Dict[str, Optional[tiktoken.Encoding]] = {}
+
+    def get_encoding(self, model_name: Optional[str]) -> Optional[tiktoken.Encoding]:
+        key = model_name or ""
+        if key not in self._encodings:
+            self._encodings[key] = self._load_encoding(model_name)
+        return self._encodings[key]
+
+    def _load_encoding(self, model_name: Optional[str]) -> Optional[tiktoken.Encoding]:
+        try:
+            try:
+                return tiktoken.encoding_for_model(model_name) if model_name else tiktoken.get_encoding(
+                    self.default_encoding)
+            except KeyError:
+                return tiktoken.get_encoding(self.default_encoding)
+        except Exception as e:
+            self.logger.warning(f"Tokenizer unavailable for model {model_name}, token counts are estimated: {e}")
+            return None
+
+    def count_text(self, text: str, model_name: Optional[str] = None) -> int:
+        if not text:
+            return 0
+        encoding = self.get_encoding(model_name)
+        if encoding is None:
+            return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_content(self, content, model_name: Optional[str] = None) -> int:
+        if isinstance(content, str):
+            return self.count_text(content, model_name)
+        tokens = 0
+        for part in content or []:
+            if not isinstance(part, dict):
+                tokens += self.count_text(str(part), model_name)
+            elif part.get("type") == "image_url":
+                tokens += TOKENS_PER_IMAGE
+            else:
+                tokens += self.count_text(part.get("text", ""), model_name)
+        return tokens
+
+    def count_message(self, message: Dict, model_name: Optional[str] = None) -> int:
+        return TOKENS_PER_MESSAGE + self.count_content(message.get("content"), model_name)
+
+    def count_messages(self, messages: List[Dict], model_name: Optional[str] = None) -> int:
+        if not messages:
+            return 0
+        return sum(self.count_message(message, model_name) for message in messages) + TOKENS_PER_REPLY
+
+    def truncate_text(self, text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+        """
+        Keeps the first max_tokens tokens of the text.
+        """
+        encoding = self.get_encoding(model_name)
+        if encoding is None:
+            return text[:max_tokens * CHARS_PER_TOKEN]
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,158 @@
+import json
+import re
+from typing import List, Optional
+
+JSON_ACTION_PATTERN = re.compile(r'"ActionName"\s*:\s*"UserInteraction"', re.IGNORECASE)
+JSON_VALUE_PATTERN = re.compile(r'"value"\s*:\s*"', re.IGNORECASE)
+YAML_ACTION_PATTERN = re.compile(r'^\s*(?:-\s*)?ActionName:\s*["\']?UserInteraction["\']?\s*$', re.IGNORECASE | re.MULTILINE)
+YAML_VALUE_PATTERN = re.compile(r'^([ \t]*)value:[ \t]*(.*)$', re.IGNORECASE | re.MULTILINE)
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class UserInteractionStreamParser:
+    """
+    Incremental parser for a streamed [BEGINIMDETECT] completion. It extracts the value of the first
+    UserInteraction action while the completion is still being generated, as soon as its text field is open,
+    so that it can be shown to the user before the whole response is available.
+    The complete response is still parsed the usual way once the stream is over.
+    """
+
+    def __init__(self, conversion_format: str = "json"):
+        self.conversion_format = conversion_format.lower() if conversion_format else "json"
+        self.buffer = ""
+        self.is_complete = False
+        self._value_start: Optional[int] = None
+        self._position = 0
+        self._decoded: List[str] = []
+        # YAML only: indentation of the value key, style of the value and indentation of a block scalar content
+        self._key_indent = 0
+        self._yaml_style: Optional[str] = None
+        self._content_indent: Optional[int] = None
+        self._block_end: Optional[int] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._value_start is not None
+
+    @property
+    def value(self) -> Optional[str]:
+        if not self.is_open:
+            return None
+        if self.conversion_format == "yaml" and self._yaml_style == "block":
+            return self._block_value()
+        # Some models double escape the new lines, the same fix is applied on the complete response
+        return "".join(self._decoded).replace("\\n", "\n")
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Adds a chunk of the completion and returns the value of the UserInteraction decoded so far,
+        or None while its text field is not open yet.
+        """
+        if not chunk:
+            return self.value
+        self.buffer += chunk
+        if self.is_complete:
+            return self.value
+        if not self.is_open:
+            self._find_value_start()
+        if self.is_open:
+            if self.conversion_format == "yaml" and self._yaml_style != "quoted":
+                self._parse_yaml_value()
+            else:
+                self._decode_json_string()
+        return self.value
+
+    def _find_value_start(self):
+        if self.conversion_format == "yaml":
+            action = YAML_ACTION_PATTERN.search(self.buffer)
+            if not action:
+                return
+            value = YAML_VALUE_PATTERN.search(self.buffer, action.end())
+            # The whole line is needed to know the style of the value
+            if not value or '\n' not in self.buffer[value.end():]:
+                return
+            self._key_indent = len(value.group(1))
+            inline_value = value.group(2).strip()
+            if inline_value[:1] in ('|', '>'):
+                self._yaml_style = "block"
+                self._value_start = self.buffer.index('\n', value.end()) + 1
+            elif inline_value.startswith('"'):
+                self._yaml_style = "quoted"
+                self._value_start = value.start(2) + value.group(2).index('"') + 1
+            else:
+                self._yaml_style = "plain"
+                self._value_start = value.start(2)
+            self._position = self._value_start
+            return
+
+        action = JSON_ACTION_PATTERN.search(self.buffer)
+        if not action:
+            return
+        value = JSON_VALUE_PATTERN.search(self.buffer, action.end())
+        if value:
+            self._value_start = self._position = value.end()
+
+    def _decode_json_string(self):
+        buffer = self.buffer
+        while self._position < len(buffer):
+            char = buffer[self._position]
+            if char == '"':
+                self.is_complete = True
+                return
+            if char != '\\':
+                self._decoded.append(char)
+                self._position += 1
+                continue
+            # Escape sequences are decoded once they are complete
+            if self._position + 1 >= len(buffer):
+                return
+            escaped = buffer[self._position + 1]
+            if escaped == 'u':
+                hex_digits = buffer[self._position + 2:self._position + 6]
+                if len(hex_digits) < 4:
+                    return
+                try:
+                    self._decoded.append(json.loads(f'"\\u{hex_digits}"'))
+                except json.JSONDecodeError:
+                    self._decoded.append(hex_digits)
+                self._position += 6
+            else:
+                self._decoded.append(JSON_ESCAPES.get(escaped, escaped))
+                self._position += 2
+
+    def _parse_yaml_value(self):
+        if self._yaml_style == "plain":
+            end = self.buffer.find('\n', self._value_start)
+            raw = self.buffer[self._value_start:] if end == -1 else self.buffer[self._value_start:end]
+            self._decoded = [raw.strip().strip("'")]
+            self.is_complete = end != -1
+            return
+
+        # Block scalar: the content ends with the first line indented like the value key or less
+        lines = self.buffer[self._value_start:].split('\n')
+        for index, line in enumerate(lines):
+            if not line.strip():
+                continue
+            indent = len(line) - len(line.lstrip())
+            is_last_line = index == len(lines) - 1
+            if indent <= self._key_indent or line.strip().startswith("[ENDIMDETECT]"):
+                self._block_end = self._value_start + sum(len(previous) + 1 for previous in lines[:index])
+                self.is_complete = True
+                return
+            if self._content_indent is None and not is_last_line:
+                self._content_indent = indent
+
+    def _block_value(self) -> str:
+        content = self.buffer[self._value_start:self._block_end]
+        lines = content.split('\n')
+        if not self.is_complete and lines:
+            # A partial last line is only shown once it is known to belong to the value
+            last_line = lines[-1]
+            last_indent = len(last_line) - len(last_line.lstrip())
+            if last_line.strip() and last_indent <= self._key_indent:
+                lines = lines[:-1]
+        indent = self._content_indent
+        if indent is None:
+            non_empty = [line for line in lines if line.strip()]
+            indent = min((len(line) - len(line.lstrip()) for line in non_empty), default=0)
+        return "\n".join(line[indent:] for line in lines).strip('\n')
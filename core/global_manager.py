@@ -16,6 +16,10 @@ from core.backend.session_manager_plugin_base import SessionManagerPluginBase
 from core.event_processing.interaction_queue_manager import (
     InteractionQueueManager,
 )
+from core.event_processing.processing_coordinator import (
+    BackendProcessingStateStore,
+    ProcessingCoordinator,
+)
 from core.genai_interactions.genai_interactions_image_generator_dispatcher import (
     GenaiInteractionsImageGeneratorDispatcher,
 )
@@ -26,6 +30,7 @@ from core.genai_interactions.genai_interactions_text_dispatcher import (
     GenaiInteractionsTextDispatcher,
 )
 from core.genai_interactions.genai_vectorsearch_dispatcher import GenaiVectorsearch
+from core.genai_interactions.token_accounting import TokenAccounting
 from core.user_interactions.user_interactions_dispatcher import (
     UserInteractionsDispatcher,
 )
@@ -42,6 +47,7 @@ from utils.config_manager.config_manager import ConfigManager
 from utils.config_manager.config_model import BotConfig
 from utils.logging.logger_loader import setup_logger_and_tracer
 from utils.prompt_manager.prompt_manager import PromptManager
+from utils.web_content_fetcher.web_content_fetcher import WebContentFetcher
 
 
 class GlobalManager:
@@ -71,6 +77,10 @@ class GlobalManager:
         self.user_interactions_dispatcher = UserInteractionsDispatcher(self)
         self.user_interactions_behavior_dispatcher = UserInteractionsBehaviorsDispatcher(self)
         self.session_manager_dispatcher = SessionManagerDispatcher(self)
+        self.web_content_fetcher = WebContentFetcher(self)
+        processing_state_store = BackendProcessingStateStore(self) if self.bot_config.PERSIST_PROCESSING_STATE else None
+        self.processing_coordinator = ProcessingCoordinator(self, store=processing_state_store)
+        self.token_accounting = TokenAccounting(self.logger)
 
         self.logger.info("Loading plugins...")
         self.plugin_manager.load_plugins()
@@ -0,0 +1,84 @@
+import time
+from typing import Optional
+
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+
+class MessageStream:
+    """
+    A message shown progressively in the thread of an event while it is being generated.
+    The message is posted with its first text, then edited at most once per update interval
+    so that the platform rate limits are respected. The last text is always applied by finalize.
+    """
+
+    def __init__(self, dispatcher, event: IncomingNotificationDataBase, update_interval: float):
+        self.dispatcher = dispatcher
+        self.logger = dispatcher.logger
+        self.event = event
+        self.update_interval = update_interval
+        self.message_ref = None
+        self.failed = False
+        self.updates_count = 0
+        self._last_text: Optional[str] = None
+        self._last_update_time = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self.message_ref is not None
+
+    async def update(self, text: Optional[str]):
+        """
+        Shows the text generated so far. Updates received within the update interval are skipped,
+        only the latest text matters.
+        """
+        if self.failed or not text or not text.strip() or text == self._last_text:
+            return
+        if self.started and time.monotonic() - self._last_update_time < self.update_interval:
+            return
+        await self._apply(text, is_final=False)
+
+    async def finalize(self, text: Optional[str]) -> bool:
+        """
+        Applies the complete text. Returns True if the message has been fully delivered through the stream,
+        in which case it must not be sent again.
+        """
+        if not self.started:
+            return False
+        if self.failed or not text:
+            await self.discard()
+            return False
+        await self._apply(text, is_final=True)
+        if self.failed:
+            return False
+        await self.dispatcher.record_interaction(self.event, text, action_ref="user_interaction")
+        return True
+
+    async def discard(self):
+        """
+        Removes the streamed message, used when the message finally has to be delivered differently.
+        """
+        if not self.started:
+            return
+        try:
+            await self.dispatcher.delete_message(self.event, self.message_ref)
+        except Exception as e:
+            self.logger.error(f"Error deleting streamed message: {e}")
+        self.message_ref = None
+
+    async def _apply(self, text: str, is_final: bool):
+        try:
+            if not self.started:
+                self.message_ref = await self.dispatcher.post_updatable_message(text, self.event)
+                if self.message_ref is None:
+                    self.failed = True
+                    return
+            elif text != self._last_text or is_final:
+                await self.dispatcher.update_message(text, self.event, self.message_ref, is_final=is_final)
+            self._last_text = text
+            self._last_update_time = time.monotonic()
+            self.updates_count += 1
+        except Exception as e:
+            self.logger.error(f"Error streaming message, falling back to a regular message: {e}")
+            self.failed = True
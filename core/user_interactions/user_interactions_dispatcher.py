@@ -193,39 +193,8 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
         try:
             if event is not None:
                 if is_replayed == False:
-                    # Get the session
-                    session = await self.global_manager.session_manager_dispatcher.get_or_create_session(
-                        event.channel_id, event.thread_id, enriched=True
-                    )
-
-                    interaction = {
-                        "message": message,
-                        "message_type": message_type.value,
-                        "timestamp": datetime.now().isoformat(),
-                        "action_ref": action_ref
-                    }
-
-                    # Search for the most recent assistant message
-                    message_index = None
-                    for idx in range(len(session.messages) - 1, -1, -1):
-                        if session.messages[idx].get("role") == "assistant":
-                            message_index = idx
-                            break
-
-                    if message_index is not None:
-                        if is_internal:
-                            # Add the interaction to mind_interactions in the correct assistant message
-                            await self.session_manager_dispatcher.add_mind_interaction_to_message(session=session,
-                                                                                                  message_index=message_index,
-                                                                                                  interaction=interaction)
-                        else:
-                            # Add the interaction to user_interactions in the correct assistant message
-                            await self.session_manager_dispatcher.add_user_interaction_to_message(session=session,
-                                                                                                  message_index=message_index,
-                                                                                                  interaction=interaction)
-
-                    # Save the session after adding the interaction
-                    await self.global_manager.session_manager_dispatcher.save_session(session)
+                    await self.record_interaction(event, message, message_type, is_internal=is_internal,
+                                                  action_ref=action_ref)
 
                 plugin_name = event.origin_plugin_name
                 self.logger.debug(f"Event provided with origin_plugin_name: {plugin_name}")
@@ -263,6 +232,80 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
         finally:
             self.logger.debug("Exiting send_message method")
 
+    async def record_interaction(self, event: IncomingNotificationDataBase, message, message_type=MessageType.TEXT,
+                                 is_internal=False, action_ref=None):
+        """
+        Records a message sent to the user (or an internal message) in the last assistant message of the session.
+        """
+        # Get the session
+        session = await self.global_manager.session_manager_dispatcher.get_or_create_session(
+            event.channel_id, event.thread_id, enriched=True
+        )
+
+        interaction = {
+            "message": message,
+            "message_type": message_type.value,
+            "timestamp": datetime.now().isoformat(),
+            "action_ref": action_ref
+        }
+
+        # Search for the most recent assistant message
+        message_index = None
+        for idx in range(len(session.messages) - 1, -1, -1):
+            if session.messages[idx].get("role") == "assistant":
+                message_index = idx
+                break
+
+        if message_index is not None:
+            if is_internal:
+                # Add the interaction to mind_interactions in the correct assistant message
+                await self.session_manager_dispatcher.add_mind_interaction_to_message(session=session,
+                                                                                      message_index=message_index,
+                                                                                      interaction=interaction)
+            else:
+                # Add the interaction to user_interactions in the correct assistant message
+                await self.session_manager_dispatcher.add_user_interaction_to_message(session=session,
+                                                                                      message_index=message_index,
+                                                                                      interaction=interaction)
+
+        # Save the session after adding the interaction
+        await self.global_manager.session_manager_dispatcher.save_session(session)
+
+    def supports_message_updates(self, plugin_name=None) -> bool:
+        plugin: UserInteractionsPluginBase = self.get_plugin(plugin_name)
+        return plugin.supports_message_updates
+
+    def message_update_interval(self, plugin_name=None) -> float:
+        plugin: UserInteractionsPluginBase = self.get_plugin(plugin_name)
+        return plugin.message_update_interval
+
+    def open_message_stream(self, event: IncomingNotificationDataBase):
+        """
+        Returns a MessageStream to progressively show a message in the thread of the event,
+        or None if the plugin of the event cannot edit its messages.
+        """
+        from core.user_interactions.message_stream import MessageStream
+        plugin: UserInteractionsPluginBase = self.get_plugin(event.origin_plugin_name)
+        if plugin is None or not plugin.supports_message_updates:
+            return None
+        return MessageStream(self, event, plugin.message_update_interval)
+
+    async def post_updatable_message(self, message, event: IncomingNotificationDataBase, plugin_name=None):
+        plugin_name = event.origin_plugin_name if event is not None else plugin_name
+        plugin: UserInteractionsPluginBase = self.get_plugin(plugin_name)
+        return await plugin.post_updatable_message(message=message, event=event)
+
+    async def update_message(self, message, event: IncomingNotificationDataBase, message_ref, is_final=False,
+                             plugin_name=None):
+        plugin_name = event.origin_plugin_name if event is not None else plugin_name
+        plugin: UserInteractionsPluginBase = self.get_plugin(plugin_name)
+        return await plugin.update_message(message=message, event=event, message_ref=message_ref, is_final=is_final)
+
+    async def delete_message(self, event: IncomingNotificationDataBase, message_ref, plugin_name=None):
+        plugin_name = event.origin_plugin_name if event is not None else plugin_name
+        plugin: UserInteractionsPluginBase = self.get_plugin(plugin_name)
+        return await plugin.delete_message(event=event, message_ref=message_ref)
+
     async def upload_file(self, event: IncomingNotificationDataBase, file_content, filename, title, is_internal=False,
                           plugin_name=None, is_replayed=False, background_tasks: BackgroundTasks = None):
         if event is not None:
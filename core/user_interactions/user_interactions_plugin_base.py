@@ -142,6 +142,38 @@ class UserInteractionsPluginBase(PluginBase, ABC):
         """
         raise NotImplementedError
 
+    @property
+    def supports_message_updates(self) -> bool:
+        """
+        Whether the plugin can edit a message after posting it, which is required to stream completions.
+        """
+        return False
+
+    @property
+    def message_update_interval(self) -> float:
+        """
+        Minimum number of seconds between two edits of the same message.
+        """
+        return 1.0
+
+    async def post_updatable_message(self, message, event: IncomingNotificationDataBase):
+        """
+        Posts a text message that can be edited afterwards and returns its reference, or None on failure.
+        """
+        raise NotImplementedError
+
+    async def update_message(self, message, event: IncomingNotificationDataBase, message_ref, is_final=False):
+        """
+        Replaces the content of a message posted with post_updatable_message.
+        """
+        raise NotImplementedError
+
+    async def delete_message(self, event: IncomingNotificationDataBase, message_ref):
+        """
+        Deletes a message posted with post_updatable_message.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def get_bot_id(self) -> str:
         """
@@ -1,9 +1,11 @@
+import asyncio
 import copy
 import os
 import re
+import time
+from collections import OrderedDict
 
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
 
 from core.action_interactions.action_base import ActionBase
 from core.action_interactions.action_input import ActionInput
@@ -12,11 +14,12 @@ from core.user_interactions.incoming_notification_data_base import (
 )
 from core.user_interactions.message_type import MessageType
 
-
 # IMPORTANT : Define an environment variable for your subscription ID called BING_SEARCH_SUBSCRIPTION_KEY
 
 class BingSearch(ActionBase):
     REQUIRED_PARAMETERS = ['query', "result_number", "from_snippet", "user_input", "urls"]
+    parallel_safe = True
+    batch_follow_up = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
@@ -27,10 +30,20 @@ class BingSearch(ActionBase):
         self.genai_interactions_text_dispatcher = self.global_manager.genai_interactions_text_dispatcher
         self.backend_internal_data_processing_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
 
+        self.web_content_fetcher = self.global_manager.web_content_fetcher
+
         self.logger = self.global_manager.logger
         self.subscription_key = os.getenv("BING_SEARCH_SUBSCRIPTION_KEY")
         self.search_url = "https://api.bing.microsoft.com/v7.0/search"
 
+        bot_config = self.global_manager.bot_config
+        self.cache_ttl = bot_config.BING_SEARCH_CACHE_TTL
+        self.cache_max_entries = bot_config.BING_SEARCH_CACHE_MAX_ENTRIES
+        self.deadline = bot_config.BING_SEARCH_DEADLINE
+        self.max_page_tokens = bot_config.BING_SEARCH_MAX_PAGE_TOKENS
+        # Search results per query with the time they were received
+        self._search_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
     async def execute(self, action_input: ActionInput, event: IncomingNotificationDataBase):
         await self.user_interactions_dispatcher.send_message(event=event,
                                                              message="Looking for more info on the web please wait...",
@@ -65,28 +78,38 @@ class BingSearch(ActionBase):
         return bool(from_snippet)
 
     async def perform_search(self, query, event):
+        cached = self._search_cache.get(query)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            self._search_cache.move_to_end(query)
+            self.logger.debug(f"Bing search cache hit for {query}")
+            return cached[1]
+
         headers = {"Ocp-Apim-Subscription-Key": self.subscription_key}
-        params = {"q": query, "textDecorations": True, "textFormat": "Raw"}
+        params = {"q": query, "textDecorations": "true", "textFormat": "Raw"}
         try:
-            response = requests.get(self.search_url, headers=headers, params=params)
-            response.raise_for_status()
-            return response.json()
+            search_results = await self.web_content_fetcher.fetch_json(self.search_url, params=params, headers=headers)
         except Exception as e:
             await self.handle_search_error(e, event)
             return None
 
+        self._search_cache[query] = (time.monotonic(), search_results)
+        self._search_cache.move_to_end(query)
+        while len(self._search_cache) > self.cache_max_entries:
+            self._search_cache.popitem(last=False)
+        return search_results
+
     async def handle_search_error(self, error, event):
         message = "An unknown error occurred."
-        if isinstance(error, requests.exceptions.HTTPError):
-            if error.response.status_code == 403:
+        if isinstance(error, aiohttp.ClientResponseError):
+            if error.status == 403:
                 message = f"403 Forbidden error for URL: {self.search_url}. Skipping this URL."
-            elif error.response.status_code == 401:
+            elif error.status == 401:
                 message = f"401 Unauthorized error for URL: {self.search_url}. Permission denied."
             else:
-                message = f"HTTPError for URL: {self.search_url}. Status code: {error.response.status_code}."
-        elif isinstance(error, requests.exceptions.ConnectionError):
+                message = f"HTTPError for URL: {self.search_url}. Status code: {error.status}."
+        elif isinstance(error, aiohttp.ClientConnectionError):
             message = f"ConnectionError for URL: {self.search_url}. Could not connect to the server."
-        elif isinstance(error, requests.exceptions.Timeout):
+        elif isinstance(error, asyncio.TimeoutError):
             raise error
         self.logger.error(message)
         await self.user_interactions_dispatcher.send_message(event=event, message=message,
@@ -110,7 +133,6 @@ class BingSearch(ActionBase):
 
     async def process_urls(self, urls, event: IncomingNotificationDataBase):
         event_copy = copy.deepcopy(event)
-        urls_msg = []
         urls = urls.split(',')
         for url in urls:
             if not self.is_valid_url(url):
@@ -119,10 +141,10 @@ class BingSearch(ActionBase):
                                                                      message_type=MessageType.COMMENT,
                                                                      is_internal=False, action_ref="bing_search")
                 return
-            else:
-                page_content = await self.get_page_content(url)
-                page_content = self.cleanup_webcontent(page_content)
-                urls_msg.append(f"Here is the content of url {url} : {page_content}\n")
+
+        page_contents = await self.fetch_pages(urls)
+        urls_msg = [f"Here is the content of url {url} : {self.cleanup_webcontent(page_content or '')}\n"
+                    for url, page_content in zip(urls, page_contents)]
 
         event_copy.images = []
         event_copy.files_content = []
@@ -137,18 +159,16 @@ class BingSearch(ActionBase):
             event_copy.text = "Sorry the web content request returned no result. Please try rephrasing your request."
             await self.genai_interactions_text_dispatcher.trigger_genai(event=event_copy)
 
-    async def get_page_content(self, url):
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return soup.get_text()
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"An unexpected error occurred for URL: {url}. Error: {str(e)}")
-            return None
-        except Exception as e:
-            self.logger.error(f"An unexpected error occurred for URL: {url}. Error: {str(e)}")
-            return None
+    async def fetch_pages(self, urls) -> list:
+        """
+        Fetches the pages concurrently with the shared web content fetcher, the pages not fetched within
+        BING_SEARCH_DEADLINE seconds are given up. Returns the contents in the order of the urls, truncated to
+        BING_SEARCH_MAX_PAGE_TOKENS tokens, None for the pages that could not be fetched.
+        """
+        token_counter = self.global_manager.token_accounting.token_counter
+        texts = await self.web_content_fetcher.fetch_many(urls, self.deadline)
+        return [token_counter.truncate_text(text, self.max_page_tokens) if text is not None else None
+                for text in texts]
 
     def is_valid_url(self, url):
         regex = re.compile(
@@ -162,14 +182,11 @@ class BingSearch(ActionBase):
         return re.match(regex, url) is not None
 
     async def get_webpages_content(self, result_urls, event: IncomingNotificationDataBase):
-        # Initialize a list to store the page contents
+        # Fetch the pages concurrently, keeping each content with its url
         page_contents = []
-
-        # Iterate over the result URLs
-        for url in result_urls:
-            page_content = await self.get_page_content(url)
+        for url, page_content in zip(result_urls, await self.fetch_pages(result_urls)):
             if page_content is not None:
-                page_contents.append(page_content)
+                page_contents.append((url, page_content))
             else:
                 await self.user_interactions_dispatcher.send_message(
                     event=event,
@@ -203,9 +220,9 @@ class BingSearch(ActionBase):
         page_messages.append(f"Here is a text content from the {len(page_contents)} web page(s) we analyzed:")
 
         # Iterate over the page contents
-        for i, page_content in enumerate(page_contents):
+        for url, page_content in page_contents:
             # Create a message for this page
-            page_message = f"{result_urls[i]} {page_content}"
+            page_message = f"{url} {page_content}"
 
             # Add the page message to the list
             page_messages.append(page_message)
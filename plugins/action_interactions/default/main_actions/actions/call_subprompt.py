@@ -2,6 +2,10 @@ import copy
 
 from core.action_interactions.action_base import ActionBase
 from core.action_interactions.action_input import ActionInput
+from core.genai_interactions.concurrency_limiter import (
+    RequestPriority,
+    request_priority,
+)
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
@@ -14,6 +18,7 @@ from utils.prompt_manager.prompt_manager import PromptManager
 
 class CallSubprompt(ActionBase):
     REQUIRED_PARAMETERS = ['value']
+    batch_follow_up = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
@@ -79,7 +84,8 @@ class CallSubprompt(ActionBase):
                     self.logger.info(f"launching completion on updated system prompt {message_type}")
                     event_copy.text = f"Here's updated instruction that you must consider as system instruction: {subprompt}."
 
-                await self.genai_interactions_text_dispatcher.trigger_genai(event=event_copy)
+                with request_priority(RequestPriority.SUBPROMPT):
+                    await self.genai_interactions_text_dispatcher.trigger_genai(event=event_copy)
             else:
                 self.logger.warning(f"subprompt [{message_type}] not found")
                 event_copy.text = "No subprompt found, explain to the user the situation, if you can try to help him rephrase its request, or to contact your administrator."
@@ -17,14 +17,9 @@ class ChainOfThoughts(ActionBase):
         self.user_interactions_dispatcher = self.global_manager.user_interactions_dispatcher
         self.genai_interactions_text_dispatcher = self.global_manager.genai_interactions_text_dispatcher
         self.logger = self.global_manager.logger
-        self.accumulated_responses = []  # To accumulate all step responses
 
     async def execute(self, action_input: ActionInput, event: IncomingNotificationDataBase):
         try:
-            # Deep copy of the event and action input for processing
-            self.event: IncomingNotificationDataBase = copy.deepcopy(event)
-            self.action_input: ActionInput = action_input
-
             # Extract task and plan parameters
             task = action_input.parameters.get('task')
             plan = action_input.parameters.get('plan')
@@ -46,13 +41,15 @@ class ChainOfThoughts(ActionBase):
             for idx, step in enumerate(plan):
                 step_message = f"Executing Step {idx + 1}: {step}"
 
-                # Update the event with the step as the new prompt
-                self.event.text = step
-                self.event.files_content = []
-                self.event.images = []
+                # Deep copy of the event with the step as the new prompt, kept local since the action instance
+                # is shared by all the conversations
+                step_event: IncomingNotificationDataBase = copy.deepcopy(event)
+                step_event.text = step
+                step_event.files_content = []
+                step_event.images = []
 
                 # Trigger GenAI for this step using genai_interactions_text_dispatcher to generate a detailed response
-                await self.genai_interactions_text_dispatcher.trigger_genai(event=self.event)
+                await self.genai_interactions_text_dispatcher.trigger_genai(event=step_event)
 
         except Exception as e:
             self.logger.error(f"An error occurred: {e}")
@@ -3,9 +3,6 @@ import re
 import traceback
 import urllib.parse
 
-import aiohttp
-from bs4 import BeautifulSoup
-
 from core.action_interactions.action_base import ActionBase
 from core.action_interactions.action_input import ActionInput
 from core.backend.backend_internal_data_processing_dispatcher import (
@@ -21,10 +18,13 @@ from core.user_interactions.message_type import MessageType
 from core.user_interactions.user_interactions_dispatcher import (
     UserInteractionsDispatcher,
 )
+from utils.web_content_fetcher.web_content_fetcher import WebContentFetcher
 
 
 class FetchWebContent(ActionBase):
     REQUIRED_PARAMETERS = ['url']
+    parallel_safe = True
+    batch_follow_up = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
@@ -36,6 +36,8 @@ class FetchWebContent(ActionBase):
         self.user_interaction_dispatcher: UserInteractionsDispatcher = self.global_manager.user_interactions_dispatcher
         self.genai_interactions_text_dispatcher: GenaiInteractionsTextDispatcher = self.global_manager.genai_interactions_text_dispatcher
         self.backend_internal_data_processing_dispatcher: BackendInternalDataProcessingDispatcher = self.global_manager.backend_internal_data_processing_dispatcher
+        self.web_content_fetcher: WebContentFetcher = self.global_manager.web_content_fetcher
+        self.fetch_deadline = self.global_manager.bot_config.WEB_CONTENT_FETCH_DEADLINE
 
     async def execute(self, action_input: ActionInput, event: IncomingNotificationDataBase):
 
@@ -53,18 +55,22 @@ class FetchWebContent(ActionBase):
                                                                     action_ref="fetch_web_content")
                 return
 
-            urls = urls.split(',')  # split the urls by comma
+            urls = [urllib.parse.unquote(url.strip()) for url in urls.split(',') if url.strip()]  # decode the urls
             all_content = ""  # variable to store all content
+            failed_urls = []
+
+            for url, content in zip(urls, await self.web_content_fetcher.fetch_many(urls, self.fetch_deadline)):
+                if content is None:
+                    failed_urls.append(url)
+                    continue
+                cleaned_content = self.cleanup_webcontent(content)  # clean the content
+                all_content += f'Here is the content of the target url, use it to answer to the user as he won t see this response: {url}: {cleaned_content}\n'  # add cleaned content to all_content
 
-            for url in urls:
-                url = urllib.parse.unquote(url.strip())  # decode the url
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        text = await response.text()
-                        soup = BeautifulSoup(text, 'html.parser')
-                        content = soup.get_text()
-                        cleaned_content = self.cleanup_webcontent(content)  # clean the content
-                        all_content += f'Here is the content of the target url, use it to answer to the user as he won t see this response: {url}: {cleaned_content}\n'  # add cleaned content to all_content
+            if failed_urls:
+                await self.user_interaction_dispatcher.send_message(
+                    event=event, message=f"Could not fetch the content of {', '.join(failed_urls)}",
+                    message_type=MessageType.COMMENT, is_internal=True)
+                all_content += f"The content of these urls could not be retrieved: {', '.join(failed_urls)}\n"
 
             event_copy = copy.deepcopy(event)
             event_copy.images = []
@@ -2,14 +2,24 @@ import re
 
 from core.action_interactions.action_base import ActionBase
 from core.action_interactions.action_input import ActionInput
+from core.event_processing.background_task_manager import BackgroundTaskManager
+from core.genai_interactions.genai_interactions_image_generator_dispatcher import (
+    ImageGenerationError,
+)
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
 from core.user_interactions.message_type import MessageType
 
+GENERATING_MESSAGE = "Generating your image please wait..."
+READY_MESSAGE = "Your image is ready"
+# Longest prompt used as the title of the uploaded image
+MAX_TITLE_LENGTH = 100
+
 
 class GenerateImage(ActionBase):
     REQUIRED_PARAMETERS = ['prompt', 'size']
+    parallel_safe = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
@@ -22,49 +32,77 @@ class GenerateImage(ActionBase):
         self.genai_interactions_text_dispatcher = self.global_manager.genai_interactions_text_dispatcher
         self.backend_internal_data_processing_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
         self.genai_image_generator_dispatcher = self.global_manager.genai_image_generator_dispatcher
+        self.background_tasks = BackgroundTaskManager(
+            self.logger, self.global_manager.bot_config.GENAI_IMAGE_MAX_PENDING_GENERATIONS, name="generate_image")
 
     async def execute(self, action_input: ActionInput, event: IncomingNotificationDataBase):
         try:
-            await self.user_interaction_dispatcher.send_message(event=event,
-                                                                message="Generating your image please wait...",
-                                                                message_type=MessageType.COMMENT, is_internal=False)
-            target = action_input.parameters.get('target', '')
-            url = await self.genai_image_generator_dispatcher.handle_action(action_input)
-            if url:
-                if "Error" in url:  # Check if the returned value is an error message
-                    self.logger.error(f"An error occurred: {url}")
-                    match = re.search(r"'message': '(.*?)'", url)
-                    if match:
-                        extracted_message = match.group(1)
-                    else:
-                        extracted_message = url
-                    await self.user_interaction_dispatcher.send_message(event=event,
-                                                                        message=f"Image generation failed: {extracted_message}",
-                                                                        action_ref="generate_image")
-                    await self.user_interaction_dispatcher.send_message(event=event,
-                                                                        message=f"Image generation failed: {url}",
-                                                                        is_internal=True)
-                elif self.is_valid_url(url):  # Check if the returned value is a valid URL
-                    if (target == "slack"):
-                        await self.user_interaction_dispatcher.send_message(event=event, message=f"<{url}|Image>")
-                    else:
-                        await self.user_interaction_dispatcher.send_message(event=event, message=f"{url}")
-                else:
-                    await self.user_interaction_dispatcher.send_message(event=event,
-                                                                        message=f"Image generation failed: Invalid URL {url}",
-                                                                        action_ref="generate_image")
-                    await self.user_interaction_dispatcher.send_message(event=event,
-                                                                        message=f"Image generation failed: Invalid URL {url}",
-                                                                        is_internal=True)
-            else:
-                await self.user_interaction_dispatcher.send_message(event=event, message="Image generation failed",
-                                                                    action_ref="generate_image")
-                await self.user_interaction_dispatcher.send_message(event=event, message="Image generation failed",
-                                                                    is_internal=True)
+            message_ref = None
+            if self.supports_message_updates(event):
+                message_ref = await self.user_interaction_dispatcher.post_updatable_message(
+                    message=GENERATING_MESSAGE, event=event)
+            if message_ref is None:
+                await self.user_interaction_dispatcher.send_message(event=event, message=GENERATING_MESSAGE,
+                                                                    message_type=MessageType.COMMENT,
+                                                                    is_internal=False)
+
+            # The image is generated and uploaded in the background so the conversation goes on meanwhile,
+            # beyond the pending limit the action waits for it
+            delivery = self.deliver_image(action_input, event, message_ref)
+            if not self.background_tasks.schedule(delivery, name=f"generate_image-{event.channel_id}"):
+                await self.deliver_image(action_input, event, message_ref)
 
         except Exception as e:
             self.logger.error(f"An error occurred: {e}")
 
+    def supports_message_updates(self, event: IncomingNotificationDataBase) -> bool:
+        plugin = self.user_interaction_dispatcher.get_plugin(event.origin_plugin_name)
+        return getattr(plugin, "supports_message_updates", False) is True
+
+    async def deliver_image(self, action_input: ActionInput, event: IncomingNotificationDataBase, message_ref=None):
+        try:
+            image = await self.genai_image_generator_dispatcher.generate_image(action_input)
+            if image.cached:
+                self.logger.info(f"Generated image {image.key} reused from cache")
+
+            if image.content is not None:
+                prompt = str(action_input.parameters.get('prompt', ''))
+                await self.user_interaction_dispatcher.upload_file(event=event, file_content=image.content,
+                                                                   filename=f"image-{image.key[:12]}.png",
+                                                                   title=prompt[:MAX_TITLE_LENGTH] or "Image")
+            elif self.is_valid_url(image.url):
+                # The image could not be downloaded, the temporary url of the provider is sent instead
+                target = action_input.parameters.get('target', '')
+                if (target == "slack"):
+                    await self.user_interaction_dispatcher.send_message(event=event, message=f"<{image.url}|Image>")
+                else:
+                    await self.user_interaction_dispatcher.send_message(event=event, message=f"{image.url}")
+            else:
+                raise ImageGenerationError(f"Invalid URL {image.url}")
+        except Exception as e:
+            await self.report_failure(event, message_ref, str(e))
+            return
+
+        if message_ref is not None:
+            await self.user_interaction_dispatcher.update_message(message=READY_MESSAGE, event=event,
+                                                                  message_ref=message_ref, is_final=True)
+
+    async def report_failure(self, event: IncomingNotificationDataBase, message_ref, error: str = None):
+        self.logger.error(f"An error occurred: {error}")
+        message = internal_message = "Image generation failed"
+        if error:
+            match = re.search(r"'message': '(.*?)'", error)
+            message = f"Image generation failed: {match.group(1) if match else error}"
+            internal_message = f"Image generation failed: {error}"
+
+        if message_ref is not None:
+            await self.user_interaction_dispatcher.update_message(message=message, event=event,
+                                                                  message_ref=message_ref, is_final=True)
+        else:
+            await self.user_interaction_dispatcher.send_message(event=event, message=message,
+                                                                action_ref="generate_image")
+        await self.user_interaction_dispatcher.send_message(event=event, message=internal_message, is_internal=True)
+
     def is_valid_url(self, url):
         regex = re.compile(
             r'^(?:http|ftp)s?://'  # http:// or https://
@@ -10,6 +10,7 @@ from core.user_interactions.message_type import MessageType
 
 class GetPreviousFeedback(ActionBase):
     REQUIRED_PARAMETERS = ['value']
+    batch_follow_up = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
@@ -1,4 +1,6 @@
-import copy
+import asyncio
+import json
+import os
 import uuid
 from datetime import datetime
 
@@ -7,6 +9,7 @@ from core.action_interactions.action_input import ActionInput
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
+from core.user_interactions.message_type import MessageType
 from core.user_interactions.user_interactions_dispatcher import (
     UserInteractionsDispatcher,
 )
@@ -14,6 +17,7 @@ from core.user_interactions.user_interactions_dispatcher import (
 
 class LongText(ActionBase):
     REQUIRED_PARAMETERS = ['value', 'is_finished']
+    batch_follow_up = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
@@ -28,9 +32,6 @@ class LongText(ActionBase):
 
     async def execute(self, action_input: ActionInput, event: IncomingNotificationDataBase):
         try:
-            self.event: IncomingNotificationDataBase = copy.deepcopy(event)
-            self.action_input: ActionInput = action_input
-
             self.concatenate_folder = self.backend_internal_data_processing_dispatcher.concatenate
             self.sessions_folder = self.backend_internal_data_processing_dispatcher.sessions
 
@@ -52,13 +53,43 @@ class LongText(ActionBase):
             self.logger.error(f"An error occurred: {str(e)}")
             return False
 
+    @staticmethod
+    def manifest_name(blob_name: str) -> str:
+        return f"{os.path.splitext(blob_name)[0]}.manifest.json"
+
+    @staticmethod
+    def chunk_name(blob_name: str, index: int) -> str:
+        return f"{os.path.splitext(blob_name)[0]}.{index:05d}.txt"
+
+    async def _read_manifest(self, blob_name):
+        content = await self.backend_internal_data_processing_dispatcher.read_data_content(
+            self.concatenate_folder, self.manifest_name(blob_name))
+        return json.loads(content) if content else {"chunks": 0, "characters": 0}
+
+    async def _append_chunk(self, value, blob_name):
+        """
+        Stores the chunk in its own file and updates the small manifest of the document, the chunks already
+        stored are neither read nor written again.
+        """
+        manifest = await self._read_manifest(blob_name)
+        index = manifest["chunks"] + 1
+        await self.backend_internal_data_processing_dispatcher.write_data_content(
+            self.concatenate_folder, self.chunk_name(blob_name, index), value)
+        manifest = {"chunks": index, "characters": manifest["characters"] + len(value)}
+        await self.backend_internal_data_processing_dispatcher.write_data_content(
+            self.concatenate_folder, self.manifest_name(blob_name), json.dumps(manifest))
+        return manifest
+
+    async def _report_progress(self, event, manifest, is_finished=False):
+        status = "complete, uploading the document" if is_finished else "received"
+        await self.user_interaction_dispatcher.send_message(
+            event=event, message=f"Long text: part {manifest['chunks']} {status} ({manifest['characters']} characters)",
+            message_type=MessageType.COMMENT, action_ref="long_text")
+
     async def _process_continuation(self, value, blob_name, event):
         try:
-            existing_content = await self.backend_internal_data_processing_dispatcher.read_data_content(
-                self.concatenate_folder, blob_name)
-            updated_content = f'{existing_content or ""} \n\n{value}'.strip()
-            await self.backend_internal_data_processing_dispatcher.write_data_content(self.concatenate_folder,
-                                                                                      blob_name, updated_content)
+            manifest = await self._append_chunk(value, blob_name)
+            await self._report_progress(event, manifest)
 
             event.text = "Great, thanks, now create the next longtext action."
             event.files_content = []
@@ -69,11 +100,28 @@ class LongText(ActionBase):
             self.logger.error(f"Error in _process_continuation: {str(e)}")
             return False
 
+    async def _assemble_document(self, value, blob_name, manifest):
+        """
+        Reads each chunk once and assembles the document with the last one.
+        """
+        chunks = await asyncio.gather(*(
+            self.backend_internal_data_processing_dispatcher.read_data_content(
+                self.concatenate_folder, self.chunk_name(blob_name, index))
+            for index in range(1, manifest["chunks"] + 1)))
+        return "\n\n".join(chunk.strip() for chunk in [*chunks, value] if chunk and chunk.strip())
+
+    async def _remove_chunks(self, blob_name, manifest):
+        names = [self.chunk_name(blob_name, index) for index in range(1, manifest["chunks"] + 1)]
+        names.append(self.manifest_name(blob_name))
+        await asyncio.gather(*(self.backend_internal_data_processing_dispatcher.remove_data_content(
+            self.concatenate_folder, name) for name in names))
+
     async def _process_end_of_conversation(self, value, blob_name, event):
         try:
-            concatenated_content = await self.backend_internal_data_processing_dispatcher.read_data_content(
-                self.concatenate_folder, blob_name)
-            complete_content = f"{concatenated_content or ''} \n\n{value}".strip()
+            manifest = await self._read_manifest(blob_name)
+            complete_content = await self._assemble_document(value, blob_name, manifest)
+            await self._report_progress(event, {"chunks": manifest["chunks"] + 1, "characters": len(complete_content)},
+                                        is_finished=True)
 
             # await self.backend_internal_data_processing_dispatcher.update_session(self.sessions_folder, blob_name, "assistant", complete_content)
             session = await self.global_manager.session_manager_dispatcher.get_or_create_session(
@@ -98,17 +146,18 @@ class LongText(ActionBase):
             self.session_manager_dispatcher.append_messages(session.messages, assistant_message, session.session_id)
             await self.global_manager.session_manager_dispatcher.save_session(session)
 
-            await self.backend_internal_data_processing_dispatcher.remove_data_content(self.concatenate_folder,
-                                                                                       blob_name)
+            await self._remove_chunks(blob_name, manifest)
 
             if not event.thread_id:
                 event.thread_id = event.timestamp
 
-            await self.user_interaction_dispatcher.upload_file(event=event, file_content=complete_content,
-                                                               filename="LongText.txt", title="Long Text")
-            await self.user_interaction_dispatcher.upload_file(event=event, file_content=complete_content,
-                                                               filename="LongText.txt", title="Long Text",
-                                                               is_internal=True)
+            # Le document assemblé une seule fois est envoyé en parallèle dans le thread et le canal interne
+            await asyncio.gather(
+                self.user_interaction_dispatcher.upload_file(event=event, file_content=complete_content,
+                                                             filename="LongText.txt", title="Long Text"),
+                self.user_interaction_dispatcher.upload_file(event=event, file_content=complete_content,
+                                                             filename="LongText.txt", title="Long Text",
+                                                             is_internal=True))
             return True
         except Exception as e:
             self.logger.error(f"Error in _process_end_of_conversation: {str(e)}")
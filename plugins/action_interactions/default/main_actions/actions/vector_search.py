@@ -11,6 +11,8 @@ from core.user_interactions.message_type import MessageType
 
 class VectorSearch(ActionBase):
     REQUIRED_PARAMETERS = ['query', 'index_name', 'result_count']
+    parallel_safe = True
+    batch_follow_up = True
 
     def __init__(self, global_manager):
         from core.global_manager import GlobalManager
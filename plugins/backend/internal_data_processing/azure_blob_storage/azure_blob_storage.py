@@ -30,6 +30,9 @@ class AzureBlobStorageConfig(BaseModel):
     AZURE_BLOB_STORAGE_CUSTOM_ACTIONS_CONTAINER: str
     AZURE_BLOB_STORAGE_SUBPROMPTS_CONTAINER: str
     AZURE_BLOB_STORAGE_CHAINOFTHOUGHTS_CONTAINER: str
+    AZURE_BLOB_STORAGE_RESPONSES_CACHE_CONTAINER: str = "responses-cache"
+    AZURE_BLOB_STORAGE_IMAGE_DESCRIPTIONS_CONTAINER: str = "image-descriptions"
+    AZURE_BLOB_STORAGE_GENERATED_IMAGES_CONTAINER: str = "generated-images"
 
 
 class AzureBlobStoragePlugin(InternalDataProcessingBase):
@@ -59,6 +62,10 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.vectors_container = None
         self.custom_actions_container = None
         self.subprompts_container = None
+        self.chainofthoughts_container = None
+        self.responses_cache_container = None
+        self.image_descriptions_container = None
+        self.generated_images_container = None
 
     @property
     def plugin_name(self):
@@ -112,6 +119,18 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
     def chainofthoughts(self):
         return self.chainofthoughts_container
 
+    @property
+    def responses_cache(self):
+        return self.responses_cache_container
+
+    @property
+    def image_descriptions(self):
+        return self.image_descriptions_container
+
+    @property
+    def generated_images(self):
+        return self.generated_images_container
+
     def initialize(self):
         self.logger.debug("Initializing Azure Blob Storage connection")
         self.connection_string = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_CONNECTION_STRING
@@ -126,6 +145,9 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.custom_actions_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_CUSTOM_ACTIONS_CONTAINER
         self.subprompts_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_SUBPROMPTS_CONTAINER
         self.chainofthoughts_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_CHAINOFTHOUGHTS_CONTAINER
+        self.responses_cache_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_RESPONSES_CACHE_CONTAINER
+        self.image_descriptions_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_IMAGE_DESCRIPTIONS_CONTAINER
+        self.generated_images_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_GENERATED_IMAGES_CONTAINER
         self.plugin_name = self.azure_blob_storage_config.PLUGIN_NAME
 
         try:
@@ -151,7 +173,10 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
             self.abort_container,
             self.vectors_container,
             self.custom_actions_container,
-            self.subprompts_container
+            self.subprompts_container,
+            self.responses_cache_container,
+            self.image_descriptions_container,
+            self.generated_images_container
         ]
 
         for container in containers:
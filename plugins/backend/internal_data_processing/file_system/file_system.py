@@ -24,6 +24,9 @@ class FileSystemConfig(BaseModel):
     FILE_SYSTEM_CUSTOM_ACTIONS_CONTAINER: str
     FILE_SYSTEM_SUBPROMPTS_CONTAINER: str
     FILE_SYSTEM_CHAINOFTHOUGHTS_CONTAINER: str
+    FILE_SYSTEM_RESPONSES_CACHE_CONTAINER: str = "responses_cache"
+    FILE_SYSTEM_IMAGE_DESCRIPTIONS_CONTAINER: str = "image_descriptions"
+    FILE_SYSTEM_GENERATED_IMAGES_CONTAINER: str = "generated_images"
 
 
 class FileSystemPlugin(InternalDataProcessingBase):
@@ -49,6 +52,9 @@ class FileSystemPlugin(InternalDataProcessingBase):
         self.custom_actions_container = None
         self.subprompts_container = None
         self.chainofthoughts_container = None
+        self.responses_cache_container = None
+        self.image_descriptions_container = None
+        self.generated_images_container = None
 
     @property
     def plugin_name(self):
@@ -102,6 +108,18 @@ class FileSystemPlugin(InternalDataProcessingBase):
     def chainofthoughts(self):
         return self.chainofthoughts_container
 
+    @property
+    def responses_cache(self):
+        return self.responses_cache_container
+
+    @property
+    def image_descriptions(self):
+        return self.image_descriptions_container
+
+    @property
+    def generated_images(self):
+        return self.generated_images_container
+
     def initialize(self):
         try:
             self.logger.debug("Initializing file system")
@@ -117,6 +135,9 @@ class FileSystemPlugin(InternalDataProcessingBase):
             self.custom_actions_container = self.file_system_config.FILE_SYSTEM_CUSTOM_ACTIONS_CONTAINER
             self.subprompts_container = self.file_system_config.FILE_SYSTEM_SUBPROMPTS_CONTAINER
             self.chainofthoughts_container = self.file_system_config.FILE_SYSTEM_CHAINOFTHOUGHTS_CONTAINER
+            self.responses_cache_container = self.file_system_config.FILE_SYSTEM_RESPONSES_CACHE_CONTAINER
+            self.image_descriptions_container = self.file_system_config.FILE_SYSTEM_IMAGE_DESCRIPTIONS_CONTAINER
+            self.generated_images_container = self.file_system_config.FILE_SYSTEM_GENERATED_IMAGES_CONTAINER
 
             self.plugin_name = self.file_system_config.PLUGIN_NAME
             self.init_shares()
@@ -135,7 +156,10 @@ class FileSystemPlugin(InternalDataProcessingBase):
             self.vectors_container,
             self.custom_actions_container,
             self.subprompts_container,
-            self.chainofthoughts_container
+            self.chainofthoughts_container,
+            self.responses_cache_container,
+            self.image_descriptions_container,
+            self.generated_images_container
         ]
         for container in containers:
             directory_path = os.path.join(self.root_directory, container)
@@ -14,6 +14,8 @@ from utils.plugin_manager.plugin_manager import PluginManager
 
 AZURE_BLOB_STORAGE_QUEUE = "AZURE_BLOB_STORAGE_QUEUE"
 LOG_PREFIX = "[AZURE_BLOB_QUEUE]"
+# Maximum number of sub-requests accepted by a blob batch request
+BLOB_BATCH_MAX_SIZE = 256
 
 
 class AzureBlobStorageConfig(BaseModel):
@@ -234,6 +236,110 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
         except Exception as e:
             self.logger.error(f"{LOG_PREFIX} Failed to dequeue message '{blob_name}': {str(e)}")
 
+    async def enqueue_many(self, data_container: str, channel_id: str, thread_id: str,
+                           messages: List[Tuple[str, str]], guid: Optional[str] = None) -> None:
+        """
+        Adds several messages to the queue, reusing a single container client.
+        """
+        container_client = self.blob_service_client.get_container_client(data_container)
+        self.logger.info(
+            f"{LOG_PREFIX} Enqueueing {len(messages)} messages for channel '{channel_id}', thread '{thread_id}'.")
+        for message_id, message in messages:
+            blob_name = f"{channel_id}_{thread_id}_{message_id}_{guid or uuid.uuid4()}.txt"
+            try:
+                container_client.upload_blob(blob_name, message, overwrite=True)
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to enqueue message '{blob_name}': {str(e)}")
+
+    async def dequeue_many(self, data_container: str, channel_id: str, thread_id: str, message_ids: List[str],
+                           guid: str) -> None:
+        """
+        Removes several messages from the queue with batch delete requests.
+        """
+        blob_names = [f"{channel_id}_{thread_id}_{message_id}_{guid}.txt" for message_id in message_ids]
+        self._delete_blobs(data_container, blob_names)
+
+    async def drain(self, data_container: str, channel_id: str, thread_id: str, limit: Optional[int] = None,
+                    after_message_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Removes and returns the oldest messages of a channel/thread.
+        Only the blobs of the thread are listed, and they are removed with batch delete requests. A message is only
+        returned when its own delete succeeded, so that concurrent consumers downloading the same blob do not both
+        process it. Messages are removed before being processed: those of a consumer stopping mid-batch are lost.
+        """
+        try:
+            container_client = self.blob_service_client.get_container_client(data_container)
+            blob_names = self._list_thread_blobs(container_client, channel_id, thread_id, after_message_id)
+            if limit is not None:
+                blob_names = blob_names[:limit]
+
+            contents = {}
+            for blob_name in blob_names:
+                try:
+                    contents[blob_name] = container_client.download_blob(blob_name).readall().decode('utf-8')
+                except ResourceNotFoundError:
+                    # Already drained by a concurrent consumer
+                    continue
+
+            # The consumer whose delete succeeds claims the message, the others skip it
+            deleted_names = self._delete_blobs(data_container, list(contents))
+            drained = [(blob_name.split('_')[2], contents[blob_name]) for blob_name in deleted_names]
+            self.logger.info(
+                f"{LOG_PREFIX} Drained {len(drained)} messages for channel '{channel_id}', thread '{thread_id}'.")
+            return drained
+
+        except Exception as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to drain messages: {str(e)}")
+            return []
+
+    async def peek_count(self, data_container: str, channel_id: str, thread_id: str) -> int:
+        """
+        Counts the messages waiting for a channel/thread without downloading them.
+        """
+        try:
+            container_client = self.blob_service_client.get_container_client(data_container)
+            return len(self._list_thread_blobs(container_client, channel_id, thread_id))
+        except Exception as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to count messages: {str(e)}")
+            return 0
+
+    def _list_thread_blobs(self, container_client, channel_id: str, thread_id: str,
+                           after_message_id: Optional[str] = None) -> List[str]:
+        """
+        Returns the valid blob names of a channel/thread, sorted from the oldest to the newest.
+        The listing is filtered server side on the thread prefix.
+        """
+        blobs = container_client.list_blobs(name_starts_with=f"{channel_id}_{thread_id}_")
+        timestamps = {}
+        for blob in blobs:
+            timestamp = self.extract_message_id(blob.name)
+            if timestamp is not None:
+                timestamps[blob.name] = timestamp
+
+        if after_message_id is not None:
+            after = float(after_message_id)
+            timestamps = {name: timestamp for name, timestamp in timestamps.items() if timestamp > after}
+        return sorted(timestamps, key=lambda name: (timestamps[name], name))
+
+    def _delete_blobs(self, data_container: str, blob_names: List[str]) -> List[str]:
+        """
+        Deletes the blobs with batch delete requests and returns the names of those actually deleted.
+        """
+        if not blob_names:
+            return []
+        container_client = self.blob_service_client.get_container_client(data_container)
+        deleted_names = []
+        for start in range(0, len(blob_names), BLOB_BATCH_MAX_SIZE):
+            chunk = blob_names[start:start + BLOB_BATCH_MAX_SIZE]
+            try:
+                # Missing blobs are reported per sub-request and do not fail the whole batch
+                responses = container_client.delete_blobs(*chunk, raise_on_any_failure=False)
+                deleted_names.extend(blob_name for blob_name, response in zip(chunk, responses)
+                                     if 200 <= response.status_code < 300)
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to delete {len(chunk)} messages: {str(e)}")
+        return deleted_names
+
     async def get_next_message(self, data_container: str, channel_id: str, thread_id: str, current_message_id: str) -> \
     Tuple[Optional[str], Optional[str]]:
         """
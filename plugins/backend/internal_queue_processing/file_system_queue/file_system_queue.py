@@ -194,6 +194,108 @@ class FileSystemQueuePlugin(InternalQueueProcessingBase):
         else:
             self.logger.warning(f"{LOG_PREFIX} Message '{file_name}' not found in queue.")
 
+    async def enqueue_many(self, data_container: str, channel_id: str, thread_id: str,
+                           messages: List[Tuple[str, str]], guid: Optional[str] = None) -> None:
+        """
+        Adds several messages to the queue, each one in its own file.
+        """
+        queue_path = os.path.join(self.root_directory, data_container)
+        self.logger.debug(
+            f"{LOG_PREFIX} Enqueuing {len(messages)} messages for channel '{channel_id}', thread '{thread_id}'.")
+        for message_id, message in messages:
+            message_file_name = f"{channel_id}_{thread_id}_{message_id}_{guid or uuid.uuid4()}.txt"
+            try:
+                with open(os.path.join(queue_path, message_file_name), 'w', encoding='utf-8') as file:
+                    file.write(message)
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to enqueue message '{message_file_name}': {str(e)}")
+
+    async def dequeue_many(self, data_container: str, channel_id: str, thread_id: str, message_ids: List[str],
+                           guid: str) -> None:
+        """
+        Removes several messages from the queue, ignoring the ones already gone.
+        """
+        queue_path = os.path.join(self.root_directory, data_container)
+        removed_count = 0
+        for message_id in message_ids:
+            try:
+                os.remove(os.path.join(queue_path, f"{channel_id}_{thread_id}_{message_id}_{guid}.txt"))
+                removed_count += 1
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to remove message '{message_id}': {str(e)}")
+        self.logger.info(
+            f"{LOG_PREFIX} Removed {removed_count} messages for channel '{channel_id}', thread '{thread_id}'.")
+
+    async def drain(self, data_container: str, channel_id: str, thread_id: str, limit: Optional[int] = None,
+                    after_message_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Removes and returns the oldest messages of a channel/thread, listing the queue directory only once.
+        """
+        queue_path = os.path.join(self.root_directory, data_container)
+        try:
+            file_names = self._list_thread_messages(queue_path, channel_id, thread_id, after_message_id)
+        except Exception as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to list messages to drain: {str(e)}")
+            return []
+
+        if limit is not None:
+            file_names = file_names[:limit]
+
+        drained = []
+        for file_name in file_names:
+            file_path = os.path.join(queue_path, file_name)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    content = file.read()
+                os.remove(file_path)
+            except FileNotFoundError:
+                # Already drained by a concurrent consumer
+                continue
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to drain message '{file_name}': {str(e)}")
+                continue
+            drained.append((self.extract_message_id(file_name), content))
+
+        self.logger.info(
+            f"{LOG_PREFIX} Drained {len(drained)} messages for channel '{channel_id}', thread '{thread_id}'.")
+        return drained
+
+    async def peek_count(self, data_container: str, channel_id: str, thread_id: str) -> int:
+        """
+        Counts the messages waiting for a channel/thread without reading them.
+        """
+        queue_path = os.path.join(self.root_directory, data_container)
+        try:
+            return len(self._list_thread_messages(queue_path, channel_id, thread_id))
+        except Exception as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to count messages: {str(e)}")
+            return 0
+
+    def _list_thread_messages(self, queue_path: str, channel_id: str, thread_id: str,
+                              after_message_id: Optional[str] = None) -> List[str]:
+        """
+        Returns the valid message file names of a channel/thread, sorted from the oldest to the newest.
+        """
+        prefix = f"{channel_id}_{thread_id}_"
+        with os.scandir(queue_path) as entries:
+            file_names = [entry.name for entry in entries
+                          if entry.name.startswith(prefix) and self.extract_message_id(entry.name) is not None]
+
+        def sort_key(file_name):
+            message_id = self.extract_message_id(file_name)
+            try:
+                return float(message_id), file_name
+            except ValueError:
+                return float('inf'), file_name
+
+        file_names.sort(key=sort_key)
+        if after_message_id is not None:
+            after = float(after_message_id)
+            file_names = [f for f in file_names if sort_key(f)[0] > after]
+        return file_names
+
     def extract_message_id(self, file_name: str) -> Optional[str]:
         """
         Extracts the message ID (timestamp) from a file name.
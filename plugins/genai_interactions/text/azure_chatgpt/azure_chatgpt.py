@@ -1,20 +1,28 @@
 import asyncio
 import copy
 import inspect
-import json
 import traceback
 import uuid
 from datetime import datetime
-from typing import Any
+from typing import Any, Dict, List, Optional
 
-from openai import AsyncAzureOpenAI
+from openai import APIConnectionError, AsyncAzureOpenAI
 from pydantic import BaseModel
 
 from core.action_interactions.action_input import ActionInput
+from core.genai_interactions.completion_result import CompletionResult
+from core.genai_interactions.deployment_router import (
+    Deployment,
+    DeploymentRouter,
+)
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
 )
+from core.genai_interactions.image_description_cache import ImageDescriptionCache
+from core.genai_interactions.structured_output import (
+    JSON_SCHEMA_RESPONSE_FORMAT,
+)
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -24,6 +32,16 @@ from plugins.genai_interactions.text.chat_input_handler import ChatInputHandler
 from utils.config_manager.config_manager import ConfigManager
 from utils.plugin_manager.plugin_manager import PluginManager
 
+# Maximum number of messages posted with a thread creation or as additional messages of a run
+ASSISTANT_MAX_MESSAGES_PER_REQUEST = 32
+# Prompt of the vision model describing the images for the assistant, independent of the query so that it can be cached
+IMAGE_DESCRIPTION_PROMPT = (
+    "Please provide a detailed description of this image. "
+    "Include all relevant details, colors, text, objects, and their relationships. "
+    "give as much detail as possible on what is provided in this, provide a long answer."
+)
+IMAGE_DATA_URL_PREFIX = "data:image/jpeg;base64,"
+
 
 class AzureChatGptConfig(BaseModel):
     PLUGIN_NAME: str
@@ -36,6 +54,9 @@ class AzureChatGptConfig(BaseModel):
     AZURE_CHATGPT_VISION_MODEL_NAME: str
     AZURE_CHATGPT_IS_ASSISTANT: bool = False
     AZURE_CHATGPT_ASSISTANT_ID: str = None
+    AZURE_CHATGPT_EMBEDDING_MODEL_NAME: Optional[str] = None
+    AZURE_CHATGPT_DEPLOYMENTS: List[Dict[str, Any]] = []
+    AZURE_CHATGPT_IMAGE_INTERPRETATION_CONCURRENCY: int = 4
 
 
 class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
@@ -49,7 +70,6 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             "AZURE_CHATGPT"]
         self.azure_chatgpt_config = AzureChatGptConfig(**azure_chatgpt_config_dict)
         self.plugin_name = None
-        self._genai_cost_base = None
 
         # Dispatchers
         self.user_interaction_dispatcher = None
@@ -65,14 +85,9 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
         self._plugin_name = value
 
     @property
-    def genai_cost_base(self) -> GenAICostBase:
-        if self._genai_cost_base is None:
-            raise ValueError("GenAI cost base is not set")
-        return self._genai_cost_base
-
-    @genai_cost_base.setter
-    def genai_cost_base(self, value: GenAICostBase):
-        self._genai_cost_base = value
+    def supports_structured_output(self) -> bool:
+        # The assistant runs follow the instructions of the assistant, not a response format
+        return not self.azure_chatgpt_config.AZURE_CHATGPT_IS_ASSISTANT
 
     def initialize(self):
         # Client settings
@@ -85,6 +100,8 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
         self.output_token_price = self.azure_chatgpt_config.AZURE_CHATGPT_OUTPUT_TOKEN_PRICE
         self.is_assistant = self.azure_chatgpt_config.AZURE_CHATGPT_IS_ASSISTANT
         self.assistant_id = self.azure_chatgpt_config.AZURE_CHATGPT_ASSISTANT_ID
+        self.image_description_cache = ImageDescriptionCache(
+            self.global_manager, self.azure_chatgpt_config.AZURE_CHATGPT_IMAGE_INTERPRETATION_CONCURRENCY)
 
         self.load_client()
         self.input_handler = ChatInputHandler(self.global_manager, self)
@@ -103,6 +120,27 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
                 azure_endpoint=self.azure_openai_endpoint,
                 api_version=self.openai_api_version
             )
+            # Completions are spread across the main deployment and the additional ones, retries are handled by the router
+            deployments = [Deployment(name="main", client=self.gpt_client.with_options(max_retries=0),
+                                      model_name=self.azure_chatgpt_config.AZURE_CHATGPT_MODEL_NAME,
+                                      vision_model_name=self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME)]
+            for index, deployment_config in enumerate(self.azure_chatgpt_config.AZURE_CHATGPT_DEPLOYMENTS):
+                deployments.append(Deployment(
+                    name=deployment_config.get("NAME", f"deployment_{index + 1}"),
+                    client=AsyncAzureOpenAI(
+                        api_key=deployment_config.get("KEY", self.azure_openai_key),
+                        azure_endpoint=deployment_config["ENDPOINT"],
+                        api_version=deployment_config.get("API_VERSION", self.openai_api_version),
+                        max_retries=0
+                    ),
+                    model_name=deployment_config.get("MODEL_NAME", self.azure_chatgpt_config.AZURE_CHATGPT_MODEL_NAME),
+                    vision_model_name=deployment_config.get("VISION_MODEL_NAME",
+                                                            self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME),
+                    weight=float(deployment_config.get("WEIGHT", 1.0))
+                ))
+            self.deployment_router = DeploymentRouter.from_bot_config(
+                self.logger, self.global_manager.bot_config, deployments, retryable_exceptions=(APIConnectionError,),
+                name=self.plugin_name)
         except KeyError as e:
             self.logger.error(f"Missing configuration key: {e}")
             raise
@@ -214,7 +252,8 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             # Call the model to generate the completion
             self.logger.info(f"GENAI CALL: Calling Generative AI completion for user input on model {model_name}..")
             generation_start_time = datetime.now()
-            completion, genai_cost_base = await self.generate_completion(target_messages, event, raw_output=True)
+            completion, genai_cost_base = await self.genai_interactions_text_dispatcher.generate_completion(
+                target_messages, event, plugin_name=self.plugin_name, raw_output=True)
             generation_end_time = datetime.now()
 
             # Calculate the generation time
@@ -268,81 +307,57 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             self.logger.error(f"Error in handle_action: {e}")
             raise
 
-    async def generate_completion_assistant(self, messages, event_data: IncomingNotificationDataBase):
+    async def generate_completion_assistant(self, messages, event_data: IncomingNotificationDataBase, session=None):
+        """
+        Runs the assistant on the conversation and returns the whole completion, see stream_assistant_run.
+        """
+        chunks = []
+        genai_cost_base = None
+        async for chunk in self.stream_assistant_run(messages, event_data, session):
+            if isinstance(chunk, GenAICostBase):
+                genai_cost_base = chunk
+            else:
+                chunks.append(chunk)
+        return CompletionResult("".join(chunks) if chunks else None, genai_cost_base)
+
+    async def stream_assistant_run(self, messages, event_data: IncomingNotificationDataBase, session=None):
+        """
+        Runs the assistant on the conversation and yields the text deltas of its answer as the run events arrive,
+        then the GenAICostBase of the run. Each conversation is mapped to a persistent assistant thread, whose id is stored in the session: the thread
+        is created with the history on the first turn, then only the messages added since the last answer of the
+        assistant are posted with the run.
+        """
         try:
-            self.logger.info("Starting generate_completion_assistant method")
+            self.logger.info("Starting assistant run")
             messages_copy = copy.deepcopy(messages)
             instructions = None
-            user_query = None
-            last_user_message_index = None
 
             # Extract instructions if present (should be the first message)
             if messages_copy and messages_copy[0]['role'] == 'system':
-                instructions = messages_copy.pop(0)['content']
+                instructions = self.assistant_text(messages_copy.pop(0)['content'])
                 self.logger.info("Extracted instructions from system message")
 
             # Find the last user message and extract query
-            last_user_message = None
-            for message in reversed(messages_copy):
-                if message['role'] == 'user':
-                    last_user_message = message
+            last_user_message_index = None
+            for index in range(len(messages_copy) - 1, -1, -1):
+                if messages_copy[index]['role'] == 'user':
+                    last_user_message_index = index
                     break
 
-            if last_user_message:
-                content = last_user_message['content']
+            if last_user_message_index is not None:
+                content = messages_copy[last_user_message_index]['content']
                 if isinstance(content, list) and len(content) > 0:
                     user_query = content[0]['text'] if content[0]['type'] == 'text' else ''
                 else:
                     user_query = content
-
-                last_user_message_index = messages_copy.index(last_user_message)
                 self.logger.info(f"Extracted user query: {user_query[:50]}...")  # Log first 50 chars of query
             else:
                 self.logger.warning("No user message found")
                 user_query = ""
-                last_user_message_index = None
-
-            thread = await self.gpt_client.beta.threads.create()
-            self.logger.info(f"Created new thread with ID: {thread.id}")
 
             # Handle images if present
             if event_data.images:
-                self.logger.info(f"Processing {len(event_data.images)} images")
-                vision_model = self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME
-                if not vision_model:
-                    raise ValueError("Image received but AZURE_CHATGPT_VISION_MODEL_NAME not configured")
-
-                self.logger.info(f"Using vision model: {vision_model}")
-                image_interpretations = []
-                for i, base64_image in enumerate(event_data.images):
-                    self.logger.info(f"Interpreting image {i + 1}/{len(event_data.images)}")
-                    image_prompt = (
-                        f"Please provide a detailed description of this image in the context of the following user query: '{user_query}'. "
-                        "Include all relevant details, colors, text, objects, and their relationships. "
-                        "If there are any aspects of the image that seem particularly relevant to the query, emphasize those. give as much detail as possible on what is provided in this, provide a long answer."
-                    )
-
-                    image_message = {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "high"
-                        }
-                    }
-
-                    self.logger.info("Calling vision model for image interpretation")
-                    image_completion = await self.gpt_client.chat.completions.create(
-                        model=vision_model,
-                        messages=[
-                            {"role": "user", "content": [
-                                {"type": "text", "text": image_prompt},
-                                image_message
-                            ]}
-                        ]
-                    )
-                    interpretation = image_completion.choices[0].message.content
-                    self.logger.info(f"Image {i + 1} interpretation: {interpretation[:50]}...")  # Log first 50 chars
-                    image_interpretations.append(interpretation)
+                image_interpretations = await self.interpret_images(event_data.images)
 
                 # Ajout des interprétations d'images au dernier message utilisateur
                 if last_user_message_index is not None:
@@ -367,61 +382,71 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             # Remove images from event_data to avoid sending them again
             event_data.images = []
 
-            # Add messages to the thread
-            self.logger.info(f"Adding {len(messages_copy)} messages to the thread")
-            for message in messages_copy:
-                content = message['content']
-                if isinstance(content, list):
-                    text_content = ' '.join([item['text'] for item in content if item['type'] == 'text'])
-                else:
-                    text_content = content
-
-                await self.gpt_client.beta.threads.messages.create(
-                    thread_id=thread.id,
-                    role=message['role'],
-                    content=text_content
-                )
-
-            # Execute the assistant with instructions
+            # Only the messages following the last answer of the assistant are new to an existing thread
+            last_assistant_index = max((index for index, message in enumerate(messages_copy)
+                                        if message['role'] == 'assistant'), default=-1)
+            thread_state = getattr(session, 'assistant_thread', None) if session is not None else None
+            if thread_state and thread_state.get('assistant_id') == self.assistant_id and thread_state.get('thread_id'):
+                thread_id = thread_state['thread_id']
+                new_messages = messages_copy[last_assistant_index + 1:]
+                self.logger.info(f"Reusing assistant thread {thread_id}, posting {len(new_messages)} new messages")
+            else:
+                history = [self.assistant_message(message)
+                           for message in await self.describe_history_images(messages_copy[:last_assistant_index + 1])]
+                thread = await self.gpt_client.beta.threads.create(
+                    messages=[message for message in history[:ASSISTANT_MAX_MESSAGES_PER_REQUEST] if message['content']])
+                thread_id = thread.id
+                await self.post_assistant_messages(thread_id, history[ASSISTANT_MAX_MESSAGES_PER_REQUEST:])
+                new_messages = messages_copy[last_assistant_index + 1:]
+                self.logger.info(f"Created assistant thread {thread_id} with {len(history)} messages")
+
+            new_messages = [message for message in map(self.assistant_message, new_messages) if message['content']]
+            # The run only takes a limited number of additional messages, the oldest ones are posted first
+            overflow = max(len(new_messages) - ASSISTANT_MAX_MESSAGES_PER_REQUEST, 0)
+            await self.post_assistant_messages(thread_id, new_messages[:overflow])
+
+            # Execute the assistant with instructions, the answer is read from the run events
             self.logger.info(f"Executing assistant with ID: {self.assistant_id}")
-            run = await self.gpt_client.beta.threads.runs.create(
-                thread_id=thread.id,
-                assistant_id=self.assistant_id,
-                instructions=instructions
-            )
-
-            # Poll for completion
-            self.logger.info("Polling for run completion")
-            while run.status in ['queued', 'in_progress', 'cancelling']:
-                self.logger.info(f"Run status: {run.status}")
-                await asyncio.sleep(1)
-                run = await self.gpt_client.beta.threads.runs.retrieve(
-                    thread_id=thread.id,
-                    run_id=run.id
-                )
-
-            self.logger.info(f"Run completed with status: {run.status}")
-            if run.status == 'completed':
-                response_messages = await self.gpt_client.beta.threads.messages.list(thread_id=thread.id)
-                response = response_messages.data[0].content[0].text.value
-                self.logger.info(f"Received response: {response[:100]}...")  # Log first 100 chars of response
-
-                # Extract the GPT response and token usage details
-                self.genai_cost_base = GenAICostBase()
-                total_tokens = sum([len(message.content[0].text.value) for message in response_messages.data])
-                self.logger.info(f"Total tokens used: {total_tokens}")
-                self.genai_cost_base.total_tk = total_tokens
-                self.genai_cost_base.prompt_tk = total_tokens
-                self.genai_cost_base.completion_tk = total_tokens
-                self.genai_cost_base.input_token_price = self.input_token_price
-                self.genai_cost_base.output_token_price = self.output_token_price
-                return response, self.genai_cost_base
-            elif run.status == 'requires_action':
+            run = None
+            async with self.gpt_client.beta.threads.runs.stream(
+                    thread_id=thread_id,
+                    assistant_id=self.assistant_id,
+                    instructions=instructions,
+                    additional_messages=new_messages[overflow:] or None
+            ) as stream:
+                async for event in stream:
+                    if event.event == 'thread.message.delta':
+                        for part in event.data.delta.content or []:
+                            if part.type == 'text' and part.text and part.text.value:
+                                yield part.text.value
+                    elif event.event.startswith('thread.run.') and not event.event.startswith('thread.run.step'):
+                        run = event.data
+
+            status = run.status if run is not None else None
+            self.logger.info(f"Run completed with status: {status}")
+            if session is not None:
+                session.assistant_thread = {
+                    'thread_id': thread_id,
+                    'assistant_id': self.assistant_id,
+                    'updated_at': datetime.now().isoformat()
+                }
+            if status == 'requires_action':
                 self.logger.warning("Run requires action, not implemented in this version")
-                pass
-            else:
-                self.logger.error(f"Run failed with status: {run.status}")
-                return None, self.genai_cost_base
+            elif status != 'completed':
+                last_error = getattr(run, 'last_error', None)
+                raise RuntimeError(f"Assistant run ended with status {status}: {last_error}")
+
+            usage = run.usage
+            genai_cost_base = GenAICostBase(
+                total_tk=usage.total_tokens if usage else 0,
+                prompt_tk=usage.prompt_tokens if usage else 0,
+                completion_tk=usage.completion_tokens if usage else 0,
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
+            self.logger.info(f"Total tokens used: {genai_cost_base.total_tk}")
+            # The last item of the stream is the cost of this completion
+            yield genai_cost_base
 
         except Exception as e:
             self.logger.error(f"An error occurred during assistant completion: {str(e)}")
@@ -434,6 +459,84 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             )
             raise
 
+    async def interpret_images(self, images):
+        """
+        Describes the images with the vision model, concurrently, reusing the descriptions of the images already seen.
+        """
+        self.logger.info(f"Processing {len(images)} images")
+        vision_model = self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME
+        if not vision_model:
+            raise ValueError("Image received but AZURE_CHATGPT_VISION_MODEL_NAME not configured")
+
+        self.logger.info(f"Using vision model: {vision_model}")
+
+        async def describe(base64_image):
+            image_message = {
+                "type": "image_url",
+                "image_url": {
+                    "url": f"{IMAGE_DATA_URL_PREFIX}{base64_image}",
+                    "detail": "high"
+                }
+            }
+
+            self.logger.info("Calling vision model for image interpretation")
+            image_completion = await self.gpt_client.chat.completions.create(
+                model=vision_model,
+                messages=[
+                    {"role": "user", "content": [
+                        {"type": "text", "text": IMAGE_DESCRIPTION_PROMPT},
+                        image_message
+                    ]}
+                ]
+            )
+            interpretation = image_completion.choices[0].message.content
+            self.logger.info(f"Image interpretation: {interpretation[:50]}...")  # Log first 50 chars
+            return interpretation
+
+        image_interpretations = await self.image_description_cache.describe_all(images, vision_model, describe)
+        self.logger.info(f"{len(images)} images interpreted ({self.image_description_cache.hits} cached descriptions "
+                         f"reused so far)")
+        return image_interpretations
+
+    async def describe_history_images(self, messages):
+        """
+        Replaces the images of earlier messages by their cached description, the pixels are never sent again.
+        Images without a cached description are left out, as the assistant threads only hold text.
+        """
+        vision_model = self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME
+        for message in messages:
+            if not isinstance(message.get('content'), list):
+                continue
+            content = []
+            for item in message['content']:
+                url = (item.get('image_url') or {}).get('url', '') if item.get('type') == 'image_url' else ''
+                if not url.startswith(IMAGE_DATA_URL_PREFIX):
+                    content.append(item)
+                    continue
+                description = await self.image_description_cache.get(
+                    ImageDescriptionCache.make_key(url[len(IMAGE_DATA_URL_PREFIX):], vision_model))
+                if description:
+                    content.append({'type': 'text', 'text': f"[Image description] {description}"})
+            message['content'] = content
+        return messages
+
+    @staticmethod
+    def assistant_text(content) -> str:
+        if isinstance(content, list):
+            return ' '.join([item['text'] for item in content if item.get('type') == 'text'])
+        return content or ''
+
+    def assistant_message(self, message) -> Dict:
+        # Assistant threads only hold user and assistant messages
+        role = 'assistant' if message['role'] == 'assistant' else 'user'
+        return {'role': role, 'content': self.assistant_text(message['content'])}
+
+    async def post_assistant_messages(self, thread_id, messages):
+        for message in messages:
+            if message['content']:
+                await self.gpt_client.beta.threads.messages.create(thread_id=thread_id, role=message['role'],
+                                                                   content=message['content'])
+
     async def filter_messages(self, messages):
         filtered_messages = []
         for message in messages:
@@ -444,6 +547,13 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             filtered_messages.append(message)
         return filtered_messages
 
+    async def generate_embedding(self, text: str) -> Optional[List[float]]:
+        embedding_model_name = self.azure_chatgpt_config.AZURE_CHATGPT_EMBEDDING_MODEL_NAME
+        if not embedding_model_name:
+            return None
+        response = await self.gpt_client.embeddings.create(input=[text], model=embedding_model_name)
+        return response.data[0].embedding
+
     async def filter_images(self, messages):
         filtered_messages = []
         for message in messages:
@@ -455,85 +565,63 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             filtered_messages.append(message)
         return filtered_messages
 
-    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, raw_output=False):
+    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, raw_output=False,
+                                  session=None):
         # Check if we should use the assistant
         self.logger.info("Generate completion triggered...")
         if self.azure_chatgpt_config.AZURE_CHATGPT_IS_ASSISTANT:
-            return await self.generate_completion_assistant(messages, event_data)
+            return await self.generate_completion_assistant(messages, event_data, session)
 
         # If not using an assistant, proceed with the standard completion
-        model_name = self.azure_chatgpt_config.AZURE_CHATGPT_MODEL_NAME
-
         # Filter out messages content from the metadata
 
         messages = [{'role': message.get('role'), 'content': message.get('content')} for message in messages]
 
-        if event_data.images:
+        use_vision_model = bool(event_data.images)
+        if use_vision_model:
             if not self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME:
                 self.logger.error("Image received without AZURE_CHATGPT_VISION_MODEL_NAME in config")
                 await self.user_interaction_dispatcher.send_message(event=event_data,
                                                                     message="Image received without genai interpreter in config",
                                                                     message_type=MessageType.COMMENT)
                 return
-            model_name = self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME
         else:
-            model_name = self.azure_chatgpt_config.AZURE_CHATGPT_MODEL_NAME
             messages = await self.filter_images(messages)
 
-        try:
-            completion = await self.gpt_client.chat.completions.create(
-                model=model_name,
+        # The actions are requested as JSON following the actions schema instead of the marker block
+        completion_options = {"response_format": JSON_SCHEMA_RESPONSE_FORMAT} \
+            if self.structured_output_enabled(raw_output) else {}
+
+        async def create_completion(deployment: Deployment):
+            return await deployment.client.chat.completions.create(
+                model=deployment.vision_model_name if use_vision_model else deployment.model_name,
                 temperature=0.1,
                 top_p=0.1,
                 messages=messages,
                 max_tokens=4096,
-                seed=69
+                seed=69,
+                **completion_options
             )
 
+        try:
+            completion = await self.deployment_router.call(create_completion)
+
             # Extract the full response between the markers
             response = completion.choices[0].message.content
             if raw_output == False:
-                start_marker = "[BEGINIMDETECT]"
-                end_marker = "[ENDIMDETECT]"
-
-                # Ensure that the markers exist in the response
-                if start_marker in response and end_marker in response:
-                    # Extract the JSON content between the markers
-                    json_content = response.split(start_marker)[1].split(end_marker)[0].strip()
-
-                    # Load the JSON content
-                    try:
-                        response_dict = json.loads(json_content)
-                        normalized_response_dict = self.normalize_keys(response_dict)
-
-                        # Locate the "UserInteraction" action and replace escape sequences
-                        for action in normalized_response_dict.get("response", []):
-                            if action["Action"]["ActionName"] == "UserInteraction":
-                                value = action["Action"]["Parameters"]["value"]
-
-                                # Replace the escape sequences (\\n) with real newlines (\n)
-                                formatted_value = value.replace("\\n", "\n")
-                                action["Action"]["Parameters"]["value"] = formatted_value
-
-                        # Rebuild the formatted JSON with indentation
-                        formatted_json_content = json.dumps(response_dict, ensure_ascii=False, indent=2)
-                        response = f"{start_marker}\n{formatted_json_content}\n{end_marker}"
-
-                    except json.JSONDecodeError as e:
-                        # Log error if JSON parsing fails
-                        self.logger.error(f"Error decoding JSON: {e}")
-                else:
-                    self.logger.error("Missing [BEGINIMDETECT] or [ENDIMDETECT] markers in the response.")
+                response = self.format_completion(response)
 
             # Extract the GPT response and token usage details
-            self.genai_cost_base = GenAICostBase()
-            self.genai_cost_base.total_tk = completion.usage.total_tokens
-            self.genai_cost_base.prompt_tk = completion.usage.prompt_tokens
-            self.genai_cost_base.completion_tk = completion.usage.completion_tokens
-            self.genai_cost_base.input_token_price = self.input_token_price
-            self.genai_cost_base.output_token_price = self.output_token_price
+            genai_cost_base = GenAICostBase(
+                total_tk=completion.usage.total_tokens,
+                prompt_tk=completion.usage.prompt_tokens,
+                completion_tk=completion.usage.completion_tokens,
+                cached_tk=GenAICostBase.read_cached_tokens(completion.usage),
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
 
-            return response, self.genai_cost_base
+            return CompletionResult(response, genai_cost_base)
 
         except asyncio.exceptions.CancelledError:
             await self.user_interaction_dispatcher.send_message(event=event_data, message="Task was cancelled",
@@ -544,9 +632,80 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
             self.logger.error(f"An unexpected error occurred: {str(e)}\n{traceback.format_exc()}")
             await self.user_interaction_dispatcher.send_message(event=event_data,
                                                                 message="An unexpected error occurred",
-                                                                message_type=MessageType.ERROR, is_internal=True)
+                                                                message_type=MessageType.COMMENT, is_internal=True)
             raise  # Re-raise the exception after logging
 
+    async def generate_completion_stream(self, messages, event_data: IncomingNotificationDataBase, session=None):
+        self.logger.info("Generate completion stream triggered...")
+        if self.azure_chatgpt_config.AZURE_CHATGPT_IS_ASSISTANT:
+            async for chunk in self.stream_assistant_run(messages, event_data, session):
+                yield chunk
+            return
+
+        messages = [{'role': message.get('role'), 'content': message.get('content')} for message in messages]
+
+        use_vision_model = bool(event_data.images)
+        if use_vision_model:
+            if not self.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME:
+                self.logger.error("Image received without AZURE_CHATGPT_VISION_MODEL_NAME in config")
+                await self.user_interaction_dispatcher.send_message(event=event_data,
+                                                                    message="Image received without genai interpreter in config",
+                                                                    message_type=MessageType.COMMENT)
+                return
+        else:
+            messages = await self.filter_images(messages)
+
+        completion_options = {"response_format": JSON_SCHEMA_RESPONSE_FORMAT} \
+            if self.structured_output_enabled() else {}
+
+        async def create_stream(deployment: Deployment):
+            return await deployment.client.chat.completions.create(
+                model=deployment.vision_model_name if use_vision_model else deployment.model_name,
+                temperature=0.1,
+                top_p=0.1,
+                messages=messages,
+                max_tokens=4096,
+                seed=69,
+                stream=True,
+                stream_options={"include_usage": True},
+                **completion_options
+            )
+
+        try:
+            # The deployment is held until the stream is consumed, a stream cannot be replayed so it is not hedged
+            usage = None
+            async with self.deployment_router.stream(create_stream) as stream:
+                async for chunk in stream:
+                    # The last chunk only holds the token usage of the whole completion
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+            genai_cost_base = GenAICostBase(
+                total_tk=usage.total_tokens if usage else 0,
+                prompt_tk=usage.prompt_tokens if usage else 0,
+                completion_tk=usage.completion_tokens if usage else 0,
+                cached_tk=GenAICostBase.read_cached_tokens(usage),
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
+
+            # The last item of the stream is the cost of this completion
+            yield genai_cost_base
+
+        except asyncio.exceptions.CancelledError:
+            await self.user_interaction_dispatcher.send_message(event=event_data, message="Task was cancelled",
+                                                                message_type=MessageType.COMMENT, is_internal=True)
+            self.logger.error("Task was cancelled")
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred: {str(e)}\n{traceback.format_exc()}")
+            await self.user_interaction_dispatcher.send_message(event=event_data,
+                                                                message="An unexpected error occurred",
+                                                                message_type=MessageType.COMMENT, is_internal=True)
+            raise
+
     async def trigger_genai(self, event: IncomingNotificationDataBase):
 
         AUTOMATED_RESPONSE_TRIGGER = "Automated response"
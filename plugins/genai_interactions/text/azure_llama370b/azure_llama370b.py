@@ -1,6 +1,5 @@
 import asyncio
 import inspect
-import json
 import traceback
 import uuid
 from datetime import datetime
@@ -14,6 +13,7 @@ from core.backend.backend_internal_data_processing_dispatcher import (
     BackendInternalDataProcessingDispatcher,
 )
 from core.backend.session_manager_dispatcher import SessionManagerDispatcher
+from core.genai_interactions.completion_result import CompletionResult
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
@@ -48,7 +48,6 @@ class AzureLlama370bPlugin(GenAIInteractionsTextPluginBase):
             "AZURE_LLAMA370B"]
         self.azure_llama370b_config = AzureLlama370bConfig(**azure_llama370b_config_dict)
         self.plugin_name = None
-        self._genai_cost_base = None
         self.model_name = self.azure_llama370b_config.AZURE_LLAMA370B_MODELNAME
 
         # Dispatchers
@@ -64,16 +63,6 @@ class AzureLlama370bPlugin(GenAIInteractionsTextPluginBase):
     def plugin_name(self, value):
         self._plugin_name = value
 
-    @property
-    def genai_cost_base(self) -> GenAICostBase:
-        if self._genai_cost_base is None:
-            raise ValueError("GenAI cost base is not set")
-        return self._genai_cost_base
-
-    @genai_cost_base.setter
-    def genai_cost_base(self, value: GenAICostBase):
-        self._genai_cost_base = value
-
     def initialize(self):
         # Client settings
         self.azure_llama370b_key = self.azure_llama370b_config.AZURE_LLAMA370B_KEY
@@ -182,7 +171,8 @@ class AzureLlama370bPlugin(GenAIInteractionsTextPluginBase):
             # Call the model to generate the completion
             self.logger.info(f"GENAI CALL: Calling Generative AI completion for user input on model {model_name}..")
             generation_start_time = datetime.now()
-            completion, genai_cost_base = await self.generate_completion(messages, event, raw_output=True)
+            completion, genai_cost_base = await self.genai_interactions_text_dispatcher.generate_completion(
+                messages, event, plugin_name=self.plugin_name, raw_output=True)
             generation_end_time = datetime.now()
 
             # Calculate the generation time
@@ -268,44 +258,16 @@ class AzureLlama370bPlugin(GenAIInteractionsTextPluginBase):
             # Extraction de la réponse complète
             response = completion.choices[0].message.content
 
-            if not raw_output:
-                start_marker = "[BEGINIMDETECT]"
-                end_marker = "[ENDIMDETECT]"
-
-                # Assurez-vous que les marqueurs existent dans la réponse
-                if start_marker in response and end_marker in response:
-                    # Extraire le contenu JSON entre les marqueurs
-                    json_content = response.split(start_marker)[1].split(end_marker)[0].strip()
-
-                    try:
-                        response_dict = json.loads(json_content)
-                        normalized_response_dict = self.normalize_keys(response_dict)
-
-                        # Localiser l'action "UserInteraction" et remplacer les séquences d'échappement
-                        for action in normalized_response_dict.get("response", []):
-                            if action["Action"]["ActionName"] == "UserInteraction":
-                                value = action["Action"]["Parameters"]["value"]
-                                formatted_value = value.replace("\\n", "\n")  # Remplacer les séquences d'échappement
-                                action["Action"]["Parameters"]["value"] = formatted_value
-
-                        # Reconstruire le JSON formaté
-                        formatted_json_content = json.dumps(response_dict, ensure_ascii=False, indent=2)
-                        response = f"{start_marker}\n{formatted_json_content}\n{end_marker}"
-
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"Error decoding JSON: {e}")
-                else:
-                    self.logger.error("Missing [BEGINIMDETECT] or [ENDIMDETECT] markers in the response.")
-
             # Extraction des détails sur l'utilisation des tokens et les coûts
-            self.genai_cost_base = GenAICostBase()
-            self.genai_cost_base.total_tk = completion.usage.total_tokens
-            self.genai_cost_base.prompt_tk = completion.usage.prompt_tokens
-            self.genai_cost_base.completion_tk = completion.usage.completion_tokens
-            self.genai_cost_base.input_token_price = self.input_token_price
-            self.genai_cost_base.output_token_price = self.output_token_price
-
-            return response, self.genai_cost_base
+            genai_cost_base = GenAICostBase(
+                total_tk=completion.usage.total_tokens,
+                prompt_tk=completion.usage.prompt_tokens,
+                completion_tk=completion.usage.completion_tokens,
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
+
+            return CompletionResult(response, genai_cost_base)
 
         except asyncio.exceptions.CancelledError:
             await self.user_interaction_dispatcher.send_message(
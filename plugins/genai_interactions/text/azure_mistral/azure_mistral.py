@@ -1,12 +1,11 @@
 import asyncio
 import inspect
-import json
 import traceback
 import uuid
 from datetime import datetime
 from typing import Any
 
-from mistralai.client import MistralClient
+from mistralai.async_client import MistralAsyncClient
 from pydantic import BaseModel
 
 from core.action_interactions.action_input import ActionInput
@@ -14,10 +13,14 @@ from core.backend.backend_internal_data_processing_dispatcher import (
     BackendInternalDataProcessingDispatcher,
 )
 from core.backend.session_manager_dispatcher import SessionManagerDispatcher
+from core.genai_interactions.completion_result import CompletionResult
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
 )
+from core.genai_interactions.structured_output import (
+    JSON_OBJECT_RESPONSE_FORMAT,
+)
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -35,6 +38,8 @@ class AzureMistralConfig(BaseModel):
     AZURE_MISTRAL_KEY: str
     AZURE_MISTRAL_ENDPOINT: str
     AZURE_MISTRAL_MODELNAME: str
+    AZURE_MISTRAL_TIMEOUT: int = 120
+    AZURE_MISTRAL_MAX_CONCURRENT_REQUESTS: int = 64
 
 
 class AzureMistralPlugin(GenAIInteractionsTextPluginBase):
@@ -48,7 +53,6 @@ class AzureMistralPlugin(GenAIInteractionsTextPluginBase):
             "AZURE_MISTRAL"]
         self.azure_mistral_config = AzureMistralConfig(**azure_mistral_config_dict)
         self.plugin_name = None
-        self._genai_cost_base = None
         self.model_name = self.azure_mistral_config.AZURE_MISTRAL_MODELNAME
         # Dispatchers
         self.user_interaction_dispatcher = None
@@ -64,14 +68,8 @@ class AzureMistralPlugin(GenAIInteractionsTextPluginBase):
         self._plugin_name = value
 
     @property
-    def genai_cost_base(self) -> GenAICostBase:
-        if self._genai_cost_base is None:
-            raise ValueError("GenAI cost base is not set")
-        return self._genai_cost_base
-
-    @genai_cost_base.setter
-    def genai_cost_base(self, value: GenAICostBase):
-        self._genai_cost_base = value
+    def supports_structured_output(self) -> bool:
+        return True
 
     def initialize(self):
         # Client settings
@@ -93,8 +91,11 @@ class AzureMistralPlugin(GenAIInteractionsTextPluginBase):
 
     def load_client(self):
         try:
-            self.mistral_client = MistralClient(
-                endpoint=self.azure_mistral_endpoint, api_key=self.azure_mistral_key
+            # Async client: a completion must not block the event loop shared by all the conversations
+            self.mistral_client = MistralAsyncClient(
+                endpoint=self.azure_mistral_endpoint, api_key=self.azure_mistral_key,
+                timeout=self.azure_mistral_config.AZURE_MISTRAL_TIMEOUT,
+                max_concurrent_requests=self.azure_mistral_config.AZURE_MISTRAL_MAX_CONCURRENT_REQUESTS
             )
         except KeyError as e:
             self.logger.error(f"Missing configuration key: {e}")
@@ -185,7 +186,8 @@ class AzureMistralPlugin(GenAIInteractionsTextPluginBase):
             generation_start_time = datetime.now()
 
             # Ensure raw_output is set to True
-            completion, genai_cost_base = await self.generate_completion(messages, event, raw_output=True)
+            completion, genai_cost_base = await self.genai_interactions_text_dispatcher.generate_completion(
+                messages, event, plugin_name=self.plugin_name, raw_output=True)
 
             generation_end_time = datetime.now()
 
@@ -250,57 +252,34 @@ class AzureMistralPlugin(GenAIInteractionsTextPluginBase):
         # Préparer les messages avant de les envoyer au modèle
         messages = [{'role': message.get('role'), 'content': message.get('content')} for message in messages]
 
+        # Mode JSON de Mistral : la réponse est un objet JSON, sans les marqueurs
+        completion_options = {"response_format": JSON_OBJECT_RESPONSE_FORMAT} \
+            if self.structured_output_enabled(raw_output) else {}
+
         try:
             # Appel au modèle Generative AI pour générer la réponse
-            completion = self.mistral_client.chat(
+            completion = await self.mistral_client.chat(
                 model=model_name,
                 messages=messages,
                 temperature=0.1,
                 top_p=0.1,
-                max_tokens=4096
+                max_tokens=4096,
+                **completion_options
             )
 
             # Extraction de la réponse complète
             response = completion.choices[0].message.content
 
-            if not raw_output:
-                start_marker = "[BEGINIMDETECT]"
-                end_marker = "[ENDIMDETECT]"
-
-                # Assurez-vous que les marqueurs existent dans la réponse
-                if start_marker in response and end_marker in response:
-                    # Extraire le contenu JSON entre les marqueurs
-                    json_content = response.split(start_marker)[1].split(end_marker)[0].strip()
-
-                    try:
-                        response_dict = json.loads(json_content)
-                        normalized_response_dict = self.normalize_keys(response_dict)
-
-                        # Localiser l'action "UserInteraction" et remplacer les séquences d'échappement
-                        for action in normalized_response_dict.get("response", []):
-                            if action["Action"]["ActionName"] == "UserInteraction":
-                                value = action["Action"]["Parameters"]["value"]
-                                formatted_value = value.replace("\\n", "\n")  # Remplacer les séquences d'échappement
-                                action["Action"]["Parameters"]["value"] = formatted_value
-
-                        # Reconstruire le JSON formaté
-                        formatted_json_content = json.dumps(response_dict, ensure_ascii=False, indent=2)
-                        response = f"{start_marker}\n{formatted_json_content}\n{end_marker}"
-
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"Error decoding JSON: {e}")
-                else:
-                    self.logger.error("Missing [BEGINIMDETECT] or [ENDIMDETECT] markers in the response.")
-
             # Extraction des détails sur l'utilisation des tokens et les coûts
-            self.genai_cost_base = GenAICostBase()
-            self.genai_cost_base.total_tk = completion.usage.total_tokens
-            self.genai_cost_base.prompt_tk = completion.usage.prompt_tokens
-            self.genai_cost_base.completion_tk = completion.usage.completion_tokens
-            self.genai_cost_base.input_token_price = self.input_token_price
-            self.genai_cost_base.output_token_price = self.output_token_price
-
-            return response, self.genai_cost_base
+            genai_cost_base = GenAICostBase(
+                total_tk=completion.usage.total_tokens,
+                prompt_tk=completion.usage.prompt_tokens,
+                completion_tk=completion.usage.completion_tokens,
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
+
+            return CompletionResult(response, genai_cost_base)
 
         except asyncio.exceptions.CancelledError:
             await self.user_interaction_dispatcher.send_message(
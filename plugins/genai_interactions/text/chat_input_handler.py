@@ -1,6 +1,5 @@
 import asyncio
 import datetime
-import json
 import traceback
 import uuid
 from datetime import datetime, timezone
@@ -8,10 +7,24 @@ from datetime import datetime, timezone
 import yaml
 
 from core.backend.pricing_data import PricingData
+from core.genai_interactions.concurrency_limiter import CircuitOpenError
+from core.genai_interactions.conversation_context_builder import (
+    ConversationContextBuilder,
+)
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
 )
+from core.genai_interactions.genai_response import GenAIResponse
+from core.genai_interactions.genai_response_parser import (
+    SUPPORTED_FORMATS,
+    GenAIResponseParser,
+)
+from core.genai_interactions.prompt_prefix_tracker import PromptPrefixTracker
+from core.genai_interactions.thread_summarizer import ThreadSummarizer
+from core.genai_interactions.user_interaction_stream_parser import (
+    UserInteractionStreamParser,
+)
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -38,6 +51,16 @@ class ChatInputHandler():
         self.genai_client = {}
         self.bot_config: BotConfig = self.global_manager.bot_config
         self.conversion_format = self.bot_config.LLM_CONVERSION_FORMAT
+        self.context_builder = ConversationContextBuilder(
+            self.logger,
+            token_budget=self.bot_config.CONTEXT_TOKEN_BUDGET,
+            recent_messages=self.bot_config.CONTEXT_RECENT_MESSAGES,
+            max_part_tokens=self.bot_config.CONTEXT_MAX_PART_TOKENS)
+        self.thread_summarizer = ThreadSummarizer(
+            self.global_manager,
+            keep_recent=self.bot_config.CONTEXT_RECENT_MESSAGES,
+            batch_size=self.bot_config.CONTEXT_SUMMARY_BATCH_SIZE)
+        self.prompt_prefix_tracker = PromptPrefixTracker(self.logger)
 
     async def handle_event_data(self, event_data: IncomingNotificationDataBase):
         try:
@@ -281,7 +304,7 @@ class ChatInputHandler():
     def construct_message(self, event_data):
         # Construire le message utilisateur à partir de event_data
         format_timestamp = str(event_data.timestamp)
-        constructed_message_content = f"Timestamp: {str(format_timestamp)}, [Human readable date]:{str(datetime.fromtimestamp(float(event_data.timestamp)))}, [username]: {str(event_data.user_name)}, [user id]: {str(event_data.user_id)}, [user email]: {event_data.user_email}, [Directly mentioning you]: {str(event_data)}, [message]: {str(event_data.text)}"
+        constructed_message_content = f"Timestamp: {str(format_timestamp)}, [Human readable date]:{str(datetime.fromtimestamp(float(event_data.timestamp)))}, [username]: {str(event_data.user_name)}, [user id]: {str(event_data.user_id)}, [user email]: {event_data.user_email}, [Directly mentioning you]: {str(event_data.is_mention)}, [message]: {str(event_data.text)}"
 
         # Formater le contenu avec des images et des fichiers supplémentaires si applicable
         user_content_text = [{"type": "text", "text": constructed_message_content}]
@@ -369,8 +392,26 @@ class ChatInputHandler():
             # Enregistrer le temps de début
             start_time = datetime.now()
 
+            # Remplacer les anciens messages par le résumé du thread
+            if self.thread_summarizer.enabled:
+                messages = self.thread_summarizer.apply_summary(messages, session)
+
+            # Construire le contexte envoyé au modèle dans le budget de tokens
+            context_metrics = None
+            if self.context_builder.enabled:
+                messages, context_metrics = self.context_builder.build(messages, self.chat_plugin.model_name)
+            prompt_prefix = self.prompt_prefix_tracker.track(str(session.session_id), messages)
+
             # Appeler le modèle génératif AI pour obtenir la complétion
-            completion, genai_cost_base = await self.chat_plugin.generate_completion(messages, event_data)
+            # En mode assistant, la conversation est rattachée à un thread persistant enregistré dans la session
+            completion_kwargs = {"session": session} if getattr(self.chat_plugin, "is_assistant", False) is True else {}
+            message_stream = None
+            if self.bot_config.STREAM_COMPLETIONS:
+                completion, genai_cost_base, message_stream = await self.stream_completion(messages, event_data,
+                                                                                           **completion_kwargs)
+            else:
+                completion, genai_cost_base = await self.chat_plugin.generate_completion(messages, event_data,
+                                                                                         **completion_kwargs)
 
             # Enregistrer le temps de fin
             end_time = datetime.now()
@@ -390,6 +431,13 @@ class ChatInputHandler():
             return await self.handle_completion_errors(event_data, e)
 
         self.logger.info("Completion from generative AI received")
+        genai_cost_base = self.global_manager.token_accounting.account(
+            genai_cost_base, messages, completion, self.chat_plugin.model_name, event_data.channel_id, "conversation")
+        self.prompt_prefix_tracker.record_usage(genai_cost_base.prompt_tk, genai_cost_base.cached_tk)
+        self.logger.info(
+            f"Prompt prefix {str(prompt_prefix['static_prefix_hash'])[:12]}, previous context reused: "
+            f"{prompt_prefix['prefix_reused']}, cached prompt tokens: {genai_cost_base.cached_tk}/{genai_cost_base.prompt_tk} "
+            f"(overall {self.prompt_prefix_tracker.cached_ratio:.0%})")
 
         # Extraire la réponse de GenAI
         costs_container = self.backend_internal_data_processing_dispatcher.costs
@@ -404,33 +452,29 @@ class ChatInputHandler():
                                                            filename="Genai_response_raw.yaml",
                                                            title="Genai response file", is_internal=True)
 
-        try:
-            # Étape 3 : Gestion de la conversion JSON ou YAML
-            if self.conversion_format == "json":
-                # Supprimer les sauts de ligne initiaux/finals
-                gpt_response = gpt_response.strip("\n")
-
-                # Tenter de parser la réponse en JSON
-                response_json = json.loads(gpt_response)
-
-            elif self.conversion_format == "yaml":
-                sanitized_yaml = self.adjust_yaml_structure(gpt_response)
-                response_json = await self.yaml_to_json(event_data=event_data, yaml_string=sanitized_yaml)
+        conversion_format = self.response_conversion_format()
+        if conversion_format not in SUPPORTED_FORMATS:
+            # Enregistrer un avertissement et retourner None
+            if message_stream is not None:
+                await message_stream.discard()
+            self.logger.error(f"Invalid conversion format: {conversion_format}, cannot parse the response.")
+            return None
 
-            else:
-                # Enregistrer un avertissement et retourner None
-                self.logger.error(f"Invalid conversion format: {self.conversion_format}, cannot parse the response.")
-                return None
+        try:
+            # Étape 3 : Conversion JSON ou YAML de la réponse en actions, en une seule passe
+            genai_response = GenAIResponseParser(conversion_format).parse(completion)
 
-        except json.JSONDecodeError as e:
-            # Étape 5 : Gérer et signaler les erreurs de décodage JSON
+        except (ValueError, yaml.YAMLError) as e:
+            # Étape 4 : Gérer et signaler les erreurs de conversion (json.JSONDecodeError est une ValueError)
+            if message_stream is not None:
+                await message_stream.discard()
             await self.user_interaction_dispatcher.send_message(event=event_data,
                                                                 message=f"An error occurred while converting the completion: {e}",
                                                                 message_type=MessageType.COMMENT, is_internal=True)
             await self.user_interaction_dispatcher.send_message(event=event_data,
                                                                 message="Oops something went wrong, try again or contact the bot owner",
                                                                 message_type=MessageType.COMMENT)
-            self.logger.error(f"Failed to parse JSON: {e}")
+            self.logger.error(f"Failed to parse the completion: {e}")
             return None
 
         # Calculer les coûts
@@ -448,11 +492,12 @@ class ChatInputHandler():
                 }
             ],
             "timestamp": datetime.now().isoformat(),
-            "actions": self.extract_actions(response_json),
+            "actions": self.extract_actions(genai_response),
             "cost": {
                 "total_tokens": genai_cost_base.total_tk,
                 "prompt_tokens": genai_cost_base.prompt_tk,
                 "completion_tokens": genai_cost_base.completion_tk,
+                "cached_prompt_tokens": genai_cost_base.cached_tk,
                 "input_cost": input_cost,
                 "output_cost": output_cost,
                 "total_cost": total_cost
@@ -463,6 +508,9 @@ class ChatInputHandler():
             "from_action": False,
             "assistant_message_guid": str(uuid.uuid4())
         }
+        if context_metrics is not None:
+            assistant_message["context"] = context_metrics.to_dict()
+        assistant_message["prompt_prefix"] = prompt_prefix
 
         self.session_manager_dispatcher.append_messages(session.messages, assistant_message, session.session_id)
 
@@ -474,30 +522,102 @@ class ChatInputHandler():
         # Sauvegarder la session mise à jour
         await self.global_manager.session_manager_dispatcher.save_session(session)
 
-        return response_json
+        if message_stream is not None:
+            await self.complete_message_stream(message_stream, genai_response)
 
-    def extract_actions(self, response_json):
+        # Mettre à jour le résumé du thread en arrière-plan, hors du chemin de la réponse
+        if self.thread_summarizer.enabled:
+            self.thread_summarizer.schedule(session, self.chat_plugin, event_data)
+
+        return genai_response
+
+    async def stream_completion(self, messages, event_data: IncomingNotificationDataBase, **completion_kwargs):
         """
-        Extrait les actions de la réponse JSON en s'assurant que les paramètres sont correctement dissociés.
+        Streams the completion and shows the value of the UserInteraction action to the user while it is generated.
+        Returns the complete completion, its cost and the message stream, which is finalized once the
+        response is parsed.
+        """
+        parser = UserInteractionStreamParser(self.response_conversion_format())
+        message_stream = self.user_interaction_dispatcher.open_message_stream(event_data)
+        chunks = []
+        genai_cost_base = None
+        try:
+            async for chunk in self.chat_plugin.generate_completion_stream(messages, event_data, **completion_kwargs):
+                if isinstance(chunk, GenAICostBase):
+                    # Cost of this completion, sent by the plugin once the stream is over
+                    genai_cost_base = chunk
+                    continue
+                chunks.append(chunk)
+                partial_value = parser.feed(chunk)
+                if message_stream is not None:
+                    await message_stream.update(partial_value)
+            if not chunks:
+                raise ValueError("The completion stream returned no content")
+            if genai_cost_base is None:
+                raise ValueError("The completion stream returned no cost")
+        except (Exception, asyncio.CancelledError):
+            if message_stream is not None:
+                await message_stream.discard()
+            raise
+
+        completion = self.chat_plugin.format_completion("".join(chunks))
+        return completion, genai_cost_base, message_stream
+
+    def response_conversion_format(self) -> str:
+        """
+        Format of the completions: always JSON when the provider is asked for structured output,
+        LLM_CONVERSION_FORMAT otherwise.
+        """
+        structured_output_enabled = getattr(self.chat_plugin, 'structured_output_enabled', None)
+        if callable(structured_output_enabled) and structured_output_enabled() is True:
+            return "json"
+        return self.conversion_format
+
+    async def complete_message_stream(self, message_stream, genai_response: GenAIResponse):
+        """
+        Applies the final value of the streamed UserInteraction. Once delivered, the action is removed from
+        the response so that the message is not sent twice (it is still recorded in the session).
+        Messages that must be sent to another channel or as a file are delivered by the action as usual.
+        """
+        actions = genai_response.response
+        for index, action in enumerate(actions):
+            if action.ActionName != 'UserInteraction':
+                continue
+            parameters = action.Parameters if isinstance(action.Parameters, dict) else {}
+            channel_id = str(parameters.get('channelid') or 'none').lower()
+            as_file = str(parameters.get('AsFile', 'false')).lower()
+            if channel_id == 'none' and as_file != 'true' and await message_stream.finalize(parameters.get('value')):
+                del actions[index]
+            else:
+                await message_stream.discard()
+            return
+        await message_stream.discard()
+
+    def extract_actions(self, genai_response: GenAIResponse):
+        """
+        Extrait les actions de la réponse en s'assurant que les paramètres sont correctement dissociés.
         """
-        actions = response_json.get('response', [])
         extracted_actions = []
-        for action_item in actions:
-            action = action_item.get('Action', {})
-            action_name = action.get('ActionName', '')
-            parameters = action.get('Parameters', {})
+        for action in genai_response.response:
             # Assurer que les paramètres sont un dictionnaire avec des noms de paramètres distincts
-            if isinstance(parameters, dict):
-                extracted_parameters = parameters
+            if isinstance(action.Parameters, dict):
+                extracted_parameters = action.Parameters
             else:
                 extracted_parameters = {}
             extracted_actions.append({
-                "ActionName": action_name,
+                "ActionName": action.ActionName,
                 "Parameters": extracted_parameters
             })
         return extracted_actions
 
     async def handle_completion_errors(self, event_data, e):
+        if isinstance(e, CircuitOpenError):
+            # The provider is down, the user is told right away instead of waiting for the retries
+            await self.user_interaction_dispatcher.send_message(event=event_data,
+                                                                message=f":warning: {e.user_message}",
+                                                                message_type=MessageType.COMMENT, is_internal=False)
+            self.logger.error(f"Completion not sent: {e}")
+            return None
         await self.user_interaction_dispatcher.send_message(event=event_data,
                                                             message=f"An error occurred while calling the completion: {e}",
                                                             message_type=MessageType.COMMENT, is_internal=True)
@@ -513,90 +633,12 @@ class ChatInputHandler():
         return None
 
     def adjust_yaml_structure(self, yaml_content):
-        lines = yaml_content.split('\n')
-        adjusted_lines = []
-        inside_parameters_block = False
-        multiline_literal_indentation = 0
-        current_indentation_level = 0
-
-        for line in lines:
-            # Si nous sommes à l'intérieur d'un bloc multiligne, nous vérifions le niveau d'indentation
-            if multiline_literal_indentation > 0 and not line.startswith(' ' * multiline_literal_indentation):
-                # Nous avons atteint la fin du bloc multiligne
-                multiline_literal_indentation = 0
-
-            stripped_line = line.strip()
-
-            # Échapper les astérisques dans la chaîne YAML (uniquement en dehors des blocs multiligne)
-            if multiline_literal_indentation == 0:
-                stripped_line = stripped_line.replace('*', '\\*')
-
-            # Pas d'espaces en début pour 'response:'
-            if stripped_line.startswith('response:'):
-                adjusted_lines.append(stripped_line)
-                inside_parameters_block = False
-                current_indentation_level = 0
-
-            # 2 espaces avant '- Action:'
-            elif stripped_line.startswith('- Action:'):
-                adjusted_lines.append('  ' + stripped_line)
-                inside_parameters_block = False
-                current_indentation_level = 2
-
-            # 6 espaces avant 'ActionName:' ou 'Parameters:'
-            elif stripped_line.startswith('ActionName:') or stripped_line.startswith('Parameters:'):
-                adjusted_lines.append('      ' + stripped_line)
-                inside_parameters_block = stripped_line.startswith('Parameters:')
-                current_indentation_level = 6
-
-            # Commence une valeur multiligne
-            elif inside_parameters_block and stripped_line.endswith(': |'):
-                adjusted_lines.append(' ' * (current_indentation_level + 2) + stripped_line)
-                multiline_literal_indentation = current_indentation_level + 4  # Augmenter l'indentation pour le contenu multiligne
-
-            # Gérer les lignes à l'intérieur d'un bloc multiligne
-            elif multiline_literal_indentation > 0:
-                adjusted_lines.append(line)
-
-            # Lignes de valeur de paramètre régulières sous 'Parameters:'
-            elif inside_parameters_block and ':' in stripped_line:
-                adjusted_lines.append(' ' * (current_indentation_level + 2) + stripped_line)
-                if stripped_line.endswith(':'):
-                    # Augmenter le niveau d'indentation pour les dictionnaires imbriqués
-                    current_indentation_level += 2
-
-            # Diminuer l'indentation en quittant un bloc imbriqué
-            elif inside_parameters_block and not stripped_line:
-                current_indentation_level = max(current_indentation_level - 2, 6)
-                adjusted_lines.append(line)
-
-            # Garder l'indentation originale pour tout le reste
-            else:
-                adjusted_lines.append(line)
-
-        # Reconstruire le contenu YAML ajusté
-        adjusted_yaml_content = '\n'.join(adjusted_lines)
-        return adjusted_yaml_content
+        return GenAIResponseParser.adjust_yaml_structure(yaml_content)
 
     async def yaml_to_json(self, event_data, yaml_string):
         try:
             # Charger la chaîne YAML dans un dictionnaire Python
-            python_dict = yaml.safe_load(yaml_string)
-
-            # Vérifier si 'value' contient une chaîne YAML et la charger
-            for action in python_dict.get('response', []):
-                if 'value' in action['Action']['Parameters']:
-                    value_str = action['Action']['Parameters']['value']
-
-                    # Traiter uniquement si value_str est une chaîne et formatée en YAML
-                    if isinstance(value_str, str) and value_str.strip().startswith(
-                            '```yaml') and value_str.strip().endswith('```'):
-                        # Supprimer la syntaxe du bloc de code markdown
-                        yaml_str = value_str.strip()[7:-3].strip()
-                        # Parser le contenu YAML
-                        action['Action']['Parameters']['value'] = yaml.safe_load(yaml_str)
-
-            return python_dict
+            return GenAIResponseParser.load_yaml(yaml_string)
         except Exception as e:
             self.logger.error(f"An error occurred while processing the YAML string: {str(e)}")
             self.logger.error(traceback.format_exc())
@@ -1,19 +1,26 @@
 import asyncio
-import json
 import traceback
 import uuid
 from datetime import datetime
-from typing import Any
+from typing import Any, Dict, List, Optional
 
-from openai import AsyncOpenAI
+from openai import APIConnectionError, AsyncOpenAI
 from pydantic import BaseModel
 
 from core.action_interactions.action_input import ActionInput
 from core.backend.session_manager_dispatcher import SessionManagerDispatcher
+from core.genai_interactions.completion_result import CompletionResult
+from core.genai_interactions.deployment_router import (
+    Deployment,
+    DeploymentRouter,
+)
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
 )
+from core.genai_interactions.structured_output import (
+    JSON_SCHEMA_RESPONSE_FORMAT,
+)
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -33,6 +40,8 @@ class OpenAIChatGptConfig(BaseModel):
     OPENAI_CHATGPT_OUTPUT_TOKEN_PRICE: float
     OPENAI_CHATGPT_IS_ASSISTANT: bool = False
     OPENAI_CHATGPT_ASSISTANT_ID: str = None
+    OPENAI_CHATGPT_EMBEDDING_MODEL_NAME: Optional[str] = None
+    OPENAI_CHATGPT_DEPLOYMENTS: List[Dict[str, Any]] = []
 
 
 class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
@@ -46,8 +55,8 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
             "OPENAI_CHATGPT"]
         self.openai_chatgpt_config = OpenAIChatGptConfig(**openai_chatgpt_config_dict)
         self.plugin_name = None
-        self._genai_cost_base = None
         self.model_name = self.openai_chatgpt_config.OPENAI_CHATGPT_MODEL_NAME
+        self.embedding_client = None
         # Dispatchers
         self.user_interaction_dispatcher = None
         self.genai_interactions_text_dispatcher = None
@@ -62,14 +71,9 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
         self._plugin_name = value
 
     @property
-    def genai_cost_base(self) -> GenAICostBase:
-        if self._genai_cost_base is None:
-            raise ValueError("GenAI cost base is not set")
-        return self._genai_cost_base
-
-    @genai_cost_base.setter
-    def genai_cost_base(self, value: GenAICostBase):
-        self._genai_cost_base = value
+    def supports_structured_output(self) -> bool:
+        # The assistant runs follow the instructions of the assistant, not a response format
+        return not self.openai_chatgpt_config.OPENAI_CHATGPT_IS_ASSISTANT
 
     def initialize(self):
         # Client settings
@@ -82,6 +86,26 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
 
         # Set OpenAI API key
         AsyncOpenAI.api_key = self.openai_api_key
+
+        # Completions are spread across the main deployment and the additional ones, retries are handled by the router
+        deployments = [Deployment(name="main", model_name=self.model_name,
+                                  vision_model_name=self.openai_chatgpt_config.OPENAI_CHATGPT_VISION_MODEL_NAME,
+                                  settings={"api_key": self.openai_api_key, "max_retries": 0})]
+        for index, deployment_config in enumerate(self.openai_chatgpt_config.OPENAI_CHATGPT_DEPLOYMENTS):
+            settings = {"api_key": deployment_config.get("API_KEY", self.openai_api_key), "max_retries": 0}
+            if deployment_config.get("BASE_URL"):
+                settings["base_url"] = deployment_config["BASE_URL"]
+            deployments.append(Deployment(
+                name=deployment_config.get("NAME", f"deployment_{index + 1}"),
+                model_name=deployment_config.get("MODEL_NAME", self.model_name),
+                vision_model_name=deployment_config.get("VISION_MODEL_NAME",
+                                                        self.openai_chatgpt_config.OPENAI_CHATGPT_VISION_MODEL_NAME),
+                weight=float(deployment_config.get("WEIGHT", 1.0)),
+                settings=settings
+            ))
+        self.deployment_router = DeploymentRouter.from_bot_config(
+            self.logger, self.global_manager.bot_config, deployments, retryable_exceptions=(APIConnectionError,),
+            name=self.openai_chatgpt_config.PLUGIN_NAME)
         self.input_handler = ChatInputHandler(self.global_manager, self)
         self.input_handler.initialize()
 
@@ -187,7 +211,8 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
             # Call the model to generate the completion
             self.logger.info(f"GENAI CALL: Calling Generative AI completion for user input on model {model_name}..")
             generation_start_time = datetime.now()
-            completion, genai_cost_base = await self.generate_completion(messages, event, raw_output=True)
+            completion, genai_cost_base = await self.genai_interactions_text_dispatcher.generate_completion(
+                messages, event, plugin_name=self.plugin_name, raw_output=True)
             generation_end_time = datetime.now()
 
             # Calculate the generation time
@@ -241,82 +266,59 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
             self.logger.error(f"Error in handle_action: {e}")
             raise
 
-    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, raw_output=False):
-        # Check if we should use the assistant
+    async def generate_completion(self, messages, event_data: IncomingNotificationDataBase, raw_output=False,
+                                  session=None):
+        # The assistant mode, which uses the session to reuse its thread, is not implemented by this plugin
         self.logger.info("Generate completion triggered...")
 
         # If not using an assistant, proceed with the standard completion
-        model_name = self.openai_chatgpt_config.OPENAI_CHATGPT_MODEL_NAME
-
         # Filter out messages content from the metadata
 
         messages = [{'role': message.get('role'), 'content': message.get('content')} for message in messages]
 
-        if event_data.images:
+        use_vision_model = bool(event_data.images)
+        if use_vision_model:
             if not self.openai_chatgpt_config.OPENAI_CHATGPT_VISION_MODEL_NAME:
                 self.logger.error("Image received without AZURE_CHATGPT_VISION_MODEL_NAME in config")
                 await self.user_interaction_dispatcher.send_message(event=event_data,
                                                                     message="Image received without genai interpreter in config",
                                                                     message_type=MessageType.COMMENT)
                 return
-            model_name = self.openai_chatgpt_config.OPENAI_CHATGPT_VISION_MODEL_NAME
         else:
-            model_name = self.openai_chatgpt_config.OPENAI_CHATGPT_MODEL_NAME
             messages = await self.filter_images(messages)
 
-        try:
-            client = AsyncOpenAI(api_key=self.openai_api_key)
-            completion = await client.chat.completions.create(
-                model=model_name,
+        # The actions are requested as JSON following the actions schema instead of the marker block
+        completion_options = {"response_format": JSON_SCHEMA_RESPONSE_FORMAT} \
+            if self.structured_output_enabled(raw_output) else {}
+
+        async def create_completion(deployment: Deployment):
+            return await self.get_deployment_client(deployment).chat.completions.create(
+                model=deployment.vision_model_name if use_vision_model else deployment.model_name,
                 messages=messages,
                 temperature=0.1,
-                max_tokens=4096
+                max_tokens=4096,
+                **completion_options
             )
 
+        try:
+            completion = await self.deployment_router.call(create_completion)
+
             # Extract the full response between the markers
             response = completion.choices[0].message.content
             if raw_output == False:
-                start_marker = "[BEGINIMDETECT]"
-                end_marker = "[ENDIMDETECT]"
-
-                # Ensure that the markers exist in the response
-                if start_marker in response and end_marker in response:
-                    # Extract the JSON content between the markers
-                    json_content = response.split(start_marker)[1].split(end_marker)[0].strip()
-
-                    # Load the JSON content
-                    try:
-                        response_dict = json.loads(json_content)
-                        normalized_response_dict = self.normalize_keys(response_dict)
-
-                        # Locate the "UserInteraction" action and replace escape sequences
-                        for action in normalized_response_dict.get("response", []):
-                            if action["Action"]["ActionName"] == "UserInteraction":
-                                value = action["Action"]["Parameters"]["value"]
-
-                                # Replace the escape sequences (\\n) with real newlines (\n)
-                                formatted_value = value.replace("\\n", "\n")
-                                action["Action"]["Parameters"]["value"] = formatted_value
-
-                        # Rebuild the formatted JSON with indentation
-                        formatted_json_content = json.dumps(response_dict, ensure_ascii=False, indent=2)
-                        response = f"{start_marker}\n{formatted_json_content}\n{end_marker}"
-
-                    except json.JSONDecodeError as e:
-                        # Log error if JSON parsing fails
-                        self.logger.error(f"Error decoding JSON: {e}")
-                else:
-                    self.logger.error("Missing [BEGINIMDETECT] or [ENDIMDETECT] markers in the response.")
+                response = self.format_completion(response)
 
             # Extract the GPT response and token usage details
-            self.genai_cost_base = GenAICostBase()
-            self.genai_cost_base.total_tk = completion.usage.total_tokens
-            self.genai_cost_base.prompt_tk = completion.usage.prompt_tokens
-            self.genai_cost_base.completion_tk = completion.usage.completion_tokens
-            self.genai_cost_base.input_token_price = self.input_token_price
-            self.genai_cost_base.output_token_price = self.output_token_price
+            genai_cost_base = GenAICostBase(
+                total_tk=completion.usage.total_tokens,
+                prompt_tk=completion.usage.prompt_tokens,
+                completion_tk=completion.usage.completion_tokens,
+                cached_tk=GenAICostBase.read_cached_tokens(completion.usage),
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
 
-            return response, self.genai_cost_base
+            return CompletionResult(response, genai_cost_base)
 
         except asyncio.CancelledError:
             await self.user_interaction_dispatcher.send_message(event=event_data, message="Task was cancelled",
@@ -335,6 +337,22 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
                                                                 message_type=MessageType.COMMENT, is_internal=True)
             raise  # Re-raise the exception after logging
 
+    async def generate_embedding(self, text: str) -> Optional[List[float]]:
+        embedding_model_name = self.openai_chatgpt_config.OPENAI_CHATGPT_EMBEDDING_MODEL_NAME
+        if not embedding_model_name:
+            return None
+        # The client is created on first use and reused by the following embeddings, keeping its connection pool
+        if self.embedding_client is None:
+            self.embedding_client = AsyncOpenAI(api_key=self.openai_api_key)
+        response = await self.embedding_client.embeddings.create(input=[text], model=embedding_model_name)
+        return response.data[0].embedding
+
+    def get_deployment_client(self, deployment: Deployment) -> AsyncOpenAI:
+        # The clients are created on first use and reused by the following requests
+        if deployment.client is None:
+            deployment.client = AsyncOpenAI(**deployment.settings)
+        return deployment.client
+
     async def filter_images(self, messages):
         filtered_messages = []
         for message in messages:
@@ -344,6 +362,70 @@ class OpenaiChatgptPlugin(GenAIInteractionsTextPluginBase):
             filtered_messages.append(message)
         return filtered_messages
 
+    async def generate_completion_stream(self, messages, event_data: IncomingNotificationDataBase, session=None):
+        self.logger.info("Generate completion stream triggered...")
+        messages = [{'role': message.get('role'), 'content': message.get('content')} for message in messages]
+
+        use_vision_model = bool(event_data.images)
+        if use_vision_model:
+            if not self.openai_chatgpt_config.OPENAI_CHATGPT_VISION_MODEL_NAME:
+                self.logger.error("Image received without OPENAI_CHATGPT_VISION_MODEL_NAME in config")
+                await self.user_interaction_dispatcher.send_message(event=event_data,
+                                                                    message="Image received without genai interpreter in config",
+                                                                    message_type=MessageType.COMMENT)
+                return
+        else:
+            messages = await self.filter_images(messages)
+
+        completion_options = {"response_format": JSON_SCHEMA_RESPONSE_FORMAT} \
+            if self.structured_output_enabled() else {}
+
+        async def create_stream(deployment: Deployment):
+            return await self.get_deployment_client(deployment).chat.completions.create(
+                model=deployment.vision_model_name if use_vision_model else deployment.model_name,
+                messages=messages,
+                temperature=0.1,
+                max_tokens=4096,
+                stream=True,
+                stream_options={"include_usage": True},
+                **completion_options
+            )
+
+        try:
+            # The deployment is held until the stream is consumed, a stream cannot be replayed so it is not hedged
+            usage = None
+            async with self.deployment_router.stream(create_stream) as stream:
+                async for chunk in stream:
+                    # The last chunk only holds the token usage of the whole completion
+                    if chunk.usage is not None:
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+
+            genai_cost_base = GenAICostBase(
+                total_tk=usage.total_tokens if usage else 0,
+                prompt_tk=usage.prompt_tokens if usage else 0,
+                completion_tk=usage.completion_tokens if usage else 0,
+                cached_tk=GenAICostBase.read_cached_tokens(usage),
+                input_token_price=self.input_token_price,
+                output_token_price=self.output_token_price
+            )
+
+            # The last item of the stream is the cost of this completion
+            yield genai_cost_base
+
+        except asyncio.exceptions.CancelledError:
+            await self.user_interaction_dispatcher.send_message(event=event_data, message="Task was cancelled",
+                                                                message_type=MessageType.COMMENT, is_internal=True)
+            self.logger.error("Task was cancelled")
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred: {str(e)}\n{traceback.format_exc()}")
+            await self.user_interaction_dispatcher.send_message(event=event_data,
+                                                                message="An unexpected error occurred",
+                                                                message_type=MessageType.COMMENT, is_internal=True)
+            raise
+
     async def trigger_genai(self, event: IncomingNotificationDataBase):
         AUTOMATED_RESPONSE_TRIGGER = "Automated response"
         event_copy = event
@@ -12,6 +12,7 @@ from vertexai.preview.generative_models import GenerativeModel
 
 from core.action_interactions.action_input import ActionInput
 from core.backend.session_manager_dispatcher import SessionManagerDispatcher
+from core.genai_interactions.completion_result import CompletionResult
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
@@ -50,7 +51,6 @@ class VertexaiGeminiPlugin(GenAIInteractionsTextPluginBase):
             "VERTEXAI_GEMINI"]
         self.vertexai_gemini_config = VertexaiGeminiConfig(**vertexai_gemini_config_dict)
         self.plugin_name = None
-        self._genai_cost_base = None
         self.model_name = self.vertexai_gemini_config.VERTEXAI_GEMINI_MODELNAME
         # Dispatchers
         self.user_interaction_dispatcher = None
@@ -65,16 +65,6 @@ class VertexaiGeminiPlugin(GenAIInteractionsTextPluginBase):
     def plugin_name(self, value):
         self._plugin_name = value
 
-    @property
-    def genai_cost_base(self) -> GenAICostBase:
-        if self._genai_cost_base is None:
-            raise ValueError("GenAI cost base is not set")
-        return self._genai_cost_base
-
-    @genai_cost_base.setter
-    def genai_cost_base(self, value: GenAICostBase):
-        self._genai_cost_base = value
-
     def initialize(self):
         # Client settings
         self.vertexai_gemini_input_token_price = self.vertexai_gemini_config.VERTEXAI_GEMINI_INPUT_TOKEN_PRICE
@@ -183,7 +173,8 @@ class VertexaiGeminiPlugin(GenAIInteractionsTextPluginBase):
             generation_start_time = datetime.now()
 
             # Ensure raw_output is set to True
-            completion, genai_cost_base = await self.generate_completion(messages, event, raw_output=True)
+            completion, genai_cost_base = await self.genai_interactions_text_dispatcher.generate_completion(
+                messages, event, plugin_name=self.plugin_name, raw_output=True)
 
             generation_end_time = datetime.now()
 
@@ -267,49 +258,21 @@ class VertexaiGeminiPlugin(GenAIInteractionsTextPluginBase):
             first_candidate = completion.candidates[0]
             response = first_candidate.content.parts[0].text
 
-            if not raw_output:
-                start_marker = "[BEGINIMDETECT]"
-                end_marker = "[ENDIMDETECT]"
-
-                # Assurez-vous que les marqueurs existent dans la réponse
-                if start_marker in response and end_marker in response:
-                    # Extraire le contenu JSON entre les marqueurs
-                    json_content = response.split(start_marker)[1].split(end_marker)[0].strip()
-
-                    try:
-                        response_dict = json.loads(json_content)
-                        normalized_response_dict = self.normalize_keys(response_dict)
-
-                        # Localiser l'action "UserInteraction" et remplacer les séquences d'échappement
-                        for action in normalized_response_dict.get("response", []):
-                            if action["Action"]["ActionName"] == "UserInteraction":
-                                value = action["Action"]["Parameters"]["value"]
-                                formatted_value = value.replace("\\n", "\n")  # Remplacer les séquences d'échappement
-                                action["Action"]["Parameters"]["value"] = formatted_value
-
-                        # Reconstruire le JSON formaté
-                        formatted_json_content = json.dumps(response_dict, ensure_ascii=False, indent=2)
-                        response = f"{start_marker}\n{formatted_json_content}\n{end_marker}"
-
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"Error decoding JSON: {e}")
-                else:
-                    self.logger.error("Missing [BEGINIMDETECT] or [ENDIMDETECT] markers in the response.")
-
             # Calculate token usage details before any return statement
             usage_metadata = completion.usage_metadata
-            self.genai_cost_base = GenAICostBase()
-            self.genai_cost_base.total_tk = usage_metadata.total_token_count
-            self.genai_cost_base.prompt_tk = usage_metadata.prompt_token_count
-            self.genai_cost_base.completion_tk = usage_metadata.candidates_token_count
-            self.genai_cost_base.input_token_price = self.vertexai_gemini_input_token_price
-            self.genai_cost_base.output_token_price = self.vertexai_gemini_output_token_price
+            genai_cost_base = GenAICostBase(
+                total_tk=usage_metadata.total_token_count,
+                prompt_tk=usage_metadata.prompt_token_count,
+                completion_tk=usage_metadata.candidates_token_count,
+                input_token_price=self.vertexai_gemini_input_token_price,
+                output_token_price=self.vertexai_gemini_output_token_price
+            )
 
             # Process the response text to preserve newlines and Unicode characters
             formatted_response = self.process_response_text(response)
 
             # Return both the formatted response and genai_cost_base
-            return formatted_response, self.genai_cost_base
+            return CompletionResult(formatted_response, genai_cost_base)
 
         except asyncio.exceptions.CancelledError:
             # Handle task cancellation
@@ -14,6 +14,8 @@ from fastapi import Request
 from pydantic import BaseModel
 from starlette.responses import Response
 
+from core.event_processing.background_task_manager import BackgroundTaskManager
+from core.event_processing.event_deduplicator import EventDeduplicator
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -50,6 +52,12 @@ class SlackConfig(BaseModel):
     SLACK_WORKSPACE_NAME: str
     SLACK_BEHAVIOR_PLUGIN_NAME: str
     SLACK_AUTHORIZE_DIRECT_MESSAGE: bool
+    # How long (in seconds) an event_id is remembered to drop Slack retries without any storage I/O
+    SLACK_EVENT_DEDUP_TTL: int = 600
+    # Maximum number of events processed in background at the same time, above that Slack gets a 503 and retries later
+    SLACK_MAX_PENDING_EVENTS: int = 200
+    # Minimum number of seconds between two edits of a streamed message (Slack rate limits chat.update)
+    SLACK_STREAM_UPDATE_INTERVAL: float = 1.0
 
 class SlackReactionsConfig(BaseModel):
     PROCESSING: str
@@ -74,7 +82,11 @@ class SlackPlugin(UserInteractionsPluginBase):
         self._reactions = SlackReactionsConfig(**config_dict_reaction)
         self.genai_interactions_text_dispatcher = None
         self.backend_internal_data_processing_dispatcher = None
-        
+        self.root_message_timestamp = None
+        # Events are acknowledged right away and processed in tracked background tasks
+        self.background_tasks = BackgroundTaskManager(self.logger, self.slack_config.SLACK_MAX_PENDING_EVENTS,
+                                                      name="slack")
+        self.event_deduplicator = EventDeduplicator(self.slack_config.SLACK_EVENT_DEDUP_TTL)
 
     @property
     def route_path(self):
@@ -121,6 +133,8 @@ class SlackPlugin(UserInteractionsPluginBase):
         self.backend_internal_data_processing_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
 
     async def handle_request(self, request: Request):
+        # Slack retries any event not acknowledged within 3 seconds: only cheap in-memory checks are done
+        # here, everything that may wait on the backend or the network runs in a background task.
         try:
             self.logger.debug(f"request received: {request}")
             response = Response("OK", status_code=200)
@@ -129,7 +143,9 @@ class SlackPlugin(UserInteractionsPluginBase):
 
             # Check if the request is a slash command
             if request.headers['content-type'] == 'application/x-www-form-urlencoded':
-                asyncio.create_task(self.execute_slash_command(request, raw_body_str))
+                if not self.background_tasks.schedule(self.execute_slash_command(request, raw_body_str),
+                                                      name="slack-slash-command"):
+                    return self._busy_response()
             else:
                 event_data = json.loads(raw_body_str)  # Parse JSON from string
 
@@ -143,8 +159,25 @@ class SlackPlugin(UserInteractionsPluginBase):
 
                 headers = request.headers
                 self.logger.info(f"Request received from <{request.url.path}>")
+
+                if not (self._validate_headers(headers) and self._validate_signature(headers, raw_body_str)):
+                    self.logger.debug("Request discarded")
+                    return response
+
+                event_id = event_data.get('event_id')
+                if event_id is not None and self.event_deduplicator.is_duplicate(event_id):
+                    self.logger.info(
+                        f"Discarding request: event {event_id} already received "
+                        f"(retry {headers.get('X-Slack-Retry-Num', 0)}, reason: {headers.get('X-Slack-Retry-Reason')})")
+                    return response
+
                 # Create a new task to handle the rest of the processing
-                asyncio.create_task(self.process_event_data(event_data, headers, raw_body_str))
+                if not self.background_tasks.schedule(self.process_event_data(event_data, headers, raw_body_str),
+                                                      name=f"slack-event-{event_id}"):
+                    # Let Slack retry the event once the backlog has been absorbed
+                    if event_id is not None:
+                        self.event_deduplicator.forget(event_id)
+                    return self._busy_response()
 
             return response
 
@@ -152,6 +185,9 @@ class SlackPlugin(UserInteractionsPluginBase):
             self.logger.error(f"Error processing request from <{request.headers.get('Referer')}>: {e}")
             return response
 
+    def _busy_response(self):
+        return Response("Too many pending events", status_code=503, headers={"Retry-After": "1"})
+
     async def execute_slash_command(self, request: Request, raw_body_str):
         self.logger.debug("Validating request...")
         headers = request.headers
@@ -283,7 +319,8 @@ class SlackPlugin(UserInteractionsPluginBase):
 
     def _validate_signature(self, headers, raw_body_str):
         slack_signature = headers.get('X-Slack-Signature')
-        sig_basestring = f'v0:{self.root_message_timestamp}:{raw_body_str}'
+        timestamp = headers.get('X-Slack-Request-Timestamp', self.root_message_timestamp)
+        sig_basestring = f'v0:{timestamp}:{raw_body_str}'
         my_signature = 'v0=' + hmac.new(
             self.slack_signing_secret.encode(),
             sig_basestring.encode(),
@@ -344,13 +381,8 @@ class SlackPlugin(UserInteractionsPluginBase):
             self.logger.info("Discarding request: old message notification")
             return False
 
-        session_name = f"{channel_id}-{ts}.txt"
-        processing_container = self.backend_internal_data_processing_dispatcher.processing
-        result = await self.backend_internal_data_processing_dispatcher.read_data_content(processing_container,
-                                                                                          session_name)
-
-        if result is not None:
-            self.logger.warning(f"Discarding request: This request is already being processed for {session_name}")
+        if self.global_manager.processing_coordinator.is_processing(channel_id, ts):
+            self.logger.warning(f"Discarding request: This request is already being processed for {channel_id}-{ts}")
             return False
 
         return True
@@ -719,5 +751,62 @@ class SlackPlugin(UserInteractionsPluginBase):
         except Exception as e:
             self.logger.error(f"Error removing reaction: {e} in Slack Output Handler remove_reaction")
 
+    @property
+    def supports_message_updates(self) -> bool:
+        return True
+
+    @property
+    def message_update_interval(self) -> float:
+        return self.slack_config.SLACK_STREAM_UPDATE_INTERVAL
+
+    async def call_chat_api(self, method, payload):
+        headers = {'Authorization': f'Bearer {self.slack_bot_token}'}
+        # Streamed messages call the API at every update: the connections of the pooled session are reused
+        session = self.global_manager.web_content_fetcher.get_session()
+        async with session.post(f'https://slack.com/api/{method}', headers=headers, json=payload) as response:
+            if response.status != 200:
+                self.logger.error(f"Error calling Slack {method}: {response.status}")
+                return None
+            result = await response.json()
+        self.handle_response(result, payload.get('text', ''))
+        return result
+
+    def text_payload(self, message_block, is_partial=False):
+        if is_partial:
+            message_block += '...'
+        return {
+            'text': message_block,
+            'blocks': json.dumps([{"type": "section", "text": {"type": "mrkdwn", "text": message_block}}])
+        }
+
+    async def post_updatable_message(self, message, event: IncomingNotificationDataBase):
+        message_blocks = self.split_message(message, self.MAX_MESSAGE_LENGTH)
+        if not message_blocks:
+            return None
+        payload = {'channel': event.channel_id, 'thread_ts': event.response_id,
+                   **self.text_payload(message_blocks[0], is_partial=len(message_blocks) > 1)}
+        result = await self.call_chat_api('chat.postMessage', payload)
+        if not result or not result.get('ok'):
+            return None
+        return {'channel': result.get('channel', event.channel_id), 'ts': result.get('ts')}
+
+    async def update_message(self, message, event: IncomingNotificationDataBase, message_ref, is_final=False):
+        # While streaming, only the first block is edited. The overflow is posted once the message is final.
+        message_blocks = self.split_message(message, self.MAX_MESSAGE_LENGTH)
+        if not message_blocks:
+            return None
+        payload = {'channel': message_ref['channel'], 'ts': message_ref['ts'],
+                   **self.text_payload(message_blocks[0], is_partial=len(message_blocks) > 1)}
+        result = await self.call_chat_api('chat.update', payload)
+        if is_final:
+            for i, message_block in enumerate(message_blocks[1:], start=2):
+                payload = {'channel': message_ref['channel'], 'thread_ts': event.response_id,
+                           **self.text_payload(message_block, is_partial=i < len(message_blocks))}
+                await self.call_chat_api('chat.postMessage', payload)
+        return result
+
+    async def delete_message(self, event: IncomingNotificationDataBase, message_ref):
+        return await self.call_chat_api('chat.delete', {'channel': message_ref['channel'], 'ts': message_ref['ts']})
+
     def get_bot_id(self) -> str:
         return self.slack_config.SLACK_BOT_USER_ID
@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import io
 import json
@@ -8,7 +9,6 @@ from datetime import datetime, timezone
 
 import aiohttp
 import requests
-from bs4 import BeautifulSoup
 from PIL import Image
 from pypdf import PdfReader
 from requests.exceptions import ConnectionError
@@ -559,9 +559,7 @@ class SlackInputHandler:
         non_slack_urls = [url for url in urls if "slack.com" not in url]
 
         if self.global_manager.bot_config.GET_URL_CONTENT:
-            final_texts = []
-            for url in non_slack_urls:
-                final_texts.append(await self._process_single_url(url))
+            final_texts = await asyncio.gather(*(self._process_single_url(url) for url in non_slack_urls))
             text += ''.join(final_texts)
         return text
 
@@ -592,14 +590,10 @@ class SlackInputHandler:
                 return f"Error processing Slack URL: {url}"
         else:
             try:
-                webcontent = requests.get(url)
-                webcontent.raise_for_status()
-                soup = BeautifulSoup(webcontent.text, 'html.parser')
-                content = soup.get_text()
-                content = content.replace('\n', '')
-                content = re.sub(' +', ' ', content)
+                content = await self.global_manager.web_content_fetcher.fetch_text(url)
                 return f"The following text is an automated response inserted in the user conversation automatically giving the content of the URL in the user message: {content}\n"
-            except requests.exceptions.RequestException as e:
+            except Exception as e:
+                # A failing url must not drop the whole message, nor the content of the other urls
                 self.logger.error(f"An error occurred while trying to get {url}: {e}")
                 return f"An error occurred while trying to get {url}:\n"
 
@@ -257,17 +257,14 @@ class TeamsPlugin(UserInteractionsPluginBase):
         if channel_type != 'personal':
             conversation_id = event_data.get('conversation', {}).get('id', '').replace(':', '_')
             message_id = event_data.get('id')
-            session_name = f"{conversation_id}-{message_id}.txt"
+            session_channel, session_id = conversation_id, message_id
         else:
             message_id = event_data.get('conversation', {}).get('id', '').replace(':', '_')
-            session_name = f"{user_id}-{message_id}.txt"
+            session_channel, session_id = user_id, message_id
 
-        processing_container = self.backend_internal_data_processing_dispatcher.processing
-        result = await self.backend_internal_data_processing_dispatcher.read_data_content(processing_container,
-                                                                                          session_name)
-
-        if result is not None:
-            self.logger.warning(f"Discarding request: This request is already being processed for {session_name}")
+        if self.global_manager.processing_coordinator.is_processing(session_channel, session_id):
+            self.logger.warning(
+                f"Discarding request: This request is already being processed for {session_channel}-{session_id}")
             return True
         return False
 
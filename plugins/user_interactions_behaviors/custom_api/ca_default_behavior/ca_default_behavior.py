@@ -30,6 +30,8 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
         self.reaction_error = None
         self.reaction_acknowledge = None
         self.STATIC_GUID = "1234-5678-ABCD-EFGH"
+        # Number of queued messages read from the queue at once
+        self.QUEUE_DRAIN_BATCH_SIZE = 10
 
     def initialize(self):
         # Dispatchers
@@ -37,6 +39,7 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
         self.genai_interactions_text_dispatcher = self.global_manager.genai_interactions_text_dispatcher
         self.backend_internal_data_processing_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
         self.backend_internal_queue_processing_dispatcher = self.global_manager.backend_internal_queue_processing_dispatcher
+        self.processing_coordinator = self.global_manager.processing_coordinator
 
     @property
     def plugin_name(self):
@@ -66,12 +69,11 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             channel_id = event.channel_id
             thread_id = event.thread_id or event.timestamp  # Ensure thread_id is unique
 
-            # Prepare the processing session
-            session_name = f"{str(channel_id).replace(':', '_')}-{ts}.txt"
-            processing_container = self.backend_internal_data_processing_dispatcher.processing
-            await self.backend_internal_data_processing_dispatcher.write_data_content(processing_container,
-                                                                                      session_name, data="processing")
-            self.logger.info(f"IM behavior: Processing session {session_name} created successfully.")
+            # Claim the message so that duplicate notifications are discarded
+            if not self.processing_coordinator.claim_processing(channel_id, ts):
+                self.logger.warning(f"IM behavior: Message {channel_id}-{ts} is already being processed, discarding.")
+                return
+            self.logger.info(f"IM behavior: Processing session {channel_id}-{ts} created successfully.")
 
             # Retrieve bot configuration settings
             require_mention_new_message = self.bot_config.REQUIRE_MENTION_NEW_MESSAGE
@@ -97,6 +99,8 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                     abort_name = f"{str(channel_id).replace(':', '_')}-{thread_id}.txt"
                     self.logger.info(
                         f"IM behavior: Break keyword detected in thread message, stopping processing with flag {abort_name}.")
+                    # Flag the thread first so that in-flight generations are cancelled right away
+                    await self.processing_coordinator.abort(channel_id, thread_id)
                     await self.user_interaction_dispatcher.send_message(
                         event=event,
                         message=f"Break keyword detected, stopping further autogenerated processing in this thread. Use {start_keyword} to resume.",
@@ -104,9 +108,6 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                         is_internal=False,
                         show_ref=False
                     )
-                    await self.backend_internal_data_processing_dispatcher.write_data_content(
-                        self.backend_internal_data_processing_dispatcher.abort, abort_name, data="abort"
-                    )
                     return
                 elif start_keyword in event.text:
                     abort_name = f"{str(channel_id).replace(':', '_')}-{thread_id}.txt"
@@ -119,9 +120,7 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                         is_internal=False,
                         show_ref=False
                     )
-                    await self.backend_internal_data_processing_dispatcher.remove_data_content(
-                        self.backend_internal_data_processing_dispatcher.abort, abort_name
-                    )
+                    await self.processing_coordinator.resume(channel_id, thread_id)
                     return
                 elif clear_keyword in event.text:
                     self.logger.info(
@@ -289,7 +288,7 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             elapsed_time = end_time - start_time  # Calculate elapsed time
             self.logger.info(f"IM behavior: process_interaction took {elapsed_time} seconds.")
 
-    async def process_incoming_notification_data(self, event: IncomingNotificationDataBase):
+    async def process_incoming_notification_data(self, event: IncomingNotificationDataBase, drain_queue: bool = True):
         try:
             # Get the channel ID and timestamp from the event
             channel_id = event.channel_id
@@ -356,11 +355,19 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             await self.user_interaction_dispatcher.add_reaction(event=event, channel_id=channel_id, timestamp=timestamp,
                                                                 reaction_name=self.reaction_done)
 
+            # Messages drained from the queue are already removed from it, only the first one handles the queue
+            if not drain_queue:
+                return
+
             # Handle message queuing if enabled
             if self.bot_config.ACTIVATE_MESSAGE_QUEUING:
                 # Use the constant GUID for enqueuing and dequeuing messages
                 guid = self.STATIC_GUID
 
+                # The processed message stays in the queue while the pending ones are drained,
+                # so that messages arriving meanwhile keep being queued instead of processed concurrently
+                await self.process_queued_messages(event)
+
                 # Dequeue the processed message
                 await self.backend_internal_queue_processing_dispatcher.dequeue_message(
                     data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
@@ -370,52 +377,13 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                     guid=guid  # Constant GUID
                 )
 
-                # Process the next message in the queue, if any
-                next_message_data = await self.backend_internal_queue_processing_dispatcher.get_next_message(
-                    data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
-                    channel_id=event.channel_id,
-                    thread_id=event.thread_id,
-                    current_message_id=event.timestamp
-                )
-
-                while next_message_data:
-                    next_message_id, next_message_content = next_message_data
-                    if next_message_id is None and next_message_content is None:
-                        self.logger.info("IM behavior: No more messages in the queue.")
-                        break
-                    self.logger.info(
-                        f"IM behavior: Found next message in the queue: {next_message_id}. Processing next message.")
-                    try:
-                        event_to_process = IncomingNotificationDataBase.from_json(next_message_content)
-                        await self.user_interaction_dispatcher.remove_reaction(event=event_to_process, channel_id=str(
-                            event_to_process.channel_id), timestamp=event_to_process.timestamp,
-                                                                               reaction_name=self.reaction_wait)
-                        await self.user_interaction_dispatcher.add_reaction(event=event_to_process,
-                                                                            channel_id=str(event_to_process.channel_id),
-                                                                            timestamp=event_to_process.timestamp,
-                                                                            reaction_name=self.reaction_acknowledge)
-                        await self.process_incoming_notification_data(event_to_process)
-                    except Exception as e:
-                        self.logger.error(
-                            f"IM behavior: Error parsing next message: {str(e)}\n{traceback.format_exc()}")
-                        self.logger.error(f"IM behavior: Next message content: {next_message_content}")
-
-                    # Dequeue the next message regardless of success or failure
-                    await self.backend_internal_queue_processing_dispatcher.dequeue_message(
-                        data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
-                        channel_id=channel_id,
-                        thread_id=event.thread_id,
-                        message_id=next_message_id,
-                        guid=guid  # Constant GUID for consistency
-                    )
-
-                    # Fetch the next message in the queue
-                    next_message_data = await self.backend_internal_queue_processing_dispatcher.get_next_message(
+                # Messages queued while the processed message was being dequeued would otherwise wait for the TTL
+                if await self.backend_internal_queue_processing_dispatcher.peek_count(
                         data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
                         channel_id=event.channel_id,
-                        thread_id=event.thread_id,
-                        current_message_id=event.timestamp
-                    )
+                        thread_id=event.thread_id
+                ):
+                    await self.process_queued_messages(event)
             else:
                 # If message queuing is disabled, clean up the "wait" reaction from the thread
                 await self.backend_internal_queue_processing_dispatcher.dequeue_message(
@@ -449,6 +417,44 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             self.logger.error(
                 f"IM behavior: Error processing incoming notification data: {str(e)}\n{traceback.format_exc()}")
 
+    async def process_queued_messages(self, event: IncomingNotificationDataBase):
+        """
+        Drains the messages queued in the thread of the event, oldest first and by batches, and processes them.
+        """
+        while True:
+            pending_messages = await self.backend_internal_queue_processing_dispatcher.drain(
+                data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
+                channel_id=event.channel_id,
+                thread_id=event.thread_id,
+                limit=self.QUEUE_DRAIN_BATCH_SIZE,
+                after_message_id=event.timestamp
+            )
+            if not pending_messages:
+                self.logger.info("IM behavior: No more messages in the queue.")
+                return
+
+            for next_message_id, next_message_content in pending_messages:
+                self.logger.info(
+                    f"IM behavior: Found next message in the queue: {next_message_id}. Processing next message.")
+                try:
+                    event_to_process = IncomingNotificationDataBase.from_json(next_message_content)
+                    await self.user_interaction_dispatcher.remove_reaction(event=event_to_process, channel_id=str(
+                        event_to_process.channel_id), timestamp=event_to_process.timestamp,
+                                                                           reaction_name=self.reaction_wait)
+                    await self.user_interaction_dispatcher.add_reaction(event=event_to_process,
+                                                                        channel_id=str(event_to_process.channel_id),
+                                                                        timestamp=event_to_process.timestamp,
+                                                                        reaction_name=self.reaction_acknowledge)
+                    await self.process_incoming_notification_data(event_to_process, drain_queue=False)
+                except Exception as e:
+                    self.logger.error(
+                        f"IM behavior: Error parsing next message: {str(e)}\n{traceback.format_exc()}")
+                    self.logger.error(f"IM behavior: Next message content: {next_message_content}")
+
+            # A partial batch means the queue is empty
+            if len(pending_messages) < self.QUEUE_DRAIN_BATCH_SIZE:
+                return
+
     async def begin_genai_completion(self, event: IncomingNotificationDataBase, channel_id, timestamp):
         # This method is called when GenAI starts generating a completion.
         # It updates the reaction on the message in the specified channel and timestamp.
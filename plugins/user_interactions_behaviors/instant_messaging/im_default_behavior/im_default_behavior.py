@@ -1,7 +1,10 @@
+import asyncio
 import json
 import time
 import traceback
+from typing import List, Tuple
 
+from core.event_processing.message_coalescer import MessageCoalescer
 from core.genai_interactions.genai_response import GenAIResponse
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -29,7 +32,10 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
         self.reaction_writing = None
         self.reaction_error = None
         self.reaction_acknowledge = None
+        self.reaction_wait = None
         self.STATIC_GUID = "1234-5678-ABCD-EFGH"
+        # Number of queued messages read from the queue at once
+        self.QUEUE_DRAIN_BATCH_SIZE = 10
 
     def initialize(self):
         # Dispatchers
@@ -37,6 +43,8 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
         self.genai_interactions_text_dispatcher = self.global_manager.genai_interactions_text_dispatcher
         self.backend_internal_data_processing_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
         self.backend_internal_queue_processing_dispatcher = self.global_manager.backend_internal_queue_processing_dispatcher
+        self.processing_coordinator = self.global_manager.processing_coordinator
+        self.message_coalescer = MessageCoalescer(self.logger, self.bot_config.MESSAGE_COALESCING_WINDOW)
 
     @property
     def plugin_name(self):
@@ -66,12 +74,11 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             channel_id = event.channel_id
             thread_id = event.thread_id or event.timestamp  # Ensure thread_id is unique
 
-            # Prepare the processing session
-            session_name = f"{str(channel_id).replace(':', '_')}-{ts}.txt"
-            processing_container = self.backend_internal_data_processing_dispatcher.processing
-            await self.backend_internal_data_processing_dispatcher.write_data_content(processing_container,
-                                                                                      session_name, data="processing")
-            self.logger.info(f"IM behavior: Processing session {session_name} created successfully.")
+            # Claim the message so that duplicate notifications are discarded
+            if not self.processing_coordinator.claim_processing(channel_id, ts):
+                self.logger.warning(f"IM behavior: Message {channel_id}-{ts} is already being processed, discarding.")
+                return
+            self.logger.info(f"IM behavior: Processing session {channel_id}-{ts} created successfully.")
 
             # Retrieve bot configuration settings
             require_mention_new_message = self.bot_config.REQUIRE_MENTION_NEW_MESSAGE
@@ -97,6 +104,8 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                     abort_name = f"{str(channel_id).replace(':', '_')}-{thread_id}.txt"
                     self.logger.info(
                         f"IM behavior: Break keyword detected in thread message, stopping processing with flag {abort_name}.")
+                    # Flag the thread first so that in-flight generations are cancelled right away
+                    await self.processing_coordinator.abort(channel_id, thread_id)
                     await self.user_interaction_dispatcher.send_message(
                         event=event,
                         message=f"Break keyword detected, stopping further autogenerated processing in this thread. Use {start_keyword} to resume.",
@@ -104,9 +113,6 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                         is_internal=False,
                         show_ref=False
                     )
-                    await self.backend_internal_data_processing_dispatcher.write_data_content(
-                        self.backend_internal_data_processing_dispatcher.abort, abort_name, data="abort"
-                    )
                     return
                 elif start_keyword in event.text:
                     abort_name = f"{str(channel_id).replace(':', '_')}-{thread_id}.txt"
@@ -119,9 +125,7 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                         is_internal=False,
                         show_ref=False
                     )
-                    await self.backend_internal_data_processing_dispatcher.remove_data_content(
-                        self.backend_internal_data_processing_dispatcher.abort, abort_name
-                    )
+                    await self.processing_coordinator.resume(channel_id, thread_id)
                     return
                 elif clear_keyword in event.text:
                     self.logger.info(
@@ -296,6 +300,10 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             await self.user_interaction_dispatcher.send_message(event=event, message="", message_type=MessageType.TEXT,
                                                                 is_internal=True, show_ref=True)
 
+            # Wait for the follow-up messages of a burst so they are answered in a single turn
+            if self.bot_config.ACTIVATE_MESSAGE_QUEUING and self.message_coalescer.enabled:
+                event = await self.coalesce_burst(event)
+
             # Process the incoming notification data
             await self.process_incoming_notification_data(event)
 
@@ -317,7 +325,7 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             elapsed_time = end_time - start_time  # Calculate elapsed time
             self.logger.info(f"IM behavior: process_interaction took {elapsed_time} seconds.")
 
-    async def process_incoming_notification_data(self, event: IncomingNotificationDataBase):
+    async def process_incoming_notification_data(self, event: IncomingNotificationDataBase, drain_queue: bool = True):
         try:
             # Get the channel ID and timestamp from the event
             channel_id = event.channel_id
@@ -451,11 +459,19 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             ]
             await self.user_interaction_dispatcher.update_reactions_batch(reactions_actions)
 
+            # Messages drained from the queue are already removed from it, only the first one handles the queue
+            if not drain_queue:
+                return
+
             # Handle message queuing if enabled
             if self.bot_config.ACTIVATE_MESSAGE_QUEUING:
                 # Use the constant GUID for enqueuing and dequeuing messages
                 guid = self.STATIC_GUID
 
+                # The processed message stays in the queue while the pending ones are drained,
+                # so that messages arriving meanwhile keep being queued instead of processed concurrently
+                await self.process_queued_messages(event)
+
                 # Dequeue the processed message
                 await self.backend_internal_queue_processing_dispatcher.dequeue_message(
                     data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
@@ -465,68 +481,13 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
                     guid=guid  # Constant GUID
                 )
 
-                # Process the next message in the queue, if any
-                next_message_data = await self.backend_internal_queue_processing_dispatcher.get_next_message(
-                    data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
-                    channel_id=event.channel_id,
-                    thread_id=event.thread_id,
-                    current_message_id=event.timestamp
-                )
-
-                while next_message_data:
-                    next_message_id, next_message_content = next_message_data
-                    if next_message_id is None and next_message_content is None:
-                        self.logger.info("IM behavior: No more messages in the queue.")
-                        break
-                    self.logger.info(
-                        f"IM behavior: Found next message in the queue: {next_message_id}. Processing next message.")
-                    try:
-                        event_to_process = IncomingNotificationDataBase.from_json(next_message_content)
-                        # Remove 'wait' reaction and add 'acknowledge' reaction
-                        reactions_actions = [
-                            {
-                                'action': 'remove',
-                                'reaction': {
-                                    'event': event_to_process,
-                                    'channel_id': str(event_to_process.channel_id),
-                                    'timestamp': event_to_process.timestamp,
-                                    'reaction_name': self.reaction_wait
-                                }
-                            },
-                            {
-                                'action': 'add',
-                                'reaction': {
-                                    'event': event_to_process,
-                                    'channel_id': str(event_to_process.channel_id),
-                                    'timestamp': event_to_process.timestamp,
-                                    'reaction_name': self.reaction_acknowledge
-                                }
-                            }
-                        ]
-                        await self.user_interaction_dispatcher.update_reactions_batch(reactions_actions)
-
-                        await self.process_incoming_notification_data(event_to_process)
-                    except Exception as e:
-                        self.logger.error(
-                            f"IM behavior: Error parsing next message: {str(e)}\n{traceback.format_exc()}")
-                        self.logger.error(f"IM behavior: Next message content: {next_message_content}")
-
-                    # Dequeue the next message regardless of success or failure
-                    await self.backend_internal_queue_processing_dispatcher.dequeue_message(
-                        data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
-                        channel_id=channel_id,
-                        thread_id=event.thread_id,
-                        message_id=next_message_id,
-                        guid=guid  # Constant GUID for consistency
-                    )
-
-                    # Fetch the next message in the queue
-                    next_message_data = await self.backend_internal_queue_processing_dispatcher.get_next_message(
+                # Messages queued while the processed message was being dequeued would otherwise wait for the TTL
+                if await self.backend_internal_queue_processing_dispatcher.peek_count(
                         data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
                         channel_id=event.channel_id,
-                        thread_id=event.thread_id,
-                        current_message_id=event.timestamp
-                    )
+                        thread_id=event.thread_id
+                ):
+                    await self.process_queued_messages(event)
             else:
                 # If message queuing is disabled, clean up the "wait" reaction from the thread
                 await self.backend_internal_queue_processing_dispatcher.dequeue_message(
@@ -557,6 +518,134 @@ class ImDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             self.logger.error(
                 f"IM behavior: Error processing incoming notification data: {str(e)}\n{traceback.format_exc()}")
 
+    async def coalesce_burst(self, event: IncomingNotificationDataBase) -> IncomingNotificationDataBase:
+        """
+        Waits for the coalescing window, then merges the messages queued meanwhile by the same user into the event.
+        Queued messages of other users are put back in the queue.
+        """
+        await asyncio.sleep(self.message_coalescer.window_seconds)
+        pending_messages = await self.backend_internal_queue_processing_dispatcher.drain(
+            data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
+            channel_id=event.channel_id,
+            thread_id=event.thread_id,
+            after_message_id=event.timestamp
+        )
+        burst, remaining = self.message_coalescer.split_burst(event, self.parse_queued_messages(pending_messages))
+
+        if remaining:
+            await self.backend_internal_queue_processing_dispatcher.enqueue_many(
+                data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
+                channel_id=event.channel_id,
+                thread_id=event.thread_id,
+                messages=[(queued_event.timestamp, queued_event.to_json()) for queued_event in remaining],
+                guid=self.STATIC_GUID
+            )
+        if not burst:
+            return event
+
+        await self.user_interaction_dispatcher.update_reactions_batch(
+            self.queued_reactions_actions(burst, acknowledge=False))
+        merged_event = self.message_coalescer.merge([event] + burst)
+        self.message_coalescer.record_savings(len(burst) + 1, await self.estimate_prompt_tokens(event))
+        return merged_event
+
+    async def process_queued_messages(self, event: IncomingNotificationDataBase):
+        """
+        Drains the messages queued in the thread of the event, oldest first and by batches, and processes them.
+        When coalescing is enabled, consecutive messages of the same user are processed as a single turn.
+        """
+        while True:
+            pending_messages = await self.backend_internal_queue_processing_dispatcher.drain(
+                data_container=self.backend_internal_queue_processing_dispatcher.messages_queue,
+                channel_id=event.channel_id,
+                thread_id=event.thread_id,
+                limit=self.QUEUE_DRAIN_BATCH_SIZE,
+                after_message_id=event.timestamp
+            )
+            if not pending_messages:
+                self.logger.info("IM behavior: No more messages in the queue.")
+                return
+
+            pending_events = self.parse_queued_messages(pending_messages)
+            if self.message_coalescer.enabled:
+                groups = self.message_coalescer.group(pending_events)
+            else:
+                groups = [[pending_event] for pending_event in pending_events]
+
+            for group in groups:
+                self.logger.info(
+                    f"IM behavior: Found next message in the queue: {group[0].timestamp}. Processing next message.")
+                try:
+                    # Remove 'wait' reaction and add 'acknowledge' reaction
+                    reactions_actions = self.queued_reactions_actions(group[:1], acknowledge=True)
+                    reactions_actions += self.queued_reactions_actions(group[1:], acknowledge=False)
+                    await self.user_interaction_dispatcher.update_reactions_batch(reactions_actions)
+
+                    event_to_process = self.message_coalescer.merge(group)
+                    if len(group) > 1:
+                        prompt_tokens = await self.estimate_prompt_tokens(event_to_process)
+                        self.message_coalescer.record_savings(len(group), prompt_tokens)
+                    await self.process_incoming_notification_data(event_to_process, drain_queue=False)
+                except Exception as e:
+                    self.logger.error(
+                        f"IM behavior: Error processing next message: {str(e)}\n{traceback.format_exc()}")
+
+            # A partial batch means the queue is empty
+            if len(pending_messages) < self.QUEUE_DRAIN_BATCH_SIZE:
+                return
+
+    def parse_queued_messages(self, pending_messages: List[Tuple[str, str]]) -> List[IncomingNotificationDataBase]:
+        pending_events = []
+        for next_message_id, next_message_content in pending_messages:
+            try:
+                pending_events.append(IncomingNotificationDataBase.from_json(next_message_content))
+            except Exception as e:
+                self.logger.error(
+                    f"IM behavior: Error parsing next message: {str(e)}\n{traceback.format_exc()}")
+                self.logger.error(f"IM behavior: Next message content: {next_message_content}")
+        return pending_events
+
+    def queued_reactions_actions(self, events: List[IncomingNotificationDataBase], acknowledge: bool):
+        # Queued messages have a 'wait' reaction, only the message that is answered gets the 'acknowledge' one
+        reactions_actions = []
+        for queued_event in events:
+            reactions_actions.append({
+                'action': 'remove',
+                'reaction': {
+                    'event': queued_event,
+                    'channel_id': str(queued_event.channel_id),
+                    'timestamp': queued_event.timestamp,
+                    'reaction_name': self.reaction_wait
+                }
+            })
+            if acknowledge:
+                reactions_actions.append({
+                    'action': 'add',
+                    'reaction': {
+                        'event': queued_event,
+                        'channel_id': str(queued_event.channel_id),
+                        'timestamp': queued_event.timestamp,
+                        'reaction_name': self.reaction_acknowledge
+                    }
+                })
+        return reactions_actions
+
+    async def estimate_prompt_tokens(self, event: IncomingNotificationDataBase) -> int:
+        """
+        Estimates the prompt size of a completion in the thread of the event from its session history.
+        """
+        try:
+            session = await self.global_manager.session_manager_dispatcher.get_or_create_session(
+                channel_id=event.channel_id,
+                thread_id=event.thread_id or event.timestamp,
+                enriched=True
+            )
+            # Images are charged at their token cost, not at the size of their base64 data
+            return self.global_manager.token_accounting.token_counter.count_messages(session.messages)
+        except Exception as e:
+            self.logger.warning(f"IM behavior: Could not estimate the prompt size: {str(e)}")
+            return 0
+
     async def begin_genai_completion(self, event: IncomingNotificationDataBase, channel_id, timestamp):
         # This method is called when GenAI starts generating a completion.
         # It updates the reaction on the message in the specified channel and timestamp.
@@ -7,6 +7,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from core.event_processing.processing_coordinator import ProcessingCoordinator
+from core.genai_interactions.token_accounting import TokenAccounting
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -214,6 +216,9 @@ def mock_global_manager(mock_config_manager, mock_plugin_manager, mock_user_inte
     mock_global_manager.genai_image_generator_dispatcher = AsyncMock()
     mock_global_manager.bot_config.INTERNAL_DATA_PROCESSING_DEFAULT_PLUGIN_NAME = 'mock_plugin'
     mock_global_manager.session_manager_dispatcher = AsyncMock()  # Add this line
+    mock_global_manager.web_content_fetcher = AsyncMock()
+    mock_global_manager.processing_coordinator = ProcessingCoordinator(mock_global_manager)
+    mock_global_manager.token_accounting = TokenAccounting(mock_global_manager.logger)
 
     # Ensure the Azure Service Bus plugin is available
     mock_global_manager.config_manager.config_model.PLUGINS.BACKEND.INTERNAL_QUEUE_PROCESSING = {
@@ -1,6 +1,8 @@
 # tests/core/action_interactions/test_action_interactions_handler.py
 
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import copy
+from unittest.mock import ANY, AsyncMock, MagicMock
 
 import pytest
 
@@ -24,6 +26,7 @@ def global_manager():
     global_manager.plugin_manager = MagicMock()
     global_manager.logger = MagicMock()
     global_manager.user_interactions_dispatcher = MagicMock(spec=UserInteractionsDispatcher)
+    global_manager.bot_config = MagicMock(ACTION_MAX_PARALLEL=2)
     return global_manager
 
 @pytest.fixture
@@ -89,5 +92,133 @@ async def test_handle_request(action_interactions_handler, genai_response, event
 
     action_interactions_handler.handle_action = AsyncMock()
     await action_interactions_handler.handle_request(genai_response, event)
-    action_interactions_handler.handle_action.assert_any_await(action1, event)
-    action_interactions_handler.handle_action.assert_any_await(action2, event)
+    action_interactions_handler.handle_action.assert_any_await(action1, event, action_plugin=ANY)
+    action_interactions_handler.handle_action.assert_any_await(action2, event, action_plugin=ANY)
+
+
+def make_action(name):
+    action = MagicMock()
+    action.ActionName = name
+    action.Parameters = {}
+    return action
+
+
+def make_action_plugin(name, parallel_safe, timeline, running, delay=0.05):
+    plugin = MagicMock(spec=ActionBase)
+    plugin.parallel_safe = parallel_safe
+
+    async def execute(action_input, event):
+        running.add(name)
+        timeline.append(("start", name, len(running)))
+        await asyncio.sleep(delay)
+        running.discard(name)
+        timeline.append(("end", name, len(running)))
+        return name
+
+    plugin.execute = AsyncMock(side_effect=execute)
+    return plugin
+
+
+@pytest.mark.asyncio
+async def test_handle_request_runs_parallel_safe_actions_concurrently(action_interactions_handler, global_manager,
+                                                                      genai_response, event):
+    timeline, running = [], set()
+    plugins = {
+        "UserInteraction": make_action_plugin("UserInteraction", False, timeline, running, delay=0),
+        "FetchWebContent": make_action_plugin("FetchWebContent", True, timeline, running),
+        "VectorSearch": make_action_plugin("VectorSearch", True, timeline, running),
+        "StoreThought": make_action_plugin("StoreThought", False, timeline, running, delay=0),
+    }
+    global_manager.get_action.side_effect = lambda name: plugins[name]
+    genai_response.response = [make_action("FetchWebContent"), make_action("UserInteraction"),
+                               make_action("VectorSearch"), make_action("StoreThought")]
+
+    results = await action_interactions_handler.handle_request(genai_response, event)
+
+    # UserInteraction runs first and alone, the searches together, the ordered action after them
+    assert results == ["UserInteraction", "FetchWebContent", "VectorSearch", "StoreThought"]
+    assert timeline[:2] == [("start", "UserInteraction", 1), ("end", "UserInteraction", 0)]
+    assert {entry[1] for entry in timeline[2:4]} == {"FetchWebContent", "VectorSearch"}
+    assert timeline[3][0] == "start" and timeline[3][2] == 2
+    assert timeline[-2:] == [("start", "StoreThought", 1), ("end", "StoreThought", 0)]
+
+
+@pytest.mark.asyncio
+async def test_handle_request_bounds_the_parallel_actions(action_interactions_handler, global_manager,
+                                                          genai_response, event):
+    timeline, running = [], set()
+    plugins = {f"Search{i}": make_action_plugin(f"Search{i}", True, timeline, running, delay=0.01) for i in range(5)}
+    global_manager.get_action.side_effect = lambda name: plugins[name]
+    genai_response.response = [make_action(name) for name in plugins]
+
+    results = await action_interactions_handler.handle_request(genai_response, event)
+
+    assert results == list(plugins)
+    assert max(entry[2] for entry in timeline if entry[0] == "start") == 2
+
+
+@pytest.mark.asyncio
+async def test_handle_request_batches_the_follow_ups(action_interactions_handler, global_manager, genai_response):
+    from core.action_interactions.follow_up_batch import current_follow_up_batch
+    event = IncomingNotificationDataBase(timestamp="1", event_label="message", channel_id="C1", thread_id="T1",
+                                         response_id="R1", is_mention=True, text="question", origin_plugin_name="test")
+    dispatcher = MagicMock()
+    dispatcher.trigger_genai = AsyncMock()
+    global_manager.genai_interactions_text_dispatcher = dispatcher
+
+    def make_follow_up_plugin(result_text):
+        plugin = MagicMock(spec=ActionBase)
+        plugin.parallel_safe = True
+        plugin.batch_follow_up = True
+
+        async def execute(action_input, event):
+            follow_up_event = copy.deepcopy(event)
+            follow_up_event.text = result_text
+            assert current_follow_up_batch().add(follow_up_event)
+
+        plugin.execute = AsyncMock(side_effect=execute)
+        return plugin
+
+    plugins = {"FetchWebContent": make_follow_up_plugin("web content"),
+               "VectorSearch": make_follow_up_plugin("search results")}
+    global_manager.get_action.side_effect = lambda name: plugins[name]
+    genai_response.response = [make_action("FetchWebContent"), make_action("VectorSearch")]
+
+    await action_interactions_handler.handle_request(genai_response, event)
+
+    dispatcher.trigger_genai.assert_awaited_once()
+    assert dispatcher.trigger_genai.await_args.kwargs["event"].text == "web content\n\nsearch results"
+    assert action_interactions_handler.saved_completions == {"C1-T1": 1}
+    action_interactions_handler.im_dispatcher.send_message.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_handle_request_triggers_the_chain_of_thoughts_steps_separately(action_interactions_handler,
+                                                                               global_manager, genai_response):
+    from core.action_interactions.follow_up_batch import current_follow_up_batch
+    from plugins.action_interactions.default.main_actions.actions.chain_of_thoughts import (
+        ChainOfThoughts,
+    )
+    event = IncomingNotificationDataBase(timestamp="1", event_label="message", channel_id="C1", thread_id="T1",
+                                         response_id="R1", is_mention=True, text="question", origin_plugin_name="test")
+    triggered = []
+
+    async def trigger_genai(event, plugin_name=None):
+        # Same interception as the text dispatcher
+        follow_up_batch = current_follow_up_batch()
+        if follow_up_batch is not None and follow_up_batch.add(event):
+            return
+        triggered.append(event.text)
+
+    global_manager.genai_interactions_text_dispatcher = MagicMock()
+    global_manager.genai_interactions_text_dispatcher.trigger_genai = AsyncMock(side_effect=trigger_genai)
+    chain_of_thoughts = ChainOfThoughts(global_manager)
+    global_manager.get_action.return_value = chain_of_thoughts
+    action = make_action("ChainOfThoughts")
+    action.Parameters = {"task": "Plan a trip", "plan": ["Pick a city", "Book a hotel"]}
+    genai_response.response = [action]
+
+    await action_interactions_handler.handle_request(genai_response, event)
+
+    assert triggered == ["Pick a city", "Book a hotel"]
+    assert action_interactions_handler.saved_completions == {}
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from core.action_interactions.follow_up_batch import (
+    batch_follow_ups,
+    collect_follow_ups,
+    current_follow_up_batch,
+)
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+
+def make_event(text, thread_id="T1", images=None):
+    return IncomingNotificationDataBase(timestamp="1", event_label="message", channel_id="C1", thread_id=thread_id,
+                                        response_id="R1", is_mention=True, text=text, origin_plugin_name="test",
+                                        images=images)
+
+
+def test_merge_joins_the_follow_ups_of_a_conversation():
+    with collect_follow_ups() as batch:
+        batch.add(make_event("web content", images=["image1"]))
+        batch.add(make_event("search results", images=["image2"]))
+        batch.add(make_event("other thread", thread_id="T2"))
+
+    merged = batch.merge()
+
+    assert merged["C1-T1"].text == "web content\n\nsearch results"
+    assert merged["C1-T1"].images == ["image1", "image2"]
+    assert merged["C1-T2"].text == "other thread"
+    assert batch.saved_completions() == {"C1-T1": 1}
+    # The original events are left untouched
+    assert batch.events[0].text == "web content"
+
+
+@pytest.mark.asyncio
+async def test_batch_is_shared_with_the_tasks_and_closed_after_the_block():
+    async def add_follow_up():
+        return current_follow_up_batch().add(make_event("from a task"))
+
+    with collect_follow_ups() as batch, batch_follow_ups(True):
+        assert await asyncio.create_task(add_follow_up()) is True
+        late_task_batch = current_follow_up_batch()
+        with batch_follow_ups(False):
+            assert current_follow_up_batch() is None
+
+    assert current_follow_up_batch() is None
+    assert late_task_batch.add(make_event("too late")) is False
+    assert [event.text for event in batch.events] == ["from a task"]
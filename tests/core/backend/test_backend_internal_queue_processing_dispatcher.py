@@ -84,6 +84,16 @@ def mock_plugin():
         async def get_next_message(self, *args, **kwargs):
             return None, None
 
+        async def drain(self, *args, **kwargs):
+            drained = [(message_id, f"Message content for {message_id}") for message_id in self._messages_queue]
+            drained = drained[:kwargs.get('limit')]
+            for message_id, _ in drained:
+                self._messages_queue.remove(message_id)
+            return drained
+
+        async def peek_count(self, *args, **kwargs):
+            return len(self._messages_queue)
+
         async def has_older_messages(self, *args, **kwargs):
             return False
 
@@ -178,6 +188,27 @@ async def test_dequeue_message(dispatcher, mock_plugin):
     await dispatcher.dequeue_message("container", "channel", "thread", "message_id", "guid")
     assert "message" not in mock_plugin.messages_queue
 
+@pytest.mark.asyncio
+async def test_enqueue_many_and_dequeue_many(dispatcher, mock_plugin):
+    dispatcher.initialize([mock_plugin])
+    await dispatcher.enqueue_many("container", "channel", "thread", [("1", "first"), ("2", "second")], "guid")
+    assert mock_plugin.messages_queue == ["1", "2"]
+
+    await dispatcher.dequeue_many("container", "channel", "thread", ["1", "2"], "guid")
+    assert mock_plugin.messages_queue == []
+
+
+@pytest.mark.asyncio
+async def test_drain_and_peek_count(dispatcher, mock_plugin):
+    dispatcher.initialize([mock_plugin])
+    await dispatcher.enqueue_many("container", "channel", "thread", [("1", "first"), ("2", "second"), ("3", "third")])
+    assert await dispatcher.peek_count("container", "channel", "thread") == 3
+
+    drained = await dispatcher.drain("container", "channel", "thread", limit=2)
+
+    assert [message_id for message_id, _ in drained] == ["1", "2"]
+    assert await dispatcher.peek_count("container", "channel", "thread") == 1
+
 async def get_next_message(self, *args, **kwargs):
     current_message_id = kwargs['current_message_id']
     # Simulate getting the next message after the current_message_id
@@ -20,6 +20,9 @@ class MinimalImplementation(InternalDataProcessingBase):
         self._subprompts_data = {}
         self._custom_actions_data = {}
         self._chainofthoughts_data = {}
+        self._responses_cache_data = {}
+        self._image_descriptions_data = {}
+        self._generated_images_data = {}
         self._initialized = False
 
     async def initialize(self) -> None:
@@ -73,6 +76,18 @@ class MinimalImplementation(InternalDataProcessingBase):
     def chainofthoughts(self):
         return self._chainofthoughts_data
 
+    @property
+    def responses_cache(self):
+        return self._responses_cache_data
+
+    @property
+    def image_descriptions(self):
+        return self._image_descriptions_data
+
+    @property
+    def generated_images(self):
+        return self._generated_images_data
+
     async def append_data(self, container_name: str, data_identifier: str, data: str) -> None:
         pass
 
@@ -166,6 +181,9 @@ class TestInternalDataProcessingBase:
         assert hasattr(impl, 'subprompts')
         assert hasattr(impl, 'custom_actions')
         assert hasattr(impl, 'chainofthoughts')
+        assert hasattr(impl, 'responses_cache')
+        assert hasattr(impl, 'image_descriptions')
+        assert hasattr(impl, 'generated_images')
 
     @pytest.mark.asyncio
     async def test_async_methods_exist(self):
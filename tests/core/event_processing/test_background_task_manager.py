@@ -0,0 +1,70 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.event_processing.background_task_manager import BackgroundTaskManager
+
+
+@pytest.fixture
+def task_manager():
+    return BackgroundTaskManager(MagicMock(), max_pending_tasks=2, name="test")
+
+
+@pytest.mark.asyncio
+async def test_schedule_tracks_tasks_until_done(task_manager):
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+
+    assert task_manager.schedule(work()) is True
+    assert task_manager.pending_count == 1
+
+    release.set()
+    await task_manager.wait_until_idle()
+    assert task_manager.pending_count == 0
+
+
+@pytest.mark.asyncio
+async def test_schedule_rejects_when_limit_reached(task_manager):
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+
+    assert task_manager.schedule(work()) is True
+    assert task_manager.schedule(work()) is True
+    rejected = work()
+    assert task_manager.schedule(rejected) is False
+    # The rejected coroutine is closed so it does not trigger a "never awaited" warning
+    assert rejected.cr_frame is None
+    task_manager.logger.warning.assert_called_once()
+
+    release.set()
+    await task_manager.wait_until_idle()
+    assert task_manager.has_capacity() is True
+
+
+@pytest.mark.asyncio
+async def test_failed_task_is_logged(task_manager):
+    async def failing():
+        raise ValueError("boom")
+
+    task_manager.schedule(failing(), name="failing-task")
+    await task_manager.wait_until_idle()
+
+    task_manager.logger.error.assert_called_once()
+    assert "failing-task" in task_manager.logger.error.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_cancel_all(task_manager):
+    async def work():
+        await asyncio.sleep(10)
+
+    task_manager.schedule(work())
+    await task_manager.cancel_all()
+
+    assert task_manager.pending_count == 0
+    task_manager.logger.error.assert_not_called()
@@ -0,0 +1,36 @@
+from unittest.mock import patch
+
+from core.event_processing.event_deduplicator import EventDeduplicator
+
+
+def test_is_duplicate_within_window():
+    deduplicator = EventDeduplicator(ttl_seconds=60)
+
+    assert deduplicator.is_duplicate("Ev1") is False
+    assert deduplicator.is_duplicate("Ev1") is True
+    assert deduplicator.is_duplicate("Ev2") is False
+
+
+def test_entries_expire_after_ttl():
+    deduplicator = EventDeduplicator(ttl_seconds=60)
+    with patch("core.event_processing.event_deduplicator.time.monotonic", return_value=1000.0):
+        deduplicator.is_duplicate("Ev1")
+    with patch("core.event_processing.event_deduplicator.time.monotonic", return_value=1061.0):
+        assert deduplicator.is_duplicate("Ev1") is False
+
+
+def test_max_entries_evicts_oldest():
+    deduplicator = EventDeduplicator(ttl_seconds=60, max_entries=2)
+    for key in ("Ev1", "Ev2", "Ev3"):
+        deduplicator.is_duplicate(key)
+
+    assert len(deduplicator) == 2
+    assert deduplicator.is_duplicate("Ev1") is False
+
+
+def test_forget():
+    deduplicator = EventDeduplicator(ttl_seconds=60)
+    deduplicator.is_duplicate("Ev1")
+    deduplicator.forget("Ev1")
+
+    assert deduplicator.is_duplicate("Ev1") is False
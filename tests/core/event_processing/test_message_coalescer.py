@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.event_processing.message_coalescer import MessageCoalescer
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+
+def make_event(timestamp, user_id="U1", text="hello", thread_id="1.0", images=None, files_content=None):
+    return IncomingNotificationDataBase(
+        timestamp=timestamp,
+        event_label="thread_message",
+        channel_id="C123",
+        thread_id=thread_id,
+        response_id=None,
+        is_mention=False,
+        text=text,
+        origin_plugin_name="slack",
+        user_id=user_id,
+        images=images,
+        files_content=files_content
+    )
+
+
+@pytest.fixture
+def coalescer():
+    return MessageCoalescer(MagicMock(), window_seconds=1.5)
+
+
+def test_enabled_depends_on_window():
+    assert MessageCoalescer(MagicMock(), window_seconds=0).enabled is False
+    assert MessageCoalescer(MagicMock(), window_seconds=0.5).enabled is True
+
+
+def test_merge_joins_texts_and_attachments(coalescer):
+    first = make_event("1.1", text="first", images=["img1"])
+    second = make_event("1.2", text="second", images=["img2"], files_content=["file"])
+
+    merged = coalescer.merge([first, second])
+
+    assert merged.timestamp == "1.1"
+    assert merged.text == "first\nsecond"
+    assert merged.images == ["img1", "img2"]
+    assert merged.files_content == ["file"]
+    # The original events are left untouched
+    assert first.text == "first"
+    assert first.images == ["img1"]
+
+
+def test_merge_single_event_returns_it(coalescer):
+    event = make_event("1.1")
+    assert coalescer.merge([event]) is event
+
+
+def test_split_burst_stops_at_other_user(coalescer):
+    event = make_event("1.1")
+    pending = [make_event("1.2"), make_event("1.3"), make_event("1.4", user_id="U2"), make_event("1.5")]
+
+    burst, remaining = coalescer.split_burst(event, pending)
+
+    assert [e.timestamp for e in burst] == ["1.2", "1.3"]
+    assert [e.timestamp for e in remaining] == ["1.4", "1.5"]
+
+
+def test_group_keeps_order_and_separates_users(coalescer):
+    events = [make_event("1.1"), make_event("1.2"), make_event("1.3", user_id="U2"), make_event("1.4")]
+
+    groups = coalescer.group(events)
+
+    assert [[e.timestamp for e in group] for group in groups] == [["1.1", "1.2"], ["1.3"], ["1.4"]]
+
+
+def test_events_without_user_are_never_merged(coalescer):
+    events = [make_event("1.1", user_id=None), make_event("1.2", user_id=None)]
+    assert len(coalescer.group(events)) == 2
+
+
+def test_record_savings(coalescer):
+    coalescer.record_savings(3, 100)
+    coalescer.record_savings(1, 100)
+
+    assert coalescer.llm_calls_saved == 2
+    assert coalescer.tokens_saved == 200
+    coalescer.logger.info.assert_called_once()
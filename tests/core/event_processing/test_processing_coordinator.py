@@ -0,0 +1,133 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.event_processing.processing_coordinator import (
+    BackendProcessingStateStore,
+    ProcessingAborted,
+    ProcessingCoordinator,
+)
+
+
+@pytest.fixture
+def coordinator(mock_global_manager):
+    return ProcessingCoordinator(mock_global_manager)
+
+
+@pytest.fixture
+def store():
+    store = MagicMock()
+    store.read_abort_flag = AsyncMock(return_value=False)
+    store.write_abort_flag = AsyncMock()
+    store.remove_abort_flag = AsyncMock()
+    return store
+
+
+def test_claim_processing_once(coordinator):
+    assert coordinator.claim_processing("C123", "1.1") is True
+    assert coordinator.claim_processing("C123", "1.1") is False
+    assert coordinator.is_processing("C123", "1.1") is True
+    assert coordinator.is_processing("C123", "1.2") is False
+
+
+def test_make_key_normalizes_channel(coordinator):
+    assert coordinator.make_key("19:abc@thread", "1") == "19_abc@thread-1"
+
+
+@pytest.mark.asyncio
+async def test_abort_and_resume(coordinator):
+    await coordinator.abort("C123", "thread_1")
+    assert await coordinator.is_aborted("C123", "thread_1") is True
+    assert await coordinator.is_aborted("C123", "thread_2") is False
+
+    await coordinator.resume("C123", "thread_1")
+    assert await coordinator.is_aborted("C123", "thread_1") is False
+
+
+@pytest.mark.asyncio
+async def test_run_cancellable_returns_result(coordinator):
+    async def work():
+        return "done"
+
+    assert await coordinator.run_cancellable("C123", "thread_1", work()) == "done"
+    assert coordinator._tokens == {}
+
+
+@pytest.mark.asyncio
+async def test_run_cancellable_propagates_errors(coordinator):
+    async def work():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await coordinator.run_cancellable("C123", "thread_1", work())
+
+
+@pytest.mark.asyncio
+async def test_abort_cancels_in_flight_operation(coordinator):
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    operation = asyncio.create_task(coordinator.run_cancellable("C123", "thread_1", work()))
+    await started.wait()
+    await coordinator.abort("C123", "thread_1")
+
+    with pytest.raises(ProcessingAborted):
+        await asyncio.wait_for(operation, timeout=1)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_operations_started_after_abort_get_a_new_token(coordinator):
+    await coordinator.abort("C123", "thread_1")
+
+    async def work():
+        return "done"
+
+    assert await coordinator.run_cancellable("C123", "thread_1", work()) == "done"
+
+
+@pytest.mark.asyncio
+async def test_abort_flags_are_persisted(mock_global_manager, store):
+    coordinator = ProcessingCoordinator(mock_global_manager, store=store)
+
+    await coordinator.abort("C123", "thread_1")
+    await coordinator.resume("C123", "thread_1")
+
+    store.write_abort_flag.assert_awaited_once_with("C123-thread_1")
+    store.remove_abort_flag.assert_awaited_once_with("C123-thread_1")
+
+
+@pytest.mark.asyncio
+async def test_abort_flags_are_loaded_once_from_store(mock_global_manager, store):
+    store.read_abort_flag = AsyncMock(return_value=True)
+    coordinator = ProcessingCoordinator(mock_global_manager, store=store)
+
+    assert await coordinator.is_aborted("C123", "thread_1") is True
+    assert await coordinator.is_aborted("C123", "thread_1") is True
+
+    store.read_abort_flag.assert_awaited_once_with("C123-thread_1")
+
+
+@pytest.mark.asyncio
+async def test_backend_store_uses_abort_container(mock_global_manager):
+    backend = mock_global_manager.backend_internal_data_processing_dispatcher
+    backend.abort = "abort"
+    backend.read_data_content = AsyncMock(return_value="abort")
+    store = BackendProcessingStateStore(mock_global_manager)
+
+    assert await store.read_abort_flag("C123-thread_1") is True
+    await store.write_abort_flag("C123-thread_1")
+    await store.remove_abort_flag("C123-thread_1")
+
+    backend.read_data_content.assert_awaited_once_with("abort", "C123-thread_1.txt")
+    backend.write_data_content.assert_awaited_once_with("abort", "C123-thread_1.txt", data="abort")
+    backend.remove_data_content.assert_awaited_once_with("abort", "C123-thread_1.txt")
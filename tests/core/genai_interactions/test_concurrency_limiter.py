@@ -0,0 +1,104 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from core.genai_interactions.concurrency_limiter import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    RequestPriority,
+    current_priority,
+    request_priority,
+)
+
+
+def test_limit_grows_when_saturated_and_shrinks_when_throttled():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1, max_limit=4, latency_threshold=10)
+    limiter.in_flight = 2
+    limiter.release(latency=1.0)
+    assert limiter.limit == 2.5
+
+    limiter.in_flight = 1
+    limiter.release(latency=1.0)
+    # Not saturated: the limit is left as is
+    assert limiter.limit == 2.5
+
+    limiter.in_flight = 1
+    limiter.release(throttled=True)
+    assert limiter.limit == 1.25 and limiter.throttled == 1
+
+    limiter.in_flight = 1
+    limiter.release(latency=20.0)
+    assert limiter.current_limit == 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_requests_are_served_by_priority():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    await limiter.acquire()
+    served = []
+
+    async def request(name, priority):
+        await limiter.acquire(priority)
+        served.append(name)
+        limiter.release(latency=0.1)
+
+    tasks = [asyncio.ensure_future(request("summary", RequestPriority.BACKGROUND)),
+             asyncio.ensure_future(request("subprompt", RequestPriority.SUBPROMPT)),
+             asyncio.ensure_future(request("user", RequestPriority.USER))]
+    await asyncio.sleep(0)
+    assert limiter.queued == 3
+
+    limiter.release(latency=0.1)
+    await asyncio.gather(*tasks)
+    assert served == ["user", "subprompt", "summary"]
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+    await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.queued == 0
+
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_priority_is_inherited_by_the_tasks_started_in_the_block():
+    async def read_priority():
+        return current_priority()
+
+    with request_priority(RequestPriority.BACKGROUND):
+        assert await asyncio.ensure_future(read_priority()) == RequestPriority.BACKGROUND
+    assert current_priority() == RequestPriority.USER
+
+
+def test_circuit_opens_then_lets_a_single_probe_through():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow_request()
+
+    with patch("time.monotonic", return_value=breaker.opened_at + 31):
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+
+def test_circuit_open_error_message():
+    error = CircuitOpenError("azure_chatgpt", 12.4)
+    assert "azure_chatgpt" in error.user_message and "12 seconds" in error.user_message
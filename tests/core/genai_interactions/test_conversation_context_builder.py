@@ -0,0 +1,94 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.genai_interactions.conversation_context_builder import (
+    OMITTED_IMAGE_TEXT,
+    ConversationContextBuilder,
+)
+from core.genai_interactions.token_counter import TokenCounter
+
+
+class WordEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def token_counter():
+    counter = TokenCounter(MagicMock())
+    with patch.object(counter, 'get_encoding', return_value=WordEncoding()):
+        yield counter
+
+
+def user_message(text, image=False):
+    content = [{"type": "text", "text": text}]
+    if image:
+        content.append({"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,abc", "detail": "high"}})
+    return {"role": "user", "content": content, "timestamp": "1"}
+
+
+def assistant_message(text):
+    return {"role": "assistant", "content": [{"type": "text", "text": text}], "timestamp": "2"}
+
+
+def test_disabled_without_budget():
+    assert ConversationContextBuilder(MagicMock(), token_budget=0).enabled is False
+
+
+def test_recent_messages_are_kept_verbatim(token_counter):
+    builder = ConversationContextBuilder(MagicMock(), token_budget=10000, recent_messages=2, max_part_tokens=5,
+                                         token_counter=token_counter)
+    messages = [{"role": "system", "content": "system prompt"},
+                user_message("old question with a picture", image=True),
+                assistant_message("a very long answer that goes on and on and on"),
+                user_message("recent question", image=True),
+                assistant_message("recent answer")]
+
+    context, metrics = builder.build(messages)
+
+    assert context[0] == messages[0]
+    assert context[-2:] == messages[-2:]
+    assert context[1]["content"][1] == {"type": "text", "text": OMITTED_IMAGE_TEXT}
+    assert context[2]["content"][0]["text"].startswith("a very long answer that\n[... 6 tokens truncated")
+    assert metrics.images_omitted == 1
+    assert metrics.parts_truncated == 1
+    assert metrics.tokens_sent < metrics.tokens_stored
+    # The session messages are left untouched
+    assert messages[1]["content"][1]["type"] == "image_url"
+
+
+def test_oldest_messages_are_dropped_over_budget(token_counter):
+    builder = ConversationContextBuilder(MagicMock(), token_budget=40, recent_messages=2, max_part_tokens=100,
+                                         token_counter=token_counter)
+    messages = [{"role": "system", "content": "system prompt"}]
+    for i in range(10):
+        messages.append(user_message(f"question number {i}"))
+        messages.append(assistant_message(f"answer number {i}"))
+
+    context, metrics = builder.build(messages)
+
+    assert context[0]["role"] == "system"
+    assert context[-1] == messages[-1]
+    assert messages[1] not in context
+    assert metrics.tokens_sent <= 40
+    assert metrics.messages_sent == len(context) < metrics.messages_stored
+    assert builder.total_tokens_sent == metrics.tokens_sent
+
+
+def test_context_prefix_is_stable_between_turns(token_counter):
+    builder = ConversationContextBuilder(MagicMock(), token_budget=10000, recent_messages=4, max_part_tokens=2,
+                                         token_counter=token_counter)
+    messages = [{"role": "system", "content": "system prompt"}]
+    for i in range(5):
+        messages.append(user_message(f"long question number {i}"))
+        messages.append(assistant_message(f"long answer number {i}"))
+
+    context, _ = builder.build(messages[:-1])
+    next_context, _ = builder.build(messages + [user_message("next question")])
+
+    # The compaction boundary moves by steps: the previous context is a prefix of the next one
+    assert next_context[:len(context)] == context
@@ -0,0 +1,200 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.genai_interactions.concurrency_limiter import CircuitOpenError
+from core.genai_interactions.deployment_router import Deployment, DeploymentRouter
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+def make_router(*deployments, **kwargs):
+    return DeploymentRouter(MagicMock(), list(deployments), **kwargs)
+
+
+def test_select_prefers_the_lowest_weighted_latency():
+    fast, slow = Deployment("fast"), Deployment("slow")
+    fast.record_success(1.0)
+    slow.record_success(3.0)
+    router = make_router(slow, fast)
+    assert router.select() is fast
+
+    slow.weight = 4.0
+    assert router.select() is slow
+
+
+def test_select_skips_deployments_cooling_down():
+    first, second = Deployment("first"), Deployment("second")
+    router = make_router(first, second)
+    first.record_failure(60)
+    assert router.select() is second
+    second.record_failure(30)
+    # Every deployment is cooling down: the first one back is chosen
+    assert router.select() is second
+
+
+def test_retry_after_headers():
+    assert DeploymentRouter.retry_after(FakeAPIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert DeploymentRouter.retry_after(FakeAPIError(429, {"retry-after": "7"})) == 7.0
+    assert DeploymentRouter.retry_after(FakeAPIError(429)) is None
+    assert DeploymentRouter.retry_after(ValueError("no response")) is None
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_call_moves_to_another_deployment():
+    first, second = Deployment("first"), Deployment("second")
+    router = make_router(first, second)
+    request = AsyncMock(side_effect=[FakeAPIError(429, {"retry-after": "20"}), "completion"])
+
+    with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        assert await router.call(request) == "completion"
+
+    assert [call.args[0].name for call in request.await_args_list] == ["first", "second"]
+    mock_sleep.assert_not_awaited()
+    assert first.cooling_down and first.failures == 1
+    health = {entry["name"]: entry for entry in router.health()}
+    assert health["first"]["health_score"] == 0.0
+    assert health["second"]["successes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_single_deployment_waits_before_retrying():
+    deployment = Deployment("main")
+    router = make_router(deployment, base_delay=0.5, max_delay=2)
+    request = AsyncMock(side_effect=[FakeAPIError(503, {"retry-after": "3"}), "completion"])
+
+    with patch("asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        assert await router.call(request) == "completion"
+
+    assert mock_sleep.await_args.args[0] == pytest.approx(3, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_are_raised():
+    deployment = Deployment("main")
+    router = make_router(deployment, Deployment("other"))
+    request = AsyncMock(side_effect=FakeAPIError(400))
+
+    with pytest.raises(FakeAPIError):
+        await router.call(request)
+    request.assert_awaited_once()
+    assert not deployment.cooling_down
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded():
+    router = make_router(Deployment("main"), max_retries=2)
+    request = AsyncMock(side_effect=FakeAPIError(500))
+
+    with patch("asyncio.sleep", new_callable=AsyncMock), pytest.raises(FakeAPIError):
+        await router.call(request)
+    assert request.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_uses_the_fastest_deployment():
+    slow, fast = Deployment("slow"), Deployment("fast")
+    slow.record_success(0.01)
+    router = make_router(slow, fast, hedge=True, hedge_min_delay=0.05)
+    slow_cancelled = asyncio.Event()
+
+    async def request(deployment):
+        if deployment is slow:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                slow_cancelled.set()
+                raise
+        return deployment.name
+
+    assert await router.call(request) == "fast"
+    await asyncio.wait_for(slow_cancelled.wait(), timeout=1)
+    assert slow.in_flight == 0 and fast.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_open_circuits_fail_fast():
+    deployment = Deployment("main")
+    router = make_router(deployment, max_retries=3, breaker_failures=2, breaker_reset_timeout=60, name="azure_chatgpt")
+    request = AsyncMock(side_effect=FakeAPIError(503))
+
+    with patch("asyncio.sleep", new_callable=AsyncMock), pytest.raises(CircuitOpenError):
+        await router.call(request)
+    assert request.await_count == 2
+    assert router.health()[0]["circuit"] == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await router.call(request)
+    assert request.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_throttling_reduces_the_concurrency_limit():
+    first, second = Deployment("first"), Deployment("second")
+    router = make_router(first, second, initial_concurrency=8)
+    request = AsyncMock(side_effect=[FakeAPIError(429), "completion"])
+
+    assert await router.call(request) == "completion"
+    assert first.limiter.current_limit == 4
+    assert second.limiter.current_limit == 8 and second.limiter.in_flight == 0
+
+
+async def chunks(*items, error=None):
+    for item in items:
+        await asyncio.sleep(0)
+        yield item
+    if error is not None:
+        raise error
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_the_deployment_until_it_is_consumed():
+    deployment = Deployment("main")
+    router = make_router(deployment)
+    request = AsyncMock(return_value=chunks("a", "b"))
+
+    async with router.stream(request) as stream:
+        assert deployment.in_flight == 1 and deployment.limiter.in_flight == 1
+        assert [chunk async for chunk in stream] == ["a", "b"]
+        assert deployment.successes == 0
+
+    assert deployment.in_flight == 0 and deployment.limiter.in_flight == 0
+    assert deployment.successes == 1 and len(deployment.latencies) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_failing_midway_is_recorded_as_a_failure():
+    deployment = Deployment("main")
+    router = make_router(deployment, breaker_failures=1, breaker_reset_timeout=60)
+    request = AsyncMock(return_value=chunks("a", error=FakeAPIError(503)))
+
+    with pytest.raises(FakeAPIError):
+        async with router.stream(request) as stream:
+            async for _ in stream:
+                pass
+
+    request.assert_awaited_once()
+    assert deployment.in_flight == 0 and deployment.limiter.in_flight == 0
+    assert (deployment.successes, deployment.failures) == (0, 1)
+    assert router.health()[0]["circuit"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_stream_retried_until_it_is_open():
+    first, second = Deployment("first"), Deployment("second")
+    router = make_router(first, second)
+    request = AsyncMock(side_effect=[FakeAPIError(429), chunks("a")])
+
+    async with router.stream(request) as stream:
+        assert [chunk async for chunk in stream] == ["a"]
+
+    assert [call.args[0].name for call in request.await_args_list] == ["first", "second"]
+    assert (first.failures, second.successes) == (1, 1)
+    assert first.in_flight == 0 and second.in_flight == 0
@@ -36,3 +36,11 @@ def test_genai_cost_base_attribute_modification():
     assert cost_base.completion_tk == 1400
     assert cost_base.input_token_price == 0.03
     assert cost_base.output_token_price == 0.04
+
+def test_read_cached_tokens():
+    from types import SimpleNamespace
+
+    usage = SimpleNamespace(prompt_tokens=2000, prompt_tokens_details=SimpleNamespace(cached_tokens=1536))
+    assert GenAICostBase.read_cached_tokens(usage) == 1536
+    assert GenAICostBase.read_cached_tokens(SimpleNamespace(prompt_tokens=2000)) == 0
+    assert GenAICostBase().cached_tk == 0
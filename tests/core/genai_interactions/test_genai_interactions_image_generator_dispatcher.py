@@ -5,6 +5,7 @@ import pytest
 from core.action_interactions.action_input import ActionInput
 from core.genai_interactions.genai_interactions_image_generator_dispatcher import (
     GenaiInteractionsImageGeneratorDispatcher,
+    ImageGenerationError,
 )
 from core.genai_interactions.genai_interactions_plugin_base import (
     GenAIInteractionsPluginBase,
@@ -96,3 +97,58 @@ async def test_handle_action(dispatcher, mock_plugin):
     result = await dispatcher.handle_action(action_input)
     assert result is True
     mock_plugin.handle_action.assert_awaited_once_with(action_input)
+
+@pytest.fixture
+def image_backend(mock_global_manager):
+    backend = mock_global_manager.backend_internal_data_processing_dispatcher
+    backend.generated_images = "generated_images"
+    backend.read_data_content = AsyncMock(return_value=None)
+    backend.write_data_content = AsyncMock()
+    return backend
+
+@pytest.mark.asyncio
+async def test_generate_image_downloads_once_and_reuses_the_image(dispatcher, mock_plugin, image_backend,
+                                                                  mock_global_manager):
+    mock_plugin.handle_action.return_value = "https://example.com/image.png"
+    mock_global_manager.web_content_fetcher.fetch_bytes = AsyncMock(return_value=b"\x89PNG")
+    dispatcher.initialize([mock_plugin])
+    action_input = ActionInput(action_name="GenerateImage", parameters={"prompt": "A red fox", "size": "1024x1024"})
+
+    first = await dispatcher.generate_image(action_input)
+    second = await dispatcher.generate_image(
+        ActionInput(action_name="GenerateImage", parameters={"Prompt": " A red  fox", "Size": "1024x1024"}))
+
+    assert first.content == second.content == b"\x89PNG"
+    assert second.cached is True
+    mock_plugin.handle_action.assert_awaited_once_with(action_input)
+    mock_global_manager.web_content_fetcher.fetch_bytes.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_generate_image_keeps_the_url_when_the_download_fails(dispatcher, mock_plugin, image_backend,
+                                                                    mock_global_manager):
+    mock_plugin.handle_action.return_value = "https://example.com/image.png"
+    mock_global_manager.web_content_fetcher.fetch_bytes = AsyncMock(side_effect=ValueError("too large"))
+    dispatcher.initialize([mock_plugin])
+
+    image = await dispatcher.generate_image(
+        ActionInput(action_name="GenerateImage", parameters={"prompt": "A red fox", "size": "1024x1024"}))
+
+    assert (image.url, image.content) == ("https://example.com/image.png", None)
+    image_backend.write_data_content.assert_not_called()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("result, message", [
+    (None, ""),
+    ("Error code: 400 - {'message': 'Your request was rejected'}",
+     "Error code: 400 - {'message': 'Your request was rejected'}"),
+    ("invalid_url", "Invalid URL invalid_url"),
+])
+async def test_generate_image_raises_when_the_plugin_returns_no_url(dispatcher, mock_plugin, image_backend, result,
+                                                                    message):
+    mock_plugin.handle_action.return_value = result
+    dispatcher.initialize([mock_plugin])
+
+    with pytest.raises(ImageGenerationError) as error:
+        await dispatcher.generate_image(
+            ActionInput(action_name="GenerateImage", parameters={"prompt": "A red fox", "size": "1024x1024"}))
+    assert str(error.value) == message
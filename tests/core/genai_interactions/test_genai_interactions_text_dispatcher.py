@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -5,6 +6,12 @@ import pytest
 from core.action_interactions.action_input import (
     ActionInput,  # Assurez-vous d'importer ActionInput
 )
+from core.action_interactions.follow_up_batch import (
+    batch_follow_ups,
+    collect_follow_ups,
+)
+from core.genai_interactions.completion_result import CompletionResult
+from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_dispatcher import (
     GenaiInteractionsTextDispatcher,
 )
@@ -27,13 +34,20 @@ def mock_plugin():
     plugin.handle_action = AsyncMock(return_value="handled_action")
     plugin.load_client = AsyncMock(return_value="loaded_client")
     plugin.trigger_feedback = AsyncMock()
-    plugin.generate_completion = AsyncMock(return_value="completion")
+    plugin.generate_completion = AsyncMock(return_value=CompletionResult(
+        "completion", GenAICostBase(total_tk=15, prompt_tk=10, completion_tk=5, input_token_price=0.01,
+                                    output_token_price=0.03)))
+    plugin.model_name = "model"
     return plugin
 
 @pytest.fixture
 def mock_bot_config():
     config = MagicMock(spec=BotConfig)
     config.GENAI_TEXT_DEFAULT_PLUGIN_NAME = "mock_plugin"
+    config.GENAI_RESPONSE_CACHE_PLUGINS = []
+    config.GENAI_RESPONSE_CACHE_TTL = 3600
+    config.GENAI_RESPONSE_CACHE_MAX_ENTRIES = 10
+    config.GENAI_RESPONSE_CACHE_SIMILARITY_THRESHOLD = 0
     return config
 
 @pytest.fixture
@@ -46,6 +60,8 @@ def dispatcher(mock_global_manager, mock_bot_config, mock_plugin):
 @pytest.mark.asyncio
 async def test_handle_request(dispatcher, mock_plugin):
     event = MagicMock(spec=IncomingNotificationDataBase)
+    event.thread_id = "mock_thread_id"
+    event.channel_id = "mock_channel_id"
     response = await dispatcher.handle_request(event)
     mock_plugin.handle_request.assert_awaited_once_with(event)
     assert response == "handled_request"
@@ -63,11 +79,66 @@ async def test_trigger_genai(dispatcher, mock_global_manager, mock_plugin):
     event = MagicMock(spec=IncomingNotificationDataBase)
     event.thread_id = "mock_thread_id"  # Ajoutez cet attribut
     event.channel_id = "mock_channel_id"  # Ajoutez cet attribut
-    mock_global_manager.backend_internal_data_processing_dispatcher = MagicMock()
-    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value=False)
     await dispatcher.trigger_genai(event)
     mock_plugin.trigger_genai.assert_awaited_once_with(event=event)
 
+@pytest.mark.asyncio
+async def test_trigger_genai_collected_by_the_follow_up_batch(dispatcher, mock_plugin):
+    event = MagicMock(spec=IncomingNotificationDataBase)
+    with collect_follow_ups() as follow_ups, batch_follow_ups(True):
+        await dispatcher.trigger_genai(event)
+
+    mock_plugin.trigger_genai.assert_not_awaited()
+    assert follow_ups.events == [event]
+
+@pytest.mark.asyncio
+async def test_trigger_genai_not_collected_outside_of_a_batching_action(dispatcher, mock_plugin):
+    event = MagicMock(spec=IncomingNotificationDataBase)
+    event.channel_id = "C1"
+    event.thread_id = "T1"
+    with collect_follow_ups() as follow_ups:
+        await dispatcher.trigger_genai(event)
+
+    mock_plugin.trigger_genai.assert_awaited_once_with(event=event)
+    assert follow_ups.events == []
+
+@pytest.mark.asyncio
+async def test_trigger_genai_aborted_thread(dispatcher, mock_global_manager, mock_plugin):
+    event = MagicMock(spec=IncomingNotificationDataBase)
+    event.thread_id = "mock_thread_id"
+    event.channel_id = "mock_channel_id"
+    event.text = "trigger"
+    await mock_global_manager.processing_coordinator.abort("mock_channel_id", "mock_thread_id")
+
+    await dispatcher.trigger_genai(event)
+
+    mock_plugin.trigger_genai.assert_not_awaited()
+    assert mock_global_manager.user_interactions_dispatcher.send_message.await_count == 2
+
+@pytest.mark.asyncio
+async def test_handle_request_cancelled_by_abort(dispatcher, mock_global_manager, mock_plugin):
+    event = MagicMock(spec=IncomingNotificationDataBase)
+    event.thread_id = "mock_thread_id"
+    event.channel_id = "mock_channel_id"
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_completion(_event):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    mock_plugin.handle_request = slow_completion
+    request = asyncio.create_task(dispatcher.handle_request(event))
+    await started.wait()
+    await mock_global_manager.processing_coordinator.abort("mock_channel_id", "mock_thread_id")
+
+    assert await asyncio.wait_for(request, timeout=1) is None
+    assert cancelled.is_set()
+
 @pytest.mark.asyncio
 async def test_handle_action(dispatcher, mock_plugin):
     action_input = MagicMock(spec=ActionInput)
@@ -92,6 +163,43 @@ async def test_trigger_feedback(dispatcher, mock_plugin):
 async def test_generate_completion(dispatcher, mock_plugin):
     messages = ["message1", "message2"]
     event_data = MagicMock(spec=IncomingNotificationDataBase)
-    response = await dispatcher.generate_completion(messages, event_data)
-    mock_plugin.generate_completion.assert_awaited_once_with(messages, event_data)
-    assert response == "completion"
+    event_data.channel_id = "channel"
+    completion, cost = await dispatcher.generate_completion(messages, event_data)
+    mock_plugin.generate_completion.assert_awaited_once_with(messages, event_data, raw_output=False)
+    assert completion == "completion"
+    assert cost.prompt_tk == 10
+    usage = dispatcher.get_token_usage()
+    assert [(entry["model"], entry["channel"], entry["action_type"], entry["requests"]) for entry in usage] == \
+        [("model", "channel", "completion", 1)]
+
+
+@pytest.mark.asyncio
+async def test_generate_completion_from_response_cache(dispatcher, mock_plugin, mock_bot_config):
+    mock_bot_config.GENAI_RESPONSE_CACHE_PLUGINS = ["mock_plugin"]
+    dispatcher.initialize([mock_plugin])
+    backend = dispatcher.global_manager.backend_internal_data_processing_dispatcher
+    backend.read_data_content = AsyncMock(return_value=None)
+    backend.write_data_content = AsyncMock()
+    event_data = MagicMock(spec=IncomingNotificationDataBase)
+    event_data.images = []
+    event_data.channel_id = "channel"
+    messages = [{"role": "system", "content": "prompt"}, {"role": "user", "content": "question"}]
+
+    first, _ = await dispatcher.generate_completion(messages, event_data, raw_output=True)
+    second, cost = await dispatcher.generate_completion(
+        [{"role": "system", "content": "prompt "}, {"role": "user", "content": "question"}], event_data, raw_output=True)
+
+    assert first == second == "completion"
+    assert cost.total_tk == 0
+    mock_plugin.generate_completion.assert_awaited_once()
+    backend.write_data_content.assert_awaited_once()
+    assert dispatcher.response_cache.metrics["exact_hits"] == 1
+    # Only the completion actually generated is accounted
+    assert dispatcher.get_token_usage(["model"])[0]["requests"] == 1
+
+
+def test_get_deployments_health(dispatcher, mock_plugin):
+    mock_plugin.deployment_router = MagicMock()
+    mock_plugin.deployment_router.health.return_value = [{"name": "main", "health_score": 1.0}]
+
+    assert dispatcher.get_deployments_health() == {"mock_plugin": [{"name": "main", "health_score": 1.0}]}
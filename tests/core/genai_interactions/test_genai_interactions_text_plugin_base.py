@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -54,15 +54,6 @@ def mock_global_manager():
 def plugin_instance(mock_global_manager):
     return DummyGenAIInteractionsTextPluginBase(global_manager=mock_global_manager)
 
-def test_genai_cost_base_not_set(plugin_instance):
-    with pytest.raises(ValueError, match="GenAI cost base is not set"):
-        _ = plugin_instance.genai_cost_base
-
-def test_genai_cost_base_setter_getter(plugin_instance):
-    mock_cost_base = MagicMock(spec=GenAICostBase)
-    plugin_instance.genai_cost_base = mock_cost_base
-    assert plugin_instance.genai_cost_base == mock_cost_base
-
 @pytest.mark.asyncio
 async def test_generate_completion(plugin_instance):
     messages = ["message1", "message2"]
@@ -75,3 +66,14 @@ async def test_trigger_feedback(plugin_instance):
     event = MagicMock(spec=IncomingNotificationDataBase)
     result = await plugin_instance.trigger_feedback(event)
     assert result == "Feedback triggered"
+
+@pytest.mark.asyncio
+async def test_generate_completion_stream_falls_back_to_generate_completion(plugin_instance):
+    cost = MagicMock(spec=GenAICostBase)
+    plugin_instance.generate_completion = AsyncMock(return_value=("Generated completion", cost))
+
+    chunks = [chunk async for chunk in plugin_instance.generate_completion_stream([], MagicMock())]
+
+    # The cost of the completion is the last item of the stream
+    assert chunks == ["Generated completion", cost]
+    assert plugin_instance.format_completion("text") == "text"
@@ -62,3 +62,10 @@ async def test_genai_response_missing_action_field():
     })
     with pytest.raises(ValueError, match="'Action' field is missing in the action"):
         await GenAIResponse.from_json(json_data)
+
+# A parsed response is handed to the action handler as is
+@pytest.mark.asyncio
+async def test_genai_response_from_json_passes_parsed_response_through():
+    genai_response = GenAIResponse.from_dict({'response': [{'action': {'actionname': 'TestAction', 'parameters': {}}}]})
+    assert await GenAIResponse.from_json(genai_response) is genai_response
+    assert genai_response.to_dict() == {'response': [{'Action': {'ActionName': 'TestAction', 'Parameters': {}}}]}
@@ -0,0 +1,124 @@
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.genai_interactions.genai_response_cache import (
+    CachedResponse,
+    GenAIResponseCache,
+)
+
+
+@pytest.fixture
+def backend(mock_global_manager):
+    backend = mock_global_manager.backend_internal_data_processing_dispatcher
+    backend.responses_cache = "responses_cache"
+    backend.read_data_content = AsyncMock(return_value=None)
+    backend.write_data_content = AsyncMock()
+    backend.remove_data_content = AsyncMock()
+    backend.list_container_files = AsyncMock(return_value=[])
+    return backend
+
+
+@pytest.fixture
+def cache(mock_global_manager, backend):
+    mock_global_manager.bot_config.GENAI_RESPONSE_CACHE_PLUGINS = ["openai_chatgpt"]
+    mock_global_manager.bot_config.GENAI_RESPONSE_CACHE_TTL = 3600
+    mock_global_manager.bot_config.GENAI_RESPONSE_CACHE_MAX_ENTRIES = 2
+    mock_global_manager.bot_config.GENAI_RESPONSE_CACHE_SIMILARITY_THRESHOLD = 0
+    return GenAIResponseCache(mock_global_manager)
+
+
+@pytest.fixture
+def plugin():
+    plugin = MagicMock()
+    plugin.plugin_name = "openai_chatgpt"
+    plugin.model_name = "gpt-4o"
+    plugin.input_token_price = 0.0025
+    plugin.output_token_price = 0.01
+    plugin.generate_embedding = AsyncMock(return_value=None)
+    return plugin
+
+
+PARAMETERS = {"plugin_name": "openai_chatgpt", "model_name": "gpt-4o", "vision": False, "raw_output": True}
+
+
+def question(text):
+    return [{"role": "system", "content": "You answer questions."}, {"role": "user", "content": text}]
+
+
+def test_is_enabled_for(cache):
+    assert cache.is_enabled_for("openai_chatgpt")
+    assert not cache.is_enabled_for("azure_chatgpt")
+
+
+def test_key_ignores_whitespace_and_metadata(cache):
+    messages = question("What is  the refund policy?\n")
+    messages[1]["timestamp"] = "2024-01-01T00:00:00"
+    assert cache.make_keys(messages, PARAMETERS) == cache.make_keys(question("What is the refund policy?"), PARAMETERS)
+    assert cache.make_keys(question("What is the refund policy?"), {**PARAMETERS, "model_name": "gpt-4o-mini"})[0] != \
+           cache.make_keys(question("What is the refund policy?"), PARAMETERS)[0]
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_and_persistence(cache, plugin, backend):
+    assert await cache.get(plugin, question("hello"), PARAMETERS) is None
+    await cache.set(plugin, question("hello"), PARAMETERS, "Hi!")
+
+    assert await cache.get(plugin, question("hello"), PARAMETERS) == "Hi!"
+    key, _ = cache.make_keys(question("hello"), PARAMETERS)
+    backend.write_data_content.assert_awaited_once()
+    assert backend.write_data_content.await_args.args[1] == f"{key}.json"
+    assert cache.metrics == {"exact_hits": 1, "semantic_hits": 0, "misses": 1, "stores": 1}
+    assert cache.hit_ratio == 0.5
+    assert cache.cost_of_hit(plugin).total_tk == 0
+
+
+@pytest.mark.asyncio
+async def test_entry_loaded_from_backend(cache, plugin, backend):
+    key, scope = cache.make_keys(question("hello"), PARAMETERS)
+    entry = CachedResponse(key, scope, "openai_chatgpt", "gpt-4o", "Hi from the backend", time.time(),
+                           time.time() + 60)
+    backend.read_data_content.return_value = json.dumps(entry.to_dict())
+
+    assert await cache.get(plugin, question("hello"), PARAMETERS) == "Hi from the backend"
+
+
+@pytest.mark.asyncio
+async def test_expired_entry_is_evicted(cache, plugin, backend):
+    key, scope = cache.make_keys(question("hello"), PARAMETERS)
+    entry = CachedResponse(key, scope, "openai_chatgpt", "gpt-4o", "Stale", time.time() - 120, time.time() - 60)
+    backend.read_data_content.return_value = json.dumps(entry.to_dict())
+
+    assert await cache.get(plugin, question("hello"), PARAMETERS) is None
+    backend.remove_data_content.assert_awaited_once_with("responses_cache", f"{key}.json")
+
+
+@pytest.mark.asyncio
+async def test_memory_entries_are_bounded(cache, plugin):
+    for text in ("one", "two", "three"):
+        await cache.set(plugin, question(text), PARAMETERS, text.upper())
+    assert len(cache._entries) == 2
+
+
+@pytest.mark.asyncio
+async def test_semantic_hit(cache, plugin):
+    cache.similarity_threshold = 0.95
+    plugin.generate_embedding = AsyncMock(side_effect=[[1.0, 0.0], [0.99, 0.05], [0.0, 1.0]])
+    await cache.set(plugin, question("How do I reset my password?"), PARAMETERS, "Use the reset link.")
+
+    assert await cache.get(plugin, question("How can I reset my password?"), PARAMETERS) == "Use the reset link."
+    assert await cache.get(plugin, question("What is the weather?"), PARAMETERS) is None
+    assert cache.metrics["semantic_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_semantic_match_requires_same_earlier_messages(cache, plugin):
+    cache.similarity_threshold = 0.9
+    plugin.generate_embedding = AsyncMock(return_value=[1.0, 0.0])
+    await cache.set(plugin, question("How do I reset my password?"), PARAMETERS, "Use the reset link.")
+    other_prompt = [{"role": "system", "content": "You write poems."},
+                    {"role": "user", "content": "How do I reset my password?!"}]
+
+    assert await cache.get(plugin, other_prompt, PARAMETERS) is None
@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+import yaml
+
+from core.genai_interactions.genai_response_parser import GenAIResponseParser
+
+
+def make_response(action_count):
+    actions = [{"Action": {"ActionName": "ObservationThought", "Parameters": {"observation": f"step {i}"}}}
+               for i in range(action_count - 1)]
+    actions.append({"Action": {"ActionName": "UserInteraction", "Parameters": {"value": "line 1\\nline 2"}}})
+    return {"response": actions}
+
+
+def test_parse_json_between_markers():
+    completion = f"[BEGINIMDETECT]\n{json.dumps(make_response(2))}\n[ENDIMDETECT]"
+    genai_response = GenAIResponseParser("json").parse(completion)
+
+    assert [action.ActionName for action in genai_response.response] == ["ObservationThought", "UserInteraction"]
+    # The double escaped new lines of the message are fixed
+    assert genai_response.response[1].Parameters["value"] == "line 1\nline 2"
+
+
+def test_parse_normalizes_keys_and_code_fences():
+    completion = '[BEGINIMDETECT]```json\n{"response": [{"action": {"actionname": "UserInteraction", ' \
+                 '"parameters": {"value": "Hi"}}}]}\n```[ENDIMDETECT]'
+    genai_response = GenAIResponseParser("json").parse(completion)
+    assert genai_response.response[0].ActionName == "UserInteraction"
+    assert genai_response.response[0].Parameters == {"value": "Hi"}
+
+
+def test_parse_yaml():
+    completion = """[BEGINIMDETECT]
+response:
+  - Action:
+      ActionName: UserInteraction
+      Parameters:
+        value: |
+          Hello
+          **world**
+[ENDIMDETECT]"""
+    genai_response = GenAIResponseParser("yaml").parse(completion)
+    assert genai_response.response[0].Parameters["value"] == "Hello\n**world**"
+
+
+def test_parse_errors():
+    with pytest.raises(json.JSONDecodeError):
+        GenAIResponseParser("json").parse("[BEGINIMDETECT]{not json[ENDIMDETECT]")
+    with pytest.raises(ValueError, match="'response' field is missing"):
+        GenAIResponseParser("json").parse('[BEGINIMDETECT]{"answer": 1}[ENDIMDETECT]')
+    with pytest.raises(yaml.YAMLError):
+        GenAIResponseParser("yaml").parse("[BEGINIMDETECT]response: [unclosed[ENDIMDETECT]")
+    with pytest.raises(ValueError, match="Invalid conversion format"):
+        GenAIResponseParser("xml")
+
+
+@pytest.mark.parametrize("conversion_format", ["json", "yaml"])
+def test_large_multi_action_response_is_parsed_quickly(conversion_format):
+    response = make_response(500)
+    payload = json.dumps(response) if conversion_format == "json" else yaml.safe_dump(response, sort_keys=False)
+    parser = GenAIResponseParser(conversion_format)
+
+    start = time.perf_counter()
+    genai_response = parser.parse(f"[BEGINIMDETECT]\n{payload}\n[ENDIMDETECT]")
+    elapsed = time.perf_counter() - start
+
+    assert len(genai_response.response) == 500
+    assert elapsed < 2
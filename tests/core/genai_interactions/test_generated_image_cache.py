@@ -0,0 +1,104 @@
+import asyncio
+import base64
+import json
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core.genai_interactions.generated_image_cache import (
+    GeneratedImage,
+    GeneratedImageCache,
+)
+
+
+@pytest.fixture
+def backend(mock_global_manager):
+    backend = mock_global_manager.backend_internal_data_processing_dispatcher
+    backend.generated_images = "generated_images"
+    backend.read_data_content = AsyncMock(return_value=None)
+    backend.write_data_content = AsyncMock()
+    return backend
+
+
+@pytest.fixture
+def cache(mock_global_manager, backend):
+    return GeneratedImageCache(mock_global_manager)
+
+
+def generator(content=b"\x89PNG", delay=0.0):
+    async def generate(key):
+        await asyncio.sleep(delay)
+        return GeneratedImage(key=key, url="http://example.com/image.png", content=content, created_at=time.time())
+    return AsyncMock(side_effect=generate)
+
+
+def test_key_depends_on_the_normalized_prompt_size_and_model():
+    key = GeneratedImageCache.make_key("A red  fox\n in snow ", "1024x1024", "dall-e-3")
+    assert key == GeneratedImageCache.make_key("A red fox in snow", " 1024X1024", "dall-e-3")
+    assert key != GeneratedImageCache.make_key("A red fox in snow", "1792x1024", "dall-e-3")
+    assert key != GeneratedImageCache.make_key("A red fox in snow", "1024x1024", "dall-e-2")
+    assert key != GeneratedImageCache.make_key("A red fox in the snow", "1024x1024", "dall-e-3")
+
+
+@pytest.mark.asyncio
+async def test_cached_images_are_reused(cache, backend):
+    generate = generator()
+    first = await cache.get_or_generate("A red fox", "1024x1024", "dall-e-3", generate)
+    second = await cache.get_or_generate(" A red  fox ", "1024x1024", "dall-e-3", generate)
+
+    generate.assert_awaited_once()
+    assert (first.cached, second.cached) == (False, True)
+    assert second.content == b"\x89PNG"
+    assert (cache.hits, cache.misses) == (1, 1)
+    entry = json.loads(backend.write_data_content.await_args.args[2])
+    assert base64.b64decode(entry["image"]) == b"\x89PNG"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_generation(cache, backend):
+    generate = generator(delay=0.01)
+    images = await asyncio.gather(*[cache.get_or_generate("A red fox", "1024x1024", "dall-e-3", generate)
+                                    for _ in range(3)])
+
+    generate.assert_awaited_once()
+    assert [image.cached for image in images] == [False, True, True]
+    backend.write_data_content.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_images_not_downloaded_are_not_cached(cache, backend):
+    generate = generator(content=None)
+    await cache.get_or_generate("A red fox", "1024x1024", "dall-e-3", generate)
+    await cache.get_or_generate("A red fox", "1024x1024", "dall-e-3", generate)
+
+    assert generate.await_count == 2
+    backend.write_data_content.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_image_read_from_the_backend_until_it_expires(cache, backend):
+    key = GeneratedImageCache.make_key("A red fox", "1024x1024", "dall-e-3")
+    entry = {"key": key, "url": "http://example.com/image.png", "created_at": time.time(),
+             "image": base64.b64encode(b"\x89PNG").decode("ascii")}
+    backend.read_data_content.return_value = json.dumps(entry)
+
+    image = await cache.get(key)
+    assert image.content == b"\x89PNG"
+    backend.read_data_content.assert_awaited_once_with("generated_images", f"{key}.json")
+
+    cache._entries.clear()
+    entry["created_at"] = time.time() - cache.ttl - 1
+    backend.read_data_content.return_value = json.dumps(entry)
+    assert await cache.get(key) is None
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_always_generates(cache, backend):
+    cache.ttl = 0
+    generate = generator()
+    await cache.get_or_generate("A red fox", "1024x1024", "dall-e-3", generate)
+    await cache.get_or_generate("A red fox", "1024x1024", "dall-e-3", generate)
+
+    assert generate.await_count == 2
+    backend.read_data_content.assert_not_called()
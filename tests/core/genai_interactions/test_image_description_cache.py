@@ -0,0 +1,67 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core.genai_interactions.image_description_cache import ImageDescriptionCache
+
+
+@pytest.fixture
+def backend(mock_global_manager):
+    backend = mock_global_manager.backend_internal_data_processing_dispatcher
+    backend.image_descriptions = "image_descriptions"
+    backend.read_data_content = AsyncMock(return_value=None)
+    backend.write_data_content = AsyncMock()
+    return backend
+
+
+@pytest.fixture
+def cache(mock_global_manager, backend):
+    return ImageDescriptionCache(mock_global_manager, max_concurrency=2)
+
+
+def test_key_depends_on_the_image_and_the_model():
+    key = ImageDescriptionCache.make_key("aW1hZ2U=", "gpt-4o")
+    assert key == ImageDescriptionCache.make_key("aW1hZ2U=", "gpt-4o")
+    assert key != ImageDescriptionCache.make_key("aW1hZ2U=", "gpt-4o-mini")
+    assert key != ImageDescriptionCache.make_key("b3RoZXI=", "gpt-4o")
+
+
+@pytest.mark.asyncio
+async def test_describe_all_is_concurrent_bounded_and_ordered(cache, backend):
+    running, peak = 0, 0
+
+    async def describe(image):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return f"description of {image}"
+
+    descriptions = await cache.describe_all(["one", "two", "one", "three"], "gpt-4o", describe)
+
+    assert descriptions == ["description of one", "description of two", "description of one",
+                            "description of three"]
+    assert peak == 2
+    assert cache.misses == 3
+    assert backend.write_data_content.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_descriptions_are_reused(cache, backend):
+    describe = AsyncMock(return_value="a cat")
+    await cache.describe_all(["cat"], "gpt-4o", describe)
+    assert await cache.describe_all(["cat"], "gpt-4o", describe) == ["a cat"]
+    describe.assert_awaited_once()
+    assert cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_description_read_from_the_backend(cache, backend):
+    key = ImageDescriptionCache.make_key("dog", "gpt-4o")
+    backend.read_data_content.return_value = json.dumps({"key": key, "description": "a dog"})
+
+    assert await cache.get(key) == "a dog"
+    backend.read_data_content.assert_awaited_once_with("image_descriptions", f"{key}.json")
@@ -0,0 +1,54 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.genai_interactions.prompt_prefix_tracker import PromptPrefixTracker
+
+
+@pytest.fixture
+def tracker():
+    return PromptPrefixTracker(MagicMock())
+
+
+def conversation(turns):
+    messages = [{"role": "system", "content": "core prompt\nmain prompt", "timestamp": "ignored"}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i}"})
+        messages.append({"role": "assistant", "content": f"answer {i}"})
+    return messages
+
+
+def test_extended_context_reuses_prefix(tracker):
+    first = tracker.track("thread_1", conversation(1)[:-1])
+    second = tracker.track("thread_1", conversation(2)[:-1])
+
+    assert first["prefix_reused"] is False
+    assert second["prefix_reused"] is True
+    assert first["static_prefix_hash"] == second["static_prefix_hash"]
+    assert tracker.prefix_reused == 1
+
+
+def test_modified_context_does_not_reuse_prefix(tracker):
+    tracker.track("thread_1", conversation(2))
+    messages = conversation(3)
+    messages[1] = {"role": "user", "content": "question 0, compacted"}
+
+    assert tracker.track("thread_1", messages)["prefix_reused"] is False
+
+
+def test_static_prefix_ignores_metadata(tracker):
+    messages = conversation(1)
+    other_thread = conversation(2)
+    other_thread[0] = {**other_thread[0], "timestamp": "another one"}
+
+    assert tracker.track("thread_1", messages)["static_prefix_hash"] == \
+           tracker.track("thread_2", other_thread)["static_prefix_hash"]
+
+
+def test_record_usage(tracker):
+    tracker.record_usage(2000, 1024)
+    tracker.record_usage(1000, 0)
+    tracker.record_usage(MagicMock(), MagicMock())
+
+    assert tracker.cached_tokens == 1024
+    assert tracker.cached_ratio == pytest.approx(1024 / 3000)
@@ -0,0 +1,150 @@
+import asyncio
+import copy
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.backend.enriched_session import EnrichedSession
+from core.genai_interactions.genai_cost_base import GenAICostBase
+from core.genai_interactions.thread_summarizer import (
+    SUMMARY_MESSAGE_PREFIX,
+    ThreadSummarizer,
+)
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+
+@pytest.fixture
+def session():
+    session = EnrichedSession("session_1")
+    session.messages = [{"role": "system", "content": "system prompt"}]
+    for i in range(4):
+        session.messages.append({"role": "user", "content": [{"type": "text", "text": f"question {i}"}]})
+        session.messages.append({"role": "assistant", "content": "{raw completion}",
+                                 "user_interactions": [{"message": f"answer {i}"}]})
+    return session
+
+
+@pytest.fixture
+def store(mock_global_manager, session):
+    # Persisted session: each load returns a copy, as the backends do
+    store = {"session": copy.deepcopy(session)}
+
+    async def get_or_create_session(channel_id, thread_id, enriched=False):
+        return copy.deepcopy(store["session"])
+
+    async def save_session(saved):
+        store["session"] = copy.deepcopy(saved)
+
+    dispatcher = mock_global_manager.session_manager_dispatcher
+    dispatcher.get_or_create_session = AsyncMock(side_effect=get_or_create_session)
+    dispatcher.save_session = AsyncMock(side_effect=save_session)
+    return store
+
+
+@pytest.fixture
+def summarizer(mock_global_manager, store):
+    return ThreadSummarizer(mock_global_manager, keep_recent=2, batch_size=4)
+
+
+@pytest.fixture
+def event():
+    return IncomingNotificationDataBase(channel_id="C123", thread_id="1.1", timestamp="1.2", event_label="thread_message",
+                                        response_id="1.1", is_mention=True, text="question",
+                                        images=["base64"], origin_plugin_name="slack")
+
+
+def test_pending_messages_exclude_recent_ones(summarizer, session):
+    pending = summarizer.pending_messages(session)
+
+    assert len(pending) == 6
+    assert pending[0] == session.messages[1]
+    assert summarizer.should_summarize(session)
+
+
+@pytest.mark.asyncio
+async def test_summarize_folds_pending_messages(summarizer, session, event, store):
+    chat_plugin = MagicMock()
+    chat_plugin.generate_completion = AsyncMock(return_value=("The user asked 4 questions.", GenAICostBase(10, 5, 5)))
+
+    await summarizer.summarize(session, chat_plugin, event)
+
+    saved = store["session"]
+    assert saved.summary["text"] == "The user asked 4 questions."
+    assert saved.summary["summarized_count"] == 6
+    prompt, summary_event = chat_plugin.generate_completion.await_args.args
+    assert "[assistant] answer 0" in prompt[1]["content"]
+    assert "{raw completion}" not in prompt[1]["content"]
+    assert summary_event.images == [] and event.images == ["base64"]
+    summarizer.global_manager.session_manager_dispatcher.get_or_create_session.assert_awaited_once_with(
+        channel_id="C123", thread_id="1.1", enriched=True)
+    summarizer.global_manager.session_manager_dispatcher.save_session.assert_awaited_once()
+    assert not summarizer.should_summarize(saved)
+
+
+@pytest.mark.asyncio
+async def test_summarize_keeps_interactions_recorded_during_the_completion(summarizer, session, event, store):
+    completion_started, completion_released = asyncio.Event(), asyncio.Event()
+
+    async def slow_completion(prompt, summary_event, raw_output=False):
+        completion_started.set()
+        await completion_released.wait()
+        return "Summary", GenAICostBase(10, 5, 5)
+
+    chat_plugin = MagicMock()
+    chat_plugin.generate_completion = AsyncMock(side_effect=slow_completion)
+    task = asyncio.create_task(summarizer.summarize(session, chat_plugin, event))
+    await completion_started.wait()
+
+    # The turn records an interaction and a new message while the summary is written
+    current = store["session"]
+    current.messages[-1]["user_interactions"].append({"message": "late answer"})
+    current.messages.append({"role": "user", "content": [{"type": "text", "text": "question 4"}]})
+    store["session"] = current
+    completion_released.set()
+    await task
+
+    saved = store["session"]
+    assert saved.summary["text"] == "Summary"
+    assert saved.messages[-2]["user_interactions"][-1] == {"message": "late answer"}
+    assert saved.messages[-1]["content"][0]["text"] == "question 4"
+
+
+@pytest.mark.asyncio
+async def test_summarize_drops_the_summary_when_the_history_changed(summarizer, session, event, store):
+    chat_plugin = MagicMock()
+    chat_plugin.generate_completion = AsyncMock(return_value=("Summary", GenAICostBase(10, 5, 5)))
+    store["session"].messages = store["session"].messages[:1]
+
+    await summarizer.summarize(session, chat_plugin, event)
+
+    assert store["session"].summary is None
+    summarizer.global_manager.session_manager_dispatcher.save_session.assert_not_called()
+
+
+def test_apply_summary_replaces_summarized_messages(summarizer, session):
+    session.summary = {"text": "Earlier questions.", "summarized_count": 6}
+
+    context = summarizer.apply_summary(session.messages, session)
+
+    assert context[0] == session.messages[0]
+    assert context[1]["content"][0]["text"] == SUMMARY_MESSAGE_PREFIX + "Earlier questions."
+    assert context[2:] == session.messages[7:]
+
+
+def test_apply_summary_without_summary(summarizer, session):
+    assert summarizer.apply_summary(session.messages, session) is session.messages
+
+
+@pytest.mark.asyncio
+async def test_schedule_runs_once_per_session(summarizer, session, event, store):
+    chat_plugin = MagicMock()
+    chat_plugin.generate_completion = AsyncMock(return_value=("Summary", GenAICostBase(10, 5, 5)))
+
+    assert summarizer.schedule(session, chat_plugin, event) is True
+    assert summarizer.schedule(session, chat_plugin, event) is False
+    await summarizer.background_tasks.wait_until_idle()
+
+    chat_plugin.generate_completion.assert_awaited_once()
+    assert store["session"].summary["text"] == "Summary"
@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.genai_interactions.genai_cost_base import GenAICostBase
+from core.genai_interactions.token_accounting import (
+    TokenAccounting,
+    action_type,
+    current_action_type,
+)
+from core.genai_interactions.token_counter import TOKENS_PER_IMAGE
+
+
+@pytest.fixture
+def accounting():
+    token_counter = MagicMock()
+    token_counter.count_messages.return_value = 120
+    token_counter.count_text.return_value = 30
+    return TokenAccounting(MagicMock(), token_counter=token_counter)
+
+
+def image_messages(count):
+    content = [{"type": "text", "text": "Describe"}]
+    content += [{"type": "image_url", "image_url": {"url": "data:image/png;base64,AAA"}} for _ in range(count)]
+    return [{"role": "user", "content": content}]
+
+
+def test_reported_usage_is_kept(accounting):
+    cost = GenAICostBase(total_tk=3000, prompt_tk=2500, completion_tk=500, input_token_price=0.01,
+                         output_token_price=0.03, cached_tk=1024)
+
+    usage = accounting.complete_usage(cost, image_messages(2), "answer", "gpt-4o")
+
+    assert (usage.prompt_tk, usage.completion_tk, usage.cached_tk) == (2500, 500, 1024)
+    assert usage.image_tk == 2 * TOKENS_PER_IMAGE
+    assert usage.estimated is False
+    assert usage.total_cost == pytest.approx(2.5 * 0.01 + 0.5 * 0.03)
+    accounting.token_counter.count_messages.assert_not_called()
+
+
+def test_missing_usage_is_counted_locally(accounting):
+    cost = GenAICostBase(total_tk=0, prompt_tk=0, completion_tk=0, input_token_price=0.01, output_token_price=0.03)
+
+    usage = accounting.complete_usage(cost, [{"role": "user", "content": "Hi"}], "Hello", "gpt-4o")
+
+    assert (usage.prompt_tk, usage.completion_tk, usage.total_tk) == (120, 30, 150)
+    assert usage.estimated is True
+    assert usage.input_token_price == 0.01
+
+
+def test_aggregates_group_by_dimensions(accounting):
+    cost = GenAICostBase(total_tk=1500, prompt_tk=1000, completion_tk=500, input_token_price=0.01,
+                         output_token_price=0.03)
+    accounting.account(cost, [], "a", "gpt-4o", "C1", "conversation")
+    accounting.account(cost, [], "b", "gpt-4o", "C2", "conversation")
+    with action_type("LongText"):
+        accounting.account(cost, [], "c", "gpt-4o-mini", "C1", None)
+    accounting.account(None, [], "d", "gpt-4o-mini", "C1", None)
+
+    by_model = accounting.aggregates(["model"])
+    assert [entry["model"] for entry in by_model] == ["gpt-4o", "gpt-4o-mini"]
+    assert by_model[0]["requests"] == 2
+    assert by_model[0]["total_tokens"] == 3000
+    assert by_model[1]["estimated_requests"] == 1
+
+    by_action = {entry["action_type"]: entry for entry in accounting.aggregates(["action_type"])}
+    assert by_action["LongText"]["requests"] == 1
+    assert by_action["completion"]["requests"] == 1
+    assert by_action["conversation"]["prompt_tokens"] == 2000
+
+    assert accounting.aggregates([]) == [accounting.aggregates(["unknown_key"])[0]]
+
+
+@pytest.mark.asyncio
+async def test_action_type_is_inherited_by_tasks():
+    async def read_action_type():
+        return current_action_type()
+
+    with action_type("FetchWebContent"):
+        task = asyncio.create_task(read_action_type())
+    assert await task == "FetchWebContent"
+    assert current_action_type() == "completion"
@@ -0,0 +1,55 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from core.genai_interactions.token_counter import (
+    TOKENS_PER_IMAGE,
+    TOKENS_PER_MESSAGE,
+    TOKENS_PER_REPLY,
+    TokenCounter,
+)
+
+
+class FakeEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@pytest.fixture
+def counter():
+    return TokenCounter(MagicMock())
+
+
+def test_count_with_model_encoding(counter):
+    with patch('core.genai_interactions.token_counter.tiktoken.encoding_for_model', return_value=FakeEncoding()):
+        assert counter.count_text("one two three", "gpt-4o") == 3
+        assert counter.truncate_text("one two three", 2, "gpt-4o") == "one two"
+
+
+def test_unknown_model_uses_default_encoding(counter):
+    with patch('core.genai_interactions.token_counter.tiktoken.encoding_for_model', side_effect=KeyError("model")), \
+            patch('core.genai_interactions.token_counter.tiktoken.get_encoding', return_value=FakeEncoding()) as get_encoding:
+        assert counter.count_text("one two", "my-deployment") == 2
+        get_encoding.assert_called_once_with("cl100k_base")
+
+
+def test_unavailable_encoding_falls_back_to_estimate(counter):
+    with patch('core.genai_interactions.token_counter.tiktoken.encoding_for_model', side_effect=Exception("offline")) as encoding_for_model:
+        assert counter.count_text("a" * 10, "gpt-4o") == 3
+        assert counter.count_text("a" * 8, "gpt-4o") == 2
+        # The failure is remembered, the encoding is not loaded again
+        encoding_for_model.assert_called_once()
+
+
+def test_count_messages_with_images(counter):
+    with patch('core.genai_interactions.token_counter.tiktoken.encoding_for_model', return_value=FakeEncoding()):
+        messages = [
+            {"role": "system", "content": "be nice"},
+            {"role": "user", "content": [{"type": "text", "text": "look at this"},
+                                         {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,xxx"}}]}
+        ]
+        expected = 2 * TOKENS_PER_MESSAGE + 2 + 3 + TOKENS_PER_IMAGE + TOKENS_PER_REPLY
+        assert counter.count_messages(messages, "gpt-4o") == expected
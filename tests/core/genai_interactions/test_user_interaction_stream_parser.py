@@ -0,0 +1,71 @@
+from core.genai_interactions.user_interaction_stream_parser import (
+    UserInteractionStreamParser,
+)
+
+
+def feed_by_chunks(parser, text, size=3):
+    values = []
+    for i in range(0, len(text), size):
+        values.append(parser.feed(text[i:i + size]))
+    return values
+
+
+def test_json_value_is_extracted_while_streaming():
+    completion = ('[BEGINIMDETECT]\n{"response": [{"Action": {"ActionName": "ObservationThought", '
+                  '"Parameters": {"observation": "ignored"}}}, {"Action": {"ActionName": "UserInteraction", '
+                  '"Parameters": {"value": "Hello \\"world\\"\\nline \\u00e9t\\u00e9"}}}]}\n[ENDIMDETECT]')
+    parser = UserInteractionStreamParser("json")
+
+    values = feed_by_chunks(parser, completion)
+
+    partial_values = [value for value in values if value]
+    assert partial_values[0] != partial_values[-1]
+    assert all(later.startswith(earlier) for earlier, later in zip(partial_values, partial_values[1:]))
+    assert parser.value == 'Hello "world"\nline été'
+    assert parser.is_complete
+
+
+def test_json_value_waits_for_user_interaction():
+    parser = UserInteractionStreamParser("json")
+
+    assert parser.feed('{"response": [{"Action": {"ActionName": "ObservationThought", "Parameters": {"value": "x"') is None
+    assert not parser.is_open
+
+
+def test_json_incomplete_escape_is_not_decoded():
+    parser = UserInteractionStreamParser("json")
+
+    assert parser.feed('{"ActionName": "UserInteraction", "Parameters": {"value": "a\\') == "a"
+    assert parser.feed('u00e') == "a"
+    assert parser.feed('9"') == "aé"
+    assert parser.is_complete
+
+
+def test_yaml_block_value():
+    completion = ('response:\n'
+                  '  - Action:\n'
+                  '      ActionName: UserInteraction\n'
+                  '      Parameters:\n'
+                  '        value: |\n'
+                  '          Hello *there*\n'
+                  '          second line\n'
+                  '\n'
+                  '          third\n'
+                  '        channelid: none\n')
+    parser = UserInteractionStreamParser("yaml")
+
+    feed_by_chunks(parser, completion, size=4)
+
+    assert parser.value == "Hello *there*\nsecond line\n\nthird"
+    assert parser.is_complete
+
+
+def test_yaml_quoted_and_plain_values():
+    parser = UserInteractionStreamParser("yaml")
+    feed_by_chunks(parser, '  - Action:\n      ActionName: UserInteraction\n      Parameters:\n        value: "hi \\"you\\""\n')
+    assert parser.value == 'hi "you"'
+
+    parser = UserInteractionStreamParser("yaml")
+    feed_by_chunks(parser, '  - Action:\n      ActionName: UserInteraction\n      Parameters:\n        value: plain text\n')
+    assert parser.value == "plain text"
+    assert parser.is_complete
@@ -151,3 +151,20 @@ def test_calculate_total_time_invalid_times(mock_config_manager):
 
     session.calculate_total_time()
     assert session.total_time_ms == 0  # Invalid times should result in 0 total time
+
+def test_summary_round_trip(mock_config_manager):
+    session = EnrichedSession(session_id="test_session", start_time="2024-10-01T10:00:00")
+    session.summary = {"text": "The user asked for a report.", "summarized_count": 4, "updated_at": "2024-10-01T10:05:00"}
+
+    restored = EnrichedSession.from_dict(session.to_dict())
+
+    assert restored.summary == session.summary
+
+def test_assistant_thread_round_trip(mock_config_manager):
+    session = EnrichedSession(session_id="test_session", start_time="2024-10-01T10:00:00")
+    assert "assistant_thread" not in session.to_dict()
+    session.assistant_thread = {"thread_id": "thread_abc", "assistant_id": "asst_1", "updated_at": "2024-10-01T10:05:00"}
+
+    restored = EnrichedSession.from_dict(session.to_dict())
+
+    assert restored.assistant_thread == session.assistant_thread
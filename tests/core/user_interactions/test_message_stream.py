@@ -0,0 +1,67 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.user_interactions.message_stream import MessageStream
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = MagicMock()
+    dispatcher.post_updatable_message = AsyncMock(return_value={"channel": "C123", "ts": "1.1"})
+    dispatcher.update_message = AsyncMock()
+    dispatcher.delete_message = AsyncMock()
+    dispatcher.record_interaction = AsyncMock()
+    return dispatcher
+
+
+@pytest.mark.asyncio
+async def test_first_text_is_posted_then_updates_are_throttled(dispatcher):
+    stream = MessageStream(dispatcher, MagicMock(), update_interval=60)
+
+    await stream.update(None)
+    await stream.update("  ")
+    await stream.update("Hel")
+    await stream.update("Hello")
+    await stream.update("Hello world")
+
+    dispatcher.post_updatable_message.assert_awaited_once_with("Hel", stream.event)
+    dispatcher.update_message.assert_not_awaited()
+
+    assert await stream.finalize("Hello world!") is True
+    dispatcher.update_message.assert_awaited_once_with("Hello world!", stream.event, {"channel": "C123", "ts": "1.1"},
+                                                       is_final=True)
+    dispatcher.record_interaction.assert_awaited_once_with(stream.event, "Hello world!", action_ref="user_interaction")
+
+
+@pytest.mark.asyncio
+async def test_updates_are_applied_after_the_interval(dispatcher):
+    stream = MessageStream(dispatcher, MagicMock(), update_interval=0)
+
+    await stream.update("Hel")
+    await stream.update("Hello")
+
+    dispatcher.update_message.assert_awaited_once_with("Hello", stream.event, {"channel": "C123", "ts": "1.1"},
+                                                       is_final=False)
+
+
+@pytest.mark.asyncio
+async def test_finalize_without_started_stream(dispatcher):
+    stream = MessageStream(dispatcher, MagicMock(), update_interval=1)
+
+    assert await stream.finalize("Hello") is False
+    dispatcher.update_message.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_failed_update_discards_the_message(dispatcher):
+    dispatcher.update_message = AsyncMock(side_effect=Exception("rate limited"))
+    stream = MessageStream(dispatcher, MagicMock(), update_interval=0)
+
+    await stream.update("Hel")
+    await stream.update("Hello")
+
+    assert stream.failed
+    assert await stream.finalize("Hello world") is False
+    dispatcher.delete_message.assert_awaited_once()
+    dispatcher.record_interaction.assert_not_awaited()
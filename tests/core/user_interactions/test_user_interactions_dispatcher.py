@@ -478,3 +478,40 @@ async def test_handling_exception_in_send_message(mock_user_interactions_dispatc
 
     assert str(exc_info.value) == "Test error"
     mock_user_interactions_dispatcher.logger.error.assert_called_once()
+
+def test_open_message_stream(mock_user_interactions_dispatcher, mock_user_interactions_plugin):
+    mock_user_interactions_dispatcher.plugins = {"default_category": [mock_user_interactions_plugin]}
+    mock_user_interactions_plugin.plugin_name = "test_plugin"
+    mock_user_interactions_plugin.message_update_interval = 2.0
+    mock_event = MagicMock(spec=IncomingNotificationDataBase)
+    mock_event.origin_plugin_name = "test_plugin"
+
+    mock_user_interactions_plugin.supports_message_updates = False
+    assert mock_user_interactions_dispatcher.open_message_stream(mock_event) is None
+
+    mock_user_interactions_plugin.supports_message_updates = True
+    message_stream = mock_user_interactions_dispatcher.open_message_stream(mock_event)
+    assert message_stream.event == mock_event
+    assert message_stream.update_interval == 2.0
+
+def test_message_update_capabilities(mock_user_interactions_dispatcher, mock_user_interactions_plugin):
+    mock_user_interactions_dispatcher.plugins = {"default_category": [mock_user_interactions_plugin]}
+    mock_user_interactions_plugin.plugin_name = "test_plugin"
+    mock_user_interactions_plugin.supports_message_updates = True
+    mock_user_interactions_plugin.message_update_interval = 2.0
+
+    assert mock_user_interactions_dispatcher.supports_message_updates("test_plugin") is True
+    assert mock_user_interactions_dispatcher.message_update_interval("test_plugin") == 2.0
+
+@pytest.mark.asyncio
+async def test_update_message(mock_user_interactions_dispatcher, mock_user_interactions_plugin):
+    mock_user_interactions_dispatcher.plugins = {"default_category": [mock_user_interactions_plugin]}
+    mock_user_interactions_plugin.plugin_name = "test_plugin"
+    mock_user_interactions_plugin.update_message = AsyncMock()
+    mock_event = MagicMock(spec=IncomingNotificationDataBase)
+    mock_event.origin_plugin_name = "test_plugin"
+
+    await mock_user_interactions_dispatcher.update_message("Hello", mock_event, {"ts": "1.1"}, is_final=True)
+
+    mock_user_interactions_plugin.update_message.assert_awaited_once_with(
+        message="Hello", event=mock_event, message_ref={"ts": "1.1"}, is_final=True)
@@ -1,7 +1,8 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
 
+import aiohttp
 import pytest
-import requests
 
 from core.action_interactions.action_input import ActionInput
 from core.user_interactions.incoming_notification_data_base import (
@@ -11,6 +12,7 @@ from core.user_interactions.message_type import MessageType
 from plugins.action_interactions.default.main_actions.actions.bing_search import (
     BingSearch,
 )
+from utils.web_content_fetcher.web_content_fetcher import WebContentFetcher
 
 
 @pytest.fixture
@@ -18,18 +20,14 @@ def mock_env_var(monkeypatch):
     monkeypatch.setenv("BING_SEARCH_SUBSCRIPTION_KEY", "fake_subscription_key")
 
 @pytest.fixture
-def mock_response():
-    mock_resp = MagicMock()
-    mock_resp.text = "Fake HTML content"
-    mock_resp.json.return_value = {
+def search_results():
+    return {
         "webPages": {
             "value": [
                 {"url": "https://example.com", "snippet": "Example snippet"}
             ]
         }
     }
-    mock_resp.raise_for_status = MagicMock()
-    return mock_resp
 
 @pytest.fixture
 def bing_search_instance(mock_global_manager):
@@ -37,6 +35,12 @@ def bing_search_instance(mock_global_manager):
     mock_global_manager.user_interactions_dispatcher = AsyncMock()
     mock_global_manager.genai_interactions_text_dispatcher = AsyncMock()
     mock_global_manager.backend_internal_data_processing_dispatcher = AsyncMock()
+    # Real fetch_many over mocked downloads
+    web_content_fetcher = WebContentFetcher(mock_global_manager)
+    web_content_fetcher.logger = MagicMock()
+    web_content_fetcher.fetch_json = AsyncMock()
+    web_content_fetcher.fetch_text = AsyncMock(return_value="Test content")
+    mock_global_manager.web_content_fetcher = web_content_fetcher
     return BingSearch(mock_global_manager)
 
 @pytest.fixture
@@ -68,25 +72,28 @@ def incoming_notification():
         origin_plugin_name="plugin_name"
     )
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
+
+def http_error(status):
+    return aiohttp.ClientResponseError(request_info=MagicMock(), history=(), status=status)
+
 @pytest.mark.asyncio
-async def test_execute_bing_search(mock_get, mock_response, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_get.return_value = mock_response
+async def test_execute_bing_search(search_results, mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.return_value = search_results
     await bing_search_instance.execute(action_input, incoming_notification)
 
     # Vérifier que l'appel à perform_search a été fait
-    mock_get.assert_any_call(
+    bing_search_instance.web_content_fetcher.fetch_json.assert_awaited_once_with(
         "https://api.bing.microsoft.com/v7.0/search",
         headers={"Ocp-Apim-Subscription-Key": "fake_subscription_key"},
-        params={"q": "test query", "textDecorations": True, "textFormat": "Raw"}
+        params={"q": "test query", "textDecorations": "true", "textFormat": "Raw"}
     )
+    bing_search_instance.web_content_fetcher.fetch_text.assert_awaited_once_with("https://example.com")
 
     # Vérifier que genai_interactions_text_dispatcher.trigger_genai a été appelé
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_with_invalid_url(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
+async def test_execute_with_invalid_url(mock_env_var, bing_search_instance, action_input, incoming_notification):
     action_input.parameters['urls'] = 'invalid_url'
     await bing_search_instance.execute(action_input, incoming_notification)
     # Adjust the assertion to match the actual call
@@ -98,10 +105,9 @@ async def test_execute_with_invalid_url(mock_get, mock_env_var, bing_search_inst
         action_ref='bing_search'
     )
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_connection_error(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_get.side_effect = requests.exceptions.ConnectionError()
+async def test_execute_connection_error(mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.side_effect = aiohttp.ClientConnectionError()
 
     await bing_search_instance.execute(action_input, incoming_notification)
 
@@ -114,42 +120,21 @@ async def test_execute_connection_error(mock_get, mock_env_var, bing_search_inst
         action_ref='bing_search'
     )
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_timeout_error(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_get.side_effect = requests.exceptions.Timeout()
+async def test_execute_timeout_error(mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.side_effect = asyncio.TimeoutError()
 
-    with pytest.raises(requests.exceptions.Timeout):
+    with pytest.raises(asyncio.TimeoutError):
         await bing_search_instance.execute(action_input, incoming_notification)
 
-    # Capturez tous les appels à send_message
     calls = bing_search_instance.user_interactions_dispatcher.send_message.call_args_list
-
-    # Affichez les appels pour le débogage
-    print(f"Nombre d'appels à send_message: {len(calls)}")
-    for i, call in enumerate(calls):
-        print(f"Appel {i + 1}:")
-        print(f"  Arguments: {call.args}")
-        print(f"  Kwargs: {call.kwargs}")
-
-    # Vérifiez qu'au moins un appel a été fait
-    assert len(calls) >= 1
-
-    # Vérifiez le contenu du premier appel
+    assert len(calls) == 1
     assert calls[0].kwargs['message'] == "Looking for more info on the web please wait..."
     assert calls[0].kwargs['is_internal'] == False
 
-    # Si un deuxième appel a été fait, vérifiez son contenu
-    if len(calls) > 1:
-        assert "Timeout for URL:" in calls[1].kwargs['message']
-        assert calls[1].kwargs['is_internal'] == True
-    else:
-        print("Attention: Le deuxième appel attendu à send_message n'a pas été effectué.")
-
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_general_error(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_get.side_effect = Exception("General error")
+async def test_execute_general_error(mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.side_effect = Exception("General error")
 
     # Mock la méthode handle_search_error
     bing_search_instance.handle_search_error = AsyncMock()
@@ -163,29 +148,24 @@ async def test_execute_general_error(mock_get, mock_env_var, bing_search_instanc
     assert str(call_args[0][0]) == "General error"
     assert call_args[0][1] == incoming_notification
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_with_urls(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
+async def test_execute_with_urls(mock_env_var, bing_search_instance, action_input, incoming_notification):
     action_input.parameters['urls'] = 'https://example.com,https://example2.com'
-    mock_get.return_value.text = "Sample content"
     await bing_search_instance.execute(action_input, incoming_notification)
-    assert mock_get.call_count == 2
+    assert bing_search_instance.web_content_fetcher.fetch_text.await_count == 2
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_from_snippet(mock_get, mock_response, mock_env_var, bing_search_instance, action_input, incoming_notification):
+async def test_execute_from_snippet(search_results, mock_env_var, bing_search_instance, action_input, incoming_notification):
     action_input.parameters['from_snippet'] = True
-    mock_get.return_value = mock_response
+    bing_search_instance.web_content_fetcher.fetch_json.return_value = search_results
     await bing_search_instance.execute(action_input, incoming_notification)
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
+    bing_search_instance.web_content_fetcher.fetch_text.assert_not_awaited()
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_no_results(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_response = MagicMock()
-    mock_response.json.return_value = {}
-    mock_get.return_value = mock_response
+async def test_execute_no_results(mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.return_value = {}
     await bing_search_instance.execute(action_input, incoming_notification)
 
     # Adjust the assertion to match the actual call
@@ -212,10 +192,9 @@ def test_cleanup_webcontent(bing_search_instance):
 def test_is_valid_url(bing_search_instance, url, expected):
     assert bing_search_instance.is_valid_url(url) == expected
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_http_403_error(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_get.side_effect = requests.exceptions.HTTPError(response=MagicMock(status_code=403))
+async def test_execute_http_403_error(mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.side_effect = http_error(403)
     await bing_search_instance.execute(action_input, incoming_notification)
 
     # Adjust the assertion to match the actual call
@@ -227,31 +206,79 @@ async def test_execute_http_403_error(mock_get, mock_env_var, bing_search_instan
         action_ref='bing_search'
     )
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_process_urls(mock_get, bing_search_instance, incoming_notification):
-    mock_get.return_value.text = "Sample content"
+async def test_process_urls(bing_search_instance, incoming_notification):
     urls = "https://example.com,https://example2.com"
     await bing_search_instance.process_urls(urls, incoming_notification)
-    assert mock_get.call_count == 2
+    assert bing_search_instance.web_content_fetcher.fetch_text.await_count == 2
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_get_page_content(mock_get, bing_search_instance):
-    mock_get.return_value.text = "<html><body><p>Test content</p></body></html>"
-    content = await bing_search_instance.get_page_content("https://example.com")
-    assert "Test content" in content
+async def test_fetch_pages(bing_search_instance):
+    contents = await bing_search_instance.fetch_pages(["https://example.com"])
+    assert contents == ["Test content"]
+
+@pytest.mark.asyncio
+async def test_fetch_pages_truncated_by_tokens(bing_search_instance):
+    bing_search_instance.max_page_tokens = 5
+    token_counter = bing_search_instance.global_manager.token_accounting.token_counter
+    bing_search_instance.web_content_fetcher.fetch_text.return_value = "word " * 1000
+
+    content, = await bing_search_instance.fetch_pages(["https://example.com"])
+
+    assert token_counter.count_text(content) <= 5
+    assert content.startswith("word word")
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_get_webpages_content(mock_get, bing_search_instance, incoming_notification):
-    mock_get.return_value.text = "<html><body><p>Test content</p></body></html>"
+async def test_get_webpages_content(bing_search_instance, incoming_notification):
     urls = ["https://example.com", "https://example2.com"]
     await bing_search_instance.get_webpages_content(urls, incoming_notification)
-    assert mock_get.call_count == 2
+    assert bing_search_instance.web_content_fetcher.fetch_text.await_count == 2
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
 
+@pytest.mark.asyncio
+async def test_get_webpages_content_fetches_pages_concurrently(bing_search_instance, incoming_notification):
+    running = []
+    max_running = []
+
+    async def fetch_text(url):
+        running.append(url)
+        max_running.append(len(running))
+        await asyncio.sleep(0.05)
+        running.remove(url)
+        return f"content of {url}"
+
+    bing_search_instance.web_content_fetcher.fetch_text.side_effect = fetch_text
+    urls = [f"https://example{i}.com" for i in range(4)]
+
+    await bing_search_instance.get_webpages_content(urls, incoming_notification)
+
+    assert max(max_running) == 4
+    event_copy = bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.call_args.kwargs['event']
+    assert event_copy.text.index("content of https://example0.com") < event_copy.text.index(
+        "content of https://example3.com")
+
+@pytest.mark.asyncio
+async def test_get_webpages_content_gives_up_slow_pages(bing_search_instance, incoming_notification):
+    async def fetch_text(url):
+        if url == "https://slow.com":
+            await asyncio.sleep(5)
+        return "Test content"
+
+    bing_search_instance.deadline = 0.1
+    bing_search_instance.web_content_fetcher.fetch_text.side_effect = fetch_text
+
+    await bing_search_instance.get_webpages_content(["https://example.com", "https://slow.com"], incoming_notification)
+
+    bing_search_instance.user_interactions_dispatcher.send_message.assert_any_call(
+        event=incoming_notification,
+        message="An error occurred while fetching content from https://slow.com.",
+        message_type=MessageType.COMMENT,
+        is_internal=True
+    )
+    event_copy = bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.call_args.kwargs['event']
+    assert "https://example.com Test content" in event_copy.text
+
 @pytest.mark.asyncio
 async def test_select_from_snippet(bing_search_instance, incoming_notification):
     search_results = {
@@ -265,11 +292,10 @@ async def test_select_from_snippet(bing_search_instance, incoming_notification):
     await bing_search_instance.select_from_snippet(search_results, incoming_notification, 2, "test query")
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_get_webpages_content_no_results(mock_get, bing_search_instance, incoming_notification):
+async def test_get_webpages_content_no_results(bing_search_instance, incoming_notification):
     # Configurer le mock pour lever une exception pour chaque URL
-    mock_get.side_effect = requests.exceptions.RequestException("Test exception")
+    bing_search_instance.web_content_fetcher.fetch_text.side_effect = aiohttp.ClientError("Test exception")
 
     urls = ["https://example.com", "https://example2.com"]
 
@@ -298,13 +324,11 @@ async def test_process_urls_invalid(bing_search_instance, incoming_notification)
         is_internal=False,  # Change to False based on the actual behavior
         action_ref='bing_search'
     )
+    bing_search_instance.web_content_fetcher.fetch_text.assert_not_awaited()
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_execute_bing_search_no_web_pages(mock_get, mock_env_var, bing_search_instance, action_input, incoming_notification):
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"someOtherData": {}}  # No 'webPages' key
-    mock_get.return_value = mock_response
+async def test_execute_bing_search_no_web_pages(mock_env_var, bing_search_instance, action_input, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.return_value = {"someOtherData": {}}  # No 'webPages' key
     await bing_search_instance.execute(action_input, incoming_notification)
 
     # Adjust the assertion to match the actual call
@@ -316,84 +340,43 @@ async def test_execute_bing_search_no_web_pages(mock_get, mock_env_var, bing_sea
         action_ref='bing_search'  # Include action_ref in the expected call
     )
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
-@pytest.mark.asyncio
-async def test_get_page_content_complex_html(mock_get, bing_search_instance):
-    mock_get.return_value.text = """
-    <html>
-        <head><title>Test Page</title></head>
-        <body>
-            <h1>Test Header</h1>
-            <p>Test paragraph</p>
-            <script>console.log('This should be removed');</script>
-            <style>.test { color: red; }</style>
-            <a href="https://example.com">Test Link</a>
-        </body>
-    </html>
-    """
-    content = await bing_search_instance.get_page_content("https://example.com")
-    assert "Test Header" in content
-    assert "Test paragraph" in content
-    assert "Test Link" in content
-    assert "This should be removed" not in content
-    assert ".test { color: red; }" not in content
-
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
-@pytest.mark.asyncio
-async def test_process_urls_mixed(mock_get, bing_search_instance, incoming_notification):
-    mock_get.return_value.text = "Sample content"
-    urls = "invalid_url,https://example.com,https://example2.com"
-    await bing_search_instance.process_urls(urls, incoming_notification)
-
-    # Adjust the assertion to match the actual call
-    bing_search_instance.user_interactions_dispatcher.send_message.assert_called_with(
-        event=incoming_notification,
-        message="Sorry the url invalid_url is not valid",
-        message_type=MessageType.COMMENT,
-        is_internal=False,  # Adjust based on actual behavior
-        action_ref='bing_search'  # Include action_ref in the expected call
-    )
-
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_get_webpages_content_mixed_results(mock_get, bing_search_instance, incoming_notification):
-    def side_effect(url):
+async def test_get_webpages_content_mixed_results(bing_search_instance, incoming_notification):
+    async def fetch_text(url):
         if url == "https://example.com":
-            return MagicMock(text="<html><body><p>Test content</p></body></html>")
-        else:
-            raise requests.exceptions.RequestException("Test exception")
+            return "Test content"
+        raise aiohttp.ClientError("Test exception")
 
-    mock_get.side_effect = side_effect
+    bing_search_instance.web_content_fetcher.fetch_text.side_effect = fetch_text
     urls = ["https://example.com", "https://example2.com"]
     await bing_search_instance.get_webpages_content(urls, incoming_notification)
-    assert mock_get.call_count == 2
+    assert bing_search_instance.web_content_fetcher.fetch_text.await_count == 2
     bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
-    bing_search_instance.logger.error.assert_called_once_with(
-        "An unexpected error occurred for URL: https://example2.com. Error: Test exception"
+    bing_search_instance.web_content_fetcher.logger.error.assert_called_once_with(
+        "Failed to fetch https://example2.com: Test exception"
     )
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_get_webpages_content_mixed_scenarios(mock_get, bing_search_instance, incoming_notification):
-    def side_effect(url):
+async def test_get_webpages_content_mixed_scenarios(bing_search_instance, incoming_notification):
+    async def fetch_text(url):
         if url == "https://example.com":
-            return MagicMock(text="<html><body><p>Test content</p></body></html>")
+            return "Test content"
         elif url == "https://example2.com":
-            raise requests.exceptions.HTTPError(response=MagicMock(status_code=403))
+            raise http_error(403)
         elif url == "https://example3.com":
-            raise requests.exceptions.ConnectionError()
+            raise aiohttp.ClientConnectionError()
         elif url == "https://example4.com":
-            raise requests.exceptions.Timeout()
+            raise asyncio.TimeoutError()
         else:
             raise Exception("Unexpected error")
 
-    mock_get.side_effect = side_effect
+    bing_search_instance.web_content_fetcher.fetch_text.side_effect = fetch_text
     urls = ["https://example.com", "https://example2.com", "https://example3.com", "https://example4.com", "https://example5.com"]
 
     await bing_search_instance.get_webpages_content(urls, incoming_notification)
 
-    assert mock_get.call_count == 5
-    assert bing_search_instance.logger.error.call_count == 4
+    assert bing_search_instance.web_content_fetcher.fetch_text.await_count == 5
+    assert bing_search_instance.web_content_fetcher.logger.error.call_count == 4
     assert bing_search_instance.user_interactions_dispatcher.send_message.call_count == 5  # 4 error messages + 1 success message
 
     # Vérifier les messages d'erreur
@@ -405,31 +388,12 @@ async def test_get_webpages_content_mixed_scenarios(mock_get, bing_search_instan
             is_internal=True
         )
 
-    # Vérifier que le message de succès est envoyé
-    bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
-
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
-@pytest.mark.asyncio
-async def test_get_webpages_content_no_content(mock_get, bing_search_instance, incoming_notification):
-    mock_get.side_effect = requests.exceptions.RequestException("Test exception")
-    urls = ["https://example.com", "https://example2.com"]
-
-    await bing_search_instance.get_webpages_content(urls, incoming_notification)
-
-    # Adjust the assertion to match the actual call
-    bing_search_instance.user_interactions_dispatcher.send_message.assert_called_with(
-        event=incoming_notification,
-        message="Sorry, we couldn't find a solution to your problem. Please try rephrasing your request.",
-        message_type=MessageType.COMMENT,
-        is_internal=False,  # Adjust based on actual behavior
-        action_ref='bing_search'  # Include action_ref in the expected call
-    )
-
+    # The content of the page fetched stays with its own url
+    event_copy = bing_search_instance.genai_interactions_text_dispatcher.trigger_genai.call_args.kwargs['event']
+    assert "https://example.com Test content" in event_copy.text
 
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_get_webpages_content_message_formation(mock_get, bing_search_instance, incoming_notification):
-    mock_get.return_value.text = "<html><body><p>Test content</p></body></html>"
+async def test_get_webpages_content_message_formation(bing_search_instance, incoming_notification):
     urls = ["https://example.com", "https://example2.com"]
 
     await bing_search_instance.get_webpages_content(urls, incoming_notification)
@@ -443,31 +407,37 @@ async def test_get_webpages_content_message_formation(mock_get, bing_search_inst
     assert "https://example2.com Test content" in event_copy.text
     assert "Process this to answer the user, mention the webpage(s) as a Slack link" in event_copy.text
 
-def parse_from_snippet(self, from_snippet):
-    if from_snippet is None:
-        return False
-    if isinstance(from_snippet, str):
-        return from_snippet.lower() == 'true'
-    return bool(from_snippet)
-
-@patch('plugins.action_interactions.default.main_actions.actions.bing_search.requests.get')
 @pytest.mark.asyncio
-async def test_perform_search(mock_get, mock_response, bing_search_instance, incoming_notification):
+async def test_perform_search(search_results, bing_search_instance, incoming_notification):
     # Remplacer directement la clé de souscription
     bing_search_instance.subscription_key = "fake_subscription_key"
 
-    mock_get.return_value = mock_response
+    bing_search_instance.web_content_fetcher.fetch_json.return_value = search_results
     result = await bing_search_instance.perform_search("test query", incoming_notification)
-    assert result == mock_response.json.return_value
-    mock_get.assert_called_with(
+    assert result == search_results
+    bing_search_instance.web_content_fetcher.fetch_json.assert_awaited_with(
         "https://api.bing.microsoft.com/v7.0/search",
         headers={"Ocp-Apim-Subscription-Key": "fake_subscription_key"},
-        params={"q": "test query", "textDecorations": True, "textFormat": "Raw"}
+        params={"q": "test query", "textDecorations": "true", "textFormat": "Raw"}
     )
 
+@pytest.mark.asyncio
+async def test_perform_search_served_from_cache(search_results, bing_search_instance, incoming_notification):
+    bing_search_instance.web_content_fetcher.fetch_json.return_value = search_results
+
+    first = await bing_search_instance.perform_search("test query", incoming_notification)
+    second = await bing_search_instance.perform_search("test query", incoming_notification)
+    assert first == second == search_results
+    bing_search_instance.web_content_fetcher.fetch_json.assert_awaited_once()
+
+    # Expired results are searched again
+    bing_search_instance.cache_ttl = 0
+    await bing_search_instance.perform_search("test query", incoming_notification)
+    assert bing_search_instance.web_content_fetcher.fetch_json.await_count == 2
+
 @pytest.mark.asyncio
 async def test_handle_search_error(bing_search_instance, incoming_notification):
-    error = requests.exceptions.ConnectionError()
+    error = aiohttp.ClientConnectionError()
     await bing_search_instance.handle_search_error(error, incoming_notification)
 
     # Adjust the assertion to match the actual call
@@ -96,7 +96,7 @@ async def test_event_copy_integrity(chain_of_thoughts, sample_event):
 
     assert sample_event.to_dict() == original_event_dict
 
-    modified_event = chain_of_thoughts.event
+    modified_event = chain_of_thoughts.genai_interactions_text_dispatcher.trigger_genai.await_args.kwargs['event']
     assert modified_event.text == 'Step 1'
     assert modified_event.files_content == []
     assert modified_event.images == []
@@ -1,4 +1,5 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -10,6 +11,15 @@ from core.user_interactions.message_type import MessageType
 from plugins.action_interactions.default.main_actions.actions.fetch_web_content import (
     FetchWebContent,
 )
+from utils.web_content_fetcher.web_content_fetcher import WebContentFetcher
+
+
+def make_fetcher(mock_global_manager):
+    # Real fetch_many over a mocked download
+    fetcher = WebContentFetcher(mock_global_manager)
+    fetcher.logger = MagicMock()
+    fetcher.fetch_text = AsyncMock()
+    return fetcher
 
 
 @pytest.mark.asyncio
@@ -39,33 +49,14 @@ async def test_execute_no_url_provided(mock_global_manager):
     )
 
 
-class AsyncContextManagerMock:
-    def __init__(self, return_value):
-        self._return_value = return_value
-
-    async def __aenter__(self):
-        return self._return_value
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        pass
-
 @pytest.mark.asyncio
-@patch('aiohttp.ClientSession')
-async def test_execute_with_url(mock_client_session, mock_global_manager):
+async def test_execute_with_url(mock_global_manager):
     action = FetchWebContent(mock_global_manager)
     action.logger = MagicMock()
     action.user_interaction_dispatcher = AsyncMock()
     action.genai_interactions_text_dispatcher = AsyncMock()
-
-    mock_response = MagicMock()
-    mock_response.text = AsyncMock(return_value="<html><body>Test Content</body></html>")
-
-    # Mocking session.get to return a context manager
-    mock_get = AsyncContextManagerMock(mock_response)
-    mock_session = MagicMock()
-    mock_session.get.return_value = mock_get
-
-    mock_client_session.return_value = AsyncContextManagerMock(mock_session)
+    action.web_content_fetcher = make_fetcher(mock_global_manager)
+    action.web_content_fetcher.fetch_text.return_value = "Test Content"
 
     action_input = ActionInput(action_name="fetch_web_content", parameters={'url': 'http://example.com'})
     event = MagicMock(spec=IncomingNotificationDataBase)
@@ -74,10 +65,49 @@ async def test_execute_with_url(mock_client_session, mock_global_manager):
 
     # Vérification intermédiaire
     action.user_interaction_dispatcher.send_message.assert_not_called()  # s'assurer que l'erreur de URL manquant n'est pas levée
-    assert mock_session.get.called  # vérifier que l'appel à get a été fait
+    action.web_content_fetcher.fetch_text.assert_awaited_once_with('http://example.com')
 
     # Vérifier que trigger_genai a été appelé
     action.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
+    assert "Test Content" in action.genai_interactions_text_dispatcher.trigger_genai.call_args.kwargs['event'].text
+
+@pytest.mark.asyncio
+async def test_execute_returns_partial_results(mock_global_manager):
+    action = FetchWebContent(mock_global_manager)
+    action.logger = MagicMock()
+    action.user_interaction_dispatcher = AsyncMock()
+    action.genai_interactions_text_dispatcher = AsyncMock()
+    action.web_content_fetcher = make_fetcher(mock_global_manager)
+    action.fetch_deadline = 0.2
+    running = []
+
+    async def fetch_text(url):
+        running.append(url)
+        if url == "http://slow.com":
+            await asyncio.sleep(5)
+        if url == "http://broken.com":
+            raise ConnectionError("refused")
+        if url == "http://cancelled.com":
+            raise asyncio.CancelledError()
+        await asyncio.sleep(0.05)
+        return f"Content of {url}"
+
+    action.web_content_fetcher.fetch_text.side_effect = fetch_text
+    action_input = ActionInput(action_name="fetch_web_content",
+                               parameters={'url': 'http://example.com, http://slow.com,http://broken.com,http://b.com,'
+                                                 'http://cancelled.com'})
+    event = MagicMock(spec=IncomingNotificationDataBase)
+
+    await action.execute(action_input, event)
+
+    # All the urls are requested at once and the slow page does not hold the others
+    assert running == ["http://example.com", "http://slow.com", "http://broken.com", "http://b.com",
+                       "http://cancelled.com"]
+    text = action.genai_interactions_text_dispatcher.trigger_genai.call_args.kwargs['event'].text
+    assert "http://example.com: Content of http://example.com" in text
+    assert "http://b.com: Content of http://b.com" in text
+    assert "could not be retrieved: http://slow.com, http://broken.com, http://cancelled.com" in text
+    action.user_interaction_dispatcher.send_message.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_cleanup_webcontent():
@@ -1,8 +1,14 @@
-from unittest.mock import MagicMock
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from core.action_interactions.action_input import ActionInput
+from core.genai_interactions.genai_interactions_image_generator_dispatcher import (
+    ImageGenerationError,
+)
+from core.genai_interactions.generated_image_cache import GeneratedImage
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
@@ -12,18 +18,44 @@ from plugins.action_interactions.default.main_actions.actions.generate_image imp
 )
 
 
-@pytest.mark.asyncio
-async def test_execute_generate_image_success(mock_global_manager):
+def make_action(mock_global_manager, supports_message_updates=False):
+    dispatcher = mock_global_manager.user_interactions_dispatcher
+    dispatcher.get_plugin = MagicMock(return_value=MagicMock(supports_message_updates=supports_message_updates))
+    dispatcher.post_updatable_message.return_value = "placeholder-ref"
     action = GenerateImage(mock_global_manager)
     action.logger = MagicMock()
-    action.user_interaction_dispatcher = mock_global_manager.user_interactions_dispatcher
+    action.user_interaction_dispatcher = dispatcher
+    return action
+
+
+def make_image(content=b"\x89PNG", url="http://example.com/image.png", cached=False):
+    return GeneratedImage(key="a" * 64, url=url, content=content, created_at=time.time(), cached=cached)
 
-    action_input = ActionInput(action_name="generate_image", parameters={'prompt': 'A beautiful sunset', 'size': '1024x1024'})
+
+@pytest.fixture
+def action_input():
+    return ActionInput(action_name="generate_image", parameters={'prompt': 'A beautiful sunset', 'size': '1024x1024'})
+
+
+@pytest.fixture
+def event():
     event = MagicMock(spec=IncomingNotificationDataBase)
+    event.origin_plugin_name = "slack"
+    event.channel_id = "C1"
+    return event
 
-    mock_global_manager.genai_image_generator_dispatcher.handle_action.return_value = "http://example.com/image.png"
 
+async def execute(action, action_input, event):
     await action.execute(action_input, event)
+    await action.background_tasks.wait_until_idle()
+
+
+@pytest.mark.asyncio
+async def test_execute_generate_image_success(mock_global_manager, action_input, event):
+    action = make_action(mock_global_manager)
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.return_value = make_image()
+
+    await execute(action, action_input, event)
 
     action.user_interaction_dispatcher.send_message.assert_any_call(
         event=event,
@@ -31,86 +63,114 @@ async def test_execute_generate_image_success(mock_global_manager):
         message_type=MessageType.COMMENT,
         is_internal=False
     )
-    action.user_interaction_dispatcher.send_message.assert_any_call(
-        event=event,
-        message="http://example.com/image.png"
-    )
+    action.user_interaction_dispatcher.upload_file.assert_awaited_once_with(
+        event=event, file_content=b"\x89PNG", filename="image-aaaaaaaaaaaa.png", title="A beautiful sunset")
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.assert_awaited_once_with(action_input)
+
 
 @pytest.mark.asyncio
-async def test_execute_generate_image_failure(mock_global_manager):
-    action = GenerateImage(mock_global_manager)
-    action.logger = MagicMock()
-    action.user_interaction_dispatcher = mock_global_manager.user_interactions_dispatcher
+async def test_execute_updates_the_placeholder_when_the_image_is_ready(mock_global_manager, action_input, event):
+    action = make_action(mock_global_manager, supports_message_updates=True)
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.return_value = make_image()
+
+    await execute(action, action_input, event)
+
+    action.user_interaction_dispatcher.post_updatable_message.assert_awaited_once_with(
+        message="Generating your image please wait...", event=event)
+    action.user_interaction_dispatcher.send_message.assert_not_called()
+    action.user_interaction_dispatcher.upload_file.assert_awaited_once()
+    action.user_interaction_dispatcher.update_message.assert_awaited_once_with(
+        message="Your image is ready", event=event, message_ref="placeholder-ref", is_final=True)
 
-    action_input = ActionInput(action_name="generate_image", parameters={'prompt': 'A beautiful sunset', 'size': '1024x1024'})
-    event = MagicMock(spec=IncomingNotificationDataBase)
 
-    mock_global_manager.genai_image_generator_dispatcher.handle_action.return_value = "{'Error': 'Something went wrong', 'message': 'Detailed error message'}"
+@pytest.mark.asyncio
+async def test_execute_returns_before_the_image_is_generated(mock_global_manager, action_input, event):
+    action = make_action(mock_global_manager, supports_message_updates=True)
+    image_released = asyncio.Event()
+
+    async def slow_generation(_):
+        await image_released.wait()
+        return make_image()
+
+    mock_global_manager.genai_image_generator_dispatcher.generate_image = AsyncMock(side_effect=slow_generation)
 
     await action.execute(action_input, event)
+    assert action.background_tasks.pending_count == 1
+    action.user_interaction_dispatcher.upload_file.assert_not_called()
 
+    image_released.set()
+    await action.background_tasks.wait_until_idle()
+    action.user_interaction_dispatcher.upload_file.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_execute_sends_the_url_when_the_image_was_not_downloaded(mock_global_manager, event):
+    action = make_action(mock_global_manager)
+    action_input = ActionInput(action_name="generate_image",
+                               parameters={'prompt': 'A beautiful sunset', 'size': '1024x1024', 'target': 'slack'})
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.return_value = make_image(content=None)
+
+    await execute(action, action_input, event)
+
+    action.user_interaction_dispatcher.upload_file.assert_not_called()
     action.user_interaction_dispatcher.send_message.assert_any_call(
         event=event,
-        message="Generating your image please wait...",
-        message_type=MessageType.COMMENT,
-        is_internal=False
-    )
-    action.user_interaction_dispatcher.send_message.assert_any_call(
-        event=event,
-        message="Image generation failed: {'Error': 'Something went wrong', 'message': 'Detailed error message'}",
-        is_internal=True  # Updated assertion to reflect internal message
+        message="<http://example.com/image.png|Image>"
     )
 
-@pytest.mark.asyncio
-async def test_execute_generate_image_invalid_url(mock_global_manager):
-    action = GenerateImage(mock_global_manager)
-    action.logger = MagicMock()
-    action.user_interaction_dispatcher = mock_global_manager.user_interactions_dispatcher
-
-    action_input = ActionInput(action_name="generate_image", parameters={'prompt': 'A beautiful sunset', 'size': '1024x1024'})
-    event = MagicMock(spec=IncomingNotificationDataBase)
 
-    mock_global_manager.genai_image_generator_dispatcher.handle_action.return_value = "invalid_url"
+@pytest.mark.asyncio
+async def test_execute_generate_image_failure(mock_global_manager, action_input, event):
+    action = make_action(mock_global_manager)
+    error = "{'Error': 'Something went wrong', 'message': 'Detailed error message'}"
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.side_effect = ImageGenerationError(error)
 
-    await action.execute(action_input, event)
+    await execute(action, action_input, event)
 
     action.user_interaction_dispatcher.send_message.assert_any_call(
         event=event,
-        message="Generating your image please wait...",
-        message_type=MessageType.COMMENT,
-        is_internal=False
+        message="Image generation failed: Detailed error message",
+        action_ref="generate_image"
     )
     action.user_interaction_dispatcher.send_message.assert_any_call(
         event=event,
-        message="Image generation failed: Invalid URL invalid_url",
-        is_internal=True  # Updated assertion to reflect internal message
+        message=f"Image generation failed: {error}",
+        is_internal=True
     )
 
-@pytest.mark.asyncio
-async def test_execute_generate_image_no_url(mock_global_manager):
-    action = GenerateImage(mock_global_manager)
-    action.logger = MagicMock()
-    action.user_interaction_dispatcher = mock_global_manager.user_interactions_dispatcher
 
-    action_input = ActionInput(action_name="generate_image", parameters={'prompt': 'A beautiful sunset', 'size': '1024x1024'})
-    event = MagicMock(spec=IncomingNotificationDataBase)
-
-    mock_global_manager.genai_image_generator_dispatcher.handle_action.return_value = None
+@pytest.mark.asyncio
+async def test_execute_generate_image_failure_updates_the_placeholder(mock_global_manager, action_input, event):
+    action = make_action(mock_global_manager, supports_message_updates=True)
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.side_effect = ImageGenerationError(
+        "Invalid URL invalid_url")
 
-    await action.execute(action_input, event)
+    await execute(action, action_input, event)
 
-    action.user_interaction_dispatcher.send_message.assert_any_call(
+    action.user_interaction_dispatcher.update_message.assert_awaited_once_with(
+        message="Image generation failed: Invalid URL invalid_url", event=event, message_ref="placeholder-ref",
+        is_final=True)
+    action.user_interaction_dispatcher.send_message.assert_called_once_with(
         event=event,
-        message="Generating your image please wait...",
-        message_type=MessageType.COMMENT,
-        is_internal=False
+        message="Image generation failed: Invalid URL invalid_url",
+        is_internal=True
     )
+
+
+@pytest.mark.asyncio
+async def test_execute_generate_image_no_url(mock_global_manager, action_input, event):
+    action = make_action(mock_global_manager)
+    mock_global_manager.genai_image_generator_dispatcher.generate_image.side_effect = ImageGenerationError()
+
+    await execute(action, action_input, event)
+
     action.user_interaction_dispatcher.send_message.assert_any_call(
         event=event,
         message="Image generation failed",
-        is_internal=True  # Updated assertion to reflect internal message
+        is_internal=True
     )
 
+
 @pytest.mark.asyncio
 async def test_is_valid_url():
     action = GenerateImage(MagicMock())
@@ -1,6 +1,6 @@
 # tests/plugins/action_interactions/default/main_actions/actions/test_long_text.py
 
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 
@@ -62,9 +62,11 @@ async def test_process_continuation(mock_global_manager):
     # Initialiser l'attribut concatenate_folder
     long_text_action.concatenate_folder = "mock_concatenate_folder"
 
-    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value="Existing content")
+    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(
+        return_value='{"chunks": 1, "characters": 16}')
     mock_global_manager.backend_internal_data_processing_dispatcher.write_data_content = AsyncMock()
     mock_global_manager.genai_interactions_text_dispatcher.trigger_genai = AsyncMock()
+    mock_global_manager.user_interactions_dispatcher.send_message = AsyncMock()
 
     event = IncomingNotificationDataBase(
         timestamp='123456',
@@ -84,9 +86,14 @@ async def test_process_continuation(mock_global_manager):
     result = await long_text_action._process_continuation("New content", "channel_1-thread_123.txt", event)
 
     assert result is True
-    mock_global_manager.backend_internal_data_processing_dispatcher.write_data_content.assert_called_once_with(
-        "mock_concatenate_folder", "channel_1-thread_123.txt", "Existing content \n\nNew content"
-    )
+    # Only the new chunk and the manifest are written, the existing chunks are not read again
+    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content.assert_awaited_once_with(
+        "mock_concatenate_folder", "channel_1-thread_123.manifest.json")
+    assert mock_global_manager.backend_internal_data_processing_dispatcher.write_data_content.await_args_list == [
+        call("mock_concatenate_folder", "channel_1-thread_123.00002.txt", "New content"),
+        call("mock_concatenate_folder", "channel_1-thread_123.manifest.json", '{"chunks": 2, "characters": 27}')
+    ]
+    assert "part 2 received" in mock_global_manager.user_interactions_dispatcher.send_message.await_args.kwargs["message"]
     mock_global_manager.genai_interactions_text_dispatcher.trigger_genai.assert_called_once()
 
 @pytest.mark.asyncio
@@ -102,9 +109,14 @@ async def test_process_end_of_conversation(mock_global_manager):
     mock_global_manager.session_manager_dispatcher.get_or_create_session = AsyncMock(return_value=fake_session)
     mock_global_manager.session_manager_dispatcher.save_session = AsyncMock()
     mock_global_manager.session_manager_dispatcher.append_messages = MagicMock()
-    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value="Existing content")
+    stored = {"channel_1-thread_123.manifest.json": '{"chunks": 2, "characters": 20}',
+              "channel_1-thread_123.00001.txt": "First part",
+              "channel_1-thread_123.00002.txt": "Second part"}
+    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(
+        side_effect=lambda folder, name: stored.get(name))
     mock_global_manager.backend_internal_data_processing_dispatcher.remove_data_content = AsyncMock()
     mock_global_manager.user_interactions_dispatcher.upload_file = AsyncMock()
+    mock_global_manager.user_interactions_dispatcher.send_message = AsyncMock()
 
     event = IncomingNotificationDataBase(
         timestamp='123456',
@@ -128,8 +140,12 @@ async def test_process_end_of_conversation(mock_global_manager):
     mock_global_manager.session_manager_dispatcher.get_or_create_session.assert_called_once()
     mock_global_manager.session_manager_dispatcher.append_messages.assert_called_once()
     mock_global_manager.session_manager_dispatcher.save_session.assert_called_once_with(fake_session)
-    mock_global_manager.backend_internal_data_processing_dispatcher.remove_data_content.assert_called_once()
+    removed = {args.args[1] for args in
+               mock_global_manager.backend_internal_data_processing_dispatcher.remove_data_content.await_args_list}
+    assert removed == set(stored)
     assert mock_global_manager.user_interactions_dispatcher.upload_file.call_count == 2
+    uploaded = mock_global_manager.user_interactions_dispatcher.upload_file.await_args.kwargs["file_content"]
+    assert uploaded == "First part\n\nSecond part\n\nFinal content"
 
 @pytest.mark.asyncio
 async def test_long_text_execution_error_handling(mock_global_manager):
@@ -441,4 +441,4 @@ async def test_init_containers(azure_blob_storage_plugin):
         azure_blob_storage_plugin.init_containers()
 
         # Verify that create_container was called for each container
-        assert mock_container_client.create_container.call_count == 10
+        assert mock_container_client.create_container.call_count == 13
@@ -113,7 +113,7 @@ async def test_remove_data_content_file_not_exists(file_system_plugin):
 @patch('os.makedirs')
 def test_init_shares(mock_makedirs, file_system_plugin):
     file_system_plugin.init_shares()
-    assert mock_makedirs.call_count == 11
+    assert mock_makedirs.call_count == 14
 
 @pytest.mark.asyncio
 async def test_clear_container_with_permission_error(file_system_plugin):
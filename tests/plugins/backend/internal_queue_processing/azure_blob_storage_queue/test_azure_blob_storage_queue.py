@@ -701,3 +701,73 @@ async def test_cleanup_multiple_queues(azure_blob_storage_queue_plugin):
 
     # Ensure the total removed files log is correct
     azure_blob_storage_queue_plugin.logger.info.assert_any_call(f"[AZURE_BLOB_QUEUE] Total removed expired messages across all containers: {len(ttl_mapping)}.")
+
+@pytest.mark.asyncio
+async def test_drain_lists_thread_prefix_and_deletes_in_batch(azure_blob_storage_queue_plugin):
+    mock_blob_service_client = azure_blob_storage_queue_plugin.blob_service_client
+    mock_container_client = mock_blob_service_client.get_container_client.return_value
+
+    blobs = []
+    for name in ["channel1_thread1_1632492375.0000_guid.txt",
+                 "channel1_thread1_1632492373.0000_guid.txt",
+                 "channel1_thread1_1632492374.0000_guid.txt"]:
+        blob = MagicMock()
+        blob.name = name
+        blobs.append(blob)
+    mock_container_client.list_blobs.return_value = blobs
+    mock_container_client.download_blob.side_effect = \
+        lambda name: MagicMock(readall=MagicMock(return_value=name.encode('utf-8')))
+    mock_container_client.delete_blobs.return_value = [MagicMock(status_code=202), MagicMock(status_code=202)]
+
+    drained = await azure_blob_storage_queue_plugin.drain("messages", "channel1", "thread1", limit=2,
+                                                          after_message_id="1632492373.0000")
+
+    mock_container_client.list_blobs.assert_called_once_with(name_starts_with="channel1_thread1_")
+    assert drained == [
+        ("1632492374.0000", "channel1_thread1_1632492374.0000_guid.txt"),
+        ("1632492375.0000", "channel1_thread1_1632492375.0000_guid.txt"),
+    ]
+    mock_container_client.delete_blobs.assert_called_once_with(
+        "channel1_thread1_1632492374.0000_guid.txt",
+        "channel1_thread1_1632492375.0000_guid.txt",
+        raise_on_any_failure=False
+    )
+
+@pytest.mark.asyncio
+async def test_drain_skips_the_messages_claimed_by_a_concurrent_consumer(azure_blob_storage_queue_plugin):
+    mock_container_client = azure_blob_storage_queue_plugin.blob_service_client.get_container_client.return_value
+    blobs = []
+    for name in ["channel1_thread1_1632492373.0000_guid.txt", "channel1_thread1_1632492374.0000_guid.txt"]:
+        blob = MagicMock()
+        blob.name = name
+        blobs.append(blob)
+    mock_container_client.list_blobs.return_value = blobs
+    mock_container_client.download_blob.side_effect = \
+        lambda name: MagicMock(readall=MagicMock(return_value=name.encode('utf-8')))
+    # The first blob was deleted by another consumer after being downloaded by both
+    mock_container_client.delete_blobs.return_value = [MagicMock(status_code=404), MagicMock(status_code=202)]
+
+    drained = await azure_blob_storage_queue_plugin.drain("messages", "channel1", "thread1")
+
+    assert drained == [("1632492374.0000", "channel1_thread1_1632492374.0000_guid.txt")]
+
+@pytest.mark.asyncio
+async def test_peek_count(azure_blob_storage_queue_plugin):
+    mock_container_client = azure_blob_storage_queue_plugin.blob_service_client.get_container_client.return_value
+    blob = MagicMock()
+    blob.name = "channel1_thread1_1632492373.0000_guid.txt"
+    mock_container_client.list_blobs.return_value = [blob]
+
+    assert await azure_blob_storage_queue_plugin.peek_count("messages", "channel1", "thread1") == 1
+    mock_container_client.download_blob.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_dequeue_many_uses_batch_delete(azure_blob_storage_queue_plugin):
+    mock_container_client = azure_blob_storage_queue_plugin.blob_service_client.get_container_client.return_value
+    message_ids = [str(i) for i in range(300)]
+
+    await azure_blob_storage_queue_plugin.dequeue_many("messages", "channel1", "thread1", message_ids, "guid")
+
+    # Batches are limited to 256 sub-requests
+    assert mock_container_client.delete_blobs.call_count == 2
+    assert len(mock_container_client.delete_blobs.call_args_list[0].args) == 256
@@ -234,3 +234,56 @@ async def test_clear_all_queues(file_system_queue_plugin):
 
     # Make sure only two files were expected for removal
     assert mock_remove.call_count == 8  # Adjust the expected count if needed
+
+@pytest.mark.asyncio
+async def test_enqueue_many_and_drain_in_order(file_system_queue_plugin, temp_queue_dir):
+    file_system_queue_plugin.root_directory = temp_queue_dir
+    os.makedirs(os.path.join(temp_queue_dir, "messages"), exist_ok=True)
+
+    await file_system_queue_plugin.enqueue_many("messages", "channel1", "thread1", [
+        ("1632492375.0000", "third"),
+        ("1632492373.0000", "first"),
+        ("1632492374.0000", "second"),
+    ], guid="guid")
+    await file_system_queue_plugin.enqueue_message("messages", "channel1", "thread2", "1632492373.0000", "other", "guid")
+
+    assert await file_system_queue_plugin.peek_count("messages", "channel1", "thread1") == 3
+
+    drained = await file_system_queue_plugin.drain("messages", "channel1", "thread1", limit=2)
+    assert drained == [("1632492373.0000", "first"), ("1632492374.0000", "second")]
+
+    drained = await file_system_queue_plugin.drain("messages", "channel1", "thread1")
+    assert drained == [("1632492375.0000", "third")]
+    assert await file_system_queue_plugin.peek_count("messages", "channel1", "thread1") == 0
+    assert await file_system_queue_plugin.peek_count("messages", "channel1", "thread2") == 1
+
+@pytest.mark.asyncio
+async def test_drain_skips_messages_up_to_after_message_id(file_system_queue_plugin, temp_queue_dir):
+    file_system_queue_plugin.root_directory = temp_queue_dir
+    os.makedirs(os.path.join(temp_queue_dir, "messages"), exist_ok=True)
+
+    await file_system_queue_plugin.enqueue_many("messages", "channel1", "thread1", [
+        ("1632492373.0000", "current"),
+        ("1632492374.0000", "next"),
+    ], guid="guid")
+
+    drained = await file_system_queue_plugin.drain("messages", "channel1", "thread1",
+                                                   after_message_id="1632492373.0000")
+
+    assert drained == [("1632492374.0000", "next")]
+    assert await file_system_queue_plugin.peek_count("messages", "channel1", "thread1") == 1
+
+@pytest.mark.asyncio
+async def test_dequeue_many(file_system_queue_plugin, temp_queue_dir):
+    file_system_queue_plugin.root_directory = temp_queue_dir
+    os.makedirs(os.path.join(temp_queue_dir, "messages"), exist_ok=True)
+
+    await file_system_queue_plugin.enqueue_many("messages", "channel1", "thread1", [
+        ("1632492373.0000", "first"),
+        ("1632492374.0000", "second"),
+    ], guid="guid")
+
+    await file_system_queue_plugin.dequeue_many("messages", "channel1", "thread1",
+                                                ["1632492373.0000", "1632492374.0000", "missing"], "guid")
+
+    assert os.listdir(os.path.join(temp_queue_dir, "messages")) == []
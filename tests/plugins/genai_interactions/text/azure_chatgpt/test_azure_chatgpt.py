@@ -1,3 +1,4 @@
+from types import SimpleNamespace
 from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
@@ -39,6 +40,11 @@ def extended_mock_global_manager(mock_global_manager, mock_config):
 def azure_chatgpt_plugin(extended_mock_global_manager):
     plugin = AzureChatgptPlugin(global_manager=extended_mock_global_manager)
     plugin.initialize()
+    # The completions of the actions go through the text dispatcher, which calls back the plugin
+    async def dispatch_completion(messages, event_data, plugin_name=None, raw_output=False):
+        return await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+
+    plugin.genai_interactions_text_dispatcher.generate_completion = AsyncMock(side_effect=dispatch_completion)
     return plugin
 
 @pytest.mark.asyncio
@@ -59,7 +65,7 @@ async def test_initialize(azure_chatgpt_plugin):
 
 @pytest.mark.asyncio
 async def test_handle_action_with_empty_blob(azure_chatgpt_plugin):
-    with patch.object(azure_chatgpt_plugin.gpt_client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+    with patch.object(azure_chatgpt_plugin.deployment_router.deployments[0].client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
         mock_create.return_value.choices = [MagicMock(message=MagicMock(content="Generated response"))]
         mock_create.return_value.usage = MagicMock(total_tokens=100, prompt_tokens=50, completion_tokens=50)
 
@@ -120,7 +126,7 @@ class FakeSession:
 
 @pytest.mark.asyncio
 async def test_handle_action_with_existing_blob(azure_chatgpt_plugin):
-    with patch.object(azure_chatgpt_plugin.gpt_client.chat.completions, 'create', new_callable=AsyncMock) as mock_create, \
+    with patch.object(azure_chatgpt_plugin.deployment_router.deployments[0].client.chat.completions, 'create', new_callable=AsyncMock) as mock_create, \
          patch.object(azure_chatgpt_plugin.backend_internal_data_processing_dispatcher, 'read_data_content', new_callable=AsyncMock) as mock_read_data_content, \
          patch.object(azure_chatgpt_plugin.backend_internal_data_processing_dispatcher, 'write_data_content', new_callable=AsyncMock) as mock_write_data_content, \
          patch.object(azure_chatgpt_plugin.session_manager_dispatcher, 'get_or_create_session', new_callable=AsyncMock) as mock_get_or_create_session, \
@@ -224,7 +230,7 @@ async def test_generate_completion(azure_chatgpt_plugin):
         is_mention=True,
         origin_plugin_name='test_plugin'
     )
-    with patch.object(azure_chatgpt_plugin.gpt_client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
+    with patch.object(azure_chatgpt_plugin.deployment_router.deployments[0].client.chat.completions, 'create', new_callable=AsyncMock) as mock_create:
         mock_create.return_value.choices[0].message.content = "Generated response"
         mock_create.return_value.usage = MagicMock(total_tokens=100, prompt_tokens=50, completion_tokens=50)
 
@@ -278,15 +284,43 @@ async def test_trigger_genai(azure_chatgpt_plugin):
         # Fix the expected value to match the casing used in the event
         assert event.user_id == "AUTOMATED_RESPONSE"
 
+class FakeRunStream:
+    """
+    Stands for the stream manager of an assistant run, yielding the given run events.
+    """
+    def __init__(self, events):
+        self.events = events
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield event
+
+
+def assistant_run_events(*texts):
+    events = [SimpleNamespace(event="thread.run.created", data=SimpleNamespace(status="queued"))]
+    for text in texts:
+        delta = SimpleNamespace(content=[SimpleNamespace(type="text", text=SimpleNamespace(value=text))])
+        events.append(SimpleNamespace(event="thread.message.delta", data=SimpleNamespace(delta=delta)))
+    usage = SimpleNamespace(total_tokens=30, prompt_tokens=20, completion_tokens=10)
+    events.append(SimpleNamespace(event="thread.run.completed",
+                                  data=SimpleNamespace(status="completed", usage=usage, last_error=None)))
+    return events
+
 @pytest.mark.asyncio
 async def test_generate_completion_assistant(azure_chatgpt_plugin, mock_incoming_notification_data_base):
     # Configuration du plugin
     azure_chatgpt_plugin.azure_chatgpt_config.AZURE_CHATGPT_IS_ASSISTANT = True
-    azure_chatgpt_plugin.azure_chatgpt_config.AZURE_CHATGPT_ASSISTANT_ID = "test_assistant_id"
+    azure_chatgpt_plugin.assistant_id = "test_assistant_id"
     azure_chatgpt_plugin.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME = "gpt-4-vision-preview"
 
     messages = [
-        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "system", "content": [{"type": "text", "text": "You are a helpful assistant."}]},
         {"role": "user", "content": "What's the weather like?"},
         {"role": "assistant", "content": "I'm sorry, I don't have real-time weather information."},
         {"role": "user", "content": "Can you analyze this image?"}
@@ -294,38 +328,63 @@ async def test_generate_completion_assistant(azure_chatgpt_plugin, mock_incoming
 
     event_data = mock_incoming_notification_data_base
     event_data.images = ["base64_encoded_image_data"]
-
-    # Créer des mocks pour tous les appels asynchrones
-    async def mock_create_thread(*args, **kwargs):
-        return AsyncMock(id="test_thread_id")
-
-    async def mock_create_message(*args, **kwargs):
-        return AsyncMock()
-
-    async def mock_create_run(*args, **kwargs):
-        return AsyncMock(id="test_run_id", status="completed")
-
-    async def mock_retrieve_run(*args, **kwargs):
-        return AsyncMock(status="completed")
-
-    async def mock_list_messages(*args, **kwargs):
-        return MagicMock(data=[MagicMock(content=[MagicMock(text=MagicMock(value="This is the assistant's response."))])])
+    session = MagicMock(assistant_thread=None)
 
     async def mock_create_completion(*args, **kwargs):
         return AsyncMock(choices=[MagicMock(message=MagicMock(content="This is an image of a sunny day."))])
 
-    with patch.object(azure_chatgpt_plugin.gpt_client.beta.threads, 'create', side_effect=mock_create_thread), \
-         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.messages, 'create', side_effect=mock_create_message), \
-         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.runs, 'create', side_effect=mock_create_run), \
-         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.runs, 'retrieve', side_effect=mock_retrieve_run), \
-         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.messages, 'list', side_effect=mock_list_messages), \
+    with patch.object(azure_chatgpt_plugin.gpt_client.beta.threads, 'create', new_callable=AsyncMock,
+                      return_value=MagicMock(id="test_thread_id")) as mock_create_thread, \
+         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.runs, 'stream',
+                      return_value=FakeRunStream(assistant_run_events("This is the ", "assistant's response."))) as mock_stream, \
          patch.object(azure_chatgpt_plugin.gpt_client.chat.completions, 'create', side_effect=mock_create_completion):
 
-        response, genai_cost_base = await azure_chatgpt_plugin.generate_completion_assistant(messages, event_data)
+        response, genai_cost_base = await azure_chatgpt_plugin.generate_completion_assistant(messages, event_data, session)
 
-        # Ajoutez ici vos assertions pour vérifier le résultat
-        assert response == "This is the assistant's response."
-        assert isinstance(genai_cost_base, GenAICostBase)
+    assert response == "This is the assistant's response."
+    assert isinstance(genai_cost_base, GenAICostBase)
+    assert genai_cost_base.total_tk == 30 and genai_cost_base.prompt_tk == 20
+    # The history goes into the new thread, the last user message is posted with the run
+    assert mock_create_thread.await_args.kwargs["messages"] == [
+        {"role": "user", "content": "What's the weather like?"},
+        {"role": "assistant", "content": "I'm sorry, I don't have real-time weather information."}
+    ]
+    run_arguments = mock_stream.call_args.kwargs
+    assert run_arguments["thread_id"] == "test_thread_id"
+    assert run_arguments["instructions"] == "You are a helpful assistant."
+    assert len(run_arguments["additional_messages"]) == 1
+    assert "This is an image of a sunny day." in run_arguments["additional_messages"][0]["content"]
+    assert session.assistant_thread["thread_id"] == "test_thread_id"
+
+@pytest.mark.asyncio
+async def test_generate_completion_assistant_reuses_the_session_thread(azure_chatgpt_plugin,
+                                                                       mock_incoming_notification_data_base):
+    azure_chatgpt_plugin.azure_chatgpt_config.AZURE_CHATGPT_IS_ASSISTANT = True
+    azure_chatgpt_plugin.assistant_id = "test_assistant_id"
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant."},
+        {"role": "user", "content": "Hello"},
+        {"role": "assistant", "content": "Hi!"},
+        {"role": "user", "content": [{"type": "text", "text": "Tell me a joke"}]}
+    ]
+    event_data = mock_incoming_notification_data_base
+    event_data.images = []
+    session = MagicMock(assistant_thread={"thread_id": "existing_thread", "assistant_id": "test_assistant_id"})
+
+    with patch.object(azure_chatgpt_plugin.gpt_client.beta.threads, 'create', new_callable=AsyncMock) as mock_create_thread, \
+         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.messages, 'create', new_callable=AsyncMock) as mock_create_message, \
+         patch.object(azure_chatgpt_plugin.gpt_client.beta.threads.runs, 'stream',
+                      return_value=FakeRunStream(assistant_run_events("Why not?"))) as mock_stream:
+        chunks = [chunk async for chunk in azure_chatgpt_plugin.generate_completion_stream(messages, event_data,
+                                                                                          session=session)]
+
+    *chunks, genai_cost_base = chunks
+    assert chunks == ["Why not?"]
+    mock_create_thread.assert_not_awaited()
+    mock_create_message.assert_not_awaited()
+    assert mock_stream.call_args.kwargs["thread_id"] == "existing_thread"
+    assert mock_stream.call_args.kwargs["additional_messages"] == [{"role": "user", "content": "Tell me a joke"}]
+    assert genai_cost_base.completion_tk == 10
 
 @pytest.mark.asyncio
 async def test_generate_completion_assistant_error(azure_chatgpt_plugin, mock_incoming_notification_data_base):
@@ -347,3 +406,22 @@ async def test_generate_completion_assistant_error(azure_chatgpt_plugin, mock_in
             message_type=MessageType.COMMENT,  # Changé de ERROR à COMMENT
             is_internal=True
         )
+
+@pytest.mark.asyncio
+async def test_describe_history_images_uses_cached_descriptions(azure_chatgpt_plugin):
+    cache = azure_chatgpt_plugin.image_description_cache
+    vision_model = azure_chatgpt_plugin.azure_chatgpt_config.AZURE_CHATGPT_VISION_MODEL_NAME
+    cache._remember(cache.make_key("known_image", vision_model), "A chart of the sales")
+    cache.get = AsyncMock(side_effect=lambda key: cache._entries.get(key))
+    messages = [{"role": "user", "content": [
+        {"type": "text", "text": "Look at these"},
+        {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,known_image"}},
+        {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,unknown_image"}}
+    ]}]
+
+    described = await azure_chatgpt_plugin.describe_history_images(messages)
+
+    assert described[0]["content"] == [
+        {"type": "text", "text": "Look at these"},
+        {"type": "text", "text": "[Image description] A chart of the sales"}
+    ]
@@ -34,6 +34,11 @@ def extended_mock_global_manager(mock_global_manager, mock_config):
 def azure_commandr_plugin(extended_mock_global_manager):
     plugin = AzureCommandrPlugin(global_manager=extended_mock_global_manager)
     plugin.initialize()
+    # The completions of the actions go through the text dispatcher, which calls back the plugin
+    async def dispatch_completion(messages, event_data, plugin_name=None, raw_output=False):
+        return await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+
+    plugin.genai_interactions_text_dispatcher.generate_completion = AsyncMock(side_effect=dispatch_completion)
     return plugin
 
 def test_initialize(azure_commandr_plugin):
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -35,6 +36,11 @@ def extended_mock_global_manager(mock_global_manager, mock_config):
 def azure_mistral_plugin(extended_mock_global_manager):
     plugin = AzureMistralPlugin(global_manager=extended_mock_global_manager)
     plugin.initialize()
+    # The completions of the actions go through the text dispatcher, which calls back the plugin
+    async def dispatch_completion(messages, event_data, plugin_name=None, raw_output=False):
+        return await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+
+    plugin.genai_interactions_text_dispatcher.generate_completion = AsyncMock(side_effect=dispatch_completion)
     return plugin
 
 def test_initialize(azure_mistral_plugin):
@@ -53,7 +59,7 @@ async def test_handle_action_with_empty_blob(azure_mistral_plugin):
     session_mock.messages = []
     session_mock.session_id = "test_session_id"
 
-    with patch.object(azure_mistral_plugin.mistral_client, 'chat', return_value=mock_response) as mock_chat, \
+    with patch.object(azure_mistral_plugin.mistral_client, 'chat', new_callable=AsyncMock, return_value=mock_response) as mock_chat, \
          patch.object(azure_mistral_plugin.backend_internal_data_processing_dispatcher, 'read_data_content', new_callable=AsyncMock) as mock_read_data_content, \
          patch.object(azure_mistral_plugin.session_manager_dispatcher, 'get_or_create_session', new_callable=AsyncMock) as mock_get_session:
 
@@ -91,7 +97,7 @@ async def test_handle_action_with_existing_blob(azure_mistral_plugin):
     session_mock.messages = existing_messages
     session_mock.session_id = "test_session_id"
 
-    with patch.object(azure_mistral_plugin.mistral_client, 'chat', return_value=mock_response) as mock_chat, \
+    with patch.object(azure_mistral_plugin.mistral_client, 'chat', new_callable=AsyncMock, return_value=mock_response) as mock_chat, \
          patch.object(azure_mistral_plugin.backend_internal_data_processing_dispatcher, 'read_data_content', new_callable=AsyncMock) as mock_read_data_content, \
          patch.object(azure_mistral_plugin.session_manager_dispatcher, 'get_or_create_session', new_callable=AsyncMock) as mock_get_session:
 
@@ -205,3 +211,34 @@ async def test_trigger_genai_long_text(azure_mistral_plugin):
 
         mock_process.assert_called_once()
         mock_format_trigger_genai_message.assert_called_once_with(event=event, message=long_text)
+
+@pytest.mark.asyncio
+async def test_generate_completion_does_not_block_the_event_loop(azure_mistral_plugin):
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=MagicMock(content="Slow response"))]
+    mock_response.usage = MagicMock(total_tokens=10, prompt_tokens=5, completion_tokens=5)
+
+    async def slow_chat(**kwargs):
+        await asyncio.sleep(0.3)
+        return mock_response
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    event = MagicMock(images=[])
+    ticker_task = asyncio.ensure_future(ticker())
+    try:
+        with patch.object(azure_mistral_plugin.mistral_client, 'chat', side_effect=slow_chat):
+            response, _ = await azure_mistral_plugin.generate_completion([{"role": "user", "content": "hi"}], event,
+                                                                         raw_output=True)
+    finally:
+        ticker_task.cancel()
+
+    assert response == "Slow response"
+    # The loop kept running other tasks while the model was answering
+    assert ticks >= 10
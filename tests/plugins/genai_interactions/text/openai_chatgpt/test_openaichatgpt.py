@@ -53,6 +53,11 @@ def extended_mock_global_manager(mock_global_manager, mock_openai_chatgpt_config
 def openai_chatgpt_plugin(extended_mock_global_manager):
     plugin = OpenaiChatgptPlugin(global_manager=extended_mock_global_manager)
     plugin.initialize()
+    # The completions of the actions go through the text dispatcher, which calls back the plugin
+    async def dispatch_completion(messages, event_data, plugin_name=None, raw_output=False):
+        return await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+
+    plugin.genai_interactions_text_dispatcher.generate_completion = AsyncMock(side_effect=dispatch_completion)
     return plugin
 
 # Test Initialization
@@ -603,3 +608,97 @@ async def test_generate_completion_with_images_but_no_vision_model(openai_chatgp
             message_type=MessageType.COMMENT
         )
         assert result is None
+
+@pytest.mark.asyncio
+async def test_generate_completion_structured_output(openai_chatgpt_plugin, mock_async_openai):
+    from core.genai_interactions.genai_response_parser import GenAIResponseParser
+    from core.genai_interactions.structured_output import (
+        JSON_SCHEMA_RESPONSE_FORMAT,
+    )
+
+    # Local stand-in model: answers with the bare JSON action list when a response format is requested
+    async def local_model(**kwargs):
+        content = '{"response": [{"Action": {"ActionName": "UserInteraction", "Parameters": {"value": "Hi"}}}]}' \
+            if kwargs.get("response_format") else "[BEGINIMDETECT]Summary[ENDIMDETECT]"
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=content))],
+                         usage=MagicMock(total_tokens=10, prompt_tokens=5, completion_tokens=5))
+
+    mock_async_openai.side_effect = local_model
+    openai_chatgpt_plugin.global_manager.bot_config.LLM_STRUCTURED_OUTPUT = True
+    event = IncomingNotificationDataBase(channel_id="channel_id", thread_id="thread_id", user_id="user_id",
+                                         text="user text", timestamp="timestamp", event_label="event_label",
+                                         response_id="response_id", user_name="user_name", user_email="user_email",
+                                         is_mention=True, origin_plugin_name="openai_chatgpt")
+    messages = [{"role": "user", "content": "Hello"}]
+
+    response, _ = await openai_chatgpt_plugin.generate_completion(messages, event)
+    assert mock_async_openai.await_args.kwargs["response_format"] == JSON_SCHEMA_RESPONSE_FORMAT
+    genai_response = GenAIResponseParser(openai_chatgpt_plugin.input_handler.response_conversion_format()).parse(response)
+    assert genai_response.response[0].Parameters == {"value": "Hi"}
+
+    # Raw outputs, such as summaries, are not constrained
+    await openai_chatgpt_plugin.generate_completion(messages, event, raw_output=True)
+    assert "response_format" not in mock_async_openai.await_args.kwargs
+
+    openai_chatgpt_plugin.global_manager.bot_config.LLM_STRUCTURED_OUTPUT = False
+    await openai_chatgpt_plugin.generate_completion(messages, event)
+    assert "response_format" not in mock_async_openai.await_args.kwargs
+
+@pytest.mark.asyncio
+async def test_concurrent_completions_keep_their_own_cost(openai_chatgpt_plugin, mock_async_openai):
+    import asyncio
+    import random
+
+    # Fake model answering each request with its index, after a random delay so that the completions interleave
+    async def fake_model(**kwargs):
+        index = int(kwargs["messages"][-1]["content"])
+        await asyncio.sleep(random.random() / 100)
+        return MagicMock(choices=[MagicMock(message=MagicMock(content=f"answer {index}"))],
+                         usage=MagicMock(total_tokens=index, prompt_tokens=index, completion_tokens=0))
+
+    async def fake_stream(**kwargs):
+        index = int(kwargs["messages"][-1]["content"])
+
+        async def chunks():
+            for part in ("answer ", str(index)):
+                await asyncio.sleep(random.random() / 100)
+                yield MagicMock(usage=None, choices=[MagicMock(delta=MagicMock(content=part))])
+            yield MagicMock(usage=MagicMock(total_tokens=index, prompt_tokens=index, completion_tokens=0), choices=[])
+        return chunks()
+
+    event = IncomingNotificationDataBase(channel_id="channel_id", thread_id="thread_id", user_id="user_id",
+                                         text="user text", timestamp="timestamp", event_label="event_label",
+                                         response_id="response_id", user_name="user_name", user_email="user_email",
+                                         is_mention=True, origin_plugin_name="openai_chatgpt")
+
+    async def complete(index):
+        return await openai_chatgpt_plugin.generate_completion([{"role": "user", "content": str(index)}], event)
+
+    async def stream(index):
+        items = [item async for item in openai_chatgpt_plugin.generate_completion_stream(
+            [{"role": "user", "content": str(index)}], event)]
+        return "".join(items[:-1]), items[-1]
+
+    mock_async_openai.side_effect = fake_model
+    results = await asyncio.gather(*(complete(index) for index in range(300)))
+    assert all(response == f"answer {index}" and cost.total_tk == index
+               for index, (response, cost) in enumerate(results))
+
+    mock_async_openai.side_effect = fake_stream
+    results = await asyncio.gather(*(stream(index) for index in range(300)))
+    assert all(response == f"answer {index}" and cost.total_tk == index
+               for index, (response, cost) in enumerate(results))
+
+
+@pytest.mark.asyncio
+async def test_generate_embedding_reuses_one_client(openai_chatgpt_plugin):
+    openai_chatgpt_plugin.openai_chatgpt_config.OPENAI_CHATGPT_EMBEDDING_MODEL_NAME = "text-embedding-3-small"
+    with patch('plugins.genai_interactions.text.openai_chatgpt.openai_chatgpt.AsyncOpenAI') as mock_async_openai_class:
+        embeddings = mock_async_openai_class.return_value.embeddings
+        embeddings.create = AsyncMock(return_value=MagicMock(data=[MagicMock(embedding=[0.1, 0.2])]))
+
+        assert await openai_chatgpt_plugin.generate_embedding("first") == [0.1, 0.2]
+        assert await openai_chatgpt_plugin.generate_embedding("second") == [0.1, 0.2]
+
+    mock_async_openai_class.assert_called_once_with(api_key="fake_key")
+    assert embeddings.create.await_count == 2
@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from core.genai_interactions.concurrency_limiter import CircuitOpenError
 from core.genai_interactions.genai_cost_base import GenAICostBase
 from core.genai_interactions.genai_interactions_text_plugin_base import (
     GenAIInteractionsTextPluginBase,
@@ -196,7 +197,7 @@ async def test_call_completion_success(chat_input_handler):
     }
 
     # Return the mock response as a dictionary and MagicMock for cost
-    chat_input_handler.chat_plugin.generate_completion.return_value = (json.dumps(mock_response), MagicMock())
+    chat_input_handler.chat_plugin.generate_completion.return_value = (json.dumps(mock_response), GenAICostBase(10, 5, 5, 0.01, 0.03))
     chat_input_handler.backend_internal_data_processing_dispatcher.write_data_content = AsyncMock()
     chat_input_handler.conversion_format = "json"
 
@@ -212,7 +213,7 @@ async def test_call_completion_success(chat_input_handler):
     )
 
     # Assert
-    assert result == mock_response
+    assert result.to_dict() == mock_response
     chat_input_handler.chat_plugin.generate_completion.assert_called_once()
 
 
@@ -447,6 +448,17 @@ async def test_handle_completion_errors(chat_input_handler, incoming_notificatio
         mock_send_message.assert_called()
         assert "Test error" in mock_send_message.call_args[1]['message']
 
+@pytest.mark.asyncio
+async def test_handle_completion_errors_circuit_open(chat_input_handler, incoming_notification):
+    exception = CircuitOpenError("azure_chatgpt", 20)
+
+    with patch.object(chat_input_handler.user_interaction_dispatcher, 'send_message', new_callable=AsyncMock) as mock_send_message:
+        assert await chat_input_handler.handle_completion_errors(incoming_notification, exception) is None
+
+        mock_send_message.assert_called_once()
+        assert mock_send_message.call_args[1]['is_internal'] is False
+        assert "currently unavailable" in mock_send_message.call_args[1]['message']
+
 @pytest.mark.asyncio
 async def test_process_conversation_history_no_history(chat_input_handler):
     # Arrange
@@ -492,3 +504,68 @@ async def test_session_cost_accumulation(chat_input_handler, incoming_notificati
     assert session.total_cost['total_cost'] > initial_total_cost
     assert session.total_cost['total_tokens'] == 1000
     assert session.total_cost['total_cost'] == 0.025  # Calculated total cost
+
+@pytest.mark.asyncio
+async def test_call_completion_streams_user_interaction(chat_input_handler, incoming_notification):
+    response = {
+        "response": [
+            {"Action": {"ActionName": "ObservationThought", "Parameters": {"observation": "thinking"}}},
+            {"Action": {"ActionName": "UserInteraction", "Parameters": {"value": "Hello there"}}}
+        ]
+    }
+    completion = json.dumps(response)
+
+    async def completion_stream(messages, event_data):
+        for i in range(0, len(completion), 10):
+            yield completion[i:i + 10]
+        yield GenAICostBase(total_tk=10, prompt_tk=5, completion_tk=5, input_token_price=0, output_token_price=0)
+
+    chat_input_handler.bot_config = MagicMock(STREAM_COMPLETIONS=True)
+    chat_input_handler.conversion_format = "json"
+    chat_input_handler.chat_plugin = MagicMock()
+    chat_input_handler.chat_plugin.generate_completion_stream = completion_stream
+    chat_input_handler.chat_plugin.format_completion = lambda text: text
+    chat_input_handler.calculate_and_update_costs = AsyncMock()
+    message_stream = MagicMock()
+    message_stream.update = AsyncMock()
+    message_stream.finalize = AsyncMock(return_value=True)
+    chat_input_handler.user_interaction_dispatcher.open_message_stream = MagicMock(return_value=message_stream)
+
+    result = await chat_input_handler.call_completion(
+        incoming_notification.channel_id, incoming_notification.thread_id, [], incoming_notification, MagicMock())
+
+    streamed_values = [call.args[0] for call in message_stream.update.await_args_list if call.args[0]]
+    assert streamed_values[-1] == "Hello there"
+    message_stream.finalize.assert_awaited_once_with("Hello there")
+    # The streamed message is not sent again by the UserInteraction action
+    assert [action.ActionName for action in result.response] == ["ObservationThought"]
+
+@pytest.mark.asyncio
+async def test_call_completion_sends_budgeted_context(chat_input_handler, incoming_notification):
+    stored_messages = [{"role": "system", "content": "system"}, {"role": "user", "content": "hello"}]
+    context_messages = [{"role": "user", "content": "hello"}]
+    context_metrics = MagicMock()
+    context_metrics.to_dict.return_value = {"tokens_sent": 5, "tokens_stored": 10}
+    chat_input_handler.context_builder = MagicMock(enabled=True)
+    chat_input_handler.context_builder.build.return_value = (context_messages, context_metrics)
+    chat_input_handler.chat_plugin = AsyncMock()
+    chat_input_handler.chat_plugin.generate_completion.return_value = (json.dumps({"response": []}), GenAICostBase(10, 5, 5, 0.01, 0.03))
+    chat_input_handler.calculate_and_update_costs = AsyncMock()
+    chat_input_handler.conversion_format = "json"
+
+    await chat_input_handler.call_completion(
+        incoming_notification.channel_id, incoming_notification.thread_id, stored_messages, incoming_notification,
+        MagicMock())
+
+    chat_input_handler.chat_plugin.generate_completion.assert_awaited_once_with(context_messages, incoming_notification)
+    assistant_message = chat_input_handler.session_manager_dispatcher.append_messages.call_args.args[1]
+    assert assistant_message["context"] == {"tokens_sent": 5, "tokens_stored": 10}
+
+def test_structured_output_responses_are_parsed_as_json(chat_input_handler):
+    chat_input_handler.conversion_format = "yaml"
+    chat_input_handler.chat_plugin = MagicMock()
+    chat_input_handler.chat_plugin.structured_output_enabled.return_value = True
+    assert chat_input_handler.response_conversion_format() == "json"
+
+    chat_input_handler.chat_plugin.structured_output_enabled.return_value = False
+    assert chat_input_handler.response_conversion_format() == "yaml"
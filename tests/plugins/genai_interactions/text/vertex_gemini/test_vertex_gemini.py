@@ -52,6 +52,12 @@ def vertexai_gemini_plugin(extended_mock_global_manager):
         plugin.load_client = MagicMock()
         plugin.client = mock_model.return_value
         plugin.initialize()
+
+    # The completions of the actions go through the text dispatcher, which calls back the plugin
+    async def dispatch_completion(messages, event_data, plugin_name=None, raw_output=False):
+        return await plugin.generate_completion(messages, event_data, raw_output=raw_output)
+
+    plugin.genai_interactions_text_dispatcher.generate_completion = AsyncMock(side_effect=dispatch_completion)
     return plugin
 
 def test_initialize(vertexai_gemini_plugin):
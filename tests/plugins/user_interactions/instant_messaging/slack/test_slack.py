@@ -479,7 +479,6 @@ async def test_validate_event_data_webhook(slack_plugin):
 @pytest.mark.asyncio
 async def test_validate_processing_status(slack_plugin):
     slack_plugin.is_message_too_old = AsyncMock(return_value=False)
-    slack_plugin.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value=None)
 
     assert await slack_plugin._validate_processing_status("C12345678", "1234567890.123456") is True
 
@@ -489,8 +488,9 @@ async def test_validate_processing_status(slack_plugin):
 
     # Test with already processing message
     slack_plugin.is_message_too_old = AsyncMock(return_value=False)
-    slack_plugin.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value="Some content")
+    slack_plugin.global_manager.processing_coordinator.claim_processing("C12345678", "1234567890.123456")
     assert await slack_plugin._validate_processing_status("C12345678", "1234567890.123456") is False
+    slack_plugin.backend_internal_data_processing_dispatcher.read_data_content.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_process_event_data(slack_plugin):
@@ -1452,6 +1452,127 @@ async def test_handle_request_exception(slack_plugin):
     assert isinstance(response, Response)
     assert response.status_code == 200
 
+def make_signed_event_request(slack_plugin, event_id, extra_headers=None, channel="C12345678"):
+    payload = {
+        "event_id": event_id,
+        "event": {"type": "message", "user": "U123456", "channel": channel, "ts": "1234567890.123456",
+                  "event_ts": "1234567890.123456"}
+    }
+    raw_body_str = json.dumps(payload)
+    timestamp = str(int(time.time()))
+    signature = 'v0=' + hmac.new(
+        slack_plugin.slack_signing_secret.encode(),
+        f'v0:{timestamp}:{raw_body_str}'.encode(),
+        hashlib.sha256
+    ).hexdigest()
+    request = MagicMock(spec=Request)
+    request.body = AsyncMock(return_value=raw_body_str.encode())
+    request.headers = {
+        'content-type': 'application/json',
+        'X-Slack-Request-Timestamp': timestamp,
+        'X-Slack-Signature': signature,
+        **(extra_headers or {})
+    }
+    request.url.path = "/slack/events"
+    return request
+
+@pytest.mark.asyncio
+async def test_handle_request_schedules_signed_event(slack_plugin):
+    slack_plugin.process_event_data = AsyncMock()
+
+    response = await slack_plugin.handle_request(make_signed_event_request(slack_plugin, "Ev1"))
+    await slack_plugin.background_tasks.wait_until_idle()
+
+    assert response.status_code == 200
+    slack_plugin.process_event_data.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_handle_request_discards_invalid_signature(slack_plugin):
+    slack_plugin.process_event_data = AsyncMock()
+    request = make_signed_event_request(slack_plugin, "Ev1")
+    request.headers['X-Slack-Signature'] = 'v0=invalid_signature'
+
+    response = await slack_plugin.handle_request(request)
+
+    assert response.status_code == 200
+    assert slack_plugin.background_tasks.pending_count == 0
+    slack_plugin.process_event_data.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_handle_request_drops_slack_retries(slack_plugin):
+    slack_plugin.process_event_data = AsyncMock()
+
+    await slack_plugin.handle_request(make_signed_event_request(slack_plugin, "Ev1"))
+    retry = make_signed_event_request(slack_plugin, "Ev1", {'X-Slack-Retry-Num': '1',
+                                                            'X-Slack-Retry-Reason': 'http_timeout'})
+    response = await slack_plugin.handle_request(retry)
+    await slack_plugin.background_tasks.wait_until_idle()
+
+    assert response.status_code == 200
+    slack_plugin.process_event_data.assert_awaited_once()
+    slack_plugin.backend_internal_data_processing_dispatcher.read_data_content.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_handle_request_backpressure(slack_plugin):
+    release = asyncio.Event()
+
+    async def slow_processing(*args, **kwargs):
+        await release.wait()
+
+    slack_plugin.process_event_data = slow_processing
+    slack_plugin.background_tasks.max_pending_tasks = 1
+
+    first = await slack_plugin.handle_request(make_signed_event_request(slack_plugin, "Ev1"))
+    rejected = await slack_plugin.handle_request(make_signed_event_request(slack_plugin, "Ev2"))
+
+    assert first.status_code == 200
+    assert rejected.status_code == 503
+
+    release.set()
+    await slack_plugin.background_tasks.wait_until_idle()
+
+    # The rejected event was not remembered, so Slack's retry is accepted
+    retry = await slack_plugin.handle_request(
+        make_signed_event_request(slack_plugin, "Ev2", {'X-Slack-Retry-Num': '1'}))
+    await slack_plugin.background_tasks.wait_until_idle()
+    assert retry.status_code == 200
+
+@pytest.mark.asyncio
+async def test_handle_request_ack_latency_with_slow_backend(slack_plugin):
+    # The backend stays blocked until the end of the test, so every accepted event is still pending when counted
+    backend_released = asyncio.Event()
+
+    async def slow_backend_write(*args, **kwargs):
+        await backend_released.wait()
+
+    async def process_interaction(event_data):
+        await slack_plugin.backend_internal_data_processing_dispatcher.write_data_content(event_data)
+
+    slack_plugin.backend_internal_data_processing_dispatcher.write_data_content = slow_backend_write
+    slack_plugin.is_message_too_old = AsyncMock(return_value=False)
+    slack_plugin.process_interaction = process_interaction
+
+    async def timed_request(index):
+        # Two consecutive requests share an event_id, the second one being its retry by Slack
+        start = time.perf_counter()
+        await slack_plugin.handle_request(make_signed_event_request(slack_plugin, f"Ev{index // 2}",
+                                                                    {'X-Slack-Retry-Num': str(index % 2)}))
+        return time.perf_counter() - start
+
+    latencies = []
+    for _ in range(4):
+        start_index = len(latencies)
+        latencies += await asyncio.gather(*(timed_request(start_index + i) for i in range(100)))
+        await asyncio.sleep(0.01)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    assert slack_plugin.background_tasks.pending_count == 200
+    assert p99 < 0.1
+
+    backend_released.set()
+    await slack_plugin.background_tasks.wait_until_idle()
+
 @pytest.mark.asyncio
 async def test_execute_slash_command_unknown(slack_plugin):
     request = MagicMock()
@@ -1642,3 +1763,50 @@ async def test_fetch_conversation_history_exception_handling(slack_plugin, mocke
 
     # Assert that the error was logged
     slack_plugin.logger.error.assert_called_once_with("Error fetching conversation history: Test error")
+
+@pytest.mark.asyncio
+async def test_post_and_update_streamed_message(slack_plugin):
+    event = IncomingNotificationDataBase(
+        timestamp="1234567890.123456",
+        event_label="message",
+        channel_id="C12345678",
+        thread_id="1234567890.123456",
+        response_id="1234567890.123456",
+        is_mention=False,
+        text="Test message",
+        origin_plugin_name="slack"
+    )
+    slack_plugin.MAX_MESSAGE_LENGTH = 10
+    slack_plugin.call_chat_api = AsyncMock(return_value={'ok': True, 'channel': 'C12345678', 'ts': '1.2'})
+
+    message_ref = await slack_plugin.post_updatable_message("Hello", event)
+    assert message_ref == {'channel': 'C12345678', 'ts': '1.2'}
+    method, payload = slack_plugin.call_chat_api.await_args.args
+    assert method == 'chat.postMessage'
+    assert payload['thread_ts'] == event.response_id
+
+    # While streaming only the first block is edited
+    await slack_plugin.update_message("Hello\nworld, longer", event, message_ref)
+    assert [call.args[0] for call in slack_plugin.call_chat_api.await_args_list[1:]] == ['chat.update']
+
+    # The overflow is posted once the message is final
+    await slack_plugin.update_message("Hello\nworld, longer", event, message_ref, is_final=True)
+    assert [call.args[0] for call in slack_plugin.call_chat_api.await_args_list[2:]] == \
+           ['chat.update', 'chat.postMessage', 'chat.postMessage']
+    assert slack_plugin.supports_message_updates is True
+
+
+@pytest.mark.asyncio
+async def test_call_chat_api_reuses_the_pooled_session(slack_plugin):
+    session = MagicMock()
+    response = session.post.return_value.__aenter__.return_value
+    response.status = 200
+    response.json = AsyncMock(return_value={'ok': True, 'ts': '1.2'})
+    slack_plugin.global_manager.web_content_fetcher.get_session = MagicMock(return_value=session)
+
+    for method in ('chat.postMessage', 'chat.update'):
+        assert await slack_plugin.call_chat_api(method, {'text': 'Hello'}) == {'ok': True, 'ts': '1.2'}
+
+    assert [call.args[0] for call in session.post.call_args_list] == \
+           ['https://slack.com/api/chat.postMessage', 'https://slack.com/api/chat.update']
+    session.close.assert_not_called()
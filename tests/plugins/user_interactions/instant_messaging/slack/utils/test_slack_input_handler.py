@@ -4,6 +4,7 @@ import zipfile
 from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock
 
+import aiohttp
 import pytest
 from PIL import Image
 
@@ -1184,15 +1185,40 @@ async def test_process_urls(slack_input_handler, mocker):
     assert "Processed URL content" in result
 
 @pytest.mark.asyncio
-async def test_process_single_url(slack_input_handler, mocker):
-    mock_response = mocker.Mock()
-    mock_response.text = "<html><body>Example content</body></html>"
-    mocker.patch("requests.get", return_value=mock_response)
+async def test_process_single_url(slack_input_handler):
+    slack_input_handler.global_manager.web_content_fetcher.fetch_text = AsyncMock(return_value="Example content")
 
     url = "https://example.com"
     result = await slack_input_handler._process_single_url(url)
 
     assert "Example content" in result
+    slack_input_handler.global_manager.web_content_fetcher.fetch_text.assert_awaited_once_with(url)
+
+@pytest.mark.asyncio
+async def test_process_single_url_fetch_error(slack_input_handler):
+    slack_input_handler.global_manager.web_content_fetcher.fetch_text = AsyncMock(
+        side_effect=aiohttp.ClientError("boom"))
+
+    url = "https://example.com"
+    result = await slack_input_handler._process_single_url(url)
+
+    assert result == f"An error occurred while trying to get {url}:\n"
+
+@pytest.mark.asyncio
+async def test_process_urls_keeps_the_other_urls_when_one_fails(slack_input_handler, mocker):
+    mocker.patch.object(slack_input_handler.global_manager.bot_config, "GET_URL_CONTENT", True)
+
+    async def fetch_text(url):
+        if "bad" in url:
+            raise LookupError("unknown encoding: x-unknown")
+        return "Example content"
+
+    slack_input_handler.global_manager.web_content_fetcher.fetch_text = AsyncMock(side_effect=fetch_text)
+
+    result = await slack_input_handler._process_urls("See <https://good.example.com|good> and <https://bad.example.com|bad>")
+
+    assert "Example content" in result
+    assert "An error occurred while trying to get https://bad.example.com:" in result
 
 @pytest.mark.asyncio
 async def test_create_event_data_instance(slack_input_handler, mocker):
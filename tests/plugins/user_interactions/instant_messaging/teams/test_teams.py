@@ -186,12 +186,10 @@ async def test_is_duplicate_request(teams_plugin):
         'id': 'message_id'
     }
 
-    with patch.object(teams_plugin.backend_internal_data_processing_dispatcher, 'read_data_content', new_callable=AsyncMock) as mock_read_data:
-        mock_read_data.return_value = None
-        assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is False
+    assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is False
 
-        mock_read_data.return_value = 'Some content'
-        assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is True
+    teams_plugin.global_manager.processing_coordinator.claim_processing('conversation_id', 'message_id')
+    assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is True
 
 @pytest.mark.asyncio
 async def test_send_message(teams_plugin, mock_request):
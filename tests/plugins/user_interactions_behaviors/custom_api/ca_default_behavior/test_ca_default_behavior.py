@@ -117,7 +117,7 @@ async def test_process_interaction_general_event(ca_default_behavior_plugin, glo
 
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert ca_default_behavior_plugin.processing_coordinator.is_processing("C123", "1234567890.123456")
     ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_awaited()
 
 @pytest.mark.asyncio
@@ -244,7 +244,7 @@ async def test_process_interaction_thread_break_keyword(ca_default_behavior_plug
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     ca_default_behavior_plugin.user_interaction_dispatcher.send_message.assert_awaited()
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert await ca_default_behavior_plugin.processing_coordinator.is_aborted("C123", "thread_1")
 
 # ... [The rest of the tests follow the same pattern, replacing 'im_default_behavior_plugin' with 'ca_default_behavior_plugin']
 
@@ -276,7 +276,7 @@ async def test_process_interaction_basic(ca_default_behavior_plugin, global_mana
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     ca_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data.assert_awaited_once()
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited_once()
+    assert ca_default_behavior_plugin.processing_coordinator.is_processing(event.channel_id, event.timestamp)
     ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_awaited_once()
 
 @pytest.mark.asyncio
@@ -316,7 +316,7 @@ async def test_process_interaction_thread_message_with_break_keyword(ca_default_
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     ca_default_behavior_plugin.user_interaction_dispatcher.send_message.assert_awaited()
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert await ca_default_behavior_plugin.processing_coordinator.is_aborted(event.channel_id, event.thread_id or event.timestamp)
 
 @pytest.mark.asyncio
 async def test_process_incoming_notification_data_generating_completion(ca_default_behavior_plugin, event_data):
@@ -362,6 +362,27 @@ async def test_process_incoming_notification_data_error_handling(ca_default_beha
     assert any(error_message in call[0][0] for call in ca_default_behavior_plugin.logger.error.call_args_list)
 
 
+@pytest.mark.asyncio
+async def test_process_incoming_notification_data_drains_queued_messages(ca_default_behavior_plugin, event_data):
+    event = IncomingNotificationDataBase.from_dict(event_data)
+    queued_event = IncomingNotificationDataBase.from_dict({**event_data, "timestamp": "1234567891.123456"})
+    ca_default_behavior_plugin.bot_config.ACTIVATE_MESSAGE_QUEUING = True
+    ca_default_behavior_plugin.genai_interactions_text_dispatcher.handle_request = AsyncMock(return_value=None)
+    queue_dispatcher = ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher
+    queue_dispatcher.drain = AsyncMock(return_value=[(queued_event.timestamp, queued_event.to_json())])
+    queue_dispatcher.peek_count = AsyncMock(return_value=0)
+
+    await ca_default_behavior_plugin.process_incoming_notification_data(event)
+
+    # The queued message is processed once, without draining the queue again
+    processed = [call.args[0].timestamp for call in
+                 ca_default_behavior_plugin.genai_interactions_text_dispatcher.handle_request.await_args_list]
+    assert processed == [event.timestamp, queued_event.timestamp]
+    queue_dispatcher.drain.assert_awaited_once()
+    queue_dispatcher.dequeue_message.assert_awaited_once()
+    assert queue_dispatcher.dequeue_message.await_args.kwargs["message_id"] == event.timestamp
+
+
 @pytest.mark.asyncio
 async def test_begin_long_action(ca_default_behavior_plugin, event_data):
     event = IncomingNotificationDataBase.from_dict(event_data)
@@ -395,12 +416,12 @@ async def test_process_interaction_thread_start_keyword(ca_default_behavior_plug
     event_data["event_label"] = "thread_message"
     event = IncomingNotificationDataBase.from_dict(event_data)
     ca_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data = AsyncMock(return_value=event)
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.remove_data_content = AsyncMock()
+    await ca_default_behavior_plugin.processing_coordinator.abort(event.channel_id, event.thread_id or event.timestamp)
 
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     ca_default_behavior_plugin.user_interaction_dispatcher.send_message.assert_awaited_once()
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.remove_data_content.assert_awaited_once()
+    assert not await ca_default_behavior_plugin.processing_coordinator.is_aborted(event.channel_id, event.thread_id or event.timestamp)
 
 @pytest.mark.asyncio
 async def test_process_interaction_thread_clear_keyword(ca_default_behavior_plugin, global_manager, event_data):
@@ -507,8 +528,9 @@ async def test_process_interaction_error_handling(ca_default_behavior_plugin, ev
     mock_event = IncomingNotificationDataBase.from_dict(event_data)
     ca_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data = AsyncMock(return_value=mock_event)
 
-    # Mock the backend_internal_data_processing_dispatcher to raise an exception
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content = AsyncMock(side_effect=Exception("Test error"))
+    # Make the processing claim raise an exception
+    ca_default_behavior_plugin.processing_coordinator = MagicMock()
+    ca_default_behavior_plugin.processing_coordinator.claim_processing.side_effect = Exception("Test error")
 
     ca_default_behavior_plugin.mark_error = AsyncMock()
 
@@ -2,6 +2,7 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from core.genai_interactions.token_counter import TOKENS_PER_IMAGE
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
@@ -20,6 +21,7 @@ def global_manager(mock_global_manager):
     mock_global_manager.bot_config.BREAK_KEYWORD = "break"
     mock_global_manager.bot_config.START_KEYWORD = "start"
     mock_global_manager.bot_config.REQUIRE_MENTION_NEW_MESSAGE = True
+    mock_global_manager.config_manager.config_model.BOT_CONFIG.MESSAGE_COALESCING_WINDOW = 0
     yield mock_global_manager
     mock_global_manager.reset_mock()
 
@@ -103,7 +105,7 @@ async def test_process_interaction_general_event(im_default_behavior_plugin, glo
     await im_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     # Verify that the appropriate methods were called
-    im_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert im_default_behavior_plugin.processing_coordinator.is_processing("C123", "1234567890.123456")
     im_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_awaited()
 
 
@@ -217,7 +219,7 @@ async def test_process_interaction_thread_break_keyword(im_default_behavior_plug
     await im_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     im_default_behavior_plugin.user_interaction_dispatcher.send_message.assert_awaited()
-    im_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert await im_default_behavior_plugin.processing_coordinator.is_aborted("C123", "thread_1")
 
 @pytest.mark.asyncio
 async def test_process_interaction_break_keyword(im_default_behavior_plugin, global_manager):
@@ -241,7 +243,7 @@ async def test_process_interaction_break_keyword(im_default_behavior_plugin, glo
     await im_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     im_default_behavior_plugin.user_interaction_dispatcher.send_message.assert_awaited()
-    im_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert await im_default_behavior_plugin.processing_coordinator.is_aborted("C123", "thread_1")
 
 @pytest.mark.asyncio
 async def test_begin_end_genai_completion(im_default_behavior_plugin):
@@ -626,7 +628,7 @@ async def test_process_interaction_event_none_after_conversion(im_default_behavi
     # Assert
     im_default_behavior_plugin.logger.error.assert_called_with("IM behavior: No event data found")
     # Verify that other methods are not called
-    im_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_not_awaited()
+    assert not im_default_behavior_plugin.processing_coordinator.is_processing("C123", "1234567890.123456")
 
 @pytest.mark.asyncio
 async def test_process_interaction_clear_keyword(im_default_behavior_plugin, global_manager):
@@ -705,3 +707,127 @@ async def test_process_interaction_pending_messages_no_queuing_message_in_wait_q
     im_default_behavior_plugin.user_interaction_dispatcher.send_message.assert_not_awaited()
     # The event should not be enqueued again
     im_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_process_incoming_notification_data_drains_queued_messages(im_default_behavior_plugin):
+    # Setup
+    def make_event(timestamp):
+        return IncomingNotificationDataBase(
+            timestamp=timestamp,
+            event_label="thread_message",
+            channel_id="C123",
+            thread_id="1234567890.000001",
+            response_id=None,
+            user_name="test_user",
+            user_email="test_user@example.com",
+            user_id="U123",
+            is_mention=True,
+            text="hello",
+            origin_plugin_name="origin_plugin_name"
+        )
+
+    event = make_event("1234567890.123456")
+    queued_event = make_event("1234567891.123456")
+
+    im_default_behavior_plugin.bot_config.ACTIVATE_MESSAGE_QUEUING = True
+    im_default_behavior_plugin.user_interaction_dispatcher = AsyncMock()
+    im_default_behavior_plugin.genai_interactions_text_dispatcher = AsyncMock()
+    im_default_behavior_plugin.genai_interactions_text_dispatcher.handle_request = AsyncMock(return_value=None)
+    queue_dispatcher = AsyncMock()
+    queue_dispatcher.drain = AsyncMock(return_value=[(queued_event.timestamp, queued_event.to_json())])
+    queue_dispatcher.peek_count = AsyncMock(return_value=0)
+    im_default_behavior_plugin.backend_internal_queue_processing_dispatcher = queue_dispatcher
+    im_default_behavior_plugin.logger = MagicMock()
+
+    # Execute
+    await im_default_behavior_plugin.process_incoming_notification_data(event)
+
+    # Assert: the queued message is processed once, without draining the queue again
+    processed = [call.args[0].timestamp for call in
+                 im_default_behavior_plugin.genai_interactions_text_dispatcher.handle_request.await_args_list]
+    assert processed == [event.timestamp, queued_event.timestamp]
+    queue_dispatcher.drain.assert_awaited_once()
+    assert queue_dispatcher.drain.await_args.kwargs["after_message_id"] == event.timestamp
+    queue_dispatcher.dequeue_message.assert_awaited_once()
+    assert queue_dispatcher.dequeue_message.await_args.kwargs["message_id"] == event.timestamp
+
+def make_thread_event(timestamp, user_id="U123", text="hello"):
+    return IncomingNotificationDataBase(
+        timestamp=timestamp,
+        event_label="thread_message",
+        channel_id="C123",
+        thread_id="1234567890.000001",
+        response_id=None,
+        user_name="test_user",
+        user_email="test_user@example.com",
+        user_id=user_id,
+        is_mention=True,
+        text=text,
+        origin_plugin_name="origin_plugin_name"
+    )
+
+@pytest.mark.asyncio
+async def test_coalesce_burst_merges_messages_of_the_same_user(im_default_behavior_plugin, global_manager):
+    event = make_thread_event("1234567890.123456", text="first")
+    same_user = make_thread_event("1234567891.123456", text="second")
+    other_user = make_thread_event("1234567892.123456", user_id="U999", text="other")
+
+    im_default_behavior_plugin.message_coalescer.window_seconds = 0.01
+    im_default_behavior_plugin.reaction_wait = "wait"
+    im_default_behavior_plugin.user_interaction_dispatcher = AsyncMock()
+    queue_dispatcher = AsyncMock()
+    queue_dispatcher.drain = AsyncMock(return_value=[
+        (same_user.timestamp, same_user.to_json()),
+        (other_user.timestamp, other_user.to_json()),
+    ])
+    im_default_behavior_plugin.backend_internal_queue_processing_dispatcher = queue_dispatcher
+    global_manager.session_manager_dispatcher.get_or_create_session = AsyncMock(
+        return_value=MagicMock(messages=[{"role": "user", "content": "a" * 400}]))
+
+    merged = await im_default_behavior_plugin.coalesce_burst(event)
+
+    assert merged.timestamp == event.timestamp
+    assert merged.text == "first\nsecond"
+    # The message of the other user is put back in the queue
+    queue_dispatcher.enqueue_many.assert_awaited_once()
+    assert [message_id for message_id, _ in queue_dispatcher.enqueue_many.await_args.kwargs["messages"]] == \
+           [other_user.timestamp]
+    assert im_default_behavior_plugin.message_coalescer.llm_calls_saved == 1
+    assert im_default_behavior_plugin.message_coalescer.tokens_saved > 0
+
+@pytest.mark.asyncio
+async def test_process_queued_messages_coalesces_when_enabled(im_default_behavior_plugin):
+    event = make_thread_event("1234567890.123456")
+    queued = [make_thread_event("1234567891.123456", text="second"),
+              make_thread_event("1234567892.123456", text="third")]
+
+    im_default_behavior_plugin.message_coalescer.window_seconds = 1
+    im_default_behavior_plugin.user_interaction_dispatcher = AsyncMock()
+    queue_dispatcher = AsyncMock()
+    queue_dispatcher.drain = AsyncMock(return_value=[(e.timestamp, e.to_json()) for e in queued])
+    im_default_behavior_plugin.backend_internal_queue_processing_dispatcher = queue_dispatcher
+    im_default_behavior_plugin.process_incoming_notification_data = AsyncMock()
+    im_default_behavior_plugin.estimate_prompt_tokens = AsyncMock(return_value=50)
+    im_default_behavior_plugin.logger = MagicMock()
+
+    await im_default_behavior_plugin.process_queued_messages(event)
+
+    # Both queued messages are answered in a single turn
+    im_default_behavior_plugin.process_incoming_notification_data.assert_awaited_once()
+    processed_event = im_default_behavior_plugin.process_incoming_notification_data.await_args.args[0]
+    assert processed_event.text == "second\nthird"
+    assert im_default_behavior_plugin.message_coalescer.llm_calls_saved == 1
+    assert im_default_behavior_plugin.message_coalescer.tokens_saved == 50
+    im_default_behavior_plugin.process_incoming_notification_data.reset_mock()
+    im_default_behavior_plugin.estimate_prompt_tokens.reset_mock()
+
+@pytest.mark.asyncio
+async def test_estimate_prompt_tokens_charges_images_at_their_token_cost(im_default_behavior_plugin):
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64," + "A" * 400000}}
+    session = MagicMock(messages=[{"role": "user", "content": [{"type": "text", "text": "hello"}, image]}])
+    im_default_behavior_plugin.global_manager.session_manager_dispatcher.get_or_create_session = AsyncMock(
+        return_value=session)
+
+    tokens = await im_default_behavior_plugin.estimate_prompt_tokens(make_thread_event("1234567890.123456"))
+
+    assert TOKENS_PER_IMAGE < tokens < TOKENS_PER_IMAGE + 20
@@ -0,0 +1,221 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.web_content_fetcher.web_content_fetcher import WebContentFetcher
+
+PAGE = "<html><head><title>t</title><style>p {}</style></head><body><p>Hello   <b>world</b></p><script>var x;</script></body></html>"
+
+
+@asynccontextmanager
+async def running_server(app):
+    # Access logging is disabled so the test server does not depend on the global logging setup
+    server = TestServer(app)
+    await server.start_server(access_log=None)
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+@pytest.fixture
+def fetcher(mock_global_manager):
+    return WebContentFetcher(mock_global_manager)
+
+
+@pytest.fixture
+def counters():
+    return {"page": 0, "conditional": 0}
+
+
+@pytest.fixture
+def app(counters):
+    async def page(request):
+        counters["page"] += 1
+        if request.headers.get("If-None-Match") == '"v1"':
+            counters["conditional"] += 1
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        await asyncio.sleep(0.05)
+        return web.Response(text=PAGE, content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def large(request):
+        return web.Response(text="<p>" + "a" * 10000 + "</p>", content_type="text/html")
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def search(request):
+        return web.json_response({"query": request.query["q"], "key": request.headers.get("X-Key")})
+
+    async def slow(request):
+        counters["page"] += 1
+        await asyncio.sleep(0.3)
+        return web.Response(text=PAGE, content_type="text/html")
+
+    async def image(request):
+        return web.Response(body=b"\x89PNG" + bytes(2000), content_type="image/png")
+
+    async def unknown_charset(request):
+        return web.Response(body=PAGE.encode("utf-8"), headers={"Content-Type": "text/html; charset=x-unknown"})
+
+    application = web.Application()
+    application.router.add_get("/page", page)
+    application.router.add_get("/large", large)
+    application.router.add_get("/missing", missing)
+    application.router.add_get("/search", search)
+    application.router.add_get("/image", image)
+    application.router.add_get("/slow", slow)
+    application.router.add_get("/unknown-charset", unknown_charset)
+    return application
+
+
+@pytest.mark.asyncio
+async def test_fetch_text_extracts_visible_text(fetcher, app):
+    async with running_server(app) as server:
+        text = await fetcher.fetch_text(str(server.make_url("/page")))
+        await fetcher.close()
+
+    assert text == "Hello world"
+
+
+@pytest.mark.asyncio
+async def test_fetch_serves_fresh_entries_from_cache(fetcher, app, counters):
+    async with running_server(app) as server:
+        url = str(server.make_url("/page"))
+        first = await fetcher.fetch(url)
+        second = await fetcher.fetch(url)
+        await fetcher.close()
+
+    assert counters["page"] == 1
+    assert second is first
+
+
+@pytest.mark.asyncio
+async def test_fetch_deduplicates_concurrent_requests(fetcher, app, counters):
+    async with running_server(app) as server:
+        url = str(server.make_url("/page"))
+        results = await asyncio.gather(*(fetcher.fetch_text(url) for _ in range(5)))
+        await fetcher.close()
+
+    assert counters["page"] == 1
+    assert results == ["Hello world"] * 5
+
+
+@pytest.mark.asyncio
+async def test_fetch_revalidates_expired_entries_with_etag(fetcher, app, counters):
+    fetcher.cache_ttl = 0
+    async with running_server(app) as server:
+        url = str(server.make_url("/page"))
+        await fetcher.fetch(url)
+        content = await fetcher.fetch(url)
+        await fetcher.close()
+
+    assert counters["page"] == 2
+    assert counters["conditional"] == 1
+    assert content.text == "Hello world"
+
+
+@pytest.mark.asyncio
+async def test_fetch_truncates_large_responses(fetcher, app):
+    fetcher.max_response_bytes = 100
+    async with running_server(app) as server:
+        content = await fetcher.fetch(str(server.make_url("/large")))
+        await fetcher.close()
+
+    assert content.truncated is True
+    assert len(content.text) <= 100
+
+
+@pytest.mark.asyncio
+async def test_fetch_raises_on_http_error(fetcher, app):
+    async with running_server(app) as server:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await fetcher.fetch(str(server.make_url("/missing")))
+        await fetcher.close()
+
+
+@pytest.mark.asyncio
+async def test_fetch_json_sends_params_and_headers(fetcher, app):
+    async with running_server(app) as server:
+        result = await fetcher.fetch_json(str(server.make_url("/search")), params={"q": "bots"},
+                                          headers={"X-Key": "secret"})
+        await fetcher.close()
+
+    assert result == {"query": "bots", "key": "secret"}
+
+
+@pytest.mark.asyncio
+async def test_caller_giving_up_does_not_cancel_the_shared_download(fetcher, app, counters):
+    async with running_server(app) as server:
+        url = str(server.make_url("/slow"))
+        impatient = asyncio.create_task(asyncio.wait_for(fetcher.fetch_text(url), timeout=0.1))
+        patient = asyncio.create_task(asyncio.wait_for(fetcher.fetch_text(url), timeout=10))
+        results = await asyncio.gather(impatient, patient, return_exceptions=True)
+        await fetcher.close()
+
+    assert isinstance(results[0], asyncio.TimeoutError)
+    assert results[1] == "Hello world"
+    assert counters["page"] == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_many_returns_the_texts_fetched_before_the_deadline(fetcher):
+    async def fetch_text(url):
+        if url == "slow":
+            await asyncio.sleep(5)
+        if url == "broken":
+            raise ValueError("unknown encoding")
+        if url == "cancelled":
+            raise asyncio.CancelledError()
+        return f"text of {url}"
+
+    fetcher.logger = MagicMock()
+    fetcher.fetch_text = AsyncMock(side_effect=fetch_text)
+
+    texts = await fetcher.fetch_many(["a", "slow", "broken", "cancelled", "b"], deadline=0.1)
+
+    assert texts == ["text of a", None, None, None, "text of b"]
+    fetcher.logger.error.assert_called_once_with("Failed to fetch broken: unknown encoding")
+    assert fetcher.logger.warning.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_bytes_returns_the_body_and_rejects_larger_ones(fetcher, app):
+    async with running_server(app) as server:
+        body = await fetcher.fetch_bytes(str(server.make_url("/image")))
+        with pytest.raises(ValueError):
+            await fetcher.fetch_bytes(str(server.make_url("/image")), max_bytes=1000)
+        await fetcher.close()
+
+    assert body == b"\x89PNG" + bytes(2000)
+
+
+@pytest.mark.asyncio
+async def test_fetch_bytes_accepts_a_body_of_exactly_max_bytes(fetcher, app):
+    async with running_server(app) as server:
+        body = await fetcher.fetch_bytes(str(server.make_url("/image")), max_bytes=2004)
+        await fetcher.close()
+
+    assert len(body) == 2004
+
+
+@pytest.mark.asyncio
+async def test_fetch_decodes_an_unknown_charset_as_utf8(fetcher, app):
+    async with running_server(app) as server:
+        content = await fetcher.fetch(str(server.make_url("/unknown-charset")))
+        await fetcher.close()
+
+    assert content.text == "Hello world"
+
+
+def test_cache_evicts_least_recently_used_entries(fetcher):
+    fetcher.cache_max_entries = 2
+    for url in ("a", "b", "c"):
+        fetcher._store(url, object())
+
+    assert list(fetcher._cache) == ["b", "c"]
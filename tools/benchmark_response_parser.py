@@ -0,0 +1,62 @@
+import argparse
+import json
+import time
+
+import yaml
+
+from core.genai_interactions.genai_response_parser import (
+    GenAIResponseParser,
+    YamlLoader,
+)
+
+help_description = """
+Response Parser Benchmark
+
+Measures the time spent parsing large multi-action [BEGINIMDETECT] completions, in JSON and in YAML,
+with the YAML loader used by the bot (libyaml when available) and with the pure Python loader.
+
+Usage:
+  python -m tools.benchmark_response_parser [--actions <count>] [--runs <count>]
+"""
+
+
+def make_completion(action_count: int, conversion_format: str) -> str:
+    actions = [{"Action": {"ActionName": "ObservationThought",
+                           "Parameters": {"observation": f"Observation {i} " * 20, "plan": f"Step {i}"}}}
+               for i in range(action_count - 1)]
+    actions.append({"Action": {"ActionName": "UserInteraction", "Parameters": {"value": "Answer\n" * 50}}})
+    response = {"response": actions}
+    payload = json.dumps(response) if conversion_format == "json" else yaml.safe_dump(response, sort_keys=False)
+    return f"[BEGINIMDETECT]\n{payload}\n[ENDIMDETECT]"
+
+
+def measure(parse, completion: str, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        parse(completion)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=help_description, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--actions", type=int, default=200, help="Number of actions in each completion")
+    parser.add_argument("--runs", type=int, default=20, help="Number of runs averaged for each measure")
+    args = parser.parse_args()
+
+    json_completion = make_completion(args.actions, "json")
+    yaml_completion = make_completion(args.actions, "yaml")
+    json_parser = GenAIResponseParser("json")
+    yaml_parser = GenAIResponseParser("yaml")
+
+    def parse_yaml_pure_python(completion):
+        payload = GenAIResponseParser.adjust_yaml_structure(GenAIResponseParser.extract_payload(completion))
+        return yaml.load(payload, Loader=yaml.SafeLoader)
+
+    print(f"{args.actions} actions, average of {args.runs} runs")
+    print(f"json: {measure(json_parser.parse, json_completion, args.runs):.2f} ms")
+    print(f"yaml ({YamlLoader.__name__}): {measure(yaml_parser.parse, yaml_completion, args.runs):.2f} ms")
+    print(f"yaml (SafeLoader): {measure(parse_yaml_pure_python, yaml_completion, args.runs):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -68,6 +68,10 @@ class BotConfig(BaseModel):
     # The format for the bot's responses (e.g., "json" or "yaml"). This defines how the bot structures its outputs.
     LLM_CONVERSION_FORMAT: str
 
+    # If True, the text plugins supporting it ask the provider for a JSON response following the actions schema
+    # (JSON schema or JSON mode) instead of relying on the [BEGINIMDETECT] markers. The responses are then always JSON.
+    LLM_STRUCTURED_OUTPUT: bool = False
+
     # The keyword used by the bot to identify when it should stop processing a message (e.g., "!STOP").
     BREAK_KEYWORD: str
 
@@ -93,6 +97,105 @@ class BotConfig(BaseModel):
     # Specify if the bot uses the user interaction events queue.
     ACTIVATE_USER_INTERACTION_EVENTS_QUEUING: bool
 
+    # Shared web content fetcher settings (used for URLs in user messages and by the FetchWebContent action).
+    # Maximum number of pooled connections, overall and per host.
+    WEB_CONTENT_MAX_CONNECTIONS: int = 100
+    WEB_CONTENT_MAX_CONNECTIONS_PER_HOST: int = 4
+
+    # Maximum number of bytes read from a single web page, the rest of the body is discarded.
+    WEB_CONTENT_MAX_RESPONSE_BYTES: int = 2_000_000
+
+    # Timeout in seconds for a single web page request.
+    WEB_CONTENT_REQUEST_TIMEOUT: int = 15
+
+    # Overall deadline in seconds of the FetchWebContent action, its urls are fetched concurrently and the pages not
+    # fetched in time are left out of the result.
+    WEB_CONTENT_FETCH_DEADLINE: float = 30.0
+
+    # Number of seconds a fetched page is served from cache before being revalidated, and the maximum cache size.
+    WEB_CONTENT_CACHE_TTL: int = 900
+    WEB_CONTENT_CACHE_MAX_ENTRIES: int = 256
+
+    # BingSearch action: number of seconds a search result is served from cache and the maximum cache size, overall
+    # deadline in seconds to fetch the result pages (fetched concurrently by the web content fetcher), and maximum
+    # number of tokens of each page sent back to the model.
+    BING_SEARCH_CACHE_TTL: int = 600
+    BING_SEARCH_CACHE_MAX_ENTRIES: int = 256
+    BING_SEARCH_DEADLINE: float = 20.0
+    BING_SEARCH_MAX_PAGE_TOKENS: int = 2000
+
+    # Processing state (processing markers, BREAK/START abort flags) is kept in memory.
+    # If True, abort flags are also persisted in the backend abort container so they survive a restart.
+    PERSIST_PROCESSING_STATE: bool = True
+
+    # Number of seconds a processed message is remembered to discard duplicate notifications.
+    PROCESSING_MARKER_TTL: int = 3600
+
+    # Number of seconds to wait for follow-up messages before answering a new message (requires ACTIVATE_MESSAGE_QUEUING).
+    # Consecutive messages of the same user in a thread are then merged into a single turn. 0 disables coalescing.
+    MESSAGE_COALESCING_WINDOW: float = 0
+
+    # If True, completions are streamed and the user message is posted as soon as its text starts,
+    # then updated while the rest of the completion is generated. Other actions still run once it is complete.
+    STREAM_COMPLETIONS: bool = False
+
+    # Maximum number of tokens of conversation context sent to the model, counted with the model tokenizer. 0 sends the whole session.
+    # The system prompt and the CONTEXT_RECENT_MESSAGES last messages are kept verbatim, older images are replaced by
+    # a reference, older text parts are truncated to CONTEXT_MAX_PART_TOKENS and the oldest messages dropped if needed.
+    CONTEXT_TOKEN_BUDGET: int = 0
+    CONTEXT_RECENT_MESSAGES: int = 6
+    CONTEXT_MAX_PART_TOKENS: int = 2000
+
+    # Number of messages older than the CONTEXT_RECENT_MESSAGES last ones that triggers a refresh of the rolling summary
+    # of the thread. The summarized messages are then replaced by the summary in the context. 0 disables the summary.
+    CONTEXT_SUMMARY_BATCH_SIZE: int = 0
+
+    # Names of the text plugins whose completions called through the GenAI text dispatcher (GenerateText actions) are cached.
+    # Entries are keyed by the normalized messages and model parameters, persisted in the backend and expire after the TTL in seconds.
+    GENAI_RESPONSE_CACHE_PLUGINS: List[str] = []
+    GENAI_RESPONSE_CACHE_TTL: int = 86400
+    GENAI_RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+
+    # Cosine similarity above which a request with the same earlier messages and a similar last message reuses a cached
+    # completion, using the embeddings of the plugin. 0 keeps the cache to exact matches.
+    GENAI_RESPONSE_CACHE_SIMILARITY_THRESHOLD: float = 0
+
+    # Retries of the GenAI text requests failing with a retryable error (429, 5xx, timeout), on another deployment when the
+    # plugin has several, otherwise after a jittered exponential backoff (in seconds) or the Retry-After delay of the provider.
+    GENAI_MAX_RETRIES: int = 3
+    GENAI_RETRY_BASE_DELAY: float = 1.0
+    GENAI_RETRY_MAX_DELAY: float = 30.0
+
+    # If True, a request still running after the p95 latency of its deployment (at least GENAI_HEDGE_MIN_DELAY seconds)
+    # is also sent to another deployment of the plugin and the first response is used.
+    GENAI_HEDGE_REQUESTS: bool = False
+    GENAI_HEDGE_MIN_DELAY: float = 2.0
+
+    # Adaptive limit of the concurrent GenAI text requests per deployment (AIMD): it grows while the deployment keeps up,
+    # and shrinks on 429/503 responses or requests slower than GENAI_CONCURRENCY_LATENCY_THRESHOLD seconds (0 to ignore
+    # the latency). The requests over the limit wait by priority: user turns, then subprompts, then background tasks.
+    GENAI_CONCURRENCY_INITIAL_LIMIT: int = 8
+    GENAI_CONCURRENCY_MIN_LIMIT: int = 1
+    GENAI_CONCURRENCY_MAX_LIMIT: int = 32
+    GENAI_CONCURRENCY_LATENCY_THRESHOLD: float = 60.0
+
+    # A deployment failing GENAI_CIRCUIT_BREAKER_FAILURES times in a row is skipped for GENAI_CIRCUIT_BREAKER_RESET_TIMEOUT
+    # seconds, when all the deployments of a plugin are skipped the requests fail fast with a message to the user.
+    GENAI_CIRCUIT_BREAKER_FAILURES: int = 5
+    GENAI_CIRCUIT_BREAKER_RESET_TIMEOUT: float = 30.0
+
+    # Maximum number of parallel-safe actions of a response run at once, the side-effect ordered actions
+    # (UserInteraction, ObservationThought...) always run alone in the order of the response.
+    ACTION_MAX_PARALLEL: int = 4
+
+    # Images generated by the GenerateImage action, keyed by the normalized prompt, size and model: number of seconds
+    # an image is reused (0 disables the cache) and number of images kept in memory, the others are read back from the
+    # generated images container of the backend. The images are generated and uploaded in the background, at most
+    # GENAI_IMAGE_MAX_PENDING_GENERATIONS at a time, beyond that the action waits for its image.
+    GENAI_IMAGE_CACHE_TTL: int = 604800
+    GENAI_IMAGE_CACHE_MAX_MEMORY_ENTRIES: int = 16
+    GENAI_IMAGE_MAX_PENDING_GENERATIONS: int = 20
+
 class LocalLogging(BaseModel):
     PLUGIN_NAME: str
     LOCAL_LOGGING_FILE_PATH: str
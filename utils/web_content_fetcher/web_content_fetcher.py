@@ -0,0 +1,287 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+# Faster HTML parsers are used when available, BeautifulSoup remains the fallback.
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
+
+NON_CONTENT_TAGS = ('script', 'style', 'noscript', 'template', 'svg', 'head')
+
+
+@dataclass(frozen=True)
+class FetchedContent:
+    url: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    truncated: bool = False
+
+
+class WebContentFetcher:
+    """
+    Shared asynchronous web content fetcher.
+
+    Keeps one pooled aiohttp session, limits concurrent requests per host, caps the size of
+    the downloaded body and caches the extracted text. Expired entries are revalidated with
+    ETag / Last-Modified headers, and concurrent requests for the same URL share one download.
+    """
+
+    def __init__(self, global_manager):
+        from core.global_manager import GlobalManager
+        self.global_manager: GlobalManager = global_manager
+        self.logger = self.global_manager.logger
+        bot_config = self.global_manager.bot_config
+
+        self.max_connections = bot_config.WEB_CONTENT_MAX_CONNECTIONS
+        self.max_connections_per_host = bot_config.WEB_CONTENT_MAX_CONNECTIONS_PER_HOST
+        self.max_response_bytes = bot_config.WEB_CONTENT_MAX_RESPONSE_BYTES
+        self.request_timeout = bot_config.WEB_CONTENT_REQUEST_TIMEOUT
+        self.cache_ttl = bot_config.WEB_CONTENT_CACHE_TTL
+        self.cache_max_entries = bot_config.WEB_CONTENT_CACHE_MAX_ENTRIES
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._cache: "OrderedDict[str, FetchedContent]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def fetch_text(self, url: str) -> str:
+        """
+        Returns the extracted text content of the given URL.
+        """
+        content = await self.fetch(url)
+        return content.text
+
+    async def fetch(self, url: str) -> FetchedContent:
+        """
+        Returns the cached content of the URL if it is still fresh, otherwise downloads
+        (or revalidates) it. Raises aiohttp.ClientError or asyncio.TimeoutError on failure.
+        """
+        cached = self._cache.get(url)
+        if cached is not None and time.monotonic() - cached.fetched_at < self.cache_ttl:
+            self._cache.move_to_end(url)
+            self.logger.debug(f"Web content cache hit for {url}")
+            return cached
+
+        # The download runs in its own task shared by the callers of the same URL: a caller giving up (a deadline,
+        # a cancelled conversation) does not cancel it for the others, it completes and fills the cache
+        in_flight = self._in_flight.get(url)
+        if in_flight is not None:
+            self.logger.debug(f"Web content request already in flight for {url}, waiting for it")
+        else:
+            in_flight = asyncio.ensure_future(self._download_and_store(url, cached))
+            self._in_flight[url] = in_flight
+            in_flight.add_done_callback(lambda task: self._on_download_done(url, task))
+        return await asyncio.shield(in_flight)
+
+    async def fetch_many(self, urls: List[str], deadline: float) -> List[Optional[str]]:
+        """
+        Fetches the text content of the urls concurrently. When deadline seconds have passed, the texts already
+        fetched are returned and the others given up, their downloads still complete for the other callers of the
+        same URL. Returns the texts in the order of the urls, None for the urls that failed or were given up.
+        """
+        tasks = [asyncio.ensure_future(self.fetch_text(url)) for url in urls]
+        if not tasks:
+            return []
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=deadline)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        texts = []
+        for url, task in zip(urls, tasks):
+            if task in pending or task.cancelled():
+                self.logger.warning(f"Content of {url} not fetched within {deadline} seconds")
+                texts.append(None)
+            elif task.exception() is not None:
+                error = task.exception()
+                self.logger.error(f"Failed to fetch {url}: {str(error) or type(error).__name__}")
+                texts.append(None)
+            else:
+                texts.append(task.result())
+        return texts
+
+    async def _download_and_store(self, url: str, cached: Optional[FetchedContent]) -> FetchedContent:
+        content = await self._download(url, cached)
+        self._store(url, content)
+        return content
+
+    def _on_download_done(self, url: str, task: asyncio.Future):
+        if self._in_flight.get(url) is task:
+            del self._in_flight[url]
+        # Retrieve the exception so that a download no caller waits for anymore does not log a warning
+        if not task.cancelled():
+            task.exception()
+
+    async def fetch_json(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
+        """
+        Calls a JSON API through the pooled session and the host limit, the response is not cached.
+        Raises aiohttp.ClientError or asyncio.TimeoutError on failure.
+        """
+        session = self.get_session()
+        async with self._get_host_semaphore(url):
+            async with session.get(url, params=params, headers=headers) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def fetch_bytes(self, url: str, max_bytes: Optional[int] = None) -> bytes:
+        """
+        Downloads a binary file (an image for example) through the pooled session and the host limit, the response is
+        not cached. Raises ValueError when the body exceeds max_bytes (WEB_CONTENT_MAX_RESPONSE_BYTES by default),
+        aiohttp.ClientError or asyncio.TimeoutError on failure.
+        """
+        max_bytes = max_bytes or self.max_response_bytes
+        session = self.get_session()
+        async with self._get_host_semaphore(url):
+            async with session.get(url) as response:
+                response.raise_for_status()
+                body, truncated = await self._read_limited(response, max_bytes)
+        if truncated:
+            raise ValueError(f"Content of {url} exceeds {max_bytes} bytes")
+        return body
+
+    async def _download(self, url: str, cached: Optional[FetchedContent]) -> FetchedContent:
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        session = self.get_session()
+        async with self._get_host_semaphore(url):
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304 and cached is not None:
+                    self.logger.debug(f"Web content not modified for {url}, reusing cached content")
+                    return FetchedContent(
+                        url=url,
+                        text=cached.text,
+                        etag=response.headers.get('ETag', cached.etag),
+                        last_modified=response.headers.get('Last-Modified', cached.last_modified),
+                        fetched_at=time.monotonic(),
+                        truncated=cached.truncated
+                    )
+
+                response.raise_for_status()
+                body, truncated = await self._read_limited(response)
+                if truncated:
+                    self.logger.warning(f"Web content for {url} truncated to {self.max_response_bytes} bytes")
+
+                try:
+                    html = body.decode(response.charset or 'utf-8', errors='replace')
+                except LookupError:
+                    # Charset unknown to Python, utf-8 is the most likely encoding
+                    html = body.decode('utf-8', errors='replace')
+                return FetchedContent(
+                    url=url,
+                    text=self.extract_text(html),
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                    fetched_at=time.monotonic(),
+                    truncated=truncated
+                )
+
+    async def _read_limited(self, response: aiohttp.ClientResponse, max_bytes: Optional[int] = None):
+        max_bytes = max_bytes or self.max_response_bytes
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            remaining = max_bytes - size
+            if len(chunk) > remaining:
+                chunks.append(chunk[:remaining])
+                return b''.join(chunks), True
+            chunks.append(chunk)
+            size += len(chunk)
+        return b''.join(chunks), False
+
+    def _store(self, url: str, content: FetchedContent):
+        self._cache[url] = content
+        self._cache.move_to_end(url)
+        while len(self._cache) > self.cache_max_entries:
+            self._cache.popitem(last=False)
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        Returns the pooled session of the running loop, also used by the plugins calling HTTP APIs directly.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._session_loop = loop
+            self._host_semaphores = {}
+        return self._session
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_connections_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    async def close(self):
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
+    @staticmethod
+    def extract_text(html: str) -> str:
+        """
+        Extracts the visible text of an HTML document, whitespace-normalized.
+        """
+        text = None
+        if SelectolaxParser is not None:
+            tree = SelectolaxParser(html)
+            for node in tree.css(','.join(NON_CONTENT_TAGS)):
+                node.decompose()
+            root = tree.body or tree.root
+            text = root.text(separator=' ') if root is not None else ''
+        elif lxml_html is not None and html.strip():
+            try:
+                document = lxml_html.document_fromstring(html)
+                for element in list(document.iter(*NON_CONTENT_TAGS)):
+                    element.drop_tree()
+                text = document.text_content()
+            except Exception:
+                text = None
+
+        if text is None:
+            soup = BeautifulSoup(html, 'html.parser')
+            for element in soup(NON_CONTENT_TAGS):
+                element.decompose()
+            text = soup.get_text(separator=' ')
+
+        return re.sub(r'\s+', ' ', text).strip()